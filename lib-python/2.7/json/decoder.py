@@ -302,7 +302,7 @@ class JSONDecoder(object):
 
     def __init__(self, encoding=None, object_hook=None, parse_float=None,
             parse_int=None, parse_constant=None, strict=True,
-            object_pairs_hook=None):
+            object_pairs_hook=None, taint=None):
         """``encoding`` determines the encoding used to interpret any ``str``
         objects decoded by this instance (utf-8 by default).  It has no
         effect when decoding ``unicode`` objects.
@@ -344,6 +344,10 @@ class JSONDecoder(object):
         this context are those with character codes in the 0-31 range,
         including ``'\\t'`` (tab), ``'\\n'``, ``'\\r'`` and ``'\\0'``.
 
+        ``taint``, if specified, is a taint label (an int, see
+        ``__pypy__.taint``) that is attached to every string and number
+        decoded by this instance.  This requires the _json module.
+
         """
         self.encoding = encoding
         self.object_hook = object_hook
@@ -352,6 +356,7 @@ class JSONDecoder(object):
         self.parse_int = parse_int or int
         self.parse_constant = parse_constant or _CONSTANTS.__getitem__
         self.strict = strict
+        self.taint = taint
         self.parse_object = JSONObject
         self.parse_array = JSONArray
         self.parse_string = scanstring
@@ -4,6 +4,15 @@ import re
 
 from __pypy__.builders import StringBuilder, UnicodeBuilder
 
+try:
+    from _json import encode_basestring_ascii as c_encode_basestring_ascii
+except ImportError:
+    c_encode_basestring_ascii = None
+try:
+    from _json import make_encoder as c_make_encoder
+except ImportError:
+    c_make_encoder = None
+
 ESCAPE = re.compile(r'[\x00-\x1f\\"\b\f\n\r\t]')
 ESCAPE_ASCII = re.compile(r'([\\"]|[^\ -~])')
 HAS_UTF8 = re.compile(r'[\x80-\xff]')
@@ -55,7 +64,8 @@ def raw_encode_basestring_ascii(s):
     if ESCAPE_ASCII.search(s):
         return str(ESCAPE_ASCII.sub(replace, s))
     return s
-encode_basestring_ascii = lambda s: '"' + raw_encode_basestring_ascii(s) + '"'
+py_encode_basestring_ascii = lambda s: '"' + raw_encode_basestring_ascii(s) + '"'
+encode_basestring_ascii = c_encode_basestring_ascii or py_encode_basestring_ascii
 
 
 class JSONEncoder(object):
@@ -189,6 +199,8 @@ class JSONEncoder(object):
             markers = {}
         else:
             markers = None
+        if c_make_encoder is not None:
+            return self._c_encode(o, markers)
         if self.ensure_ascii:
             builder = StringBuilder()
         else:
@@ -196,6 +208,22 @@ class JSONEncoder(object):
         self._encode(o, markers, builder, 0)
         return builder.build()
 
+    def _c_encode(self, o, markers):
+        if self.ensure_ascii and self.encoding == 'utf-8':
+            _encoder = c_encode_basestring_ascii
+        else:
+            raw_encoder = self.encoder
+            def _encoder(s):
+                return '"' + raw_encoder(s) + '"'
+        _iterencode = c_make_encoder(
+            markers, self.default, _encoder, self.indent,
+            self.key_separator, self.item_separator, self.sort_keys,
+            self.skipkeys, self.allow_nan)
+        chunks = _iterencode(o, 0)
+        if self.ensure_ascii:
+            return ''.join(chunks)
+        return u''.join(chunks)
+
     def _emit_indent(self, builder, _current_indent_level):
         if self.indent is not None:
             _current_indent_level += 1
@@ -13,6 +13,9 @@ NUMBER_RE = re.compile(
     (re.VERBOSE | re.MULTILINE | re.DOTALL))
 
 def py_make_scanner(context):
+    if getattr(context, 'taint', None) is not None:
+        raise ValueError("decoding with a taint label requires the "
+                         "_json module")
     parse_object = context.parse_object
     parse_array = context.parse_array
     parse_string = context.parse_string
@@ -12,6 +12,9 @@ import marshal, struct, sys
 try: from __pypy__ import builtinify
 except ImportError: builtinify = lambda f: f
 
+try: import _pickle
+except ImportError: _pickle = None
+
 # These are purely informational; no code uses these.
 format_version = "2.0"                  # File format version we write
 compatible_formats = ["1.0",            # Original protocol 0
@@ -116,10 +119,15 @@ class Pickler(PythonPickler):
 
 @builtinify
 def dump(obj, file, protocol=None):
+    if _pickle is not None:
+        file.write(_pickle.dumps(obj, protocol))
+        return
     Pickler(file, protocol).dump(obj)
 
 @builtinify
 def dumps(obj, protocol=None):
+    if _pickle is not None:
+        return _pickle.dumps(obj, protocol)
     file = StringIO()
     Pickler(file, protocol).dump(obj)
     return file.getvalue()
@@ -592,5 +600,7 @@ def load(f):
     return Unpickler(f).load()
 
 def loads(str):
+    if _pickle is not None:
+        return _pickle.loads(str)
     f = StringIO(str)
     return Unpickler(f).load()
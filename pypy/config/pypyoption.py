@@ -31,11 +31,13 @@ working_modules.update(dict.fromkeys(
     ["_socket", "unicodedata", "mmap", "fcntl", "_locale", "pwd",
      "rctime" , "select", "zipimport", "_lsprof",
      "crypt", "signal", "_rawffi", "termios", "zlib", "bz2",
-     "struct", "_hashlib", "_md5", "_sha", "_minimal_curses", "cStringIO",
+     "struct", "_hashlib", "_md5", "_sha", "_sha256", "_sha512",
+     "_minimal_curses", "cStringIO",
      "thread", "itertools", "pyexpat", "_ssl", "cpyext", "array",
      "_bisect", "binascii", "_multiprocessing", '_warnings',
      "_collections", "_multibytecodec", "micronumpy", "_ffi",
-     "_continuation", "_cffi_backend", "_csv"]
+     "_continuation", "_cffi_backend", "_csv", "_json", "_pickle",
+     "_sqlite3", "rdatetime"]
 ))
 
 translation_modules = default_modules.copy()
@@ -75,6 +77,7 @@ if sys.platform == "sunos5":
     del working_modules["_minimal_curses"]
     del working_modules["termios"]
     del working_modules["_multiprocessing"]   # depends on rctime
+    del working_modules["rdatetime"]   # depends on rctime
 
 
 
@@ -82,6 +85,7 @@ module_dependencies = {
     '_multiprocessing': [('objspace.usemodules.rctime', True),
                          ('objspace.usemodules.thread', True)],
     'cpyext': [('objspace.usemodules.array', True)],
+    'rdatetime': [('objspace.usemodules.rctime', True)],
     }
 module_suggests = {
     # the reason you want _rawffi is for ctypes, which
@@ -101,6 +105,7 @@ module_import_dependencies = {
     "zlib"      : ["rpython.rlib.rzlib"],
     "bz2"       : ["pypy.module.bz2.interp_bz2"],
     "pyexpat"   : ["pypy.module.pyexpat.interp_pyexpat"],
+    "_sqlite3"  : ["pypy.module._sqlite3.csqlite"],
     "_ssl"      : ["pypy.module._ssl.interp_ssl"],
     "_hashlib"  : ["pypy.module._ssl.interp_ssl"],
     "_minimal_curses": ["pypy.module._minimal_curses.fficurses"],
@@ -172,6 +177,11 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                default=False,
                requires=[("objspace.usepycfiles", True)]),
 
+    BoolOption("importindex",
+               "Keep listings of the sys.path directories to find modules "
+               "with fewer stat() calls",
+               default=False),
+
     StrOption("soabi",
               "Tag to differentiate extension modules built for different Python interpreters",
               cmdline="--soabi",
@@ -27,13 +27,19 @@ class W_Root(object):
     """This is the abstract root class of all wrapped objects that live
     in a 'normal' object space like StdObjSpace."""
     __slots__ = ('taints')
+    # tells the JIT optimizer that 'taints' is taint metadata, which is
+    # None for clean objects (see rpython/jit/metainterp/optimizeopt/taint.py)
+    _jit_taint_fields_ = ['taints']
     _settled_ = True
     user_overridden_class = False
     def __new__(clz, *args, **kwargs):
         inst = super(W_Root, clz).__new__(clz, *args, **kwargs)
-        inst.taints = {} # dictionary of (taint) -> 1
+        inst.taints = None # None, or a dictionary of (taint) -> 1
         return inst
 
+    def is_tainted(self):
+        taints = self.taints
+        return taints is not None and len(taints) > 0
     def gettaint(self, space):
         if not self.taints:
             return space.newlist([])
@@ -43,18 +49,19 @@ class W_Root(object):
             return {}
         return self.taints
     def cleartaint(self, space):
-        if not self.taints:
-            return
-        self.taints.clear()
+        self.taints = None
     def addtaint(self, space, w_int):
         if not self.taints:
             self.taints = {}
         self.taints[space.int_w(w_int)] = 1
     def settaint(self, space, taints):
-        if not self.taints:
-            self.taints = {}
-        self.taints.clear()
-        self.taints.update(taints)
+        # clean objects always have None, never an empty dict
+        if not taints:
+            self.taints = None
+            return
+        new_taints = {}
+        new_taints.update(taints)
+        self.taints = new_taints
 
     def getdict(self, space):
         return None
@@ -687,6 +694,9 @@ class ObjSpace(object):
         """
         return w_obj is None or self.is_w(w_obj, self.w_None)
 
+    def is_tainted_w(self, w_obj):
+        return w_obj.is_tainted()
+
     def id(self, w_obj):
         w_result = w_obj.immutable_unique_id(self)
         if w_result is None:
@@ -935,6 +945,13 @@ class ObjSpace(object):
         """
         return None
 
+    def listview_int(self, w_list):
+        """ Return a list of unwrapped ints out of a list of ints. If the
+        argument is not a list or does not contain only ints, return None.
+        May return None anyway.
+        """
+        return None
+
     def listview_unicode(self, w_list):
         """ Return a list of unwrapped unicode out of a list of unicode. If the
         argument is not a list or does not contain only unicode, return None.
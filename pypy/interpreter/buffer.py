@@ -21,6 +21,7 @@ from pypy.interpreter.gateway import interp2app, unwrap_spec
 from pypy.interpreter.error import OperationError
 from rpython.rlib.objectmodel import compute_hash
 from rpython.rlib.rstring import StringBuilder
+from rpython.rtyper.lltypesystem import rffi
 
 
 class Buffer(Wrappable):
@@ -47,6 +48,14 @@ class Buffer(Wrappable):
     def get_raw_address(self):
         raise ValueError("no raw buffer")
 
+    def pin(self):
+        """Called before the memory at get_raw_address() is used by a call
+        that releases the GIL.  Until unpin(), it may not be resized or
+        freed by another thread."""
+
+    def unpin(self):
+        pass
+
     # __________ app-level support __________
 
     def descr_len(self, space):
@@ -291,6 +300,15 @@ class SubBufferMixin(object):
     def getitem(self, index):
         return self.buffer.getitem(self.offset + index)
 
+    def get_raw_address(self):
+        return rffi.ptradd(self.buffer.get_raw_address(), self.offset)
+
+    def pin(self):
+        self.buffer.pin()
+
+    def unpin(self):
+        self.buffer.unpin()
+
     def getslice(self, start, stop, step, size):
         if start == stop:
             return ''     # otherwise, adding self.offset might make them
@@ -18,15 +18,24 @@ from rpython.rlib.debug import check_nonneg
 from pypy.tool.stdlib_opcode import (bytecode_spec,
                                      unrolling_all_opcode_descs)
 
+@jit.unroll_safe
 def merge_taints(w_args):
-    r_val = {}
-    if len(w_args) == 0:
-        return r_val
+    """Return the union of the taints of the objects, or None if none of
+    them is tainted.  In the common case nothing is allocated, so that
+    the JIT only sees reads of the 'taints' fields."""
+    r_val = None
     for w_obj in w_args:
-        r_val.update(w_obj.gettaint_unwrapped())
+        if w_obj.is_tainted():
+            if r_val is None:
+                r_val = {}
+            r_val.update(w_obj.gettaint_unwrapped())
     return r_val
 
 def checked_settaint(w_obj, space, taints):
+    if not taints:
+        if w_obj.is_tainted():
+            w_obj.cleartaint(space)
+        return w_obj
     if w_obj == space.w_False:
         w_obj = space.newbool(False)
     elif w_obj == space.w_True:
@@ -889,30 +898,27 @@ class __extend__(pyframe.PyFrame):
 
     def POP_JUMP_IF_FALSE(self, target, next_instr):
         w_value = self.popvalue()
-        val_taints = w_value.gettaint_unwrapped()
-        if len(val_taints) > 0:
-            self.taint_space.add_taints(self.last_instr, 
-                                        val_taints)
+        if w_value.is_tainted():
+            self.taint_space.add_taints(self.last_instr,
+                                        w_value.gettaint_unwrapped())
         if not self.space.is_true(w_value):
             return target
         return next_instr
 
     def POP_JUMP_IF_TRUE(self, target, next_instr):
         w_value = self.popvalue()
-        val_taints = w_value.gettaint_unwrapped()
-        if len(val_taints) > 0:
-            self.taint_space.add_taints(self.last_instr, 
-                                        val_taints)
+        if w_value.is_tainted():
+            self.taint_space.add_taints(self.last_instr,
+                                        w_value.gettaint_unwrapped())
         if self.space.is_true(w_value):
             return target
         return next_instr
 
     def JUMP_IF_FALSE_OR_POP(self, target, next_instr):
         w_value = self.peekvalue()
-        val_taints = w_value.gettaint_unwrapped()
-        if len(val_taints) > 0:
-            self.taint_space.add_taints(self.last_instr, 
-                                        val_taints)
+        if w_value.is_tainted():
+            self.taint_space.add_taints(self.last_instr,
+                                        w_value.gettaint_unwrapped())
         if not self.space.is_true(w_value):
             return target
         self.popvalue()
@@ -920,10 +926,9 @@ class __extend__(pyframe.PyFrame):
 
     def JUMP_IF_TRUE_OR_POP(self, target, next_instr):
         w_value = self.peekvalue()
-        val_taints = w_value.gettaint_unwrapped()
-        if len(val_taints) > 0:
-            self.taint_space.add_taints(self.last_instr, 
-                                        val_taints)
+        if w_value.is_tainted():
+            self.taint_space.add_taints(self.last_instr,
+                                        w_value.gettaint_unwrapped())
         if self.space.is_true(w_value):
             return target
         self.popvalue()
@@ -1140,10 +1145,9 @@ class __extend__(pyframe.CPythonFrame):
 
     def JUMP_IF_FALSE(self, stepby, next_instr):
         w_cond = self.peekvalue()
-        val_taints = w_cond.gettaint_unwrapped()
-        if len(val_taints) > 0:
-            self.taint_space.add_taints(self.last_instr, 
-                                        val_taints)
+        if w_cond.is_tainted():
+            self.taint_space.add_taints(self.last_instr,
+                                        w_cond.gettaint_unwrapped())
 
         if not self.space.is_true(w_cond):
             next_instr += stepby
@@ -1151,10 +1155,9 @@ class __extend__(pyframe.CPythonFrame):
 
     def JUMP_IF_TRUE(self, stepby, next_instr):
         w_cond = self.peekvalue()
-        val_taints = w_cond.gettaint_unwrapped()
-        if len(val_taints) > 0:
-            self.taint_space.add_taints(self.last_instr, 
-                                        val_taints)
+        if w_cond.is_tainted():
+            self.taint_space.add_taints(self.last_instr,
+                                        w_cond.gettaint_unwrapped())
 
         if self.space.is_true(w_cond):
             next_instr += stepby
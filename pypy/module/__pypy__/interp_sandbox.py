@@ -0,0 +1,50 @@
+import os
+
+from pypy.interpreter.error import OperationError, wrap_oserror
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.objspace.std.strutil import (string_to_int, ParseStringError,
+    ParseStringOverflowError)
+
+
+def _parse_job(space, data):
+    i = data.find('\n')
+    j = -1
+    if i >= 0:
+        j = data.find('\n', i + 1)
+    if j < 0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("bad job header"))
+    try:
+        length = string_to_int(data[i + 1:j])
+    except (ParseStringError, ParseStringOverflowError):
+        raise OperationError(space.w_ValueError,
+                             space.wrap("bad job length"))
+    return data[:i], length, data[j + 1:]
+
+@unwrap_spec(job_fd=int, ready=str)
+def serve_jobs(space, job_fd, ready, w_run):
+    """Run the jobs sent by pypy/sandbox/pypy_pool.py.  Writes 'ready' to
+    'job_fd' to say that the interpreter is idle, reads from it a token,
+    a newline, a decimal length, a newline and that many bytes of source
+    code, and calls run(source).  When it returns, writes 'ready' followed
+    by the token, and so on until 'job_fd' is at end of file.
+
+    The token is only kept here, out of reach of app-level code, so a job
+    cannot say that it is finished while it keeps running."""
+    token = ''
+    while True:
+        try:
+            os.write(job_fd, ready + token)
+            data = os.read(job_fd, 65536)
+            if not data:
+                return
+            token, length, source = _parse_job(space, data)
+            while len(source) < length:
+                data = os.read(job_fd, length - len(source))
+                if not data:
+                    raise OperationError(space.w_EOFError,
+                                         space.wrap("truncated job"))
+                source += data
+        except OSError, e:
+            raise wrap_oserror(space, e)
+        space.call_function(w_run, space.wrap(source))
@@ -0,0 +1,52 @@
+import socket
+
+from pypy.interpreter.gateway import interp2app
+
+
+class AppTestServeJobs:
+    spaceconfig = dict(usemodules=['__pypy__'])
+
+    def setup_class(cls):
+        cls.w_received = cls.space.wrap(interp2app(cls.received))
+
+    def setup_method(self, meth):
+        cls = self.__class__
+        cls.pool_end, cls.interp_end = socket.socketpair()
+        # the pool sends the next job only after the READY of this one
+        source = 'x' * 70000
+        cls.pool_end.sendall('tok1\n%d\n%s' % (len(source), source))
+        cls.pool_end.shutdown(socket.SHUT_WR)
+        self.w_job_fd = self.space.wrap(cls.interp_end.fileno())
+
+    def teardown_method(self, meth):
+        self.pool_end.close()
+        self.interp_end.close()
+
+    @staticmethod
+    def received(space):
+        pool_end = AppTestServeJobs.pool_end
+        pool_end.settimeout(1.0)
+        result = []
+        while True:
+            try:
+                data = pool_end.recv(100)
+            except socket.timeout:
+                break
+            if not data:
+                break
+            result.append(data)
+        return space.wrap(''.join(result))
+
+    def test_serve_jobs(self):
+        from __pypy__ import sandbox_serve_jobs
+        seen = []
+        sandbox_serve_jobs(self.job_fd, 'ready', seen.append)
+        assert seen == ['x' * 70000]
+        assert self.received() == 'readyreadytok1'
+
+    def test_run_raises(self):
+        from __pypy__ import sandbox_serve_jobs
+        def run(source):
+            raise KeyError(source)
+        raises(KeyError, sandbox_serve_jobs, self.job_fd, 'ready', run)
+        assert self.received() == 'ready'
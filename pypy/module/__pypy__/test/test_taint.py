@@ -0,0 +1,40 @@
+
+class AppTestTaint(object):
+    spaceconfig = dict(usemodules=['__pypy__'])
+
+    def test_binop(self):
+        from __pypy__.taint import add_taint, get_taint
+        a = len('abc')
+        b = len('de')
+        assert get_taint(a) == []
+        add_taint(a, 1)
+        add_taint(b, 2)
+        assert get_taint(a + 1) == [1]
+        assert sorted(get_taint(a * b)) == [1, 2]
+        assert get_taint(-a) == [1]
+        assert get_taint(b - 1) == [2]
+
+    def test_clean_result(self):
+        from __pypy__.taint import get_taint
+        a = len('abc')
+        assert get_taint(a + 1) == []
+        assert get_taint(a == 3) == []
+        assert get_taint(a < 2) == []
+
+    def test_compare(self):
+        from __pypy__.taint import add_taint, get_taint
+        a = len('abc')
+        add_taint(a, 5)
+        res = a == 3
+        assert res
+        assert get_taint(res) == [5]
+        # the prebuilt True is not tainted
+        assert get_taint(True) == []
+
+    def test_clear(self):
+        from __pypy__.taint import add_taint, get_taint, clear_taint
+        a = len('abc')
+        add_taint(a, 1)
+        clear_taint(a)
+        assert get_taint(a) == []
+        assert get_taint(a + 1) == []
@@ -81,6 +81,7 @@ SETTINGS:
         'Dialect': 'interp_csv.W_Dialect',
 
         'reader': 'interp_reader.csv_reader',
+        'chunked_reader': 'interp_reader.csv_chunked_reader',
         'field_size_limit': 'interp_reader.csv_field_size_limit',
 
         'writer': 'interp_writer.csv_writer',
@@ -0,0 +1,64 @@
+""" Measure the rows/s of _csv.reader() over the lines of a file against
+_csv.chunked_reader(), which parses the buffered file directly, with and
+without taint labelling.  The CSV file is generated first; pass a size
+of a few thousand MB to run on multi-GB input.
+
+Usage:
+    pypy csv_rows.py [size_in_MB [repeat]]
+"""
+
+import sys, os, tempfile, _csv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, os.pardir, os.pardir))
+from pypy.tool.bench.timing import best_time
+
+def generate(path, size):
+    line = '12345,"some, quoted text",3.25,plain field,\n'
+    block = line * (65536 // len(line))
+    f = open(path, 'wb')
+    try:
+        written = 0
+        while written < size:
+            f.write(block)
+            written += len(block)
+    finally:
+        f.close()
+    return (written // len(block)) * block.count('\n')
+
+def rate(func, rows, repeat):
+    return rows / best_time(func, repeat)
+
+def count(reader):
+    n = 0
+    for row in reader:
+        n += 1
+    return n
+
+def main(size, repeat):
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    rows = generate(path, size * 1024 * 1024)
+    def lines():
+        f = open(path, 'rb')
+        try:
+            assert count(_csv.reader(f)) == rows
+        finally:
+            f.close()
+    def chunked(**kwargs):
+        def func():
+            f = open(path, 'rb')
+            try:
+                assert count(_csv.chunked_reader(f, **kwargs)) == rows
+            finally:
+                f.close()
+        return func
+    print '%d rows, %d MB' % (rows, size)
+    for name, func in [('reader', lines), ('chunked', chunked()),
+                       ('tainted', chunked(taint=1))]:
+        print '%10s %14.0f rows/s' % (name, rate(func, rows, repeat))
+    os.unlink(path)
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [100, 3][len(args):]))
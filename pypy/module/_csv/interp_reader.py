@@ -2,6 +2,7 @@ from rpython.rlib.rstring import StringBuilder
 from pypy.interpreter.baseobjspace import Wrappable
 from pypy.interpreter.error import OperationError
 from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.pyopcode import checked_settaint
 from pypy.interpreter.typedef import TypeDef, interp2app
 from pypy.interpreter.typedef import interp_attrproperty_w, interp_attrproperty
 from pypy.module._csv.interp_csv import _build_dialect
@@ -15,11 +16,29 @@ from pypy.module._csv.interp_csv import (QUOTE_MINIMAL, QUOTE_ALL,
 
 class W_Reader(Wrappable):
 
-    def __init__(self, space, dialect, w_iter):
+    def __init__(self, space, dialect, w_iter, w_file=None, chunksize=0,
+                 taints=None):
         self.space = space
         self.dialect = dialect
         self.w_iter = w_iter
         self.line_num = 0
+        # in chunked mode, the input is read with w_file.read(chunksize)
+        # and parsed straight from 'chunk', splitting lines at '\n' like
+        # iterating over the file would
+        self.w_file = w_file
+        self.chunksize = chunksize
+        self.chunk = ''
+        self.pos = 0
+        self.at_line_start = True
+        self.skip_line = False
+        # if not None, every field gets this taint
+        self.taints = taints
+        self.state = START_RECORD
+        self.field_builder = None  # valid iff state not in [START_RECORD,
+                                   #                         EAT_CRNL]
+        self.fields = None
+        self.fields_w = None
+        self.numeric_field = False
 
     def iter_w(self):
         return self.space.wrap(self)
@@ -50,167 +69,268 @@ class W_Reader(Wrappable):
                 raise OperationError(self.space.w_ValueError,
                                      self.space.wrap(e.msg))
             w_obj = self.space.wrap(ff)
+        elif self.fields_w is None:
+            # a row of plain strings: keep them unwrapped
+            self.fields.append(field)
+            return
         else:
             w_obj = self.space.wrap(field)
+        if self.taints is not None:
+            w_obj = checked_settaint(w_obj, self.space, self.taints)
         self.fields_w.append(w_obj)
 
-    def next_w(self):
+    def start_row(self):
+        self.state = START_RECORD
+        self.field_builder = None
+        self.numeric_field = False
+        if (self.taints is not None or
+                self.dialect.quoting == QUOTE_NONNUMERIC):
+            self.fields_w = []
+        else:
+            self.fields = []
+
+    def finish_row(self):
         space = self.space
+        if self.fields_w is None:
+            w_result = space.newlist_str(self.fields)
+        else:
+            w_result = space.newlist(self.fields_w)
+        self.fields = None
+        self.fields_w = None
+        return w_result
+
+    def parse_chars(self, line, start, end):
+        "Run the state machine over line[start:end]."
         dialect = self.dialect
-        self.fields_w = []
-        self.numeric_field = False
-        field_builder = None  # valid iff state not in [START_RECORD, EAT_CRNL]
-        state = START_RECORD
-        #
-        while True:
-            try:
-                w_line = space.next(self.w_iter)
-            except OperationError, e:
-                if e.match(space, space.w_StopIteration):
-                    if (field_builder is not None and
-                            state != START_RECORD and state != EAT_CRNL and
-                            (len(field_builder.build()) > 0 or
-                             state == IN_QUOTED_FIELD)):
-                        if dialect.strict:
-                            raise self.error("newline inside string")
-                        else:
-                            self.save_field(field_builder)
-                            break
-                raise
-            self.line_num += 1
-            line = space.str_w(w_line)
-            for c in line:
-                if c == '\0':
-                    raise self.error("line contains NULL byte")
-
-                if state == START_RECORD:
-                    if c == '\n' or c == '\r':
-                        state = EAT_CRNL
-                        continue
-                    # normal character - handle as START_FIELD
-                    state = START_FIELD
-                    # fall-through to the next case
-
-                if state == START_FIELD:
-                    field_builder = StringBuilder(64)
-                    # expecting field
-                    if c == '\n' or c == '\r':
-                        # save empty field
-                        self.save_field(field_builder)
-                        state = EAT_CRNL
-                    elif (c == dialect.quotechar and
-                              dialect.quoting != QUOTE_NONE):
-                        # start quoted field
-                        state = IN_QUOTED_FIELD
-                    elif c == dialect.escapechar:
-                        # possible escaped character
-                        state = ESCAPED_CHAR
-                    elif c == ' ' and dialect.skipinitialspace:
-                        # ignore space at start of field
-                        pass
-                    elif c == dialect.delimiter:
-                        # save empty field
-                        self.save_field(field_builder)
-                    else:
-                        # begin new unquoted field
-                        if dialect.quoting == QUOTE_NONNUMERIC:
-                            self.numeric_field = True
-                        self.add_char(field_builder, c)
-                        state = IN_FIELD
+        state = self.state
+        field_builder = self.field_builder
+        for i in range(start, end):
+            c = line[i]
+            if c == '\0':
+                raise self.error("line contains NULL byte")
+
+            if state == START_RECORD:
+                if c == '\n' or c == '\r':
+                    state = EAT_CRNL
+                    continue
+                # normal character - handle as START_FIELD
+                state = START_FIELD
+                # fall-through to the next case
 
-                elif state == ESCAPED_CHAR:
+            if state == START_FIELD:
+                field_builder = StringBuilder(64)
+                # expecting field
+                if c == '\n' or c == '\r':
+                    # save empty field
+                    self.save_field(field_builder)
+                    state = EAT_CRNL
+                elif (c == dialect.quotechar and
+                          dialect.quoting != QUOTE_NONE):
+                    # start quoted field
+                    state = IN_QUOTED_FIELD
+                elif c == dialect.escapechar:
+                    # possible escaped character
+                    state = ESCAPED_CHAR
+                elif c == ' ' and dialect.skipinitialspace:
+                    # ignore space at start of field
+                    pass
+                elif c == dialect.delimiter:
+                    # save empty field
+                    self.save_field(field_builder)
+                else:
+                    # begin new unquoted field
+                    if dialect.quoting == QUOTE_NONNUMERIC:
+                        self.numeric_field = True
                     self.add_char(field_builder, c)
                     state = IN_FIELD
 
-                elif state == IN_FIELD:
-                    # in unquoted field
-                    if c == '\n' or c == '\r':
-                        # end of line
-                        self.save_field(field_builder)
-                        state = EAT_CRNL
-                    elif c == dialect.escapechar:
-                        # possible escaped character
-                        state = ESCAPED_CHAR
-                    elif c == dialect.delimiter:
-                        # save field - wait for new field
-                        self.save_field(field_builder)
-                        state = START_FIELD
-                    else:
-                        # normal character - save in field
-                        self.add_char(field_builder, c)
-
-                elif state == IN_QUOTED_FIELD:
-                    # in quoted field
-                    if c == dialect.escapechar:
-                        # Possible escape character
-                        state = ESCAPE_IN_QUOTED_FIELD
-                    elif (c == dialect.quotechar and
-                              dialect.quoting != QUOTE_NONE):
-                        if dialect.doublequote:
-                            # doublequote; " represented by ""
-                            state = QUOTE_IN_QUOTED_FIELD
-                        else:
-                            # end of quote part of field
-                            state = IN_FIELD
-                    else:
-                        # normal character - save in field
-                        self.add_char(field_builder, c)
+            elif state == ESCAPED_CHAR:
+                self.add_char(field_builder, c)
+                state = IN_FIELD
 
-                elif state == ESCAPE_IN_QUOTED_FIELD:
+            elif state == IN_FIELD:
+                # in unquoted field
+                if c == '\n' or c == '\r':
+                    # end of line
+                    self.save_field(field_builder)
+                    state = EAT_CRNL
+                elif c == dialect.escapechar:
+                    # possible escaped character
+                    state = ESCAPED_CHAR
+                elif c == dialect.delimiter:
+                    # save field - wait for new field
+                    self.save_field(field_builder)
+                    state = START_FIELD
+                else:
+                    # normal character - save in field
                     self.add_char(field_builder, c)
-                    state = IN_QUOTED_FIELD
 
-                elif state == QUOTE_IN_QUOTED_FIELD:
-                    # doublequote - seen a quote in an quoted field
-                    if (dialect.quoting != QUOTE_NONE and
-                            c == dialect.quotechar):
-                        # save "" as "
-                        self.add_char(field_builder, c)
-                        state = IN_QUOTED_FIELD
-                    elif c == dialect.delimiter:
-                        # save field - wait for new field
-                        self.save_field(field_builder)
-                        state = START_FIELD
-                    elif c == '\n' or c == '\r':
-                        # end of line
-                        self.save_field(field_builder)
-                        state = EAT_CRNL
-                    elif not dialect.strict:
-                        self.add_char(field_builder, c)
-                        state = IN_FIELD
+            elif state == IN_QUOTED_FIELD:
+                # in quoted field
+                if c == dialect.escapechar:
+                    # Possible escape character
+                    state = ESCAPE_IN_QUOTED_FIELD
+                elif (c == dialect.quotechar and
+                          dialect.quoting != QUOTE_NONE):
+                    if dialect.doublequote:
+                        # doublequote; " represented by ""
+                        state = QUOTE_IN_QUOTED_FIELD
                     else:
-                        # illegal
-                        raise self.error("'%s' expected after '%s'" % (
-                            dialect.delimiter, dialect.quotechar))
-
-                elif state == EAT_CRNL:
-                    if not (c == '\n' or c == '\r'):
-                        raise self.error("new-line character seen in unquoted "
-                                        "field - do you need to open the file "
-                                        "in universal-newline mode?")
+                        # end of quote part of field
+                        state = IN_FIELD
+                else:
+                    # normal character - save in field
+                    self.add_char(field_builder, c)
 
-            if state == IN_FIELD or state == QUOTE_IN_QUOTED_FIELD:
-                self.save_field(field_builder)
-                break
-            elif state == ESCAPED_CHAR:
-                self.add_char(field_builder, '\n')
-                state = IN_FIELD
-            elif state == IN_QUOTED_FIELD:
-                pass
             elif state == ESCAPE_IN_QUOTED_FIELD:
-                self.add_char(field_builder, '\n')
+                self.add_char(field_builder, c)
                 state = IN_QUOTED_FIELD
-            elif state == START_FIELD:
-                # save empty field
-                field_builder = StringBuilder(1)
+
+            elif state == QUOTE_IN_QUOTED_FIELD:
+                # doublequote - seen a quote in an quoted field
+                if (dialect.quoting != QUOTE_NONE and
+                        c == dialect.quotechar):
+                    # save "" as "
+                    self.add_char(field_builder, c)
+                    state = IN_QUOTED_FIELD
+                elif c == dialect.delimiter:
+                    # save field - wait for new field
+                    self.save_field(field_builder)
+                    state = START_FIELD
+                elif c == '\n' or c == '\r':
+                    # end of line
+                    self.save_field(field_builder)
+                    state = EAT_CRNL
+                elif not dialect.strict:
+                    self.add_char(field_builder, c)
+                    state = IN_FIELD
+                else:
+                    # illegal
+                    raise self.error("'%s' expected after '%s'" % (
+                        dialect.delimiter, dialect.quotechar))
+
+            elif state == EAT_CRNL:
+                if not (c == '\n' or c == '\r'):
+                    raise self.error("new-line character seen in unquoted "
+                                    "field - do you need to open the file "
+                                    "in universal-newline mode?")
+        self.state = state
+        self.field_builder = field_builder
+
+    def end_of_line(self):
+        "Called at the end of each line.  Return True if the row is complete."
+        state = self.state
+        if state == IN_FIELD or state == QUOTE_IN_QUOTED_FIELD:
+            self.save_field(self.field_builder)
+            return True
+        elif state == ESCAPED_CHAR:
+            self.add_char(self.field_builder, '\n')
+            self.state = IN_FIELD
+            return False
+        elif state == IN_QUOTED_FIELD:
+            return False
+        elif state == ESCAPE_IN_QUOTED_FIELD:
+            self.add_char(self.field_builder, '\n')
+            self.state = IN_QUOTED_FIELD
+            return False
+        elif state == START_FIELD:
+            # save empty field
+            self.save_field(StringBuilder(1))
+            return True
+        else:
+            return True
+
+    def end_of_input(self):
+        """Called when the input is exhausted in the middle of a row.
+        Return True if the last field still makes a row."""
+        state = self.state
+        field_builder = self.field_builder
+        if (field_builder is not None and
+                state != START_RECORD and state != EAT_CRNL and
+                (field_builder.getlength() > 0 or
+                 state == IN_QUOTED_FIELD)):
+            if self.dialect.strict:
+                raise self.error("newline inside string")
+            else:
                 self.save_field(field_builder)
+                return True
+        return False
+
+    def next_w(self):
+        if self.w_file is not None:
+            return self.next_chunked()
+        space = self.space
+        self.start_row()
+        while True:
+            try:
+                w_line = space.next(self.w_iter)
+            except OperationError, e:
+                if e.match(space, space.w_StopIteration):
+                    if self.end_of_input():
+                        break
+                raise
+            self.line_num += 1
+            line = space.str_w(w_line)
+            self.parse_chars(line, 0, len(line))
+            if self.end_of_line():
                 break
-            else:
+        return self.finish_row()
+
+    def next_chunked(self):
+        space = self.space
+        self.start_row()
+        while True:
+            chunk = self.chunk
+            pos = self.pos
+            if pos == len(chunk):
+                w_data = space.call_method(self.w_file, 'read',
+                                           space.wrap(self.chunksize))
+                chunk = space.str_w(w_data)
+                self.chunk = chunk
+                self.pos = 0
+                if not chunk:
+                    # the last line had no '\n'
+                    if not self.at_line_start:
+                        self.at_line_start = True
+                        if self.end_of_line():
+                            break
+                    if self.end_of_input():
+                        break
+                    self.fields = None
+                    self.fields_w = None
+                    raise OperationError(space.w_StopIteration, space.w_None)
+                continue
+            end = chunk.find('\n', pos)
+            if self.skip_line:
+                # the rest of a line on which parsing failed
+                if end < 0:
+                    self.pos = len(chunk)
+                else:
+                    self.pos = end + 1
+                    self.skip_line = False
+                continue
+            if self.at_line_start:
+                self.line_num += 1
+                self.at_line_start = False
+            if end < 0:
+                # the line continues in the next chunk
+                self.pos = len(chunk)
+                try:
+                    self.parse_chars(chunk, pos, len(chunk))
+                except OperationError:
+                    # like the plain reader, go on with the next line
+                    self.skip_line = True
+                    self.at_line_start = True
+                    raise
+                continue
+            # move past the line first, so that an error in it is not
+            # raised again by the next call
+            self.pos = end + 1
+            self.at_line_start = True
+            self.parse_chars(chunk, pos, end + 1)
+            if self.end_of_line():
                 break
-        #
-        w_result = space.newlist(self.fields_w)
-        self.fields_w = None
-        return w_result
+        return self.finish_row()
 
 
 def csv_reader(space, w_iterator, w_dialect=None,
@@ -243,6 +363,41 @@ def csv_reader(space, w_iterator, w_dialect=None,
                              w_quoting, w_skipinitialspace, w_strict)
     return W_Reader(space, dialect, w_iter)
 
+@unwrap_spec(chunksize=int)
+def csv_chunked_reader(space, w_file, w_dialect=None,
+                  w_delimiter        = None,
+                  w_doublequote      = None,
+                  w_escapechar       = None,
+                  w_lineterminator   = None,
+                  w_quotechar        = None,
+                  w_quoting          = None,
+                  w_skipinitialspace = None,
+                  w_strict           = None,
+                  chunksize          = 65536,
+                  w_taint            = None,
+                  ):
+    """
+    csv_reader = chunked_reader(fileobj [, dialect='excel']
+                                [, chunksize=65536] [, taint=None]
+                                [optional keyword args])
+
+    Like reader(fileobj), but the file is read with fileobj.read(chunksize)
+    and the rows are parsed directly from these chunks instead of going
+    through the file's line iterator.  The rows and line_num are the same
+    as with reader().  If 'taint' is not None, every field of every row
+    gets that taint label."""
+    if chunksize <= 0:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "chunksize must be positive"))
+    dialect = _build_dialect(space, w_dialect, w_delimiter, w_doublequote,
+                             w_escapechar, w_lineterminator, w_quotechar,
+                             w_quoting, w_skipinitialspace, w_strict)
+    if w_taint is None or space.is_w(w_taint, space.w_None):
+        taints = None
+    else:
+        taints = {space.int_w(w_taint): 1}
+    return W_Reader(space, dialect, None, w_file, chunksize, taints)
+
 W_Reader.typedef = TypeDef(
         'reader',
         __module__ = '_csv',
@@ -104,3 +104,133 @@ class AppTestReader(object):
         self._read_test(['a,"'], 'Error', strict=True)
         self._read_test(['"a'], 'Error', strict=True)
         self._read_test(['^'], 'Error', escapechar='^', strict=True)
+
+
+class AppTestChunkedReader(object):
+    spaceconfig = {'usemodules': ['_csv', '__pypy__'],
+                   'objspace.std.withliststrategies': True}
+
+    def setup_class(cls):
+        w_compare = cls.space.appexec([], r"""():
+            import _csv
+            class File(object):
+                def __init__(self, data):
+                    self.data = data
+                    self.pos = 0
+                def read(self, size):
+                    result = self.data[self.pos:self.pos + size]
+                    self.pos += len(result)
+                    return result
+            def rows(reader):
+                result = []
+                while True:
+                    try:
+                        result.append(reader.next())
+                    except StopIteration:
+                        return result, reader.line_num
+                    except (_csv.Error, ValueError), e:
+                        return type(e), reader.line_num
+            def compare(data, **kwargs):
+                # split like file iteration does: at '\n' only
+                lines = [line + '\n' for line in data.split('\n')]
+                lines[-1] = lines[-1][:-1]
+                if not lines[-1]:
+                    del lines[-1]
+                expected = rows(_csv.reader(lines, **kwargs))
+                for chunksize in [1, 2, 3, 7, 65536]:
+                    reader = _csv.chunked_reader(File(data),
+                                                 chunksize=chunksize,
+                                                 **kwargs)
+                    result = rows(reader)
+                    assert result == expected, (data, chunksize, result,
+                                                expected)
+                return expected[0]
+            return compare
+        """)
+        if type(w_compare) is type(lambda:0):
+            w_compare = staticmethod(w_compare)
+        cls.w_compare = w_compare
+        from rpython.tool.udir import udir
+        path = udir.join('chunked.csv')
+        path.write('x,y\n1,"2\n3"\n')
+        cls.w_path = cls.space.wrap(str(path))
+
+    def test_same_as_reader(self):
+        import _csv
+        assert self.compare('a,b\nc,d\n') == [['a', 'b'], ['c', 'd']]
+        assert self.compare('a,b\r\n\r\n"c\nd",e\n') == [
+            ['a', 'b'], [], ['c\nd', 'e']]
+        assert self.compare('1,"2,3"\n4,"5""6"') == [['1', '2,3'],
+                                                    ['4', '5"6']]
+        assert self.compare('a,\\\nb\n', escapechar='\\') == [['a', '\n'],
+                                                             ['b']]
+        assert self.compare('a,"b') == [['a', 'b']]
+        assert self.compare('a,"b', strict=True) is _csv.Error
+        assert self.compare('a,b\rc\n') is _csv.Error
+        assert self.compare('a\0b\n') is _csv.Error
+        assert self.compare('1,"x",2.5\n', quoting=_csv.QUOTE_NONNUMERIC) == [
+            [1.0, 'x', 2.5]]
+        assert self.compare('a;b\n', delimiter=';') == [['a', 'b']]
+        assert self.compare('') == []
+
+    def test_recover_after_error(self):
+        import _csv
+        class File(object):
+            def __init__(self, data):
+                self.data = data
+            def read(self, size):
+                result = self.data[:size]
+                self.data = self.data[size:]
+                return result
+        def rows(reader):
+            result = []
+            for i in range(20):
+                try:
+                    result.append(reader.next())
+                except StopIteration:
+                    return result
+                except _csv.Error:
+                    result.append((_csv.Error, reader.line_num))
+            raise AssertionError("the reader does not stop: %r" % (result,))
+        for data in ['a,b\nc\x00d,e\nf,g\n', 'a,"b\nc\x00d"\nf,g\n',
+                     'a,b\rc\nf,g', 'a,b\nc,d\x00']:
+            lines = [line + '\n' for line in data.split('\n')]
+            lines[-1] = lines[-1][:-1]
+            if not lines[-1]:
+                del lines[-1]
+            expected = rows(_csv.reader(lines))
+            for chunksize in [1, 2, 3, 7, 65536]:
+                result = rows(_csv.chunked_reader(File(data),
+                                                  chunksize=chunksize))
+                assert result == expected, (data, chunksize, result,
+                                            expected)
+        assert expected == [['a', 'b'], (_csv.Error, 2)]
+
+    def test_line_num(self):
+        import _csv
+        reader = _csv.chunked_reader(open(self.path, 'rb'),
+                                     chunksize=4)
+        assert reader.next() == ['x', 'y']
+        assert reader.line_num == 1
+        assert reader.next() == ['1', '2\n3']
+        assert reader.line_num == 3
+        raises(StopIteration, reader.next)
+        raises(ValueError, _csv.chunked_reader, None, chunksize=0)
+
+    def test_unboxed_rows(self):
+        import _csv
+        from __pypy__ import list_strategy
+        reader = _csv.chunked_reader(open(self.path, 'rb'))
+        row = reader.next()
+        assert list_strategy(row) == 'str'
+
+    def test_taint(self):
+        import _csv
+        from __pypy__.taint import get_taint
+        reader = _csv.chunked_reader(open(self.path, 'rb'), taint=3)
+        row = reader.next()
+        assert row == ['x', 'y']
+        assert get_taint(row[0]) == [3]
+        assert get_taint(row[1]) == [3]
+        reader = _csv.chunked_reader(open(self.path, 'rb'))
+        assert get_taint(reader.next()[0]) == []
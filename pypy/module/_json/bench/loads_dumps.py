@@ -0,0 +1,63 @@
+""" Measure the speed of json.loads() and json.dumps() with and without the
+_json module, in MB/s of JSON text, on payloads of about 1KB (a single API
+request), 50KB (a page of results) and 2MB (an export of records).  The
+last column is json.loads() with a taint label, which needs _json.
+
+Usage:
+    pypy loads_dumps.py [repeat]
+"""
+
+import sys, os
+from test.test_support import import_fresh_module
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, os.pardir, os.pardir))
+from pypy.tool.bench.timing import best_time
+
+fast_json = import_fresh_module('json', fresh=['_json'])
+slow_json = import_fresh_module('json', blocked=['_json'])
+
+def make_record(i):
+    return {
+        'id': i,
+        'name': u'user %d' % i,
+        'email': 'user%d@example.com' % i,
+        'active': i % 3 != 0,
+        'score': i * 0.25,
+        'tags': ['alpha', 'beta', u'gamma \xe9'][:i % 4],
+        'address': {'street': '%d Main Street' % i, 'city': 'Springfield',
+                    'zip': '%05d' % i},
+        'last_login': None,
+    }
+
+def make_payload(size):
+    record_size = len(slow_json.dumps(make_record(1000)))
+    records = [make_record(i) for i in range(max(1, size // record_size))]
+    return records, slow_json.dumps(records)
+
+def mbps(size, func, repeat):
+    return size / best_time(func, repeat) / 1e6
+
+def main(repeat):
+    print '%10s %12s %12s %12s %12s %12s' % (
+        'size', 'loads', 'loads _json', 'dumps', 'dumps _json',
+        'tainted')
+    for size in [1000, 50000, 2000000]:
+        records, text = make_payload(size)
+        n = max(1, 200000 // len(text))
+        def loop(func, *args, **kwds):
+            return lambda: [func(*args, **kwds) for i in range(n)]
+        size = len(text) * n
+        print '%10d %12.1f %12.1f %12.1f %12.1f %12.1f' % (
+            len(text),
+            mbps(size, loop(slow_json.loads, text), repeat),
+            mbps(size, loop(fast_json.loads, text), repeat),
+            mbps(size, loop(slow_json.dumps, records), repeat),
+            mbps(size, loop(fast_json.dumps, records), repeat),
+            mbps(size, loop(fast_json.loads, text, taint=1), repeat))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(5)
@@ -0,0 +1,477 @@
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rfloat import rstring_to_float
+from rpython.rlib.rstring import StringBuilder, UnicodeBuilder
+from rpython.rlib.runicode import MAXUNICODE, UNICHR
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.pyopcode import checked_settaint
+from pypy.interpreter.typedef import TypeDef
+from pypy.objspace.std.strutil import string_to_int, ParseStringOverflowError
+
+
+@specialize.argtype(1)
+def json_error(space, s, msg, pos):
+    """ The ValueError of json.decoder.errmsg(msg, s, pos). """
+    lineno = 1
+    last_newline = -1
+    for i in range(min(pos, len(s))):
+        if s[i] == '\n':
+            lineno += 1
+            last_newline = i
+    if lineno == 1:
+        colno = pos
+    else:
+        colno = pos - last_newline
+    return OperationError(space.w_ValueError, space.wrap(
+        '%s: line %d column %d (char %d)' % (msg, lineno, colno, pos)))
+json_error._dont_inline_ = True
+
+def _repr_char(c):
+    if c == ord('\t'):
+        return "'\\t'"
+    elif c == ord('\n'):
+        return "'\\n'"
+    elif c == ord('\r'):
+        return "'\\r'"
+    elif 0x20 <= c < 0x7f and c != ord("'") and c != ord('\\'):
+        return "'%s'" % (chr(c),)
+    else:
+        return "'\\x%s'" % (_hex(c, 2),)
+
+def _hex(c, digits):
+    builder = StringBuilder(digits)
+    for i in range(digits - 1, -1, -1):
+        builder.append("0123456789abcdef"[(c >> (4 * i)) & 0xf])
+    return builder.build()
+
+@specialize.argtype(0)
+def _isdigit(c):
+    return '0' <= c <= '9'
+
+@specialize.argtype(0)
+def _startswith(s, pos, word):
+    if pos + len(word) > len(s):
+        return False
+    for i in range(len(word)):
+        if s[pos + i] != word[i]:
+            return False
+    return True
+
+@specialize.argtype(0)
+def _skip_whitespace(s, pos):
+    length = len(s)
+    while pos < length:
+        c = s[pos]
+        if c != ' ' and c != '\t' and c != '\n' and c != '\r':
+            break
+        pos += 1
+    return pos
+
+@specialize.argtype(0)
+def _decode_hex4(s, pos):
+    """ The value of the 4 hex digits at 'pos', or -1. """
+    if pos + 4 > len(s):
+        return -1
+    result = 0
+    for i in range(pos, pos + 4):
+        c = ord(s[i])
+        if ord('0') <= c <= ord('9'):
+            digit = c - ord('0')
+        elif ord('a') <= c <= ord('f'):
+            digit = c - (ord('a') - 10)
+        elif ord('A') <= c <= ord('F'):
+            digit = c - (ord('A') - 10)
+        else:
+            return -1
+        result = (result << 4) | digit
+    return result
+
+@specialize.argtype(0)
+def _ascii_slice(s, start, end):
+    """ s[start:end] as a str; it only contains ASCII characters. """
+    assert 0 <= start <= end
+    if isinstance(s, str):
+        return s[start:end]
+    builder = StringBuilder(end - start)
+    for i in range(start, end):
+        builder.append(chr(ord(s[i])))
+    return builder.build()
+
+@specialize.argtype(2)
+def _append_chunk(space, builder, s, start, end, w_encoding):
+    assert 0 <= start <= end
+    if isinstance(s, unicode):
+        builder.append_slice(s, start, end)
+        return
+    for i in range(start, end):
+        if ord(s[i]) >= 0x80:
+            break
+    else:
+        for i in range(start, end):
+            builder.append(unichr(ord(s[i])))
+        return
+    w_chunk = space.call_method(space.wrap(s[start:end]), 'decode',
+                                w_encoding)
+    builder.append(space.unicode_w(w_chunk))
+
+@specialize.argtype(1)
+def scan_string(space, s, end, w_encoding, strict):
+    """ Decode the JSON string starting at s[end], after its opening quote.
+    Returns the decoded unicode and the index after the closing quote.
+    The non-ASCII parts of a str are decoded with 'w_encoding'.
+    """
+    length = len(s)
+    begin = end - 1
+    builder = UnicodeBuilder()
+    while True:
+        start = end
+        while end < length:
+            c = s[end]
+            if c == '"' or c == '\\' or ord(c) < 0x20:
+                break
+            end += 1
+        if end == length:
+            raise json_error(space, s, "Unterminated string starting at",
+                             begin)
+        if end > start:
+            _append_chunk(space, builder, s, start, end, w_encoding)
+        c = s[end]
+        end += 1
+        if c == '"':
+            break
+        if c != '\\':
+            if strict:
+                msg = "Invalid control character %s at" % (
+                    _repr_char(ord(c)),)
+                raise json_error(space, s, msg, end)
+            builder.append(unichr(ord(c)))
+            continue
+        if end == length:
+            raise json_error(space, s, "Unterminated string starting at",
+                             begin)
+        esc = s[end]
+        if esc != 'u':
+            if esc == '"':
+                builder.append(u'"')
+            elif esc == '\\':
+                builder.append(u'\\')
+            elif esc == '/':
+                builder.append(u'/')
+            elif esc == 'b':
+                builder.append(u'\b')
+            elif esc == 'f':
+                builder.append(u'\f')
+            elif esc == 'n':
+                builder.append(u'\n')
+            elif esc == 'r':
+                builder.append(u'\r')
+            elif esc == 't':
+                builder.append(u'\t')
+            else:
+                msg = "Invalid \\escape: " + _repr_char(ord(esc))
+                raise json_error(space, s, msg, end)
+            end += 1
+            continue
+        uni = _decode_hex4(s, end + 1)
+        if uni < 0:
+            raise json_error(space, s, "Invalid \\uXXXX escape", end)
+        next_end = end + 5
+        if 0xd800 <= uni <= 0xdbff and MAXUNICODE > 0xffff:
+            # a surrogate pair gives a single character on UCS-4 builds
+            uni2 = -1
+            if _startswith(s, end + 5, '\\u'):
+                uni2 = _decode_hex4(s, end + 7)
+            if not (0xdc00 <= uni2 <= 0xdfff):
+                raise json_error(space, s,
+                                 "Invalid \\uXXXX\\uXXXX surrogate pair", end)
+            uni = 0x10000 + (((uni - 0xd800) << 10) | (uni2 - 0xdc00))
+            next_end += 6
+        builder.append(UNICHR(uni))
+        end = next_end
+    return builder.build(), end
+
+@unwrap_spec(end=int, strict=bool)
+def scanstring(space, w_s, end, w_encoding=None, strict=True):
+    """scanstring(basestring, end, encoding, strict=True) -> (str, end)
+
+    Scan the string s for a JSON string. End is the index of the
+    character in s after the quote that started the JSON string.
+    Unescapes all valid JSON string escape sequences and raises ValueError
+    on attempt to decode an invalid string. If strict is False then literal
+    control characters are allowed in the string.
+
+    Returns a tuple of the decoded string and the index of the character in s
+    after the end quote."""
+    if w_encoding is None or space.is_w(w_encoding, space.w_None):
+        w_encoding = space.wrap('utf-8')
+    if space.isinstance_w(w_s, space.w_unicode):
+        u = space.unicode_w(w_s)
+        if not 0 <= end <= len(u):
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("end is out of bounds"))
+        result, end = scan_string(space, u, end, w_encoding, strict)
+    elif space.isinstance_w(w_s, space.w_str):
+        s = space.str_w(w_s)
+        if not 0 <= end <= len(s):
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("end is out of bounds"))
+        result, end = scan_string(space, s, end, w_encoding, strict)
+    else:
+        raise operationerrfmt(space.w_TypeError,
+                              "first argument must be a string, not %s",
+                              space.type(w_s).getname(space))
+    return space.newtuple([space.wrap(result), space.wrap(end)])
+
+# ____________________________________________________________
+
+class W_Scanner(Wrappable):
+    """ The scan_once() function of a JSONDecoder.  It reads the same
+    attributes of the decoder as json.scanner.py_make_scanner(), plus
+    'taint': if it is not None, every string and number decoded gets this
+    taint label.
+    """
+
+    def __init__(self, space, w_context):
+        self.space = space
+        w_encoding = space.getattr(w_context, space.wrap('encoding'))
+        if space.is_w(w_encoding, space.w_None):
+            w_encoding = space.wrap('utf-8')
+        self.w_encoding = w_encoding
+        self.strict = space.is_true(
+            space.getattr(w_context, space.wrap('strict')))
+        self.w_object_hook = self._get_hook(w_context, 'object_hook')
+        self.w_object_pairs_hook = self._get_hook(w_context,
+                                                  'object_pairs_hook')
+        self.w_parse_float = space.getattr(w_context,
+                                           space.wrap('parse_float'))
+        self.w_parse_int = space.getattr(w_context, space.wrap('parse_int'))
+        self.w_parse_constant = space.getattr(w_context,
+                                              space.wrap('parse_constant'))
+        self.fast_float = space.is_w(self.w_parse_float, space.w_float)
+        self.fast_int = space.is_w(self.w_parse_int, space.w_int)
+        w_taint = space.findattr(w_context, space.wrap('taint'))
+        if w_taint is None or space.is_w(w_taint, space.w_None):
+            self.taints = None
+        else:
+            self.taints = {space.int_w(w_taint): 1}
+        self.memo = {}
+
+    def _get_hook(self, w_context, name):
+        w_hook = self.space.getattr(w_context, self.space.wrap(name))
+        if self.space.is_w(w_hook, self.space.w_None):
+            return None
+        return w_hook
+
+    @unwrap_spec(idx=int)
+    def descr_call(self, space, w_string, idx):
+        try:
+            if space.isinstance_w(w_string, space.w_unicode):
+                w_result, end = self.scan_once(space.unicode_w(w_string), idx)
+            elif space.isinstance_w(w_string, space.w_str):
+                w_result, end = self.scan_once(space.str_w(w_string), idx)
+            else:
+                raise operationerrfmt(space.w_TypeError,
+                                      "first argument must be a string, "
+                                      "not %s",
+                                      space.type(w_string).getname(space))
+        finally:
+            self.memo.clear()
+        if w_result is None:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        return space.newtuple([w_result, space.wrap(end)])
+
+    def tainted(self, w_obj):
+        if self.taints is not None:
+            w_obj = checked_settaint(w_obj, self.space, self.taints)
+        return w_obj
+
+    @specialize.argtype(1)
+    def scan_once(self, s, idx):
+        """ Decode the JSON value at s[idx].  Returns the value and the
+        index after it, or (None, idx) if there is no value there. """
+        space = self.space
+        if idx < 0 or idx >= len(s):
+            return None, idx
+        c = s[idx]
+        if c == '"':
+            return self.parse_string(s, idx + 1)
+        elif c == '{':
+            return self.parse_object(s, idx + 1)
+        elif c == '[':
+            return self.parse_array(s, idx + 1)
+        elif c == 'n' and _startswith(s, idx, 'null'):
+            return space.w_None, idx + 4
+        elif c == 't' and _startswith(s, idx, 'true'):
+            return space.w_True, idx + 4
+        elif c == 'f' and _startswith(s, idx, 'false'):
+            return space.w_False, idx + 5
+        elif c == 'N' and _startswith(s, idx, 'NaN'):
+            return self.parse_constant('NaN'), idx + 3
+        elif c == 'I' and _startswith(s, idx, 'Infinity'):
+            return self.parse_constant('Infinity'), idx + 8
+        elif c == '-' and _startswith(s, idx, '-Infinity'):
+            return self.parse_constant('-Infinity'), idx + 9
+        return self.parse_number(s, idx)
+
+    @specialize.argtype(1)
+    def parse_string(self, s, end):
+        u, end = scan_string(self.space, s, end, self.w_encoding,
+                             self.strict)
+        return self.tainted(self.space.wrap(u)), end
+
+    @specialize.argtype(1)
+    def parse_key(self, s, end):
+        u, end = scan_string(self.space, s, end, self.w_encoding,
+                             self.strict)
+        # share the keys that are repeated in the document
+        w_key = self.memo.get(u, None)
+        if w_key is None:
+            w_key = self.tainted(self.space.wrap(u))
+            self.memo[u] = w_key
+        return w_key, end
+
+    @specialize.argtype(1)
+    def parse_number(self, s, idx):
+        length = len(s)
+        start = idx
+        if idx < length and s[idx] == '-':
+            idx += 1
+        if idx < length and s[idx] == '0':
+            idx += 1
+        elif idx < length and '1' <= s[idx] <= '9':
+            idx += 1
+            while idx < length and _isdigit(s[idx]):
+                idx += 1
+        else:
+            return None, start
+        is_float = False
+        if idx + 1 < length and s[idx] == '.' and _isdigit(s[idx + 1]):
+            is_float = True
+            idx += 2
+            while idx < length and _isdigit(s[idx]):
+                idx += 1
+        if idx < length and (s[idx] == 'e' or s[idx] == 'E'):
+            end = idx + 1
+            if end < length and (s[end] == '-' or s[end] == '+'):
+                end += 1
+            if end < length and _isdigit(s[end]):
+                while end < length and _isdigit(s[end]):
+                    end += 1
+                is_float = True
+                idx = end
+        numstr = _ascii_slice(s, start, idx)
+        if is_float:
+            return self.parse_float(numstr), idx
+        else:
+            return self.parse_int(numstr), idx
+
+    def parse_float(self, numstr):
+        space = self.space
+        if self.fast_float:
+            w_result = space.newfloat(rstring_to_float(numstr))
+        else:
+            w_result = space.call_function(self.w_parse_float,
+                                           space.wrap(numstr))
+        return self.tainted(w_result)
+
+    def parse_int(self, numstr):
+        space = self.space
+        if self.fast_int:
+            try:
+                w_result = space.newint(string_to_int(numstr))
+            except ParseStringOverflowError:
+                w_result = space.call_function(space.w_long,
+                                               space.wrap(numstr))
+        else:
+            w_result = space.call_function(self.w_parse_int,
+                                           space.wrap(numstr))
+        return self.tainted(w_result)
+
+    def parse_constant(self, name):
+        space = self.space
+        w_result = space.call_function(self.w_parse_constant,
+                                       space.wrap(name))
+        if (self.taints is not None and
+                space.is_w(space.type(w_result), space.w_float)):
+            # don't taint the float shared by all the decoders
+            w_result = space.newfloat(space.float_w(w_result))
+        return self.tainted(w_result)
+
+    @specialize.argtype(1)
+    def parse_object(self, s, end):
+        space = self.space
+        length = len(s)
+        if self.w_object_pairs_hook is not None:
+            pairs_w = []
+            w_dict = None
+        else:
+            pairs_w = None
+            w_dict = space.newdict()
+        end = _skip_whitespace(s, end)
+        if end < length and s[end] == '}':
+            end += 1
+        else:
+            while True:
+                if end >= length or s[end] != '"':
+                    raise json_error(space, s, "Expecting property name", end)
+                w_key, end = self.parse_key(s, end + 1)
+                end = _skip_whitespace(s, end)
+                if end >= length or s[end] != ':':
+                    raise json_error(space, s, "Expecting : delimiter", end)
+                end = _skip_whitespace(s, end + 1)
+                w_value, end = self.scan_once(s, end)
+                if w_value is None:
+                    raise json_error(space, s, "Expecting object", end)
+                if pairs_w is not None:
+                    pairs_w.append(space.newtuple([w_key, w_value]))
+                else:
+                    space.setitem(w_dict, w_key, w_value)
+                end = _skip_whitespace(s, end)
+                if end < length and s[end] == '}':
+                    end += 1
+                    break
+                if end >= length or s[end] != ',':
+                    raise json_error(space, s, "Expecting , delimiter", end)
+                end = _skip_whitespace(s, end + 1)
+        if pairs_w is not None:
+            return space.call_function(self.w_object_pairs_hook,
+                                       space.newlist(pairs_w)), end
+        if self.w_object_hook is not None:
+            w_dict = space.call_function(self.w_object_hook, w_dict)
+        return w_dict, end
+
+    @specialize.argtype(1)
+    def parse_array(self, s, end):
+        space = self.space
+        length = len(s)
+        items_w = []
+        end = _skip_whitespace(s, end)
+        if end < length and s[end] == ']':
+            return space.newlist(items_w), end + 1
+        while True:
+            w_value, end = self.scan_once(s, end)
+            if w_value is None:
+                raise json_error(space, s, "Expecting object", end)
+            items_w.append(w_value)
+            end = _skip_whitespace(s, end)
+            if end < length and s[end] == ']':
+                end += 1
+                break
+            if end >= length or s[end] != ',':
+                raise json_error(space, s, "Expecting , delimiter", end)
+            end = _skip_whitespace(s, end + 1)
+        return space.newlist(items_w), end
+
+
+def descr_new_scanner(space, w_subtype, w_context):
+    return space.wrap(W_Scanner(space, w_context))
+
+W_Scanner.typedef = TypeDef(
+    'make_scanner',
+    __module__ = '_json',
+    __new__ = interp2app(descr_new_scanner),
+    __call__ = interp2app(W_Scanner.descr_call),
+    __doc__ = """JSON scanner object""",
+)
+W_Scanner.typedef.acceptable_as_base_class = False
@@ -0,0 +1,343 @@
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rfloat import isinf, isnan
+from rpython.rlib.rstring import StringBuilder
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import TypeDef
+
+HEX = '0123456789abcdef'
+
+ESCAPED = {
+    ord('"'): '\\"',
+    ord('\\'): '\\\\',
+    ord('\b'): '\\b',
+    ord('\f'): '\\f',
+    ord('\n'): '\\n',
+    ord('\r'): '\\r',
+    ord('\t'): '\\t',
+}
+
+def _append_uXXXX(builder, n):
+    builder.append('\\u')
+    builder.append(HEX[(n >> 12) & 0xf])
+    builder.append(HEX[(n >> 8) & 0xf])
+    builder.append(HEX[(n >> 4) & 0xf])
+    builder.append(HEX[n & 0xf])
+
+def _append_escaped(builder, n):
+    escaped = ESCAPED.get(n, None)
+    if escaped is not None:
+        builder.append(escaped)
+    elif n < 0x10000:
+        _append_uXXXX(builder, n)
+    else:
+        # surrogate pair
+        n -= 0x10000
+        _append_uXXXX(builder, 0xd800 | ((n >> 10) & 0x3ff))
+        _append_uXXXX(builder, 0xdc00 | (n & 0x3ff))
+
+def _needs_escape(n):
+    return n < 0x20 or n >= 0x7f or n == ord('"') or n == ord('\\')
+
+@specialize.argtype(1)
+def _write_ascii(builder, s):
+    builder.append('"')
+    start = 0
+    length = len(s)
+    for i in range(length):
+        n = ord(s[i])
+        if _needs_escape(n):
+            if isinstance(s, str):
+                builder.append_slice(s, start, i)
+            else:
+                for j in range(start, i):
+                    builder.append(chr(ord(s[j])))
+            _append_escaped(builder, n)
+            start = i + 1
+    if isinstance(s, str):
+        builder.append_slice(s, start, length)
+    else:
+        for j in range(start, length):
+            builder.append(chr(ord(s[j])))
+    builder.append('"')
+
+def write_string_ascii(space, builder, w_s):
+    """ Write the ASCII-only JSON representation of the str or unicode
+    'w_s'.  The non-ASCII parts of a str are decoded as UTF-8. """
+    if not space.isinstance_w(w_s, space.w_unicode):
+        s = space.str_w(w_s)
+        for c in s:
+            if ord(c) >= 0x80:
+                break
+        else:
+            _write_ascii(builder, s)
+            return
+        w_s = space.call_method(w_s, 'decode', space.wrap('utf-8'))
+    _write_ascii(builder, space.unicode_w(w_s))
+
+def encode_basestring_ascii(space, w_s):
+    """encode_basestring_ascii(basestring) -> str
+
+    Return an ASCII-only JSON representation of a Python string"""
+    if not (space.isinstance_w(w_s, space.w_str) or
+            space.isinstance_w(w_s, space.w_unicode)):
+        raise operationerrfmt(space.w_TypeError,
+                              "first argument must be a string, not %s",
+                              space.type(w_s).getname(space))
+    builder = StringBuilder()
+    write_string_ascii(space, builder, w_s)
+    return space.wrap(builder.build())
+
+# ____________________________________________________________
+
+class Chunks(object):
+    """ The output of the encoder: the str parts are joined as they come,
+    only the unicode returned by a custom string encoder are kept apart.
+    """
+    def __init__(self, space):
+        self.space = space
+        self.builder = StringBuilder()
+        self.chunks_w = []
+
+    def append(self, s):
+        self.builder.append(s)
+
+    def append_w(self, w_s):
+        space = self.space
+        if space.isinstance_w(w_s, space.w_str):
+            self.builder.append(space.str_w(w_s))
+        else:
+            self.flush()
+            self.chunks_w.append(w_s)
+
+    def flush(self):
+        if self.builder.getlength() > 0:
+            self.chunks_w.append(self.space.wrap(self.builder.build()))
+            self.builder = StringBuilder()
+
+    def build_w(self):
+        self.flush()
+        return self.space.newlist(self.chunks_w)
+
+
+class W_Encoder(Wrappable):
+    """ What JSONEncoder.encode() does, without calling any of its methods
+    apart from 'default'.  The strings are written by 'w_encoder', unless
+    it is encode_basestring_ascii(), in which case they are written
+    directly.
+    """
+
+    def __init__(self, space, w_markers, w_default, w_encoder, w_indent,
+                 w_key_separator, w_item_separator, sort_keys, skipkeys,
+                 allow_nan):
+        self.space = space
+        if space.is_w(w_markers, space.w_None):
+            self.w_markers = None
+        else:
+            self.w_markers = w_markers
+        self.w_default = w_default
+        self.w_encoder = w_encoder
+        w_module = space.getbuiltinmodule('_json')
+        self.fast_encode = space.is_w(w_encoder, space.getattr(
+            w_module, space.wrap('encode_basestring_ascii')))
+        if space.is_w(w_indent, space.w_None):
+            self.indent = -1
+        else:
+            self.indent = space.int_w(w_indent)
+        # str or unicode, kept wrapped: the unicode ones go to the output
+        # as separate chunks, like the strings of a custom 'w_encoder'
+        self.w_key_separator = w_key_separator
+        self.w_item_separator = w_item_separator
+        self.sort_keys = sort_keys
+        self.skipkeys = skipkeys
+        self.allow_nan = allow_nan
+
+    @unwrap_spec(current_indent_level=int)
+    def descr_call(self, space, w_obj, current_indent_level):
+        chunks = Chunks(space)
+        self.encode(chunks, w_obj, current_indent_level)
+        return chunks.build_w()
+
+    def mark(self, w_obj):
+        if self.w_markers is not None:
+            space = self.space
+            w_id = space.id(w_obj)
+            if space.is_true(space.contains(self.w_markers, w_id)):
+                raise OperationError(space.w_ValueError,
+                                     space.wrap("Circular reference detected"))
+            space.setitem(self.w_markers, w_id, w_obj)
+
+    def unmark(self, w_obj):
+        if self.w_markers is not None:
+            space = self.space
+            space.delitem(self.w_markers, space.id(w_obj))
+
+    def encode(self, chunks, w_obj, level):
+        space = self.space
+        if (space.isinstance_w(w_obj, space.w_str) or
+                space.isinstance_w(w_obj, space.w_unicode)):
+            self.encode_string(chunks, w_obj)
+        elif space.is_w(w_obj, space.w_None):
+            chunks.append('null')
+        elif space.isinstance_w(w_obj, space.w_bool):
+            if space.is_true(w_obj):
+                chunks.append('true')
+            else:
+                chunks.append('false')
+        elif (space.isinstance_w(w_obj, space.w_int) or
+                  space.isinstance_w(w_obj, space.w_long)):
+            chunks.append(space.str_w(space.str(w_obj)))
+        elif space.isinstance_w(w_obj, space.w_float):
+            chunks.append(self.floatstr(w_obj))
+        elif (space.isinstance_w(w_obj, space.w_list) or
+                  space.isinstance_w(w_obj, space.w_tuple)):
+            self.encode_list(chunks, w_obj, level)
+        elif space.isinstance_w(w_obj, space.w_dict):
+            self.encode_dict(chunks, w_obj, level)
+        else:
+            self.mark(w_obj)
+            w_res = space.call_function(self.w_default, w_obj)
+            self.encode(chunks, w_res, level)
+            self.unmark(w_obj)
+
+    def encode_string(self, chunks, w_s):
+        if self.fast_encode:
+            write_string_ascii(self.space, chunks.builder, w_s)
+        else:
+            chunks.append_w(self.space.call_function(self.w_encoder, w_s))
+
+    def floatstr(self, w_obj):
+        space = self.space
+        value = space.float_w(w_obj)
+        if isnan(value):
+            text = 'NaN'
+        elif isinf(value):
+            if value > 0:
+                text = 'Infinity'
+            else:
+                text = '-Infinity'
+        else:
+            return space.str_w(space.repr(w_obj))
+        if not self.allow_nan:
+            raise operationerrfmt(space.w_ValueError,
+                "Out of range float values are not JSON compliant: %s",
+                space.str_w(space.repr(w_obj)))
+        return text
+
+    def open_indent(self, chunks, level):
+        if self.indent < 0:
+            return self.w_item_separator, level
+        level += 1
+        newline_indent = '\n' + ' ' * (self.indent * level)
+        chunks.append(newline_indent)
+        return self.space.add(self.w_item_separator,
+                              self.space.wrap(newline_indent)), level
+
+    def close_indent(self, chunks, level):
+        if self.indent >= 0:
+            chunks.append('\n' + ' ' * (self.indent * (level - 1)))
+
+    def encode_list(self, chunks, w_list, level):
+        space = self.space
+        items_w = space.fixedview(w_list)
+        if not items_w:
+            chunks.append('[]')
+            return
+        self.mark(w_list)
+        chunks.append('[')
+        w_separator, level = self.open_indent(chunks, level)
+        for i in range(len(items_w)):
+            if i > 0:
+                chunks.append_w(w_separator)
+            self.encode(chunks, items_w[i], level)
+        self.close_indent(chunks, level)
+        chunks.append(']')
+        self.unmark(w_list)
+
+    def encode_dict(self, chunks, w_dict, level):
+        space = self.space
+        if space.len_w(w_dict) == 0:
+            chunks.append('{}')
+            return
+        self.mark(w_dict)
+        chunks.append('{')
+        w_separator, level = self.open_indent(chunks, level)
+        first = True
+        if self.sort_keys:
+            w_keys = space.call_method(w_dict, 'keys')
+            space.call_method(w_keys, 'sort')
+            for w_key in space.listview(w_keys):
+                w_value = space.getitem(w_dict, w_key)
+                first = self.encode_item(chunks, w_key, w_value, level,
+                                         w_separator, first)
+        else:
+            for w_item in space.listview(space.call_method(w_dict, 'items')):
+                w_key, w_value = space.fixedview(w_item, 2)
+                first = self.encode_item(chunks, w_key, w_value, level,
+                                         w_separator, first)
+        self.close_indent(chunks, level)
+        chunks.append('}')
+        self.unmark(w_dict)
+
+    def encode_item(self, chunks, w_key, w_value, level, w_separator,
+                    first):
+        w_key = self.key_string(w_key)
+        if w_key is None:
+            return first
+        if not first:
+            chunks.append_w(w_separator)
+        self.encode_string(chunks, w_key)
+        chunks.append_w(self.w_key_separator)
+        self.encode(chunks, w_value, level)
+        return False
+
+    def key_string(self, w_key):
+        """ The key as a string, or None if it must be skipped. """
+        space = self.space
+        if (space.isinstance_w(w_key, space.w_str) or
+                space.isinstance_w(w_key, space.w_unicode)):
+            return w_key
+        elif space.isinstance_w(w_key, space.w_float):
+            return space.wrap(self.floatstr(w_key))
+        elif space.isinstance_w(w_key, space.w_bool):
+            if space.is_true(w_key):
+                return space.wrap('true')
+            else:
+                return space.wrap('false')
+        elif space.is_w(w_key, space.w_None):
+            return space.wrap('null')
+        elif (space.isinstance_w(w_key, space.w_int) or
+                  space.isinstance_w(w_key, space.w_long)):
+            return space.str(w_key)
+        elif self.skipkeys:
+            return None
+        raise operationerrfmt(space.w_TypeError, "key %s is not a string",
+                              space.str_w(space.repr(w_key)))
+
+
+def check_separator(space, w_separator):
+    if not (space.isinstance_w(w_separator, space.w_str) or
+            space.isinstance_w(w_separator, space.w_unicode)):
+        raise operationerrfmt(space.w_TypeError,
+                              "separator must be a string, not %s",
+                              space.type(w_separator).getname(space))
+
+@unwrap_spec(sort_keys=bool, skipkeys=bool, allow_nan=bool)
+def descr_new_encoder(space, w_subtype, w_markers, w_default, w_encoder,
+                      w_indent, w_key_separator, w_item_separator, sort_keys,
+                      skipkeys, allow_nan):
+    check_separator(space, w_key_separator)
+    check_separator(space, w_item_separator)
+    return space.wrap(W_Encoder(space, w_markers, w_default, w_encoder,
+                                w_indent, w_key_separator, w_item_separator,
+                                sort_keys, skipkeys, allow_nan))
+
+W_Encoder.typedef = TypeDef(
+    'make_encoder',
+    __module__ = '_json',
+    __new__ = interp2app(descr_new_encoder),
+    __call__ = interp2app(W_Encoder.descr_call),
+    __doc__ = """_iterencode(obj, _current_indent_level) -> iterable""",
+)
+W_Encoder.typedef.acceptable_as_base_class = False
@@ -0,0 +1,126 @@
+
+class AppTestScanstring(object):
+    spaceconfig = dict(usemodules=['_json'])
+
+    def test_simple(self):
+        from _json import scanstring
+        assert scanstring('"abc" x', 1) == (u'abc', 5)
+        assert scanstring(u'"abc"', 1) == (u'abc', 5)
+        assert type(scanstring('"abc"', 1)[0]) is unicode
+
+    def test_escapes(self):
+        from _json import scanstring
+        assert scanstring(r'"a\"b\\c\/d\b\f\n\r\t"', 1) == (
+            u'a"b\\c/d\b\f\n\r\t', 22)
+        assert scanstring(r'"\u007b\u00e9"', 1) == (u'{\xe9', 14)
+        res = scanstring(r'"z\ud834\udd20x"', 1, None, True)
+        assert res == (u'z\U0001d120x', 16)
+
+    def test_encoding(self):
+        from _json import scanstring
+        assert scanstring('"\xc3\xa9t\xc3\xa9"', 1) == (u'\xe9t\xe9', 7)
+        assert scanstring('"\xe9t\xe9"', 1, 'latin-1') == (u'\xe9t\xe9', 5)
+        raises(UnicodeDecodeError, scanstring, '"\xe9"', 1)
+
+    def test_errors(self):
+        from _json import scanstring
+        exc = raises(ValueError, scanstring, '"abc', 1)
+        assert str(exc.value) == ('Unterminated string starting at: '
+                                  'line 1 column 0 (char 0)')
+        exc = raises(ValueError, scanstring, '\n\n "a\nb"', 4)
+        assert str(exc.value) == ("Invalid control character '\\n' at: "
+                                  "line 4 column 1 (char 6)")
+        assert scanstring('"a\nb"', 1, None, False) == (u'a\nb', 5)
+        raises(ValueError, scanstring, r'"\x"', 1)
+        raises(ValueError, scanstring, r'"\u12"', 1)
+        raises(ValueError, scanstring, r'"\ud834x"', 1)
+        raises(ValueError, scanstring, '"abc"', 10)
+        raises(TypeError, scanstring, 42, 1)
+
+
+class AppTestScanner(object):
+    spaceconfig = dict(usemodules=['_json', '__pypy__', 'struct', 'binascii'])
+
+    def test_loads(self):
+        import json, _json
+        assert json.scanner.make_scanner is _json.make_scanner
+        doc = ('{"a": [1, -2.5e3, true, false, null], "b": {"c": "d"},'
+               ' "e": [], "f": {}, "g": 123456789012345678901234567890}')
+        assert json.loads(doc) == {
+            u'a': [1, -2500.0, True, False, None], u'b': {u'c': u'd'},
+            u'e': [], u'f': {}, u'g': 123456789012345678901234567890}
+        assert json.loads(u' [ 1 , "\xe9" ] ') == [1, u'\xe9']
+        assert json.loads('"x"') == u'x'
+        assert json.loads('0.5') == 0.5
+
+    def test_constants(self):
+        import json, math
+        res = json.loads('[NaN, Infinity, -Infinity]')
+        assert math.isnan(res[0])
+        assert res[1:] == [float('inf'), float('-inf')]
+        res = json.loads('[NaN]', parse_constant=lambda s: s)
+        assert res == ['NaN']
+
+    def test_hooks(self):
+        import json
+        from decimal import Decimal
+        assert json.loads('[1.5, 2]', parse_float=Decimal,
+                          parse_int=float) == [Decimal('1.5'), 2.0]
+        assert json.loads('{"a": {"b": 1}}', object_hook=len) == 1
+        res = json.loads('{"a": 1, "b": 2, "c": {}}', object_pairs_hook=list)
+        assert res == [(u'a', 1), (u'b', 2), (u'c', [])]
+
+    def test_errors(self):
+        import json
+        for doc, msg in [
+                ('', 'No JSON object could be decoded'),
+                ('[1,', 'Expecting object: line 1 column 3 (char 3)'),
+                ('[1 2]', 'Expecting , delimiter: line 1 column 3 (char 3)'),
+                ('{"a" 1}', 'Expecting : delimiter: line 1 column 5 (char 5)'),
+                ('{1: 2}', 'Expecting property name: line 1 column 1 (char 1)'),
+                ('[1] x', 'Extra data: line 1 column 4 - line 1 column 5 '
+                          '(char 4 - 5)')]:
+            exc = raises(ValueError, json.loads, doc)
+            assert str(exc.value) == msg
+
+    def test_scanner_call(self):
+        import _json
+        class Context(object):
+            encoding = None
+            strict = True
+            object_hook = None
+            object_pairs_hook = None
+            parse_float = float
+            parse_int = int
+            parse_constant = None
+        scan_once = _json.make_scanner(Context())
+        assert scan_once('xx[1]', 2) == ([1], 5)
+        raises(StopIteration, scan_once, 'xx[1]', 5)
+        raises(StopIteration, scan_once, 'xx[1]', 0)
+        raises(AttributeError, _json.make_scanner, 1)
+
+    def test_shared_keys(self):
+        import json
+        res = json.loads('[{"key": 1}, {"key": 2}]')
+        assert res[0].keys()[0] is res[1].keys()[0]
+
+    def test_taint(self):
+        import json
+        from __pypy__.taint import get_taint
+        res = json.loads('{"a": [1, 2.5, "x", true, null, NaN], '
+                         '"b": 123456789012345678901234567890}', taint=7)
+        for key, value in res.items():
+            assert get_taint(key) == [7]
+        items = res[u'a']
+        assert get_taint(items[0]) == [7]
+        assert get_taint(items[1]) == [7]
+        assert get_taint(items[2]) == [7]
+        assert get_taint(items[5]) == [7]
+        assert get_taint(res[u'b']) == [7]
+        res = json.loads('[1, 2]', taint=3)
+        assert get_taint(res[0]) == get_taint(res[1]) == [3]
+        res = json.loads('{"a": 1, "b": 2}', taint=3)
+        assert [get_taint(key) for key in res] == [[3], [3]]
+        # the shared constants are not tainted
+        assert get_taint(json.loads('NaN')) == []
+        assert get_taint(json.loads('[1, "x"]')[1]) == []
@@ -0,0 +1,63 @@
+
+class AppTestEncoder(object):
+    spaceconfig = dict(usemodules=['_json', 'struct', 'binascii'])
+
+    def test_encode_basestring_ascii(self):
+        from _json import encode_basestring_ascii
+        assert encode_basestring_ascii('abc') == '"abc"'
+        assert encode_basestring_ascii(u'a"b\\c\n\x01\x7f') == (
+            '"a\\"b\\\\c\\n\\u0001\\u007f"')
+        assert encode_basestring_ascii(u'\u03b1\u03a9') == '"\\u03b1\\u03a9"'
+        assert encode_basestring_ascii('\xce\xb1\xce\xa9') == (
+            '"\\u03b1\\u03a9"')
+        assert encode_basestring_ascii(u'\U0001d120') == '"\\ud834\\udd20"'
+        raises(TypeError, encode_basestring_ascii, 42)
+
+    def test_dumps(self):
+        import json, _json
+        assert json.encoder.c_make_encoder is _json.make_encoder
+        assert json.dumps([1, 2.5, u'x', 'y', None, True, False, (3,)]) == (
+            '[1, 2.5, "x", "y", null, true, false, [3]]')
+        assert json.dumps({'a': {}}) == '{"a": {}}'
+        assert json.dumps({2: 1, 1.5: 3, None: 4, False: 5},
+                          sort_keys=True) == (
+            '{"null": 4, "false": 5, "1.5": 3, "2": 1}')
+        assert json.dumps(10 ** 20) == '100000000000000000000'
+        assert json.dumps(float('inf')) == 'Infinity'
+        raises(ValueError, json.dumps, float('nan'), allow_nan=False)
+
+    def test_options(self):
+        import json
+        assert json.dumps({'b': [1, 2], 'a': 1}, sort_keys=True,
+                          indent=2, separators=(',', ': ')) == (
+            '{\n  "a": 1,\n  "b": [\n    1,\n    2\n  ]\n}')
+        assert json.dumps({'a': 1, (1, 2): 2}, skipkeys=True) == '{"a": 1}'
+        res = json.dumps({'a': [1, 2]}, separators=(u',', u':'))
+        assert res == u'{"a":[1,2]}'
+        assert type(res) is unicode
+        assert json.dumps([1, {'a': 2}], indent=1,
+                          separators=(u'\u3001', u'\uff1a')) == (
+            u'[\n 1\u3001\n {\n  "a"\uff1a2\n }\n]')
+        raises(TypeError, json.dumps, {(1, 2): 2})
+        assert json.dumps([u'\xe9'], ensure_ascii=False) == u'["\xe9"]'
+        assert json.dumps(['\xe9'], encoding='latin-1') == '["\\u00e9"]'
+
+    def test_default_and_markers(self):
+        import json
+        class A(object):
+            pass
+        assert json.dumps([A()], default=lambda a: 'A') == '["A"]'
+        raises(TypeError, json.dumps, [A()])
+        lst = []
+        lst.append(lst)
+        raises(ValueError, json.dumps, lst)
+        raises(RuntimeError, json.dumps, lst, check_circular=False)
+
+    def test_make_encoder(self):
+        import _json
+        raises(TypeError, _json.make_encoder, None, "\xCD\x7D", None)
+        raises(TypeError, _json.make_encoder, None, None, None, None, ':',
+               5, False, False, True)
+        encoder = _json.make_encoder(None, None, _json.encode_basestring_ascii,
+                                     None, ':', ',', False, False, True)
+        assert encoder({'a': [1, u'\xe9']}, 0) == ['{"a":[1,"\\u00e9"]}']
@@ -16,3 +16,6 @@ class Module(MixedModule):
 
     if sys.platform == 'win32':
         interpleveldefs['win32'] = 'interp_win32.win32_namespace(space)'
+    else:
+        interpleveldefs['RingConnection'] = 'interp_ring.W_RingConnection'
+        interpleveldefs['ring_pipe'] = 'interp_ring.ring_pipe'
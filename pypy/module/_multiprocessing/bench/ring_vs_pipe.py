@@ -0,0 +1,52 @@
+""" Compare _multiprocessing.ring_pipe() with Connections over os.pipe()
+between two forked processes: the round-trip latency of a small message
+sent back and forth, and the throughput of small messages sent one way.
+
+Usage:
+    pypy ring_vs_pipe.py [messages [size]]
+"""
+
+import sys, os, time, _multiprocessing
+
+def pipe_pair():
+    r, w = os.pipe()
+    return (_multiprocessing.Connection(r, writable=False),
+            _multiprocessing.Connection(w, readable=False))
+
+def run(make_pair, messages, size):
+    request_r, request_w = make_pair()
+    reply_r, reply_w = make_pair()
+    message = 'x' * size
+    pid = os.fork()
+    if pid == 0:
+        try:
+            for i in range(messages):
+                reply_w.send_bytes(request_r.recv_bytes())
+            for i in range(messages):
+                request_r.recv_bytes()
+            reply_w.send_bytes('done')
+        finally:
+            os._exit(0)
+    t0 = time.time()
+    for i in range(messages):
+        request_w.send_bytes(message)
+        reply_r.recv_bytes()
+    t1 = time.time()
+    for i in range(messages):
+        request_w.send_bytes(message)
+    reply_r.recv_bytes()
+    t2 = time.time()
+    os.waitpid(pid, 0)
+    return (t1 - t0) / messages * 1e6, messages / (t2 - t1)
+
+def main(messages, size):
+    print '%d messages of %d bytes' % (messages, size)
+    print '%10s %16s %16s' % ('', 'round trip (us)', 'messages/s')
+    for name, make_pair in [('pipe', pipe_pair),
+                            ('ring', _multiprocessing.ring_pipe)]:
+        print '%10s %16.1f %16.0f' % ((name,) + run(make_pair, messages,
+                                                   size))
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [100000, 64][len(args):]))
@@ -114,13 +114,19 @@ class W_BaseConnection(Wrappable):
         rwbuffer = space.rwbuffer_w(w_buffer)
         length = rwbuffer.getlength()
 
+        # self.buffer only holds BUFFER_SIZE bytes, longer messages that
+        # fit come in a new buffer too
         res, newbuf = self.do_recv_string(
-            space, length - offset, PY_SSIZE_T_MAX)
+            space, min(length - offset, self.BUFFER_SIZE), PY_SSIZE_T_MAX)
         try:
             if newbuf:
-                raise BufferTooShort(space, space.wrap(
-                    rffi.charpsize2str(newbuf, res)))
-            rwbuffer.setslice(offset, rffi.charpsize2str(self.buffer, res))
+                if res > length - offset:
+                    raise BufferTooShort(space, space.wrap(
+                        rffi.charpsize2str(newbuf, res)))
+                rwbuffer.setslice(offset, rffi.charpsize2str(newbuf, res))
+            else:
+                rwbuffer.setslice(offset,
+                                  rffi.charpsize2str(self.buffer, res))
         finally:
             if newbuf:
                 rffi.free_charp(newbuf)
@@ -0,0 +1,248 @@
+from pypy.interpreter.typedef import TypeDef
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.error import (
+    OperationError, wrap_oserror, operationerrfmt)
+from pypy.module._multiprocessing.interp_connection import (
+    W_BaseConnection, READABLE, WRITABLE)
+from pypy.module._multiprocessing.interp_semaphore import (
+    W_SemLock, SEMAPHORE, create_semlock, semlock_acquire, sem_post)
+from rpython.rtyper.lltypesystem import rffi, lltype
+from rpython.rlib import rmmap
+import os
+
+HEADER_SIZE = 4
+MAX_MESSAGE = 0x7fffffff
+# The mapping starts with two longs: a flag set when the writer is
+# closed, and the number of slots it had filled then.
+CONTROL_SIZE = 16
+
+
+class RingBuffer(object):
+    """Shared memory cut into 'nslots' slots of 'slotsize' bytes, with
+    the semaphores counting the filled and the free slots.  A message
+    takes as many consecutive slots as needed for its length, stored in
+    the first HEADER_SIZE bytes, and its data.  The memory is an
+    anonymous shared mapping, so the ring keeps working between the two
+    sides of a fork().  It starts with CONTROL_SIZE bytes telling if
+    the writer is closed."""
+
+    def __init__(self, space, nslots, slotsize):
+        self.nslots = nslots
+        self.slotsize = slotsize
+        try:
+            self.mmap = rmmap.mmap(-1, CONTROL_SIZE + nslots * slotsize)
+        except OSError, e:
+            raise wrap_oserror(space, e)
+        self.filled = W_SemLock(create_semlock(space, 0, nslots),
+                                SEMAPHORE, nslots)
+        self.free = W_SemLock(create_semlock(space, nslots, nslots),
+                              SEMAPHORE, nslots)
+
+    def getslot(self, index):
+        return rffi.ptradd(self.mmap.data, CONTROL_SIZE + index * self.slotsize)
+
+    def getcontrol(self):
+        return rffi.cast(rffi.LONGP, self.mmap.data)
+
+    def writer_closed(self, count):
+        """True if the writer is closed after filling 'count' slots."""
+        control = self.getcontrol()
+        return (rffi.cast(lltype.Signed, control[0]) != 0 and
+                rffi.cast(lltype.Signed, control[1]) == count)
+
+    def close_writer(self, count):
+        control = self.getcontrol()
+        control[1] = rffi.cast(rffi.LONG, count)
+        control[0] = rffi.cast(rffi.LONG, 1)
+        # wakes up the reader, which then finds no more messages
+        try:
+            sem_post(self.filled.handle)
+        except OSError:
+            pass
+
+
+class W_RingConnection(W_BaseConnection):
+    """One end of a ring_pipe(): the reading side or the writing side,
+    for a single reader and a single writer."""
+
+    def __init__(self, ring, flags):
+        W_BaseConnection.__init__(self, flags)
+        self.ring = ring
+        self.writer = bool(flags & WRITABLE)
+        self.index = 0        # the next slot this side reads or writes
+        self.count = 0        # the slots this side has read or written
+        self.pending = False  # poll() already acquired a filled slot
+        self.sender_pid = 0   # the process that sent on this end
+
+    def is_valid(self):
+        return self.ring is not None
+
+    def do_close(self):
+        ring = self.ring
+        self.ring = None
+        # only the process that sent on the writing end closes the
+        # channel, not another one closing its copy of it after a fork()
+        if (ring is not None and self.writer and
+                self.sender_pid == os.getpid()):
+            ring.close_writer(self.count)
+
+    def get_ring(self, space):
+        ring = self.ring
+        if ring is None:
+            raise OperationError(space.w_IOError,
+                                 space.wrap("connection is closed"))
+        return ring
+
+    def acquire(self, space, sem, block, w_timeout):
+        try:
+            return semlock_acquire(sem, space, block, w_timeout)
+        except OSError, e:
+            raise wrap_oserror(space, e)
+
+    def post(self, space, sem):
+        self.index = (self.index + 1) % self.ring.nslots
+        self.count += 1
+        try:
+            sem_post(sem.handle)
+        except OSError, e:
+            raise wrap_oserror(space, e)
+
+    def interrupted(self, flag):
+        """Called when a message was only partly sent or received, or
+        was bad: this side is then out of step with the other one, so it
+        stops being readable or writable."""
+        self.flags &= ~flag
+        if self.flags == 0:
+            self.close()
+
+    def wait_filled(self, space, ring):
+        if self.pending:
+            self.pending = False
+        else:
+            self.acquire(space, ring.filled, True, space.w_None)
+        if ring.writer_closed(self.count):
+            # leave the wakeup for the next recv() or poll()
+            self.pending = True
+            raise OperationError(space.w_EOFError, space.w_None)
+        return ring.getslot(self.index)
+
+    def do_send_string(self, space, buffer, offset, size):
+        ring = self.get_ring(space)
+        if size > MAX_MESSAGE:
+            raise operationerrfmt(space.w_ValueError,
+                                  "Cannot send %d bytes over connection", size)
+        self.sender_pid = os.getpid()
+        data = rffi.get_nonmovingbuffer(buffer)
+        try:
+            sent = 0
+            first = True
+            while first or sent < size:
+                try:
+                    self.acquire(space, ring.free, True, space.w_None)
+                except OperationError:
+                    if not first:
+                        self.interrupted(WRITABLE)
+                    raise
+                slot = ring.getslot(self.index)
+                room = ring.slotsize
+                if first:
+                    rffi.cast(rffi.UINTP, slot)[0] = rffi.cast(rffi.UINT,
+                                                               size)
+                    slot = rffi.ptradd(slot, HEADER_SIZE)
+                    room -= HEADER_SIZE
+                    first = False
+                count = min(room, size - sent)
+                rffi.c_memcpy(rffi.cast(rffi.VOIDP, slot),
+                              rffi.cast(rffi.VOIDP,
+                                        rffi.ptradd(data, offset + sent)),
+                              count)
+                sent += count
+                self.post(space, ring.filled)
+        finally:
+            rffi.free_nonmovingbuffer(buffer, data)
+
+    def do_recv_string(self, space, buflength, maxlength):
+        ring = self.get_ring(space)
+        slot = self.wait_filled(space, ring)
+        length = rffi.cast(lltype.Signed, rffi.cast(rffi.UINTP, slot)[0])
+        if length > maxlength: # bad message, close connection
+            self.interrupted(READABLE)
+            raise OperationError(space.w_IOError, space.wrap(
+                "bad message length"))
+
+        if length <= buflength:
+            newbuf = lltype.nullptr(rffi.CCHARP.TO)
+            dest = self.buffer
+        else:
+            newbuf = lltype.malloc(rffi.CCHARP.TO, length, flavor='raw')
+            dest = newbuf
+        try:
+            received = min(ring.slotsize - HEADER_SIZE, length)
+            rffi.c_memcpy(rffi.cast(rffi.VOIDP, dest),
+                          rffi.cast(rffi.VOIDP,
+                                    rffi.ptradd(slot, HEADER_SIZE)),
+                          received)
+            self.post(space, ring.free)
+            while received < length:
+                try:
+                    slot = self.wait_filled(space, ring)
+                except OperationError:
+                    self.interrupted(READABLE)
+                    raise
+                count = min(ring.slotsize, length - received)
+                rffi.c_memcpy(rffi.cast(rffi.VOIDP,
+                                        rffi.ptradd(dest, received)),
+                              rffi.cast(rffi.VOIDP, slot), count)
+                received += count
+                self.post(space, ring.free)
+        except OperationError:
+            if newbuf:
+                lltype.free(newbuf, flavor='raw')
+            raise
+        return length, newbuf
+
+    def do_poll(self, space, timeout):
+        ring = self.get_ring(space)
+        if not self.pending:
+            if timeout < 0.0:
+                w_timeout = space.w_None
+            else:
+                w_timeout = space.wrap(timeout)
+            self.pending = self.acquire(space, ring.filled, timeout != 0.0,
+                                        w_timeout)
+        return self.pending
+
+
+@unwrap_spec(nslots=int, slotsize=int)
+def ring_pipe(space, nslots=256, slotsize=256):
+    """ring_pipe(nslots=256, slotsize=256) -> (reader, writer)
+
+    Return the two ends of a one-way channel in shared memory, with the
+    send and recv methods of a Connection.  Create it before forking:
+    one process must only read from it and one only write to it.
+    Messages are copied in and out of 'nslots' slots of 'slotsize'
+    bytes; a message longer than a slot takes several.
+
+    When the process that sent on the writer closes it, recv() raises
+    EOFError once the messages sent before are read.  Unlike with a
+    pipe, a writer that dies without closing its end, e.g. because it
+    crashed or was killed, cannot be detected: recv() then blocks."""
+    if nslots < 1:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("nslots must be positive"))
+    if slotsize < 8 or slotsize % 8 != 0:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "slotsize must be a positive multiple of 8"))
+    if nslots > MAX_MESSAGE // slotsize:
+        raise OperationError(space.w_OverflowError,
+                             space.wrap("ring buffer too large"))
+    ring = RingBuffer(space, nslots, slotsize)
+    return space.newtuple([space.wrap(W_RingConnection(ring, READABLE)),
+                           space.wrap(W_RingConnection(ring, WRITABLE))])
+
+
+W_RingConnection.typedef = TypeDef(
+    'RingConnection', W_BaseConnection.typedef,
+    __module__ = '_multiprocessing',
+    __doc__ = W_RingConnection.__doc__,
+)
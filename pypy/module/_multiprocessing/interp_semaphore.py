@@ -346,13 +346,13 @@ else:
                         sem_timedwait(self.handle, deadline)
                 except OSError, e:
                     if e.errno == errno.EINTR:
-                        # again
+                        # like CPython, run the signal handlers and wait
+                        # again; if they raise, nothing was acquired
+                        _check_signals(space)
                         continue
                     elif e.errno in (errno.EAGAIN, errno.ETIMEDOUT):
                         return False
                     raise
-                _check_signals(space)
-
                 return True
         finally:
             if deadline:
@@ -508,20 +508,23 @@ class W_SemLock(Wrappable):
     def __del__(self):
         delete_semaphore(self.handle)
 
-@unwrap_spec(kind=int, value=int, maxvalue=int)
-def descr_new(space, w_subtype, kind, value, maxvalue):
-    if kind != RECURSIVE_MUTEX and kind != SEMAPHORE:
-        raise OperationError(space.w_ValueError,
-                             space.wrap("unrecognized kind"))
-
+def create_semlock(space, value, maxvalue):
+    """Create a new anonymous semaphore and return its handle."""
     counter = space.fromcache(CounterState).getCount()
     name = "/mp%d-%d" % (os.getpid(), counter)
 
     try:
-        handle = create_semaphore(space, name, value, maxvalue)
+        return create_semaphore(space, name, value, maxvalue)
     except OSError, e:
         raise wrap_oserror(space, e)
 
+@unwrap_spec(kind=int, value=int, maxvalue=int)
+def descr_new(space, w_subtype, kind, value, maxvalue):
+    if kind != RECURSIVE_MUTEX and kind != SEMAPHORE:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("unrecognized kind"))
+
+    handle = create_semlock(space, value, maxvalue)
     self = space.allocate_instance(W_SemLock, w_subtype)
     self.__init__(handle, kind, maxvalue)
 
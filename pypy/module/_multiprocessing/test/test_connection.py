@@ -173,3 +173,134 @@ class AppTestSocketConnection(BaseConnectionTest):
         assert data1 == '\x00\x00\x00\x03abc'
         data2 = sock.recv(8)
         assert data2 == '\x00\x00\x00\x04defg'
+
+class AppTestRingConnection(BaseConnectionTest):
+    spaceconfig = dict(usemodules=['_multiprocessing', 'thread', 'signal',
+                                   'struct', 'array', 'itertools', 'posix',
+                                   'binascii'])
+
+    def setup_class(cls):
+        if sys.platform == "win32":
+            py.test.skip("posix only")
+
+    def w_make_pair(self):
+        import _multiprocessing
+        return _multiprocessing.ring_pipe(4, 16)
+
+    def test_ring_pipe(self):
+        import _multiprocessing
+        rhandle, whandle = self.make_pair()
+        assert isinstance(rhandle, _multiprocessing.RingConnection)
+        assert rhandle.readable and not rhandle.writable
+        assert whandle.writable and not whandle.readable
+        raises(IOError, rhandle.send_bytes, "x")
+        raises(IOError, whandle.recv_bytes)
+        raises(ValueError, _multiprocessing.ring_pipe, 0)
+        raises(ValueError, _multiprocessing.ring_pipe, 4, 12)
+
+    def test_messages_across_slots(self):
+        import array
+        rhandle, whandle = self.make_pair()
+        # 4 slots of 16 bytes: the ring wraps around many times
+        for i in range(20):
+            whandle.send_bytes("")
+            assert rhandle.recv_bytes() == ""
+            whandle.send_bytes("abcdefghijkl" * (i % 4 + 1), 2)
+            assert rhandle.recv_bytes() == ("abcdefghijkl" * (i % 4 + 1))[2:]
+        whandle.send_bytes("x" * 40)
+        buf = array.array('c', ' ' * 50)
+        assert rhandle.recv_bytes_into(buf, 5) == 40
+        assert buf.tostring() == ' ' * 5 + 'x' * 40 + ' ' * 5
+        rhandle.close()
+        assert rhandle.closed
+        raises(IOError, rhandle.recv_bytes)
+
+    def test_bad_message_length(self):
+        rhandle, whandle = self.make_pair()
+        whandle.send_bytes("x" * 20)
+        raises(IOError, rhandle.recv_bytes, 10)
+        assert not rhandle.readable
+
+    def test_larger_than_ring(self):
+        import thread
+        rhandle, whandle = self.make_pair()
+        data = "".join([chr(i % 256) for i in range(1000)])
+        thread.start_new_thread(whandle.send_bytes, (data,))
+        assert rhandle.recv_bytes() == data
+
+    def test_interrupted_recv(self):
+        import os, signal
+        class Interrupted(Exception):
+            pass
+        def handler(signum, frame):
+            raise Interrupted
+        rhandle, whandle = self.make_pair()
+        # the writer dies in the middle of a message of 7 slots
+        pid = os.fork()
+        if pid == 0:
+            try:
+                whandle.send_bytes("x" * 100)
+            finally:
+                os._exit(0)
+        assert rhandle.poll(10)
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        old_handler = signal.signal(signal.SIGALRM, handler)
+        try:
+            signal.alarm(1)
+            raises(Interrupted, rhandle.recv_bytes)
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, old_handler)
+        # the rest of the message is not taken for another one
+        assert not rhandle.readable
+        raises(IOError, rhandle.recv_bytes)
+
+    def test_writer_closed(self):
+        rhandle, whandle = self.make_pair()
+        whandle.send_bytes("abc")
+        whandle.send_bytes("x" * 40)
+        whandle.close()
+        assert rhandle.poll()
+        assert rhandle.recv_bytes() == "abc"
+        assert rhandle.recv_bytes() == "x" * 40
+        assert rhandle.poll()
+        raises(EOFError, rhandle.recv_bytes)
+        raises(EOFError, rhandle.recv)
+        assert rhandle.readable
+
+    def test_writer_closed_after_fork(self):
+        import os
+        rhandle, whandle = self.make_pair()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                rhandle.close()
+                for i in range(10):
+                    whandle.send(i)
+                whandle.close()
+            finally:
+                os._exit(0)
+        try:
+            # closing the copy that did not send does not end the channel
+            whandle.close()
+            assert [rhandle.recv() for i in range(10)] == range(10)
+            raises(EOFError, rhandle.recv)
+        finally:
+            os.waitpid(pid, 0)
+
+    def test_fork(self):
+        import os
+        rhandle, whandle = self.make_pair()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for i in range(100):
+                    whandle.send((i, "y" * i))
+            finally:
+                os._exit(0)
+        try:
+            for i in range(100):
+                assert rhandle.recv() == (i, "y" * i)
+        finally:
+            os.waitpid(pid, 0)
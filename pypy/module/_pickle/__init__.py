@@ -0,0 +1,20 @@
+"""
+Mixed-module definition for the _pickle module.
+This is an optional module; if not present, cPickle.dumps() and
+cPickle.loads() use the pure Python Pickler and Unpickler.
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """Fast paths for cPickle.dumps() and cPickle.loads()
+"""
+
+    appleveldefs = {
+        }
+
+    interpleveldefs = {
+        'dumps':            'interp_pickler.dumps',
+        'loads':            'interp_unpickler.loads',
+        }
@@ -0,0 +1,64 @@
+""" Measure the speed of cPickle.dumps() and cPickle.loads() with protocol
+2, with the _pickle module and with the pure Python Pickler and Unpickler
+that cPickle uses without it, in MB/s of pickle data.  The payloads are a
+list of records (dicts of strs, ints and floats), a list of ints, and a
+graph of instances sharing their sub-objects.
+
+Usage:
+    pypy dumps_loads.py [repeat]
+"""
+
+import sys, os
+from cStringIO import StringIO
+import cPickle
+import _pickle
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, os.pardir, os.pardir))
+from pypy.tool.bench.timing import best_time
+
+class Node(object):
+    def __init__(self, name, children):
+        self.name = name
+        self.children = children
+
+def make_records(n):
+    return [{'id': i, 'name': 'user %d' % i, 'score': i * 0.25,
+             'tags': ['a', 'b'], 'active': i % 3 != 0} for i in range(n)]
+
+def make_graph(n):
+    leaves = [Node('leaf %d' % i, []) for i in range(n)]
+    return [Node('node %d' % i, leaves[i:i + 10]) for i in range(n)]
+
+def python_dumps(obj):
+    f = StringIO()
+    cPickle.Pickler(f, 2).dump(obj)
+    return f.getvalue()
+
+def python_loads(data):
+    return cPickle.Unpickler(StringIO(data)).load()
+
+def mbps(size, func, repeat):
+    return size / best_time(func, repeat) / 1e6
+
+def main(repeat):
+    print '%10s %10s %12s %12s %12s %12s' % (
+        'payload', 'size', 'dumps', 'dumps fast', 'loads', 'loads fast')
+    payloads = [('records', make_records(20000)),
+                ('ints', range(500000)),
+                ('graph', make_graph(5000))]
+    for name, obj in payloads:
+        data = _pickle.dumps(obj, 2)
+        assert data == python_dumps(obj)
+        print '%10s %10d %12.1f %12.1f %12.1f %12.1f' % (
+            name, len(data),
+            mbps(len(data), lambda: python_dumps(obj), repeat),
+            mbps(len(data), lambda: _pickle.dumps(obj, 2), repeat),
+            mbps(len(data), lambda: python_loads(data), repeat),
+            mbps(len(data), lambda: _pickle.loads(data), repeat))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(5)
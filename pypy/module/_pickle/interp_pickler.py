@@ -0,0 +1,781 @@
+from rpython.rlib.debug import mark_dict_non_null
+from rpython.rlib.objectmodel import compute_identity_hash, r_dict
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rstruct.ieee import pack_float
+from pypy.interpreter import gateway
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import WrappedDefault, unwrap_spec
+from pypy.interpreter.unicodehelper import PyUnicode_EncodeUTF8
+
+HIGHEST_PROTOCOL = 2
+
+# the opcodes, as in lib-python/2.7/pickle.py
+MARK            = '('
+STOP            = '.'
+POP             = '0'
+POP_MARK        = '1'
+DUP             = '2'
+FLOAT           = 'F'
+INT             = 'I'
+BININT          = 'J'
+BININT1         = 'K'
+LONG            = 'L'
+BININT2         = 'M'
+NONE            = 'N'
+PERSID          = 'P'
+BINPERSID       = 'Q'
+REDUCE          = 'R'
+STRING          = 'S'
+BINSTRING       = 'T'
+SHORT_BINSTRING = 'U'
+UNICODE         = 'V'
+BINUNICODE      = 'X'
+APPEND          = 'a'
+BUILD           = 'b'
+GLOBAL          = 'c'
+DICT            = 'd'
+EMPTY_DICT      = '}'
+APPENDS         = 'e'
+GET             = 'g'
+BINGET          = 'h'
+INST            = 'i'
+LONG_BINGET     = 'j'
+LIST            = 'l'
+EMPTY_LIST      = ']'
+OBJ             = 'o'
+PUT             = 'p'
+BINPUT          = 'q'
+LONG_BINPUT     = 'r'
+SETITEM         = 's'
+TUPLE           = 't'
+EMPTY_TUPLE     = ')'
+SETITEMS        = 'u'
+BINFLOAT        = 'G'
+
+PROTO           = '\x80'
+NEWOBJ          = '\x81'
+EXT1            = '\x82'
+EXT2            = '\x83'
+EXT4            = '\x84'
+TUPLE1          = '\x85'
+TUPLE2          = '\x86'
+TUPLE3          = '\x87'
+NEWTRUE         = '\x88'
+NEWFALSE        = '\x89'
+LONG1           = '\x8a'
+LONG4           = '\x8b'
+
+TUPLESIZE2CODE = [EMPTY_TUPLE, TUPLE1, TUPLE2, TUPLE3]
+
+# keep in sync with pickle.Pickler._BATCHSIZE
+BATCHSIZE = 1000
+
+
+def append_int4(builder, value):
+    for i in range(4):
+        builder.append(chr((value >> (8 * i)) & 0xff))
+
+def encode_long(bigint):
+    """ The two's complement little-endian bytes of 'bigint', as
+    pickle.encode_long(). """
+    if bigint.sign == 0:
+        return ''
+    if bigint.sign < 0:
+        nbits = bigint.invert().bit_length()
+    else:
+        nbits = bigint.bit_length()
+    return bigint.tobytes(nbits // 8 + 1, 'little', True)
+
+# ____________________________________________________________
+#
+# The objects that are not of one of the builtin types saved below are
+# handled like pickle.Pickler.save() does, at app-level.  The result says
+# which opcodes to write:
+#
+#   ('global', module, name, code)  GLOBAL, or EXT1/2/4 if code is not 0
+#   ('inst', cls, args, state)      OBJ or INST, then BUILD
+#   ('reduce', func, args, state, listitems, dictitems)
+#   ('newobj', cls, args, state, listitems, dictitems)
+
+app = gateway.applevel(r'''
+    from types import (ClassType, FunctionType, BuiltinFunctionType,
+                       InstanceType, ModuleType, TypeType, TupleType,
+                       StringType)
+
+    def save_global(obj, name, proto):
+        import sys
+        from pickle import PicklingError, whichmodule
+        from copy_reg import _extension_registry
+        if name is None:
+            name = obj.__name__
+        module = getattr(obj, "__module__", None)
+        if module is None:
+            module = whichmodule(obj, name)
+        try:
+            __import__(module)
+            mod = sys.modules[module]
+            klass = getattr(mod, name)
+        except (ImportError, KeyError, AttributeError):
+            raise PicklingError(
+                "Can't pickle %r: it's not found as %s.%s" %
+                (obj, module, name))
+        else:
+            if klass is not obj:
+                raise PicklingError(
+                    "Can't pickle %r: it's not the same object as %s.%s" %
+                    (obj, module, name))
+        code = 0
+        if proto >= 2:
+            code = _extension_registry.get((module, name), 0)
+        return ('global', module, name, code)
+
+    def save_reduce(obj, proto, func, args, state=None, listitems=None,
+                    dictitems=None):
+        from pickle import PicklingError
+        if not isinstance(args, TupleType):
+            raise PicklingError("args from reduce() should be a tuple")
+        if not hasattr(func, '__call__'):
+            raise PicklingError("func from reduce should be callable")
+        if proto >= 2 and getattr(func, "__name__", "") == "__newobj__":
+            cls = args[0]
+            if not hasattr(cls, "__new__"):
+                raise PicklingError(
+                    "args[0] from __newobj__ args has no __new__")
+            if obj is not None and cls is not obj.__class__:
+                raise PicklingError(
+                    "args[0] from __newobj__ args has the wrong class")
+            return ('newobj', cls, args[1:], state, listitems, dictitems)
+        return ('reduce', func, args, state, listitems, dictitems)
+
+    def reduce_object(obj, proto):
+        from pickle import PicklingError
+        from copy_reg import dispatch_table
+        t = type(obj)
+        if t is InstanceType:
+            cls = obj.__class__
+            if hasattr(obj, '__getinitargs__'):
+                args = obj.__getinitargs__()
+                len(args) # XXX Assert it's a sequence
+            else:
+                args = ()
+            try:
+                getstate = obj.__getstate__
+            except AttributeError:
+                stuff = obj.__dict__
+            else:
+                stuff = getstate()
+            return ('inst', cls, tuple(args), stuff)
+        if t is ClassType or t is BuiltinFunctionType:
+            return save_global(obj, None, proto)
+        error = None
+        if t is FunctionType:
+            try:
+                return save_global(obj, None, proto)
+            except PicklingError, e:
+                error = e
+        reduce = dispatch_table.get(t)
+        if reduce:
+            rv = reduce(obj)
+        else:
+            try:
+                issc = issubclass(t, TypeType)
+            except TypeError: # t is not a class (old Boost; see SF #502085)
+                issc = 0
+            if issc:
+                return save_global(obj, None, proto)
+            reduce = getattr(obj, "__reduce_ex__", None)
+            if reduce:
+                rv = reduce(proto)
+            else:
+                reduce = getattr(obj, "__reduce__", None)
+                if reduce:
+                    rv = reduce()
+                elif error is not None:
+                    raise error
+                else:
+                    raise PicklingError("Can't pickle %r object: %r" %
+                                        (t.__name__, obj))
+        if type(rv) is StringType:
+            return save_global(obj, rv, proto)
+        if type(rv) is not TupleType:
+            raise PicklingError("%s must return string or tuple" % reduce)
+        l = len(rv)
+        if not (2 <= l <= 5):
+            raise PicklingError("Tuple returned by %s must have "
+                                "two to five elements" % reduce)
+        return save_reduce(obj, proto, *rv)
+
+    def reduce_moduledict(obj):
+        # save module dictionary as "getattr(module, '__dict__')"
+        import sys
+        try:
+            name = obj['__name__']
+            if type(name) is not str:
+                return None
+            themodule = sys.modules[name]
+            if type(themodule) is not ModuleType:
+                return None
+            if themodule.__dict__ is not obj:
+                return None
+        except (AttributeError, KeyError, TypeError):
+            return None
+        return save_reduce(None, 0, getattr, (themodule, '__dict__'))
+''', filename=__file__)
+
+reduce_object = app.interphook('reduce_object')
+reduce_moduledict = app.interphook('reduce_moduledict')
+
+# ____________________________________________________________
+
+def _same_str(s1, s2):
+    return s1 is s2
+
+def _str_identity_hash(s):
+    return compute_identity_hash(s)
+
+
+class Pickler(object):
+    """ What pickle.Pickler does, for the builtin types, with the memo
+    indices of cPickle (starting at one).
+    """
+
+    def __init__(self, space, proto):
+        self.space = space
+        self.proto = proto
+        self.bin = proto >= 1
+        self.builder = StringBuilder()
+        # {w_obj: memo index}: a plain RPython dict compares its W_Root
+        # keys by identity, like the storage of IdentityDictStrategy
+        self.memo = {}
+        mark_dict_non_null(self.memo)
+        # {str: memo index} for the str objects, by identity of their
+        # RPython string: that is what makes two of them 'is' each other
+        # (see W_AbstractStringObject.is_w), and it is all that is left of
+        # them in the storage of the str strategies of lists and dicts
+        self.memo_str = r_dict(_same_str, _str_identity_hash)
+        self.memo_len = 1
+
+    def dump(self, w_obj):
+        if self.proto >= 2:
+            self.builder.append(PROTO)
+            self.builder.append(chr(self.proto))
+        self.save(w_obj)
+        self.builder.append(STOP)
+        return self.builder.build()
+
+    def write_put(self, index):
+        builder = self.builder
+        if not self.bin:
+            builder.append(PUT)
+            builder.append(str(index))
+            builder.append('\n')
+        elif index < 256:
+            builder.append(BINPUT)
+            builder.append(chr(index))
+        else:
+            builder.append(LONG_BINPUT)
+            append_int4(builder, index)
+
+    def write_get(self, index):
+        builder = self.builder
+        if not self.bin:
+            builder.append(GET)
+            builder.append(str(index))
+            builder.append('\n')
+        elif index < 256:
+            builder.append(BINGET)
+            builder.append(chr(index))
+        else:
+            builder.append(LONG_BINGET)
+            append_int4(builder, index)
+
+    def memoize(self, w_obj):
+        self.write_put(self.memo_len)
+        self.memo[w_obj] = self.memo_len
+        self.memo_len += 1
+
+    def save_memo_str(self, s):
+        index = self.memo_str.get(s, 0)
+        if index > 0:
+            self.write_get(index)
+            return
+        self.save_str(s)
+        self.write_put(self.memo_len)
+        self.memo_str[s] = self.memo_len
+        self.memo_len += 1
+
+    def save(self, w_obj):
+        space = self.space
+        index = self.memo.get(w_obj, 0)
+        if index > 0:
+            self.write_get(index)
+            return
+        w_type = space.type(w_obj)
+        if space.is_w(w_obj, space.w_None):
+            self.builder.append(NONE)
+        elif w_type is space.w_bool:
+            self.save_bool(space.is_true(w_obj))
+        elif w_type is space.w_int:
+            self.save_int(space.int_w(w_obj))
+        elif w_type is space.w_float:
+            self.save_float(w_obj)
+        elif w_type is space.w_str:
+            self.save_memo_str(space.str_w(w_obj))
+        elif w_type is space.w_unicode:
+            self.save_unicode(w_obj)
+            self.memoize(w_obj)
+        elif w_type is space.w_tuple:
+            self.save_tuple(w_obj)
+        elif w_type is space.w_list:
+            self.save_list(w_obj)
+        elif w_type is space.w_dict:
+            self.save_dict(w_obj)
+        elif w_type is space.w_long:
+            self.save_long(w_obj)
+        else:
+            w_reduced = reduce_object(space, w_obj, space.wrap(self.proto))
+            self.save_reduced(w_obj, w_reduced)
+
+    def save_bool(self, value):
+        if self.proto >= 2:
+            if value:
+                self.builder.append(NEWTRUE)
+            else:
+                self.builder.append(NEWFALSE)
+        elif value:
+            self.builder.append('I01\n')
+        else:
+            self.builder.append('I00\n')
+
+    def save_int(self, value):
+        builder = self.builder
+        if self.bin:
+            if 0 <= value <= 0xff:
+                builder.append(BININT1)
+                builder.append(chr(value))
+                return
+            if 0 <= value <= 0xffff:
+                builder.append(BININT2)
+                builder.append(chr(value & 0xff))
+                builder.append(chr(value >> 8))
+                return
+            if -0x80000000 <= value <= 0x7fffffff:
+                builder.append(BININT)
+                append_int4(builder, value)
+                return
+        # text pickle, or int too big to fit in signed 4-byte format
+        builder.append(INT)
+        builder.append(str(value))
+        builder.append('\n')
+
+    def save_long(self, w_obj):
+        space = self.space
+        builder = self.builder
+        if self.proto >= 2:
+            data = encode_long(space.bigint_w(w_obj))
+            if len(data) < 256:
+                builder.append(LONG1)
+                builder.append(chr(len(data)))
+            else:
+                builder.append(LONG4)
+                append_int4(builder, len(data))
+            builder.append(data)
+        else:
+            builder.append(LONG)
+            builder.append(space.str_w(space.repr(w_obj)))
+            builder.append('\n')
+
+    def save_float(self, w_obj):
+        space = self.space
+        if self.bin:
+            self.builder.append(BINFLOAT)
+            pack_float(self.builder, space.float_w(w_obj), 8, True)
+        else:
+            self.builder.append(FLOAT)
+            self.builder.append(space.str_w(space.repr(w_obj)))
+            self.builder.append('\n')
+
+    def save_str(self, s):
+        builder = self.builder
+        if self.bin:
+            if len(s) < 256:
+                builder.append(SHORT_BINSTRING)
+                builder.append(chr(len(s)))
+            else:
+                builder.append(BINSTRING)
+                append_int4(builder, len(s))
+            builder.append(s)
+        else:
+            builder.append(STRING)
+            builder.append(self.space.str_w(self.space.repr(
+                self.space.wrap(s))))
+            builder.append('\n')
+
+    def save_unicode(self, w_obj):
+        space = self.space
+        builder = self.builder
+        if self.bin:
+            data = PyUnicode_EncodeUTF8(space, space.unicode_w(w_obj))
+            builder.append(BINUNICODE)
+            append_int4(builder, len(data))
+            builder.append(data)
+        else:
+            w_obj = space.call_method(w_obj, 'replace', space.wrap(u'\\'),
+                                      space.wrap(u'\\u005c'))
+            w_obj = space.call_method(w_obj, 'replace', space.wrap(u'\n'),
+                                      space.wrap(u'\\u000a'))
+            w_data = space.call_method(w_obj, 'encode',
+                                       space.wrap('raw-unicode-escape'))
+            builder.append(UNICODE)
+            builder.append(space.str_w(w_data))
+            builder.append('\n')
+
+    def save_tuple(self, w_tuple):
+        space = self.space
+        builder = self.builder
+        items_w = space.fixedview(w_tuple)
+        n = len(items_w)
+        if n == 0:
+            if self.bin:
+                builder.append(EMPTY_TUPLE)
+            else:
+                builder.append(MARK + TUPLE)
+            return
+        if n <= 3 and self.proto >= 2:
+            for w_item in items_w:
+                self.save(w_item)
+            index = self.memo.get(w_tuple, 0)
+            if index > 0:
+                # the tuple is recursive: it was saved by its items
+                builder.append(POP * n)
+                self.write_get(index)
+            else:
+                builder.append(TUPLESIZE2CODE[n])
+                self.memoize(w_tuple)
+            return
+        builder.append(MARK)
+        for w_item in items_w:
+            self.save(w_item)
+        index = self.memo.get(w_tuple, 0)
+        if index > 0:
+            if self.bin:
+                builder.append(POP_MARK)
+            else:
+                builder.append(POP * (n + 1))
+            self.write_get(index)
+        else:
+            builder.append(TUPLE)
+            self.memoize(w_tuple)
+
+    def save_list(self, w_list):
+        space = self.space
+        if self.bin:
+            self.builder.append(EMPTY_LIST)
+        else:
+            self.builder.append(MARK + LIST)
+        self.memoize(w_list)
+        # read the storage of the int and str strategies directly
+        intlist = space.listview_int(w_list)
+        if intlist is not None:
+            self.batch_ints(intlist)
+            return
+        strlist = space.listview_str(w_list)
+        if strlist is not None:
+            self.batch_strs(strlist)
+            return
+        self.batch_appends(space.fixedview(w_list))
+
+    def batch_ints(self, intlist):
+        builder = self.builder
+        length = len(intlist)
+        if not self.bin:
+            for value in intlist:
+                self.save_int(value)
+                builder.append(APPEND)
+            return
+        for start in range(0, length, BATCHSIZE):
+            stop = min(start + BATCHSIZE, length)
+            if stop - start > 1:
+                builder.append(MARK)
+                for i in range(start, stop):
+                    self.save_int(intlist[i])
+                builder.append(APPENDS)
+            else:
+                self.save_int(intlist[start])
+                builder.append(APPEND)
+
+    def batch_strs(self, strlist):
+        builder = self.builder
+        length = len(strlist)
+        if not self.bin:
+            for s in strlist:
+                self.save_memo_str(s)
+                builder.append(APPEND)
+            return
+        for start in range(0, length, BATCHSIZE):
+            stop = min(start + BATCHSIZE, length)
+            if stop - start > 1:
+                builder.append(MARK)
+                for i in range(start, stop):
+                    self.save_memo_str(strlist[i])
+                builder.append(APPENDS)
+            else:
+                self.save_memo_str(strlist[start])
+                builder.append(APPEND)
+
+    def batch_appends(self, items_w):
+        builder = self.builder
+        length = len(items_w)
+        if not self.bin:
+            for w_item in items_w:
+                self.save(w_item)
+                builder.append(APPEND)
+            return
+        for start in range(0, length, BATCHSIZE):
+            stop = min(start + BATCHSIZE, length)
+            if stop - start > 1:
+                builder.append(MARK)
+                for i in range(start, stop):
+                    self.save(items_w[i])
+                builder.append(APPENDS)
+            else:
+                self.save(items_w[start])
+                builder.append(APPEND)
+
+    def batch_appends_iter(self, w_iter):
+        """ The same as batch_appends(), for the listitems of a reduce. """
+        space = self.space
+        builder = self.builder
+        if not self.bin:
+            while True:
+                w_item = self.next_or_none(w_iter)
+                if w_item is None:
+                    break
+                self.save(w_item)
+                builder.append(APPEND)
+            return
+        while True:
+            items_w = self.next_batch(w_iter)
+            if len(items_w) > 1:
+                builder.append(MARK)
+                for w_item in items_w:
+                    self.save(w_item)
+                builder.append(APPENDS)
+            elif items_w:
+                self.save(items_w[0])
+                builder.append(APPEND)
+            if len(items_w) < BATCHSIZE:
+                break
+
+    def save_dict(self, w_dict):
+        space = self.space
+        if space.finditem_str(w_dict, '__name__') is not None:
+            w_reduced = reduce_moduledict(space, w_dict)
+            if not space.is_w(w_reduced, space.w_None):
+                self.save_reduced(None, w_reduced)
+                return
+        if self.bin:
+            self.builder.append(EMPTY_DICT)
+        else:
+            self.builder.append(MARK + DICT)
+        self.memoize(w_dict)
+        # read the storage of the str and int strategies directly
+        keys, values_w = space.view_as_kwargs(w_dict)
+        if keys is not None:
+            self.batch_setitems_str(keys, values_w)
+            return
+        intkeys = space.listview_int(w_dict)
+        if intkeys is not None:
+            # values() is in the same order as the keys
+            self.batch_setitems_int(intkeys, space.fixedview(
+                space.call_method(w_dict, 'values')))
+            return
+        self.batch_setitems_iter(space.iter(
+            space.call_method(w_dict, 'iteritems')))
+
+    def batch_setitems_str(self, keys, values_w):
+        builder = self.builder
+        length = len(keys)
+        if not self.bin:
+            for i in range(length):
+                self.save_memo_str(keys[i])
+                self.save(values_w[i])
+                builder.append(SETITEM)
+            return
+        for start in range(0, length, BATCHSIZE):
+            stop = min(start + BATCHSIZE, length)
+            if stop - start > 1:
+                builder.append(MARK)
+            for i in range(start, stop):
+                self.save_memo_str(keys[i])
+                self.save(values_w[i])
+            if stop - start > 1:
+                builder.append(SETITEMS)
+            else:
+                builder.append(SETITEM)
+
+    def batch_setitems_int(self, keys, values_w):
+        builder = self.builder
+        length = len(keys)
+        if not self.bin:
+            for i in range(length):
+                self.save_int(keys[i])
+                self.save(values_w[i])
+                builder.append(SETITEM)
+            return
+        for start in range(0, length, BATCHSIZE):
+            stop = min(start + BATCHSIZE, length)
+            if stop - start > 1:
+                builder.append(MARK)
+            for i in range(start, stop):
+                self.save_int(keys[i])
+                self.save(values_w[i])
+            if stop - start > 1:
+                builder.append(SETITEMS)
+            else:
+                builder.append(SETITEM)
+
+    def write_setitems(self, keys_w, values_w, n):
+        builder = self.builder
+        if n > 1:
+            builder.append(MARK)
+            for i in range(n):
+                self.save(keys_w[i])
+                self.save(values_w[i])
+            builder.append(SETITEMS)
+        elif n == 1:
+            self.save(keys_w[0])
+            self.save(values_w[0])
+            builder.append(SETITEM)
+
+    def batch_setitems_iter(self, w_iter):
+        space = self.space
+        builder = self.builder
+        if not self.bin:
+            while True:
+                w_item = self.next_or_none(w_iter)
+                if w_item is None:
+                    break
+                w_key, w_value = space.fixedview(w_item, 2)
+                self.save(w_key)
+                self.save(w_value)
+                builder.append(SETITEM)
+            return
+        while True:
+            items_w = self.next_batch(w_iter)
+            keys_w = []
+            values_w = []
+            for w_item in items_w:
+                w_key, w_value = space.fixedview(w_item, 2)
+                keys_w.append(w_key)
+                values_w.append(w_value)
+            self.write_setitems(keys_w, values_w, len(items_w))
+            if len(items_w) < BATCHSIZE:
+                break
+
+    def next_or_none(self, w_iter):
+        space = self.space
+        try:
+            return space.next(w_iter)
+        except OperationError, e:
+            if not e.match(space, space.w_StopIteration):
+                raise
+            return None
+
+    def next_batch(self, w_iter):
+        items_w = []
+        while len(items_w) < BATCHSIZE:
+            w_item = self.next_or_none(w_iter)
+            if w_item is None:
+                break
+            items_w.append(w_item)
+        return items_w
+
+    def save_reduced(self, w_obj, w_reduced):
+        """ Write what reduce_object() returned for 'w_obj'. """
+        space = self.space
+        builder = self.builder
+        items_w = space.fixedview(w_reduced)
+        kind = space.str_w(items_w[0])
+        if kind == 'global':
+            self.save_global(w_obj, space.str_w(items_w[1]),
+                             space.str_w(items_w[2]), space.int_w(items_w[3]))
+        elif kind == 'inst':
+            self.save_inst(w_obj, items_w[1], items_w[2], items_w[3])
+        else:
+            assert kind == 'reduce' or kind == 'newobj'
+            self.save(items_w[1])
+            self.save(items_w[2])
+            if kind == 'newobj':
+                builder.append(NEWOBJ)
+            else:
+                builder.append(REDUCE)
+            if w_obj is not None:
+                self.memoize(w_obj)
+            if not space.is_w(items_w[4], space.w_None):
+                self.batch_appends_iter(items_w[4])
+            if not space.is_w(items_w[5], space.w_None):
+                self.batch_setitems_iter(items_w[5])
+            if not space.is_w(items_w[3], space.w_None):
+                self.save(items_w[3])
+                builder.append(BUILD)
+
+    def save_global(self, w_obj, module, name, code):
+        builder = self.builder
+        if code > 0:
+            if code <= 0xff:
+                builder.append(EXT1)
+                builder.append(chr(code))
+            elif code <= 0xffff:
+                builder.append(EXT2)
+                builder.append(chr(code & 0xff))
+                builder.append(chr(code >> 8))
+            else:
+                builder.append(EXT4)
+                append_int4(builder, code)
+            return
+        builder.append(GLOBAL)
+        builder.append(module)
+        builder.append('\n')
+        builder.append(name)
+        builder.append('\n')
+        self.memoize(w_obj)
+
+    def save_inst(self, w_obj, w_cls, w_args, w_state):
+        space = self.space
+        builder = self.builder
+        builder.append(MARK)
+        if self.bin:
+            self.save(w_cls)
+            for w_arg in space.fixedview(w_args):
+                self.save(w_arg)
+            builder.append(OBJ)
+        else:
+            for w_arg in space.fixedview(w_args):
+                self.save(w_arg)
+            builder.append(INST)
+            builder.append(space.str_w(space.getattr(
+                w_cls, space.wrap('__module__'))))
+            builder.append('\n')
+            builder.append(space.str_w(space.getattr(
+                w_cls, space.wrap('__name__'))))
+            builder.append('\n')
+        self.memoize(w_obj)
+        self.save(w_state)
+        builder.append(BUILD)
+
+
+@unwrap_spec(w_protocol=WrappedDefault(None))
+def dumps(space, w_obj, w_protocol):
+    """dumps(obj, protocol=0) -- Return a string containing an object in
+    pickle format."""
+    if space.is_w(w_protocol, space.w_None):
+        proto = 0
+    else:
+        proto = space.int_w(w_protocol)
+        if proto < 0:
+            proto = HIGHEST_PROTOCOL
+        elif proto > HIGHEST_PROTOCOL:
+            raise OperationError(space.w_ValueError, space.wrap(
+                "pickle protocol must be <= %d" % HIGHEST_PROTOCOL))
+    return space.wrap(Pickler(space, proto).dump(w_obj))
@@ -0,0 +1,392 @@
+from rpython.rlib.debug import mark_dict_non_null
+from rpython.rlib.rbigint import rbigint
+from rpython.rlib.rstruct.ieee import unpack_float
+from pypy.interpreter import gateway
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.unicodehelper import (PyUnicode_DecodeUTF8,
+                                            PyUnicode_DecodeRawUnicodeEscape)
+from pypy.module._pickle.interp_pickler import HIGHEST_PROTOCOL
+
+
+app = gateway.applevel(r'''
+    def find_class(module, name):
+        import sys
+        __import__(module)
+        mod = sys.modules[module]
+        klass = getattr(mod, name)
+        return klass
+
+    def instantiate(klass, args):
+        # as cPickle.Unpickler._instantiate()
+        import sys
+        from types import ClassType
+        from pickle import _EmptyClass
+        if (not args and
+                type(klass) is ClassType and
+                not hasattr(klass, "__getinitargs__")):
+            value = _EmptyClass()
+            value.__class__ = klass
+            return value
+        try:
+            return klass(*args)
+        except TypeError, err:
+            raise TypeError, "in constructor for %s: %s" % (
+                klass.__name__, str(err)), sys.exc_info()[2]
+
+    def get_extension(code):
+        from copy_reg import (_extension_cache, _inverted_registry)
+        nil = []
+        obj = _extension_cache.get(code, nil)
+        if obj is not nil:
+            return obj
+        key = _inverted_registry.get(code)
+        if not key:
+            raise ValueError("unregistered extension code %d" % code)
+        obj = find_class(*key)
+        _extension_cache[code] = obj
+        return obj
+
+    def build(inst, state):
+        # as cPickle.Unpickler.load_build()
+        setstate = getattr(inst, "__setstate__", None)
+        if setstate:
+            setstate(state)
+            return
+        slotstate = None
+        if isinstance(state, tuple) and len(state) == 2:
+            state, slotstate = state
+        if state:
+            d = inst.__dict__
+            try:
+                for k, v in state.iteritems():
+                    d[intern(k)] = v
+            except TypeError:
+                d.update(state)
+        if slotstate:
+            for k, v in slotstate.items():
+                setattr(inst, k, v)
+
+    def unpickling_error(msg):
+        from pickle import UnpicklingError
+        return UnpicklingError(msg)
+''', filename=__file__)
+
+find_class = app.interphook('find_class')
+instantiate = app.interphook('instantiate')
+get_extension = app.interphook('get_extension')
+build = app.interphook('build')
+unpickling_error = app.interphook('unpickling_error')
+
+
+class Unpickler(object):
+    """ What cPickle.Unpickler does, reading from a string.  The MARKs are
+    not pushed on the stack, their positions are kept in 'marks'.
+    """
+
+    def __init__(self, space, data):
+        self.space = space
+        self.data = data
+        self.pos = 0
+        self.stack = []
+        self.marks = []
+        self.memo = {}      # {memo index: w_obj}
+        mark_dict_non_null(self.memo)
+
+    def error(self, msg):
+        space = self.space
+        w_error = unpickling_error(space, space.wrap(msg))
+        return OperationError(space.type(w_error), w_error)
+
+    def eof(self):
+        space = self.space
+        return OperationError(space.w_EOFError, space.w_None)
+
+    def read(self, n):
+        start = self.pos
+        end = start + n
+        if n < 0 or end > len(self.data):
+            raise self.eof()
+        assert 0 <= start <= end
+        self.pos = end
+        return self.data[start:end]
+
+    def read1(self):
+        pos = self.pos
+        if pos >= len(self.data):
+            raise self.eof()
+        self.pos = pos + 1
+        return ord(self.data[pos])
+
+    def read_int4(self):
+        b0 = self.read1()
+        b1 = self.read1()
+        b2 = self.read1()
+        b3 = self.read1()
+        if b3 >= 0x80:
+            b3 -= 0x100
+        return b0 | (b1 << 8) | (b2 << 16) | (b3 << 24)
+
+    def readline(self):
+        """ The next line, without its newline. """
+        start = self.pos
+        end = self.data.find('\n', start)
+        if end < 0:
+            raise self.eof()
+        assert 0 <= start <= end
+        self.pos = end + 1
+        return self.data[start:end]
+
+    def push(self, w_obj):
+        self.stack.append(w_obj)
+
+    def pop(self):
+        if len(self.stack) <= self.top_mark():
+            raise self.error("unpickling stack underflow")
+        return self.stack.pop()
+
+    def top(self):
+        if len(self.stack) <= self.top_mark():
+            raise self.error("unpickling stack underflow")
+        return self.stack[-1]
+
+    def top_mark(self):
+        if self.marks:
+            return self.marks[-1]
+        return 0
+
+    def pop_mark(self):
+        """ Pops the last MARK, and returns the items pushed after it. """
+        if not self.marks:
+            raise self.error("could not find MARK")
+        k = self.marks.pop()
+        items_w = self.stack[k:]
+        del self.stack[k:]
+        return items_w
+
+    def load(self):
+        space = self.space
+        while True:
+            key = chr(self.read1())
+            if key == '.':              # STOP
+                return self.pop()
+            elif key == '(':            # MARK
+                self.marks.append(len(self.stack))
+            elif key == 'q':            # BINPUT
+                self.memo[self.read1()] = self.top()
+            elif key == 'r':            # LONG_BINPUT
+                self.memo[self.read_int4()] = self.top()
+            elif key == 'h':            # BINGET
+                self.load_get(self.read1())
+            elif key == 'j':            # LONG_BINGET
+                self.load_get(self.read_int4())
+            elif key == 'K':            # BININT1
+                self.push(space.wrap(self.read1()))
+            elif key == 'M':            # BININT2
+                low = self.read1()
+                self.push(space.wrap(low | (self.read1() << 8)))
+            elif key == 'J':            # BININT
+                self.push(space.wrap(self.read_int4()))
+            elif key == 'U':            # SHORT_BINSTRING
+                self.push(space.wrap(self.read(self.read1())))
+            elif key == 'T':            # BINSTRING
+                self.push(space.wrap(self.read(self.read_int4())))
+            elif key == 'X':            # BINUNICODE
+                data = self.read(self.read_int4())
+                self.push(space.wrap(PyUnicode_DecodeUTF8(space, data)))
+            elif key == 'G':            # BINFLOAT
+                self.push(space.wrap(unpack_float(self.read(8), True)))
+            elif key == 'N':            # NONE
+                self.push(space.w_None)
+            elif key == '\x88':         # NEWTRUE
+                self.push(space.w_True)
+            elif key == '\x89':         # NEWFALSE
+                self.push(space.w_False)
+            elif key == ']':            # EMPTY_LIST
+                self.push(space.newlist([]))
+            elif key == '}':            # EMPTY_DICT
+                self.push(space.newdict())
+            elif key == ')':            # EMPTY_TUPLE
+                self.push(space.newtuple([]))
+            elif key == '\x85':         # TUPLE1
+                w_item = self.pop()
+                self.push(space.newtuple([w_item]))
+            elif key == '\x86':         # TUPLE2
+                w_item2 = self.pop()
+                w_item1 = self.pop()
+                self.push(space.newtuple([w_item1, w_item2]))
+            elif key == '\x87':         # TUPLE3
+                w_item3 = self.pop()
+                w_item2 = self.pop()
+                w_item1 = self.pop()
+                self.push(space.newtuple([w_item1, w_item2, w_item3]))
+            elif key == 't':            # TUPLE
+                self.push(space.newtuple(self.pop_mark()))
+            elif key == 'l':            # LIST
+                self.push(space.newlist(self.pop_mark()))
+            elif key == 'd':            # DICT
+                self.push(self.load_dict(self.pop_mark()))
+            elif key == 'a':            # APPEND
+                w_item = self.pop()
+                self.load_append(self.top(), w_item)
+            elif key == 'e':            # APPENDS
+                items_w = self.pop_mark()
+                self.load_appends(self.top(), items_w)
+            elif key == 's':            # SETITEM
+                w_value = self.pop()
+                w_key = self.pop()
+                self.load_setitems(self.top(), [w_key, w_value])
+            elif key == 'u':            # SETITEMS
+                items_w = self.pop_mark()
+                self.load_setitems(self.top(), items_w)
+            elif key == 'c':            # GLOBAL
+                module = self.readline()
+                name = self.readline()
+                self.push(find_class(space, space.wrap(module),
+                                     space.wrap(name)))
+            elif key == '\x81':         # NEWOBJ
+                w_args = self.pop()
+                w_cls = self.pop()
+                w_new = space.getattr(w_cls, space.wrap('__new__'))
+                args_w = [w_cls] + space.fixedview(w_args)
+                self.push(space.call(w_new, space.newtuple(args_w)))
+            elif key == 'R':            # REDUCE
+                w_args = self.pop()
+                w_func = self.pop()
+                self.push(space.call(w_func, w_args))
+            elif key == 'b':            # BUILD
+                w_state = self.pop()
+                build(space, self.top(), w_state)
+            elif key == '\x80':         # PROTO
+                proto = self.read1()
+                if proto > HIGHEST_PROTOCOL:
+                    raise OperationError(space.w_ValueError, space.wrap(
+                        "unsupported pickle protocol: %d" % proto))
+            elif key == 'p':            # PUT
+                self.memo[self.read_index()] = self.top()
+            elif key == 'g':            # GET
+                self.load_get(self.read_index())
+            elif key == 'I':            # INT
+                line = self.readline()
+                if line == '01':
+                    self.push(space.w_True)
+                elif line == '00':
+                    self.push(space.w_False)
+                else:
+                    self.push(space.call_function(space.w_int,
+                                                  space.wrap(line)))
+            elif key == 'L':            # LONG
+                self.push(space.call_function(space.w_long,
+                                              space.wrap(self.readline()),
+                                              space.wrap(0)))
+            elif key == '\x8a':         # LONG1
+                self.load_long(self.read1())
+            elif key == '\x8b':         # LONG4
+                self.load_long(self.read_int4())
+            elif key == 'F':            # FLOAT
+                self.push(space.call_function(space.w_float,
+                                              space.wrap(self.readline())))
+            elif key == 'S':            # STRING
+                self.load_string(self.readline())
+            elif key == 'V':            # UNICODE
+                data = self.readline()
+                self.push(space.wrap(
+                    PyUnicode_DecodeRawUnicodeEscape(space, data)))
+            elif key == 'i':            # INST
+                module = self.readline()
+                name = self.readline()
+                w_cls = find_class(space, space.wrap(module),
+                                   space.wrap(name))
+                w_args = space.newtuple(self.pop_mark())
+                self.push(instantiate(space, w_cls, w_args))
+            elif key == 'o':            # OBJ
+                items_w = self.pop_mark()
+                if not items_w:
+                    raise self.error("unpickling stack underflow")
+                w_args = space.newtuple(items_w[1:])
+                self.push(instantiate(space, items_w[0], w_args))
+            elif key == '\x82':         # EXT1
+                self.push(get_extension(space, space.wrap(self.read1())))
+            elif key == '\x83':         # EXT2
+                low = self.read1()
+                code = low | (self.read1() << 8)
+                self.push(get_extension(space, space.wrap(code)))
+            elif key == '\x84':         # EXT4
+                code = self.read_int4()
+                self.push(get_extension(space, space.wrap(code)))
+            elif key == '0':            # POP
+                if self.marks and self.marks[-1] == len(self.stack):
+                    self.marks.pop()
+                else:
+                    self.pop()
+            elif key == '1':            # POP_MARK
+                self.pop_mark()
+            elif key == '2':            # DUP
+                self.push(self.top())
+            elif key == 'P' or key == 'Q':      # PERSID, BINPERSID
+                raise self.error("A load persistent id instruction was "
+                                 "encountered, but no persistent_load "
+                                 "function was specified.")
+            else:
+                raise self.error("invalid load key, '%s'." % key)
+
+    def read_index(self):
+        line = self.readline()
+        try:
+            return int(line)
+        except ValueError:
+            raise OperationError(self.space.w_ValueError, self.space.wrap(
+                "invalid memo index: %s" % line))
+
+    def load_get(self, index):
+        w_obj = self.memo.get(index, None)
+        if w_obj is None:
+            raise OperationError(self.space.w_KeyError,
+                                 self.space.wrap(index))
+        self.push(w_obj)
+
+    def load_long(self, n):
+        bigint = rbigint.frombytes(self.read(n), 'little', True)
+        self.push(self.space.newlong_from_rbigint(bigint))
+
+    def load_string(self, rep):
+        space = self.space
+        if (len(rep) < 2 or rep[0] != rep[-1] or
+                (rep[0] != "'" and rep[0] != '"')):
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("insecure string pickle"))
+        end = len(rep) - 1
+        assert end >= 1
+        w_rep = space.wrap(rep[1:end])
+        self.push(space.call_method(w_rep, 'decode',
+                                    space.wrap('string-escape')))
+
+    def load_dict(self, items_w):
+        space = self.space
+        if len(items_w) % 2:
+            raise self.error("odd number of items for DICT")
+        w_dict = space.newdict()
+        self.load_setitems(w_dict, items_w)
+        return w_dict
+
+    def load_append(self, w_list, w_item):
+        self.space.call_method(w_list, 'append', w_item)
+
+    def load_appends(self, w_list, items_w):
+        # a new list gets the strategy of its items at once, and extending
+        # an empty list takes over the strategy of the new list
+        space = self.space
+        space.call_method(w_list, 'extend', space.newlist(items_w))
+
+    def load_setitems(self, w_dict, items_w):
+        space = self.space
+        if len(items_w) % 2:
+            raise self.error("odd number of items for SETITEMS")
+        for i in range(0, len(items_w), 2):
+            space.setitem(w_dict, items_w[i], items_w[i + 1])
+
+
+@unwrap_spec(data='bufferstr')
+def loads(space, data):
+    """loads(string) -- Load a pickle from the given string"""
+    return Unpickler(space, data).load()
@@ -0,0 +1,135 @@
+class AppTestPickler(object):
+    spaceconfig = dict(usemodules=['_pickle', 'struct', 'binascii',
+                                   'itertools', '_collections'])
+
+    def setup_class(cls):
+        cls.w_python_dumps = cls.space.appexec([], """():
+            import cPickle
+            from StringIO import StringIO
+            def python_dumps(obj, proto):
+                f = StringIO()
+                cPickle.Pickler(f, proto).dump(obj)
+                return f.getvalue()
+            return python_dumps
+        """)
+        cls.w_mod = cls.space.appexec([], """():
+            import sys, imp
+            mod = imp.new_module('pickletest_mod')
+            exec '''if 1:
+                class Point(object):
+                    def __init__(self, x, y):
+                        self.x = x
+                        self.y = y
+
+                class Classic:
+                    pass
+            ''' in mod.__dict__
+            sys.modules['pickletest_mod'] = mod
+            return mod
+        """)
+
+    def w_check(self, obj):
+        import _pickle, pickle
+        for proto in range(3):
+            data = _pickle.dumps(obj, proto)
+            assert data == self.python_dumps(obj, proto)
+            assert pickle.loads(data) == obj
+
+    def w_check_recursive(self, obj):
+        import _pickle
+        for proto in range(3):
+            assert _pickle.dumps(obj, proto) == self.python_dumps(obj, proto)
+
+    def test_scalars(self):
+        for obj in [None, True, False, 0, 1, 255, 256, 65535, 65536, -1,
+                    2 ** 31 - 1, -2 ** 31, 2 ** 40, -2 ** 40, 0L, 5L, -128L,
+                    255L, -256L, 10 ** 30, -10 ** 30, 0.5, -1e100, 1e-300,
+                    'abc', '', 'x' * 300, 'a\nb\\c\'"', u'abc',
+                    u'\u20ac\n\\x', u'\U0001d120']:
+            self.check(obj)
+
+    def test_containers(self):
+        self.check(())
+        self.check((1,))
+        self.check((1, 2, 'x'))
+        self.check((1, 2, 3, 4))
+        self.check([])
+        self.check([1, 2, 3])
+        self.check(range(1001))
+        self.check(['a', 'b', 'c'])
+        self.check(['a', 'b', 'a'])
+        self.check(['x%d' % i for i in range(1001)])
+        self.check([1, 'a', None, 2.5, [], {}])
+        self.check({})
+        self.check({'a': 1})
+        self.check(dict([(i, str(i)) for i in range(1001)]))
+        self.check(dict([('x%d' % i, [i]) for i in range(1001)]))
+        self.check({'a': 1, 'b': 'a'})
+        self.check({5: None})
+        self.check({1: [(2, 3)], 'x': {'y': u'z'}})
+
+    def test_shared(self):
+        import _pickle, pickle
+        s = 'shared'
+        l = [1]
+        obj = [s, s, l, (l, s), {'k': l}]
+        self.check(obj)
+        res = pickle.loads(_pickle.dumps(obj, 2))
+        assert res[0] is res[1]
+        assert res[2] is res[3][0] is res[4]['k']
+
+    def test_recursive(self):
+        l = []
+        l.append(l)
+        self.check_recursive(l)
+        d = {}
+        d[1] = d
+        self.check_recursive(d)
+        l = []
+        t = (l, 1)
+        l.append(t)
+        self.check_recursive(t)
+        t = (l, 1, 2, 3, 4)
+        l[0] = t
+        self.check_recursive(t)
+
+    def test_objects(self):
+        import _pickle, pickle, collections, os
+        self.check(collections.OrderedDict([(1, 2), (3, 4)]))
+        self.check(collections.deque([1, 2, 3]))
+        self.check([len, os.path.join, collections.deque])
+        self.check(set([1, 2]))
+        Point = self.mod.Point
+        res = pickle.loads(_pickle.dumps(Point(1, 2), 2))
+        assert type(res) is Point
+        assert (res.x, res.y) == (1, 2)
+
+    def test_classic_instance(self):
+        import _pickle, pickle
+        Classic = self.mod.Classic
+        obj = Classic()
+        obj.a = 5
+        for proto in range(3):
+            data = _pickle.dumps(obj, proto)
+            assert data == self.python_dumps(obj, proto)
+            res = pickle.loads(data)
+            assert res.__class__ is Classic
+            assert res.a == 5
+
+    def test_errors(self):
+        import _pickle, pickle
+        class Local(object):
+            pass
+        raises(pickle.PicklingError, _pickle.dumps, Local)
+        raises(ValueError, _pickle.dumps, 1, 3)
+        assert _pickle.dumps(1, -1) == _pickle.dumps(1, 2)
+        assert _pickle.dumps(1) == _pickle.dumps(1, 0)
+
+    def test_cpickle(self):
+        import cPickle, _pickle
+        from StringIO import StringIO
+        assert cPickle.dumps([1, 'a'], 2) == _pickle.dumps([1, 'a'], 2)
+        f = StringIO()
+        cPickle.dump({'a': 1}, f, 2)
+        assert f.getvalue() == _pickle.dumps({'a': 1}, 2)
+        assert cPickle.loads(f.getvalue()) == {'a': 1}
@@ -0,0 +1,130 @@
+class AppTestUnpickler(object):
+    spaceconfig = dict(usemodules=['_pickle', 'struct', 'binascii'])
+
+    def setup_class(cls):
+        cls.w_mod = cls.space.appexec([], """():
+            import sys, imp
+            mod = imp.new_module('unpickletest_mod')
+            exec '''if 1:
+                class Point(object):
+                    def __init__(self, x, y):
+                        self.x = x
+                        self.y = y
+                    def __eq__(self, other):
+                        return self.__dict__ == other.__dict__
+
+                class Slotted(object):
+                    __slots__ = ('a',)
+
+                class Classic:
+                    def __eq__(self, other):
+                        return self.__dict__ == other.__dict__
+
+                class WithInitArgs:
+                    def __init__(self, a):
+                        self.a = a
+                    def __getinitargs__(self):
+                        return (self.a,)
+                    def __eq__(self, other):
+                        return self.a == other.a
+            ''' in mod.__dict__
+            sys.modules['unpickletest_mod'] = mod
+            return mod
+        """)
+
+    def w_check(self, obj):
+        import _pickle, pickle
+        for proto in range(3):
+            res = _pickle.loads(pickle.dumps(obj, proto))
+            assert type(res) is type(obj)
+            assert res == obj
+
+    def test_scalars(self):
+        for obj in [None, True, False, 0, 1, 255, 256, 65535, 65536, -1,
+                    2 ** 31 - 1, -2 ** 31, 2 ** 40, -2 ** 40, 0L, 5L, -128L,
+                    255L, -256L, 10 ** 30, -10 ** 30, 0.5, -1e100, 1e-300,
+                    'abc', '', 'x' * 300, 'a\nb\\c\'"', u'abc',
+                    u'\u20ac\n\\x', u'\U0001d120']:
+            self.check(obj)
+
+    def test_containers(self):
+        self.check(())
+        self.check((1,))
+        self.check((1, 2, 3, 4))
+        self.check([])
+        self.check(range(1001))
+        self.check(['a', 2, None])
+        self.check({})
+        self.check(dict([(str(i), i) for i in range(1001)]))
+        self.check({1: [(2, 3)], 'x': {'y': u'z'}})
+
+    def test_shared_and_recursive(self):
+        import _pickle, pickle
+        l = [1]
+        res = _pickle.loads(pickle.dumps([l, l, (l,)], 2))
+        assert res[0] is res[1] is res[2][0]
+        l = []
+        l.append(l)
+        for proto in range(3):
+            res = _pickle.loads(pickle.dumps(l, proto))
+            assert res[0] is res
+        t = ([], 1)
+        t[0].append(t)
+        for proto in range(3):
+            res = _pickle.loads(pickle.dumps(t, proto))
+            assert res[0][0] is res
+
+    def test_objects(self):
+        import _pickle, pickle
+        mod = self.mod
+        self.check(mod.Point(1, [2]))
+        self.check(mod.Classic())
+        self.check(mod.WithInitArgs(5))
+        obj = mod.Slotted()
+        obj.a = 42
+        res = _pickle.loads(pickle.dumps(obj, 2))
+        assert type(res) is mod.Slotted
+        assert res.a == 42
+        self.check(set([1, 2]))
+        for proto in range(3):
+            res = _pickle.loads(pickle.dumps([len, mod.Point], proto))
+            assert res == [len, mod.Point]
+
+    def test_extension(self):
+        import _pickle, pickle, copy_reg
+        copy_reg.add_extension('unpickletest_mod', 'Point', 0x1234)
+        try:
+            data = pickle.dumps(self.mod.Point, 2)
+            assert '\x83' in data
+            assert _pickle.loads(data) is self.mod.Point
+        finally:
+            copy_reg.remove_extension('unpickletest_mod', 'Point', 0x1234)
+
+    def test_opcodes(self):
+        import _pickle
+        assert _pickle.loads('(K\x01K\x020.') == 1
+        assert _pickle.loads('K\x012\x86.') == (1, 1)
+        assert _pickle.loads('K\x01(K\x02K\x031.') == 1
+        assert _pickle.loads('(K\x01l.') == [1]
+        assert _pickle.loads('(K\x01K\x02d.') == {1: 2}
+        assert _pickle.loads("S'a\\nb'\np0\n0g0\n.") == 'a\nb'
+        assert _pickle.loads('I42\nI01\n\x86.') == (42, True)
+        assert _pickle.loads('L12L\n.') == 12L
+        assert _pickle.loads('F1.5\n.') == 1.5
+        assert _pickle.loads('c__builtin__\nlen\n.') is len
+        assert _pickle.loads('c__builtin__\nint\nU\x0242\x85R.') == 42
+
+    def test_errors(self):
+        import _pickle, pickle
+        raises(EOFError, _pickle.loads, '')
+        raises(EOFError, _pickle.loads, 'K')
+        raises(EOFError, _pickle.loads, 'K\x01')
+        raises(EOFError, _pickle.loads, 'S\'abc')
+        raises(pickle.UnpicklingError, _pickle.loads, '.')
+        raises(pickle.UnpicklingError, _pickle.loads, 'K\x01t.')
+        raises(pickle.UnpicklingError, _pickle.loads, 'z')
+        raises(pickle.UnpicklingError, _pickle.loads, 'U\x01aQ.')
+        raises(KeyError, _pickle.loads, 'h\x05.')
+        raises(ValueError, _pickle.loads, '\x80\x03N.')
+        raises(ValueError, _pickle.loads, "S'abc\n.")
+        raises(ImportError, _pickle.loads, 'cno_such_module\nx\n.')
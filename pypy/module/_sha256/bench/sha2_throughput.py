@@ -0,0 +1,49 @@
+""" Measure the hashing throughput of the _sha256 and _sha512 modules
+against the pure Python versions in lib_pypy, in MB/s, for buffers of
+64 bytes (a token), 4KB (a page) and 1MB (a file).
+
+Usage:
+    pypy sha2_throughput.py [repeat]
+"""
+
+import sys, os, imp
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                    os.pardir, os.pardir, os.pardir, os.pardir)
+lib_pypy = os.path.join(root, 'lib_pypy')
+
+sys.path.insert(0, root)
+from pypy.tool.bench.timing import best_time
+
+def load_pure(name):
+    return imp.load_source(name + '_pure', os.path.join(lib_pypy,
+                                                        name + '.py'))
+
+import _sha256, _sha512
+pure_sha256 = load_pure('_sha256')
+pure_sha512 = load_pure('_sha512')
+
+def mbps(size, func, repeat):
+    return size / best_time(func, repeat) / 1e6
+
+def main(repeat):
+    print '%10s %12s %12s %12s %12s' % (
+        'size', 'sha256 pure', 'sha256', 'sha512 pure', 'sha512')
+    for size in [64, 4096, 1048576]:
+        data = os.urandom(size)
+        def speed(cls, total):
+            n = max(1, total // size)
+            func = lambda: [cls(data).digest() for i in range(n)]
+            return mbps(n * size, func, repeat)
+        print '%10d %12.1f %12.1f %12.1f %12.1f' % (
+            size,
+            speed(pure_sha256.sha256, 100000),
+            speed(_sha256.sha256, 10000000),
+            speed(pure_sha512.sha512, 100000),
+            speed(_sha512.sha512, 10000000))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(5)
@@ -0,0 +1,94 @@
+"""
+The hash types of the _sha256 and _sha512 modules.  They only differ by
+the RPython class they are built on, rsha256.RSHA256 or rsha512.RSHA512,
+and by the variant of it with another initial state and a shorter digest.
+"""
+
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.typedef import TypeDef
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.pyopcode import checked_settaint
+
+
+def make_sha_classes(RSHA, RVariant, name, variant_name, block_size):
+    """Return the app-level classes for the hash 'RSHA' and its variant
+    'RVariant', a subclass of it, named 'name' and 'variant_name'."""
+
+    class W_SHA(Wrappable, RSHA):
+        """
+        A subclass of an RSHA class that can be exposed to app-level.  The
+        taints of all the strings passed to update() are carried over to
+        the digests.
+        """
+
+        def __init__(self, space):
+            self.space = space
+            self.input_taints = None
+            self._init()
+
+        def update_w(self, w_string):
+            self.update(self.space.bufferstr_w(w_string))
+            if w_string.is_tainted():
+                if self.input_taints is None:
+                    self.input_taints = {}
+                self.input_taints.update(w_string.gettaint_unwrapped())
+
+        def digest_w(self):
+            return checked_settaint(self.space.wrap(self.digest()),
+                                    self.space, self.input_taints)
+
+        def hexdigest_w(self):
+            return checked_settaint(self.space.wrap(self.hexdigest()),
+                                    self.space, self.input_taints)
+
+        def _new_empty(self):
+            return W_SHA(self.space)
+
+        def copy_w(self):
+            clone = self._new_empty()
+            clone._copyfrom(self)
+            if self.input_taints is not None:
+                clone.input_taints = self.input_taints.copy()
+            return self.space.wrap(clone)
+
+    class W_Variant(W_SHA):
+        digest_size = RVariant.digest_size
+        _initial_state = RVariant._initial_state
+
+        def _new_empty(self):
+            return W_Variant(self.space)
+
+    W_SHA.__name__ = 'W_' + name.upper()
+    W_Variant.__name__ = 'W_' + variant_name.upper()
+    W_SHA.typedef = make_typedef(W_SHA, name, block_size)
+    W_Variant.typedef = make_typedef(W_Variant, variant_name, block_size)
+    return W_SHA, W_Variant
+
+
+def make_new(W_Class):
+    def descr_new(space, w_subtype, w_string=None):
+        w_sha = space.allocate_instance(W_Class, w_subtype)
+        sha = space.interp_w(W_Class, w_sha)
+        W_Class.__init__(sha, space)
+        if w_string is not None:
+            sha.update_w(w_string)
+        return w_sha
+    descr_new.func_name = 'descr_new_' + W_Class.__name__
+    return interp2app(descr_new)
+
+def make_typedef(W_Class, name, block_size):
+    return TypeDef(
+        name,
+        __new__   = make_new(W_Class),
+        update    = interp2app(W_Class.update_w),
+        digest    = interp2app(W_Class.digest_w),
+        hexdigest = interp2app(W_Class.hexdigest_w),
+        copy      = interp2app(W_Class.copy_w),
+        digest_size = W_Class.digest_size,
+        digestsize = W_Class.digest_size,
+        name = name,
+        block_size = block_size,
+        __doc__   = """%s([string]) -> return a new %s hash object.
+
+If string is present, the method call update(string) is made.""" % (
+            name, name.upper()))
@@ -0,0 +1,5 @@
+from rpython.rlib import rsha256
+from pypy.module._sha256.interp_sha2 import make_sha_classes
+
+W_SHA256, W_SHA224 = make_sha_classes(rsha256.RSHA256, rsha256.RSHA224,
+                                      'sha256', 'sha224', 64)
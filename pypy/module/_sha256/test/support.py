@@ -0,0 +1,80 @@
+"""
+The tests shared by the _sha256 and _sha512 modules.
+"""
+
+
+class BaseAppTestSHA2(object):
+    """The tests of a module with the hash 'names[0]' and its variant
+    'names[1]'; 'vectors' is a list of (name, data, hexdigest)."""
+
+    def setup_class(cls):
+        space = cls.space
+        cls.w_modname = space.wrap(cls.modname)
+        cls.w_names = space.wrap(cls.names)
+        cls.w_digest_sizes = space.wrap(cls.digest_sizes)
+        cls.w_block_size = space.wrap(cls.block_size)
+        cls.w_vectors = space.wrap(cls.vectors)
+
+    def test_digest_size(self):
+        mod = __import__(self.modname)
+        name, variant = self.names
+        size, variant_size = self.digest_sizes
+        assert getattr(mod, name).digest_size == size
+        assert getattr(mod, name)().digestsize == size
+        assert getattr(mod, name)().block_size == self.block_size
+        assert getattr(mod, variant).digest_size == variant_size
+        assert getattr(mod, variant)().name == variant
+
+    def test_vectors(self):
+        mod = __import__(self.modname)
+        for name, data, expected in self.vectors:
+            cls = getattr(mod, name)
+            d = cls(data)
+            assert d.hexdigest() == expected
+            assert d.digest() == expected.decode('hex')
+            d = cls()
+            for c in data:
+                d.update(c)
+            assert d.hexdigest() == expected
+            assert type(d.copy()) is cls
+
+    def test_copy(self):
+        variant = getattr(__import__(self.modname), self.names[1])
+        d1 = variant("abc" * 50)
+        d2 = d1.copy()
+        d1.update("def")
+        d2.update("def")
+        assert d1.digest() == d2.digest()
+        d2.update("x")
+        assert d1.digest() != d2.digest()
+        assert d1.digest() == variant("abc" * 50 + "def").digest()
+
+    def test_buffer(self):
+        cls = getattr(__import__(self.modname), self.names[0])
+        d1 = cls(buffer("abcde"))
+        d1.update(buffer("jkl"))
+        assert d1.digest() == cls("abcdejkl").digest()
+
+    def test_hashlib(self):
+        import hashlib
+        mod = __import__(self.modname)
+        for name in self.names:
+            h = hashlib.new(name, "x" * 1000)
+            assert h.hexdigest() == getattr(mod, name)(
+                "x" * 1000).hexdigest()
+
+    def test_taint(self):
+        from __pypy__.taint import add_taint, get_taint
+        mod = __import__(self.modname)
+        cls = getattr(mod, self.names[0])
+        variant = getattr(mod, self.names[1])
+        data = ''.join(['just a ', 'test string'])
+        add_taint(data, 5)
+        d = cls('plain')
+        assert get_taint(d.digest()) == []
+        d.update(data)
+        assert get_taint(d.digest()) == [5]
+        assert get_taint(d.hexdigest()) == [5]
+        assert get_taint(d.copy().hexdigest()) == [5]
+        assert get_taint(variant(data).digest()) == [5]
+        assert get_taint(variant('plain').digest()) == []
@@ -0,0 +1,21 @@
+"""
+Tests for the sha224 and sha256 types of the _sha256 module.
+"""
+
+from pypy.module._sha256.test.support import BaseAppTestSHA2
+
+
+class AppTestSHA256(BaseAppTestSHA2):
+    spaceconfig = dict(usemodules=['_sha256', 'struct', 'binascii'])
+    modname = '_sha256'
+    names = ('sha256', 'sha224')
+    digest_sizes = (32, 28)
+    block_size = 64
+    vectors = [
+        ('sha256', "",
+         "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"),
+        ('sha256', "just a test string",
+         "d7b553c6f09ac85d142415f857c5310f3bbbe7cdd787cce4b985acedd585266f"),
+        ('sha224', "abc",
+         "23097d223405d8228642a477bda255b32aadbce4bda0b3f7e36c9da7"),
+        ]
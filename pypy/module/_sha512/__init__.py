@@ -0,0 +1,21 @@
+"""
+Mixed-module definition for the _sha512 module.
+Note that there is also a pure Python implementation in lib_pypy/_sha512.py;
+the present mixed-module version takes precedence if it is enabled.
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """\
+This module implements the SHA-384 and SHA-512 secure hash algorithms
+for hashlib, when OpenSSL is not available."""
+
+    interpleveldefs = {
+        'sha512': 'interp_sha512.W_SHA512',
+        'sha384': 'interp_sha512.W_SHA384',
+        }
+
+    appleveldefs = {
+        }
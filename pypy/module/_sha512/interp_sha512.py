@@ -0,0 +1,5 @@
+from rpython.rlib import rsha512
+from pypy.module._sha256.interp_sha2 import make_sha_classes
+
+W_SHA512, W_SHA384 = make_sha_classes(rsha512.RSHA512, rsha512.RSHA384,
+                                      'sha512', 'sha384', 128)
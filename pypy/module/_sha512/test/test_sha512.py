@@ -0,0 +1,24 @@
+"""
+Tests for the sha384 and sha512 types of the _sha512 module.
+"""
+
+from pypy.module._sha256.test.support import BaseAppTestSHA2
+
+
+class AppTestSHA512(BaseAppTestSHA2):
+    spaceconfig = dict(usemodules=['_sha512', 'struct', 'binascii'])
+    modname = '_sha512'
+    names = ('sha512', 'sha384')
+    digest_sizes = (64, 48)
+    block_size = 128
+    vectors = [
+        ('sha512', "",
+         "cf83e1357eefb8bdf1542850d66d8007d620e4050b5715dc83f4a921d36ce9ce"
+         "47d0d13c5d85f2b0ff8318d2877eec2f63b931bd47417a81a538327af927da3e"),
+        ('sha512', "just a test string",
+         "68be4c6664af867dd1d01c8d77e963d87d77b702400c8fabae355a41b8927a5a"
+         "5533a7f1c28509bbd65c5f3ac716f33be271fbda0ca018b71a84708c9fae8a53"),
+        ('sha384', "abc",
+         "cb00753f45a35e8bb5a03d699ac65007272c32ab0eded163"
+         "1a8b605a43ff5bed8086072ba1e7cc2358baeca134c825a7"),
+        ]
@@ -0,0 +1,84 @@
+""" Measure the MB/s of a TCP transfer over the loopback interface:
+sendall() of a string and recv() into new strings, against sendall()
+of an array.array and recv_into() a preallocated array or bytearray,
+which go straight between the socket and the buffer's memory.
+
+Usage:
+    pypy loopback.py [size_in_MB [repeat]]
+"""
+
+import sys, os, socket, thread
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, os.pardir, os.pardir))
+from pypy.tool.bench.timing import best_time
+
+CHUNK = 1024 * 1024
+BUFSIZE = 65536
+
+def connection():
+    serv = socket.socket()
+    serv.bind(('127.0.0.1', 0))
+    serv.listen(1)
+    cli = socket.socket()
+    cli.connect(serv.getsockname())
+    conn, addr = serv.accept()
+    serv.close()
+    return cli, conn
+
+def transfer(data, chunks, receive):
+    def run():
+        cli, conn = connection()
+        def send():
+            for i in range(chunks):
+                cli.sendall(data)
+            cli.close()
+        lock = thread.allocate_lock()
+        lock.acquire()
+        def sender():
+            try:
+                send()
+            finally:
+                lock.release()
+        thread.start_new_thread(sender, ())
+        received = receive(conn)
+        lock.acquire()
+        conn.close()
+        assert received == chunks * len(data)
+    return run
+
+def recv_strings(conn):
+    received = 0
+    while True:
+        data = conn.recv(BUFSIZE)
+        if not data:
+            return received
+        received += len(data)
+
+def recv_into(buf):
+    def receive(conn):
+        received = 0
+        while True:
+            n = conn.recv_into(buf)
+            if not n:
+                return received
+            received += n
+    return receive
+
+def main(size, repeat):
+    chunks = size * 1024 * 1024 // CHUNK
+    cases = [
+        ('str', 'x' * CHUNK, recv_strings),
+        ('array', array('c', 'x' * CHUNK),
+                  recv_into(array('c', '\0' * BUFSIZE))),
+        ('bytearray', array('c', 'x' * CHUNK), recv_into(bytearray(BUFSIZE))),
+    ]
+    print '%d MB' % (chunks * CHUNK // (1024 * 1024))
+    for name, data, receive in cases:
+        best = best_time(transfer(data, chunks, receive), repeat)
+        print '%10s %10.1f MB/s' % (name, chunks * CHUNK / best / 1e6)
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [1024, 3][len(args):]))
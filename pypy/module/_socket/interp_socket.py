@@ -18,6 +18,30 @@ class SignalChecker:
         self.space.getexecutioncontext().checksignals()
 
 
+def has_raw_address(buf):
+    try:
+        buf.get_raw_address()
+    except ValueError:
+        return False
+    return True
+
+def raw_send_buffer(space, w_data):
+    """The Buffer of 'w_data' if its memory can be sent without a copy
+    (arrays, memoryviews of them...), or None to use bufferstr_w().
+    It must be pinned while a call that releases the GIL uses it."""
+    if space.isinstance_w(w_data, space.w_basestring):
+        return None
+    try:
+        buf = space.buffer_w(w_data)
+    except OperationError, e:
+        if not e.match(space, space.w_TypeError):
+            raise
+        return None
+    if not has_raw_address(buf):
+        return None
+    return buf
+
+
 # XXX Hack to seperate rpython and pypy
 def addr_as_object(addr, fd, space):
     if isinstance(addr, rsocket.INETAddress):
@@ -326,22 +350,31 @@ class W_RSocket(Wrappable, RSocket):
         except SocketError, e:
             raise converted_error(space, e)
 
-    @unwrap_spec(data='bufferstr', flags=int)
-    def send_w(self, space, data, flags=0):
+    @unwrap_spec(flags=int)
+    def send_w(self, space, w_data, flags=0):
         """send(data[, flags]) -> count
 
         Send a data string to the socket.  For the optional flags
         argument, see the Unix manual.  Return the number of bytes
         sent; this may be less than len(data) if the network is busy.
         """
+        buf = raw_send_buffer(space, w_data)
         try:
-            count = self.send(data, flags)
+            if buf is not None:
+                buf.pin()
+                try:
+                    count = self.send_raw(buf.get_raw_address(),
+                                          buf.getlength(), flags)
+                finally:
+                    buf.unpin()
+            else:
+                count = self.send(space.bufferstr_w(w_data), flags)
         except SocketError, e:
             raise converted_error(space, e)
         return space.wrap(count)
 
-    @unwrap_spec(data='bufferstr', flags=int)
-    def sendall_w(self, space, data, flags=0):
+    @unwrap_spec(flags=int)
+    def sendall_w(self, space, w_data, flags=0):
         """sendall(data[, flags])
 
         Send a data string to the socket.  For the optional flags
@@ -349,8 +382,17 @@ class W_RSocket(Wrappable, RSocket):
         until all data is sent.  If an error occurs, it's impossible
         to tell how much data has been sent.
         """
+        buf = raw_send_buffer(space, w_data)
         try:
-            count = self.sendall(data, flags, SignalChecker(space))
+            if buf is not None:
+                buf.pin()
+                try:
+                    self.sendall_raw(buf, flags, SignalChecker(space))
+                finally:
+                    buf.unpin()
+            else:
+                self.sendall(space.bufferstr_w(w_data), flags,
+                             SignalChecker(space))
         except SocketError, e:
             raise converted_error(space, e)
 
@@ -428,9 +470,20 @@ class W_RSocket(Wrappable, RSocket):
     def recv_into_w(self, space, w_buffer, nbytes=0, flags=0):
         rwbuffer = space.rwbuffer_w(w_buffer)
         lgt = rwbuffer.getlength()
+        if nbytes < 0:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("negative buffersize in recv_into"))
         if nbytes == 0 or nbytes > lgt:
             nbytes = lgt
         try:
+            if has_raw_address(rwbuffer):
+                rwbuffer.pin()
+                try:
+                    count = self.recv_raw(rwbuffer.get_raw_address(), nbytes,
+                                          flags)
+                finally:
+                    rwbuffer.unpin()
+                return space.wrap(count)
             return space.wrap(self.recvinto(rwbuffer, nbytes, flags))
         except SocketError, e:
             raise converted_error(space, e)
@@ -439,10 +492,21 @@ class W_RSocket(Wrappable, RSocket):
     def recvfrom_into_w(self, space, w_buffer, nbytes=0, flags=0):
         rwbuffer = space.rwbuffer_w(w_buffer)
         lgt = rwbuffer.getlength()
+        if nbytes < 0:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("negative buffersize in recvfrom_into"))
         if nbytes == 0 or nbytes > lgt:
             nbytes = lgt
         try:
-            readlgt, addr = self.recvfrom_into(rwbuffer, nbytes, flags)
+            if has_raw_address(rwbuffer):
+                rwbuffer.pin()
+                try:
+                    readlgt, addr = self.recvfrom_raw(
+                        rwbuffer.get_raw_address(), nbytes, flags)
+                finally:
+                    rwbuffer.unpin()
+            else:
+                readlgt, addr = self.recvfrom_into(rwbuffer, nbytes, flags)
             if addr:
                 w_addr = addr_as_object(addr, self.fd, space)
             else:
@@ -669,6 +669,43 @@ class AppTestSocketTCP:
         msg = buf.tostring()[:len(MSG)]
         assert msg == MSG
 
+    def test_recv_into_buffers(self):
+        import socket
+        import array
+        cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        cli.connect(self.serv.getsockname())
+        conn, addr = self.serv.accept()
+        conn.sendall('abcdefgh')
+        buf = array.array('c', ' ' * 6)
+        assert cli.recv_into(memoryview(buf)[2:], 3) == 3
+        assert buf.tostring() == '  abc '
+        buf = bytearray(8)
+        assert cli.recv_into(buf, 2) == 2
+        assert buf == 'de' + '\0' * 6
+        nbytes, addr = cli.recvfrom_into(memoryview(buf)[4:])
+        assert nbytes == 3
+        assert buf == 'de\0\0fgh\0'
+        buf = array.array('c', ' ' * 4)
+        raises(ValueError, cli.recv_into, buf, -1)
+
+    def test_send_buffers(self):
+        import socket
+        import array
+        cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        cli.connect(self.serv.getsockname())
+        conn, addr = self.serv.accept()
+        data = array.array('c', 'x' * 100000 + 'end')
+        cli.sendall(data)
+        cli.sendall(memoryview(data)[-3:])
+        assert cli.send(bytearray('ab')) == 2
+        cli.sendall(array.array('i', [0x01020304]))
+        expected = ('x' * 100000 + 'end' + 'end' + 'ab' +
+                    array.array('i', [0x01020304]).tostring())
+        received = ''
+        while len(received) < len(expected):
+            received += conn.recv(65536)
+        assert received == expected
+
     def test_family(self):
         import socket
         cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
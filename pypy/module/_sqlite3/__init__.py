@@ -0,0 +1,50 @@
+from pypy.interpreter.mixedmodule import MixedModule
+from pypy.module._sqlite3 import csqlite
+
+
+class Module(MixedModule):
+    """The interpreter-level binding to SQLite used by the sqlite3 package.
+
+Statements are prepared once and kept in a per-connection cache, rows are
+built directly as tuples, and Connection.set_taint_auditor() gets to see
+the taint of every parameter at the time it is bound."""
+
+    appleveldefs = {
+        'Error':              'app_sqlite3.Error',
+        'Warning':            'app_sqlite3.Warning',
+        'InterfaceError':     'app_sqlite3.InterfaceError',
+        'DatabaseError':      'app_sqlite3.DatabaseError',
+        'InternalError':      'app_sqlite3.InternalError',
+        'OperationalError':   'app_sqlite3.OperationalError',
+        'ProgrammingError':   'app_sqlite3.ProgrammingError',
+        'IntegrityError':     'app_sqlite3.IntegrityError',
+        'DataError':          'app_sqlite3.DataError',
+        'NotSupportedError':  'app_sqlite3.NotSupportedError',
+
+        'connect':            'app_sqlite3.connect',
+        'converters':         'app_sqlite3.converters',
+        'adapters':           'app_sqlite3.adapters',
+        'PrepareProtocol':    'app_sqlite3.PrepareProtocol',
+        'register_adapter':   'app_sqlite3.register_adapter',
+        'register_converter': 'app_sqlite3.register_converter',
+        'adapt':              'app_sqlite3.adapt',
+        'OptimizedUnicode':   'app_sqlite3.OptimizedUnicode',
+        'Row':                'app_sqlite3.Row',
+        }
+
+    interpleveldefs = {
+        'version':          'space.wrap("2.6.0")',
+        'sqlite_version':   'interp_connection.sqlite_version(space)',
+        'complete_statement': 'interp_connection.complete_statement',
+        '_base_type_adapted': 'interp_connection.base_type_adapted',
+
+        'PARSE_COLNAMES':   'space.wrap(interp_statement.PARSE_COLNAMES)',
+        'PARSE_DECLTYPES':  'space.wrap(interp_statement.PARSE_DECLTYPES)',
+
+        'Connection':       'interp_connection.W_Connection',
+        'Cursor':           'interp_cursor.W_Cursor',
+        }
+
+    for name in csqlite.authorizer_codes:
+        interpleveldefs[name] = 'space.wrap(%d)' % getattr(csqlite, name)
+    interpleveldefs['SQLITE_OK'] = 'space.wrap(%d)' % csqlite.SQLITE_OK
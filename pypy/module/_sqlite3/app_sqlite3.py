@@ -0,0 +1,139 @@
+import _sqlite3
+
+
+class Error(StandardError):
+    pass
+
+class Warning(StandardError):
+    pass
+
+class InterfaceError(Error):
+    pass
+
+class DatabaseError(Error):
+    pass
+
+class InternalError(DatabaseError):
+    pass
+
+class OperationalError(DatabaseError):
+    pass
+
+class ProgrammingError(DatabaseError):
+    pass
+
+class IntegrityError(DatabaseError):
+    pass
+
+class DataError(DatabaseError):
+    pass
+
+class NotSupportedError(DatabaseError):
+    pass
+
+
+def connect(database, **kwargs):
+    """connect(database[, timeout, detect_types, isolation_level,
+               check_same_thread, factory, cached_statements])
+
+Opens a connection to the SQLite database file *database*. You can use
+":memory:" to open a database connection to a database that resides in
+RAM instead of on disk."""
+    factory = kwargs.get("factory", _sqlite3.Connection)
+    return factory(database, **kwargs)
+
+
+converters = {}
+adapters = {}
+
+class PrepareProtocol(object):
+    pass
+
+_base_types = (int, long, float, str, unicode, buffer)
+
+def register_adapter(typ, callable):
+    """register_adapter(type, callable)
+
+Registers an adapter with pysqlite's adapter registry."""
+    if typ in _base_types:
+        _sqlite3._base_type_adapted()
+    adapters[typ, PrepareProtocol] = callable
+
+def register_converter(name, callable):
+    """register_converter(typename, callable)
+
+Registers a converter with pysqlite."""
+    converters[name.upper()] = callable
+
+def adapt(val, proto=PrepareProtocol):
+    """adapt(obj, protocol, alternate) -> adapt obj to given protocol."""
+    # look for an adapter in the registry
+    adapter = adapters.get((type(val), proto), None)
+    if adapter is not None:
+        return adapter(val)
+
+    # try to have the protocol adapt this object
+    if hasattr(proto, '__adapt__'):
+        try:
+            adapted = proto.__adapt__(val)
+        except TypeError:
+            pass
+        else:
+            if adapted is not None:
+                return adapted
+
+    # and finally try to have the object adapt itself
+    if hasattr(val, '__conform__'):
+        try:
+            adapted = val.__conform__(proto)
+        except TypeError:
+            pass
+        else:
+            if adapted is not None:
+                return adapted
+
+    return val
+
+def OptimizedUnicode(s):
+    try:
+        val = unicode(s, "ascii").encode("ascii")
+    except UnicodeDecodeError:
+        val = unicode(s, "utf-8")
+    return val
+
+
+class Row(object):
+    def __init__(self, cursor, values):
+        self.description = cursor.description
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, long, slice)):
+            return self.values[item]
+        else:
+            item = item.lower()
+            for idx, desc in enumerate(self.description):
+                if desc[0].lower() == item:
+                    return self.values[idx]
+            raise IndexError("No item with that key")
+
+    def keys(self):
+        return [desc[0] for desc in self.description]
+
+    def __eq__(self, other):
+        if not isinstance(other, Row):
+            return NotImplemented
+        if self.description != other.description:
+            return False
+        if self.values != other.values:
+            return False
+        return True
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(self.description)) ^ hash(tuple(self.values))
@@ -0,0 +1,51 @@
+""" Measure the _sqlite3 module against the ctypes version in lib_pypy,
+in rows/s, for an executemany() of integer rows, a repeated single-row
+execute() going through the statement cache, and a full table fetch.
+
+Usage:
+    pypy sqlite_roundtrip.py [repeat]
+"""
+
+import sys, os, imp
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                    os.pardir, os.pardir, os.pardir, os.pardir)
+lib_pypy = os.path.join(root, 'lib_pypy')
+
+sys.path.insert(0, root)
+from pypy.tool.bench.timing import best_time
+
+import _sqlite3
+ctypes_sqlite3 = imp.load_source('_sqlite3_ctypes',
+                                 os.path.join(lib_pypy, '_sqlite3.py'))
+
+ROWS = 100000
+
+def rate(func, repeat):
+    return ROWS / best_time(func, repeat)
+
+def run(module, repeat):
+    con = module.connect(":memory:")
+    con.execute("create table t (a integer, b integer)")
+    rows = [[i, i * 2] for i in range(ROWS)]
+    def insert_many():
+        con.execute("delete from t")
+        con.executemany("insert into t values (?, ?)", rows)
+    def execute_one():
+        for i in range(ROWS):
+            con.execute("select ?", (i,)).fetchone()
+    def fetch_all():
+        con.execute("select a, b from t").fetchall()
+    return (rate(insert_many, repeat), rate(execute_one, repeat),
+            rate(fetch_all, repeat))
+
+def main(repeat):
+    print '%10s %14s %14s %14s' % ('', 'executemany', 'execute', 'fetchall')
+    for name, module in [('ctypes', ctypes_sqlite3), ('_sqlite3', _sqlite3)]:
+        print '%10s %14.0f %14.0f %14.0f' % ((name,) + run(module, repeat))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(5)
@@ -0,0 +1,175 @@
+from rpython.rtyper.lltypesystem import rffi, lltype
+from rpython.rtyper.tool import rffi_platform as platform
+from rpython.translator.tool.cbuild import ExternalCompilationInfo
+
+eci = ExternalCompilationInfo(
+    includes = ['sqlite3.h'],
+    libraries = ['sqlite3'],
+    )
+eci = platform.configure_external_library(
+    'sqlite3', eci,
+    [dict(prefix='sqlite-')])
+if not eci:
+    raise ImportError("Could not find sqlite3 library")
+
+result_codes = '''
+    SQLITE_OK SQLITE_ERROR SQLITE_INTERNAL SQLITE_PERM SQLITE_ABORT
+    SQLITE_BUSY SQLITE_LOCKED SQLITE_NOMEM SQLITE_READONLY SQLITE_INTERRUPT
+    SQLITE_IOERR SQLITE_CORRUPT SQLITE_NOTFOUND SQLITE_FULL SQLITE_CANTOPEN
+    SQLITE_PROTOCOL SQLITE_EMPTY SQLITE_SCHEMA SQLITE_TOOBIG
+    SQLITE_CONSTRAINT SQLITE_MISMATCH SQLITE_MISUSE SQLITE_NOLFS SQLITE_AUTH
+    SQLITE_FORMAT SQLITE_RANGE SQLITE_NOTADB SQLITE_ROW SQLITE_DONE
+    '''.split()
+
+datatypes = '''
+    SQLITE_INTEGER SQLITE_FLOAT SQLITE_BLOB SQLITE_NULL SQLITE_TEXT
+    SQLITE_UTF8
+    '''.split()
+
+# the authorizer action codes and return values, exported by the module
+authorizer_codes = '''
+    SQLITE_DENY SQLITE_IGNORE
+    SQLITE_CREATE_INDEX SQLITE_CREATE_TABLE SQLITE_CREATE_TEMP_INDEX
+    SQLITE_CREATE_TEMP_TABLE SQLITE_CREATE_TEMP_TRIGGER
+    SQLITE_CREATE_TEMP_VIEW SQLITE_CREATE_TRIGGER SQLITE_CREATE_VIEW
+    SQLITE_DELETE SQLITE_DROP_INDEX SQLITE_DROP_TABLE SQLITE_DROP_TEMP_INDEX
+    SQLITE_DROP_TEMP_TABLE SQLITE_DROP_TEMP_TRIGGER SQLITE_DROP_TEMP_VIEW
+    SQLITE_DROP_TRIGGER SQLITE_DROP_VIEW SQLITE_INSERT SQLITE_PRAGMA
+    SQLITE_READ SQLITE_SELECT SQLITE_TRANSACTION SQLITE_UPDATE
+    SQLITE_ATTACH SQLITE_DETACH SQLITE_ALTER_TABLE SQLITE_REINDEX
+    SQLITE_ANALYZE SQLITE_CREATE_VTABLE SQLITE_DROP_VTABLE SQLITE_FUNCTION
+    '''.split()
+
+class CConfig:
+    _compilation_info_ = eci
+
+    for name in result_codes + datatypes + authorizer_codes:
+        locals()[name] = platform.ConstantInteger(name)
+
+for k, v in platform.configure(CConfig).items():
+    globals()[k] = v
+
+def external(name, args, result, **kwds):
+    return rffi.llexternal(name, args, result, compilation_info=eci, **kwds)
+
+# The handles are all opaque to us: 'sqlite3 *', 'sqlite3_stmt *',
+# 'sqlite3_context *' and 'sqlite3_value *' are passed around as VOIDP.
+DB = rffi.VOIDP
+STMT = rffi.VOIDP
+CONTEXT = rffi.VOIDP
+VALUE = rffi.VOIDP
+# The 'void (*)(void *)' destructors are only ever SQLITE_TRANSIENT, which
+# is the special value -1: declare them as VOIDP so that this value is
+# passed as it is, even untranslated.
+DESTRUCTOR = rffi.VOIDP
+
+def SQLITE_TRANSIENT():
+    "The destructor telling SQLite to make its own copy of the data."
+    return rffi.cast(DESTRUCTOR, -1)
+
+FUNC = lltype.Ptr(lltype.FuncType([CONTEXT, rffi.INT, rffi.VOIDPP],
+                                  lltype.Void))
+FINAL = lltype.Ptr(lltype.FuncType([CONTEXT], lltype.Void))
+COLLATION = lltype.Ptr(lltype.FuncType(
+    [rffi.VOIDP, rffi.INT, rffi.VOIDP, rffi.INT, rffi.VOIDP], rffi.INT))
+AUTHORIZER = lltype.Ptr(lltype.FuncType(
+    [rffi.VOIDP, rffi.INT, rffi.CCHARP, rffi.CCHARP, rffi.CCHARP,
+     rffi.CCHARP], rffi.INT))
+PROGRESS = lltype.Ptr(lltype.FuncType([rffi.VOIDP], rffi.INT))
+
+sqlite3_libversion = external('sqlite3_libversion', [], rffi.CCHARP)
+sqlite3_complete = external('sqlite3_complete', [rffi.CCHARP], rffi.INT)
+
+# connections
+sqlite3_open = external('sqlite3_open', [rffi.CCHARP, rffi.VOIDPP], rffi.INT)
+sqlite3_close = external('sqlite3_close', [DB], rffi.INT)
+sqlite3_close_nogil = external('sqlite3_close', [DB], rffi.INT,
+                               threadsafe=False)
+sqlite3_busy_timeout = external('sqlite3_busy_timeout', [DB, rffi.INT],
+                                rffi.INT)
+sqlite3_errcode = external('sqlite3_errcode', [DB], rffi.INT)
+sqlite3_errmsg = external('sqlite3_errmsg', [DB], rffi.CCHARP)
+sqlite3_changes = external('sqlite3_changes', [DB], rffi.INT)
+sqlite3_total_changes = external('sqlite3_total_changes', [DB], rffi.INT)
+sqlite3_last_insert_rowid = external('sqlite3_last_insert_rowid', [DB],
+                                     rffi.LONGLONG)
+sqlite3_get_autocommit = external('sqlite3_get_autocommit', [DB], rffi.INT)
+sqlite3_interrupt = external('sqlite3_interrupt', [DB], lltype.Void)
+
+# statements
+sqlite3_prepare_v2 = external('sqlite3_prepare_v2',
+                              [DB, rffi.CCHARP, rffi.INT, rffi.VOIDPP,
+                               rffi.CCHARPP], rffi.INT)
+sqlite3_step = external('sqlite3_step', [STMT], rffi.INT)
+sqlite3_reset = external('sqlite3_reset', [STMT], rffi.INT)
+sqlite3_finalize = external('sqlite3_finalize', [STMT], rffi.INT)
+sqlite3_finalize_nogil = external('sqlite3_finalize', [STMT], rffi.INT,
+                                  threadsafe=False)
+sqlite3_bind_parameter_count = external('sqlite3_bind_parameter_count',
+                                        [STMT], rffi.INT)
+sqlite3_bind_parameter_name = external('sqlite3_bind_parameter_name',
+                                       [STMT, rffi.INT], rffi.CCHARP)
+sqlite3_bind_null = external('sqlite3_bind_null', [STMT, rffi.INT], rffi.INT)
+sqlite3_bind_int64 = external('sqlite3_bind_int64',
+                              [STMT, rffi.INT, rffi.LONGLONG], rffi.INT)
+sqlite3_bind_double = external('sqlite3_bind_double',
+                               [STMT, rffi.INT, rffi.DOUBLE], rffi.INT)
+sqlite3_bind_text = external('sqlite3_bind_text',
+                             [STMT, rffi.INT, rffi.CCHARP, rffi.INT,
+                              DESTRUCTOR], rffi.INT)
+sqlite3_bind_blob = external('sqlite3_bind_blob',
+                             [STMT, rffi.INT, rffi.CCHARP, rffi.INT,
+                              DESTRUCTOR], rffi.INT)
+sqlite3_column_count = external('sqlite3_column_count', [STMT], rffi.INT)
+sqlite3_column_type = external('sqlite3_column_type', [STMT, rffi.INT],
+                               rffi.INT)
+sqlite3_column_int64 = external('sqlite3_column_int64', [STMT, rffi.INT],
+                                rffi.LONGLONG)
+sqlite3_column_double = external('sqlite3_column_double', [STMT, rffi.INT],
+                                 rffi.DOUBLE)
+sqlite3_column_bytes = external('sqlite3_column_bytes', [STMT, rffi.INT],
+                                rffi.INT)
+sqlite3_column_text = external('sqlite3_column_text', [STMT, rffi.INT],
+                               rffi.CCHARP)
+sqlite3_column_blob = external('sqlite3_column_blob', [STMT, rffi.INT],
+                               rffi.CCHARP)
+sqlite3_column_name = external('sqlite3_column_name', [STMT, rffi.INT],
+                               rffi.CCHARP)
+sqlite3_column_decltype = external('sqlite3_column_decltype',
+                                   [STMT, rffi.INT], rffi.CCHARP)
+
+# user-defined functions, aggregates, collations and hooks
+sqlite3_create_function = external('sqlite3_create_function',
+                                   [DB, rffi.CCHARP, rffi.INT, rffi.INT,
+                                    rffi.VOIDP, FUNC, FUNC, FINAL], rffi.INT)
+sqlite3_create_collation = external('sqlite3_create_collation',
+                                    [DB, rffi.CCHARP, rffi.INT, rffi.VOIDP,
+                                     COLLATION], rffi.INT)
+sqlite3_set_authorizer = external('sqlite3_set_authorizer',
+                                  [DB, AUTHORIZER, rffi.VOIDP], rffi.INT)
+sqlite3_progress_handler = external('sqlite3_progress_handler',
+                                    [DB, rffi.INT, PROGRESS, rffi.VOIDP],
+                                    lltype.Void)
+sqlite3_user_data = external('sqlite3_user_data', [CONTEXT], rffi.VOIDP)
+sqlite3_aggregate_context = external('sqlite3_aggregate_context',
+                                     [CONTEXT, rffi.INT], rffi.VOIDP)
+sqlite3_value_type = external('sqlite3_value_type', [VALUE], rffi.INT)
+sqlite3_value_int64 = external('sqlite3_value_int64', [VALUE], rffi.LONGLONG)
+sqlite3_value_double = external('sqlite3_value_double', [VALUE], rffi.DOUBLE)
+sqlite3_value_bytes = external('sqlite3_value_bytes', [VALUE], rffi.INT)
+sqlite3_value_text = external('sqlite3_value_text', [VALUE], rffi.CCHARP)
+sqlite3_value_blob = external('sqlite3_value_blob', [VALUE], rffi.CCHARP)
+sqlite3_result_null = external('sqlite3_result_null', [CONTEXT],
+                               lltype.Void)
+sqlite3_result_int64 = external('sqlite3_result_int64',
+                                [CONTEXT, rffi.LONGLONG], lltype.Void)
+sqlite3_result_double = external('sqlite3_result_double',
+                                 [CONTEXT, rffi.DOUBLE], lltype.Void)
+sqlite3_result_text = external('sqlite3_result_text',
+                               [CONTEXT, rffi.CCHARP, rffi.INT, DESTRUCTOR],
+                               lltype.Void)
+sqlite3_result_blob = external('sqlite3_result_blob',
+                               [CONTEXT, rffi.CCHARP, rffi.INT, DESTRUCTOR],
+                               lltype.Void)
+sqlite3_result_error = external('sqlite3_result_error',
+                                [CONTEXT, rffi.CCHARP, rffi.INT], lltype.Void)
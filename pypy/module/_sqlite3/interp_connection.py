@@ -0,0 +1,659 @@
+import weakref
+
+from pypy.interpreter import gateway
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.typedef import (TypeDef, GetSetProperty,
+                                      make_weakref_descr)
+from pypy.interpreter.unicodehelper import (PyUnicode_DecodeUTF8,
+                                            PyUnicode_EncodeUTF8)
+from pypy.module._sqlite3 import csqlite
+from pypy.module._sqlite3.interp_error import get_error, sqlite_error
+from pypy.module._sqlite3.interp_statement import (StatementCache,
+                                                   _base_type_adapted)
+from rpython.rlib import jit
+from rpython.rlib.rarithmetic import intmask
+from rpython.rtyper.lltypesystem import rffi, lltype
+
+
+def sql_w(space, w_sql):
+    "The SQL text as an utf-8 encoded string."
+    if space.isinstance_w(w_sql, space.w_unicode):
+        return PyUnicode_EncodeUTF8(space, space.unicode_w(w_sql))
+    elif space.isinstance_w(w_sql, space.w_str):
+        return space.str_w(w_sql)
+    raise OperationError(space.w_ValueError, space.wrap(
+        "operation parameter must be str or unicode"))
+
+
+class W_Connection(Wrappable):
+    def __init__(self, space):
+        self.space = space
+        self.db = lltype.nullptr(rffi.VOIDP.TO)
+        self.closed = True
+        self.w_text_factory = space.w_unicode
+        self.w_row_factory = space.w_None
+        self.w_isolation_level = space.wrap("")
+        self.begin_statement = "BEGIN "
+        self.detect_types = 0
+        self.statement_cache = None
+        self.statements = []
+        self.statement_counter = 0
+        self.cursors = []
+        self.ec = None
+        self.w_taint_auditor = None
+        self.callbacks = []
+
+    def __del__(self):
+        if self.db:
+            csqlite.sqlite3_close_nogil(self.db)
+
+    @unwrap_spec(timeout=float, detect_types=int,
+                 w_isolation_level=gateway.WrappedDefault(""),
+                 check_same_thread=bool, cached_statements=int)
+    def descr_init(self, space, w_database, timeout=5.0, detect_types=0,
+                   w_isolation_level=None, check_same_thread=True,
+                   w_factory=None, cached_statements=100):
+        database = sql_w(space, w_database)
+        with lltype.scoped_alloc(rffi.VOIDPP.TO, 1) as result:
+            with rffi.scoped_str2charp(database) as ll_database:
+                ret = csqlite.sqlite3_open(ll_database, result)
+            self.db = result[0]
+        if ret != csqlite.SQLITE_OK:
+            raise OperationError(get_error(space, "OperationalError"),
+                                 space.wrap("Could not open database"))
+        # pysqlite2 uses timeout in seconds
+        csqlite.sqlite3_busy_timeout(self.db, int(timeout * 1000))
+        self.closed = False
+        self.detect_types = detect_types
+        self.statement_cache = StatementCache(space, self, cached_statements)
+        self.descr_set_isolation_level(space, w_isolation_level)
+        if check_same_thread:
+            self.ec = space.getexecutioncontext()
+
+    def error(self, ret):
+        return sqlite_error(self.space, self.db, intmask(ret))
+
+    def remember_statement(self, stmt):
+        self.statements.append(weakref.ref(stmt))
+        self.statement_counter += 1
+        if self.statement_counter % 100 == 0:
+            self.statements = [ref for ref in self.statements
+                               if ref() is not None]
+
+    def check_thread(self):
+        if self.ec is not None and (
+                self.ec is not self.space.getexecutioncontext()):
+            raise OperationError(
+                get_error(self.space, "ProgrammingError"),
+                self.space.wrap(
+                    "SQLite objects created in a thread can only be used "
+                    "in that same thread."))
+
+    def check_closed(self):
+        if self.closed:
+            raise OperationError(
+                get_error(self.space, "ProgrammingError"),
+                self.space.wrap("Cannot operate on a closed database."))
+
+    def check_usable(self):
+        self.check_thread()
+        self.check_closed()
+
+    def reset_cursors(self):
+        for ref in self.cursors:
+            cursor = ref()
+            if cursor is not None:
+                cursor.reset = True
+
+    def reset_statements(self):
+        for ref in self.statements:
+            stmt = ref()
+            if stmt is not None and stmt.handle:
+                stmt.reset()
+
+    def text_factory_decodes_utf8(self):
+        space = self.space
+        w_text_factory = self.w_text_factory
+        if space.is_w(w_text_factory, space.w_unicode):
+            return True
+        w_module = space.getbuiltinmodule('_sqlite3')
+        return space.is_w(w_text_factory, space.getattr(
+            w_module, space.wrap('OptimizedUnicode')))
+
+    def convert_text(self, text):
+        space = self.space
+        w_text_factory = self.w_text_factory
+        if space.is_w(w_text_factory, space.w_unicode):
+            return space.wrap(PyUnicode_DecodeUTF8(space, text))
+        elif space.is_w(w_text_factory, space.w_str):
+            return space.wrap(text)
+        return space.call_function(w_text_factory, space.wrap(text))
+
+    # ____________________________________________________________
+    # transactions
+
+    def exec_simple(self, sql):
+        "Run a statement that needs no parameters and returns no rows."
+        with lltype.scoped_alloc(rffi.VOIDPP.TO, 1) as result:
+            with rffi.scoped_str2charp(sql) as ll_sql:
+                ret = csqlite.sqlite3_prepare_v2(
+                    self.db, ll_sql, -1, result,
+                    lltype.nullptr(rffi.CCHARPP.TO))
+            if ret != csqlite.SQLITE_OK:
+                raise self.error(ret)
+            handle = result[0]
+        ret = csqlite.sqlite3_step(handle)
+        if ret != csqlite.SQLITE_DONE:
+            error = self.error(ret)
+            csqlite.sqlite3_finalize(handle)
+            raise error
+        csqlite.sqlite3_finalize(handle)
+
+    def begin(self):
+        if self.begin_statement is None:
+            return
+        if csqlite.sqlite3_get_autocommit(self.db):
+            self.exec_simple(self.begin_statement)
+
+    def commit(self):
+        self.check_usable()
+        if csqlite.sqlite3_get_autocommit(self.db):
+            return
+        self.reset_statements()
+        self.exec_simple("COMMIT")
+
+    def rollback(self):
+        self.check_usable()
+        if csqlite.sqlite3_get_autocommit(self.db):
+            return
+        self.reset_statements()
+        try:
+            self.exec_simple("ROLLBACK")
+        finally:
+            self.reset_cursors()
+
+    def close(self):
+        self.check_thread()
+        if self.closed:
+            return
+        for ref in self.statements:
+            stmt = ref()
+            if stmt is not None:
+                stmt.finalize()
+        self.statements = []
+        self.statement_cache.clear()
+        ret = csqlite.sqlite3_close(self.db)
+        if ret != csqlite.SQLITE_OK:
+            # the database is still open, and has the error message
+            raise sqlite_error(self.space, self.db, intmask(ret))
+        self.closed = True
+        self.db = lltype.nullptr(rffi.VOIDP.TO)
+        self.reset_cursors()
+        for callback_id in self.callbacks:
+            callbacks.free(callback_id)
+        self.callbacks = []
+
+    def descr_enter(self, space):
+        return space.wrap(self)
+
+    def descr_exit(self, space, w_type, w_value, w_tb):
+        if space.is_w(w_type, space.w_None):
+            self.commit()
+        else:
+            self.rollback()
+        return space.w_False
+
+    # ____________________________________________________________
+    # cursors
+
+    def new_cursor(self, space):
+        from pypy.module._sqlite3.interp_cursor import W_Cursor
+        cursor = W_Cursor(space)
+        cursor.init(self)
+        return cursor
+
+    def cursor(self, space, w_factory=None):
+        self.check_usable()
+        if w_factory is None or space.is_w(w_factory, space.w_None):
+            w_cursor = space.wrap(self.new_cursor(space))
+        else:
+            w_cursor = space.call_function(w_factory, space.wrap(self))
+        if not space.is_w(self.w_row_factory, space.w_None):
+            space.setattr(w_cursor, space.wrap('row_factory'),
+                          self.w_row_factory)
+        return w_cursor
+
+    def execute(self, space, w_sql, w_params=None):
+        self.check_closed()
+        cursor = self.new_cursor(space)
+        cursor.w_row_factory = self.w_row_factory
+        return cursor.execute(space, w_sql, w_params)
+
+    def executemany(self, space, w_sql, w_many_params):
+        self.check_closed()
+        cursor = self.new_cursor(space)
+        cursor.w_row_factory = self.w_row_factory
+        return cursor.executemany(space, w_sql, w_many_params)
+
+    def executescript(self, space, w_sql):
+        self.check_closed()
+        cursor = self.new_cursor(space)
+        cursor.w_row_factory = self.w_row_factory
+        return cursor.executescript(space, w_sql)
+
+    def interrupt(self, space):
+        self.check_closed()
+        csqlite.sqlite3_interrupt(self.db)
+
+    def iterdump(self, space):
+        return iterdump(space, space.wrap(self))
+
+    def set_taint_auditor(self, space, w_callback):
+        """set_taint_auditor(callback)
+
+Calls callback(sql, key, taints) whenever a tainted value is bound to
+a statement, before it runs.  'key' is the 1-based position or the name
+of the parameter, or None when the SQL text itself is tainted.  The
+callback can raise to refuse the statement.  Pass None to remove it."""
+        self.check_usable()
+        if space.is_w(w_callback, space.w_None):
+            self.w_taint_auditor = None
+        else:
+            self.w_taint_auditor = w_callback
+
+    # ____________________________________________________________
+    # user-defined functions, aggregates, collations and hooks
+
+    def new_callback(self, w_callable):
+        callback_id = callbacks.put(CallbackData(self.space, w_callable))
+        self.callbacks.append(callback_id)
+        return rffi.cast(rffi.VOIDP, callback_id)
+
+    @unwrap_spec(name=str, num_args=int)
+    def create_function(self, space, name, num_args, w_callback):
+        self.check_usable()
+        with rffi.scoped_str2charp(name) as ll_name:
+            if space.is_w(w_callback, space.w_None):
+                ret = csqlite.sqlite3_create_function(
+                    self.db, ll_name, num_args, csqlite.SQLITE_UTF8,
+                    lltype.nullptr(rffi.VOIDP.TO),
+                    lltype.nullptr(csqlite.FUNC.TO),
+                    lltype.nullptr(csqlite.FUNC.TO),
+                    lltype.nullptr(csqlite.FINAL.TO))
+            else:
+                ret = csqlite.sqlite3_create_function(
+                    self.db, ll_name, num_args, csqlite.SQLITE_UTF8,
+                    self.new_callback(w_callback), function_callback,
+                    lltype.nullptr(csqlite.FUNC.TO),
+                    lltype.nullptr(csqlite.FINAL.TO))
+        if ret != csqlite.SQLITE_OK:
+            raise OperationError(get_error(space, "OperationalError"),
+                                 space.wrap("Error creating function"))
+
+    @unwrap_spec(name=str, num_args=int)
+    def create_aggregate(self, space, name, num_args, w_cls):
+        self.check_usable()
+        with rffi.scoped_str2charp(name) as ll_name:
+            ret = csqlite.sqlite3_create_function(
+                self.db, ll_name, num_args, csqlite.SQLITE_UTF8,
+                self.new_callback(w_cls), lltype.nullptr(csqlite.FUNC.TO),
+                step_callback, final_callback)
+        if ret != csqlite.SQLITE_OK:
+            raise OperationError(get_error(space, "OperationalError"),
+                                 space.wrap("Error creating aggregate"))
+
+    @unwrap_spec(name=str)
+    def create_collation(self, space, name, w_callback):
+        self.check_usable()
+        name = name.upper()
+        for c in name:
+            if not (c.isalnum() or c == '_'):
+                raise OperationError(get_error(space, "ProgrammingError"),
+                    space.wrap("invalid character in collation name"))
+        with rffi.scoped_str2charp(name) as ll_name:
+            if space.is_w(w_callback, space.w_None):
+                ret = csqlite.sqlite3_create_collation(
+                    self.db, ll_name, csqlite.SQLITE_UTF8,
+                    lltype.nullptr(rffi.VOIDP.TO),
+                    lltype.nullptr(csqlite.COLLATION.TO))
+            else:
+                if not space.is_true(space.callable(w_callback)):
+                    raise OperationError(space.w_TypeError,
+                                         space.wrap("parameter must be callable"))
+                ret = csqlite.sqlite3_create_collation(
+                    self.db, ll_name, csqlite.SQLITE_UTF8,
+                    self.new_callback(w_callback), collation_callback)
+        if ret != csqlite.SQLITE_OK:
+            raise self.error(ret)
+
+    def set_authorizer(self, space, w_callback):
+        self.check_usable()
+        if space.is_w(w_callback, space.w_None):
+            ret = csqlite.sqlite3_set_authorizer(
+                self.db, lltype.nullptr(csqlite.AUTHORIZER.TO),
+                lltype.nullptr(rffi.VOIDP.TO))
+        else:
+            ret = csqlite.sqlite3_set_authorizer(
+                self.db, authorizer_callback, self.new_callback(w_callback))
+        if ret != csqlite.SQLITE_OK:
+            raise self.error(ret)
+
+    @unwrap_spec(nsteps=int)
+    def set_progress_handler(self, space, w_callback, nsteps):
+        self.check_usable()
+        if space.is_w(w_callback, space.w_None):
+            csqlite.sqlite3_progress_handler(
+                self.db, 0, lltype.nullptr(csqlite.PROGRESS.TO),
+                lltype.nullptr(rffi.VOIDP.TO))
+        else:
+            csqlite.sqlite3_progress_handler(
+                self.db, nsteps, progress_callback,
+                self.new_callback(w_callback))
+
+    # ____________________________________________________________
+    # attributes
+
+    def descr_get_isolation_level(self, space):
+        return self.w_isolation_level
+
+    def descr_set_isolation_level(self, space, w_value):
+        if space.is_w(w_value, space.w_None):
+            self.commit()
+            self.begin_statement = None
+        else:
+            level = space.str_w(space.str(w_value))
+            upper = level.upper()
+            if (upper != "" and upper != "DEFERRED" and
+                    upper != "IMMEDIATE" and upper != "EXCLUSIVE"):
+                raise OperationError(space.w_ValueError, space.wrap(
+                    "invalid value for isolation_level"))
+            self.begin_statement = "BEGIN " + level
+        self.w_isolation_level = w_value
+
+    def descr_get_total_changes(self, space):
+        self.check_closed()
+        return space.wrap(intmask(csqlite.sqlite3_total_changes(self.db)))
+
+    def descr_get_text_factory(self, space):
+        return self.w_text_factory
+
+    def descr_set_text_factory(self, space, w_value):
+        self.w_text_factory = w_value
+
+    def descr_get_row_factory(self, space):
+        return self.w_row_factory
+
+    def descr_set_row_factory(self, space, w_value):
+        self.w_row_factory = w_value
+
+
+app = gateway.applevel(r'''
+    def iterdump(connection):
+        from sqlite3.dump import _iterdump
+        return _iterdump(connection)
+''', filename=__file__)
+
+iterdump = app.interphook("iterdump")
+
+
+def descr_new_connection(space, w_subtype, __args__):
+    w_self = space.allocate_instance(W_Connection, w_subtype)
+    W_Connection.__init__(space.interp_w(W_Connection, w_self), space)
+    return w_self
+
+def make_error_getter(name):
+    def descr_get_error(self, space):
+        return get_error(space, name)
+    descr_get_error.func_name = 'descr_get_' + name
+    return GetSetProperty(descr_get_error, cls=W_Connection)
+
+W_Connection.typedef = TypeDef("Connection",
+    __module__ = '_sqlite3',
+    __new__ = interp2app(descr_new_connection),
+    __init__ = interp2app(W_Connection.descr_init),
+    __enter__ = interp2app(W_Connection.descr_enter),
+    __exit__ = interp2app(W_Connection.descr_exit),
+    __weakref__ = make_weakref_descr(W_Connection),
+    cursor = interp2app(W_Connection.cursor),
+    execute = interp2app(W_Connection.execute),
+    executemany = interp2app(W_Connection.executemany),
+    executescript = interp2app(W_Connection.executescript),
+    commit = interp2app(W_Connection.commit),
+    rollback = interp2app(W_Connection.rollback),
+    close = interp2app(W_Connection.close),
+    interrupt = interp2app(W_Connection.interrupt),
+    iterdump = interp2app(W_Connection.iterdump),
+    create_function = interp2app(W_Connection.create_function),
+    create_aggregate = interp2app(W_Connection.create_aggregate),
+    create_collation = interp2app(W_Connection.create_collation),
+    set_authorizer = interp2app(W_Connection.set_authorizer),
+    set_progress_handler = interp2app(W_Connection.set_progress_handler),
+    set_taint_auditor = interp2app(W_Connection.set_taint_auditor),
+    isolation_level = GetSetProperty(W_Connection.descr_get_isolation_level,
+                                     W_Connection.descr_set_isolation_level),
+    total_changes = GetSetProperty(W_Connection.descr_get_total_changes),
+    text_factory = GetSetProperty(W_Connection.descr_get_text_factory,
+                                  W_Connection.descr_set_text_factory),
+    row_factory = GetSetProperty(W_Connection.descr_get_row_factory,
+                                 W_Connection.descr_set_row_factory),
+    Error = make_error_getter("Error"),
+    Warning = make_error_getter("Warning"),
+    InterfaceError = make_error_getter("InterfaceError"),
+    DatabaseError = make_error_getter("DatabaseError"),
+    InternalError = make_error_getter("InternalError"),
+    OperationalError = make_error_getter("OperationalError"),
+    ProgrammingError = make_error_getter("ProgrammingError"),
+    IntegrityError = make_error_getter("IntegrityError"),
+    DataError = make_error_getter("DataError"),
+    NotSupportedError = make_error_getter("NotSupportedError"),
+)
+
+# ____________________________________________________________
+# C callbacks
+
+class CallbackData(object):
+    def __init__(self, space, w_callable):
+        self.space = space
+        self.w_callable = w_callable
+        # the live instances of an aggregate class, by the id stored in
+        # their sqlite3_aggregate_context()
+        self.instances = {}
+        self.next_instance_id = 1
+
+class Storage:
+    "Store the CallbackData under a non moving ID, passed as user data"
+    def __init__(self):
+        self.next_id = 1
+        self.storage = {}
+
+    def put(self, data):
+        callback_id = self.next_id
+        self.next_id += 1
+        self.storage[callback_id] = data
+        return callback_id
+
+    def get(self, ll_userdata):
+        return self.storage[rffi.cast(lltype.Signed, ll_userdata)]
+
+    def free(self, callback_id):
+        del self.storage[callback_id]
+
+callbacks = Storage()
+
+def convert_values(space, argc, argv):
+    args_w = [None] * argc
+    for i in range(argc):
+        value = argv[i]
+        typ = csqlite.sqlite3_value_type(value)
+        if typ == csqlite.SQLITE_INTEGER:
+            w_arg = space.wrap(csqlite.sqlite3_value_int64(value))
+        elif typ == csqlite.SQLITE_FLOAT:
+            w_arg = space.wrap(csqlite.sqlite3_value_double(value))
+        elif typ == csqlite.SQLITE_TEXT:
+            text = csqlite.sqlite3_value_text(value)
+            size = intmask(csqlite.sqlite3_value_bytes(value))
+            w_arg = space.wrap(PyUnicode_DecodeUTF8(
+                space, rffi.charpsize2str(text, size)))
+        elif typ == csqlite.SQLITE_BLOB:
+            from pypy.interpreter.buffer import StringBuffer
+            blob = csqlite.sqlite3_value_blob(value)
+            size = intmask(csqlite.sqlite3_value_bytes(value))
+            w_arg = space.wrap(StringBuffer(rffi.charpsize2str(blob, size)))
+        else:
+            w_arg = space.w_None
+        args_w[i] = w_arg
+    return args_w
+
+def set_result(space, context, w_value):
+    if space.is_w(w_value, space.w_None):
+        csqlite.sqlite3_result_null(context)
+    elif (space.isinstance_w(w_value, space.w_int) or
+          space.isinstance_w(w_value, space.w_long)):
+        csqlite.sqlite3_result_int64(context, space.r_longlong_w(w_value))
+    elif space.isinstance_w(w_value, space.w_float):
+        csqlite.sqlite3_result_double(context, space.float_w(w_value))
+    elif (space.isinstance_w(w_value, space.w_str) or
+          space.isinstance_w(w_value, space.w_unicode)):
+        if space.isinstance_w(w_value, space.w_unicode):
+            data = PyUnicode_EncodeUTF8(space, space.unicode_w(w_value))
+        else:
+            data = space.str_w(w_value)
+        with rffi.scoped_nonmovingbuffer(data) as buf:
+            csqlite.sqlite3_result_text(context, buf, len(data),
+                                        csqlite.SQLITE_TRANSIENT())
+    elif space.isinstance_w(w_value, space.builtin.get('buffer')):
+        data = space.bufferstr_w(w_value)
+        with rffi.scoped_nonmovingbuffer(data) as buf:
+            csqlite.sqlite3_result_blob(context, buf, len(data),
+                                        csqlite.SQLITE_TRANSIENT())
+    else:
+        result_error(context, "user-defined function returned an "
+                              "unsupported type")
+
+def result_error(context, msg):
+    with rffi.scoped_str2charp(msg) as ll_msg:
+        csqlite.sqlite3_result_error(context, ll_msg, len(msg))
+
+def get_aggregate_id(context):
+    ptr = csqlite.sqlite3_aggregate_context(context,
+                                            rffi.sizeof(lltype.Signed))
+    return rffi.cast(rffi.SIGNEDP, ptr)
+
+@jit.jit_callback("SQLITE:function")
+def function_callback(context, argc, argv):
+    data = callbacks.get(csqlite.sqlite3_user_data(context))
+    space = data.space
+    try:
+        args_w = convert_values(space, intmask(argc), argv)
+        w_result = space.call(data.w_callable, space.newtuple(args_w))
+        set_result(space, context, w_result)
+    except OperationError:
+        result_error(context, "user-defined function raised exception")
+
+@jit.jit_callback("SQLITE:step")
+def step_callback(context, argc, argv):
+    data = callbacks.get(csqlite.sqlite3_user_data(context))
+    space = data.space
+    ptr = get_aggregate_id(context)
+    if not ptr[0]:
+        try:
+            w_instance = space.call_function(data.w_callable)
+        except OperationError:
+            result_error(context, "user-defined aggregate's '__init__' "
+                                  "method raised error")
+            return
+        instance_id = data.next_instance_id
+        data.next_instance_id += 1
+        data.instances[instance_id] = w_instance
+        ptr[0] = instance_id
+    w_instance = data.instances[ptr[0]]
+    try:
+        args_w = convert_values(space, intmask(argc), argv)
+        space.call(space.getattr(w_instance, space.wrap('step')),
+                   space.newtuple(args_w))
+    except OperationError:
+        result_error(context, "user-defined aggregate's 'step' "
+                              "method raised error")
+
+@jit.jit_callback("SQLITE:final")
+def final_callback(context):
+    data = callbacks.get(csqlite.sqlite3_user_data(context))
+    space = data.space
+    ptr = get_aggregate_id(context)
+    if not ptr[0]:
+        return
+    w_instance = data.instances[ptr[0]]
+    del data.instances[ptr[0]]
+    try:
+        w_result = space.call_method(w_instance, 'finalize')
+        set_result(space, context, w_result)
+    except OperationError:
+        result_error(context, "user-defined aggregate's 'finalize' "
+                              "method raised error")
+
+@jit.jit_callback("SQLITE:collation")
+def collation_callback(ll_userdata, len1, str1, len2, str2):
+    data = callbacks.get(ll_userdata)
+    space = data.space
+    try:
+        w_text1 = space.wrap(PyUnicode_DecodeUTF8(space, rffi.charpsize2str(
+            rffi.cast(rffi.CCHARP, str1), intmask(len1))))
+        w_text2 = space.wrap(PyUnicode_DecodeUTF8(space, rffi.charpsize2str(
+            rffi.cast(rffi.CCHARP, str2), intmask(len2))))
+        w_result = space.call_function(data.w_callable, w_text1, w_text2)
+        result = space.int_w(w_result)
+    except OperationError:
+        result = 0
+    if result < 0:
+        result = -1
+    elif result > 0:
+        result = 1
+    return rffi.cast(rffi.INT, result)
+
+def wrap_charp(space, ll_str):
+    if not ll_str:
+        return space.w_None
+    return space.wrap(rffi.charp2str(ll_str))
+
+@jit.jit_callback("SQLITE:authorizer")
+def authorizer_callback(ll_userdata, action, arg1, arg2, dbname, source):
+    data = callbacks.get(ll_userdata)
+    space = data.space
+    try:
+        w_result = space.call_function(
+            data.w_callable, space.wrap(intmask(action)),
+            wrap_charp(space, arg1), wrap_charp(space, arg2),
+            wrap_charp(space, dbname), wrap_charp(space, source))
+        result = space.int_w(w_result)
+    except OperationError:
+        result = csqlite.SQLITE_DENY
+    return rffi.cast(rffi.INT, result)
+
+@jit.jit_callback("SQLITE:progress")
+def progress_callback(ll_userdata):
+    data = callbacks.get(ll_userdata)
+    space = data.space
+    try:
+        w_result = space.call_function(data.w_callable)
+        result = space.is_true(w_result)
+    except OperationError:
+        # abort the query if an error occurred
+        result = True
+    return rffi.cast(rffi.INT, result)
+
+# ____________________________________________________________
+# module-level functions
+
+def sqlite_version(space):
+    return space.wrap(rffi.charp2str(csqlite.sqlite3_libversion()))
+
+@unwrap_spec(sql=str)
+def complete_statement(space, sql):
+    with rffi.scoped_str2charp(sql) as ll_sql:
+        return space.wrap(bool(csqlite.sqlite3_complete(ll_sql)))
+
+def base_type_adapted(space):
+    "Called by register_adapter() for the types bound without adapt()."
+    _base_type_adapted(space)
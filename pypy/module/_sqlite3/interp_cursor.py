@@ -0,0 +1,296 @@
+import weakref
+
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import (TypeDef, GetSetProperty,
+                                      make_weakref_descr)
+from pypy.module._sqlite3 import csqlite
+from pypy.module._sqlite3.interp_connection import W_Connection, sql_w
+from pypy.module._sqlite3.interp_error import get_error
+from pypy.module._sqlite3.interp_statement import (DML, DDL,
+                                                   check_remaining_sql)
+from rpython.rlib.rarithmetic import intmask
+from rpython.rtyper.lltypesystem import rffi, lltype
+
+
+class W_Cursor(Wrappable):
+    def __init__(self, space):
+        self.space = space
+        self.connection = None
+        self.w_description = space.w_None
+        self.arraysize = 1
+        self.w_row_factory = space.w_None
+        self.rowcount = -1
+        self.statement = None
+        self.reset = False
+        self.locked = False
+        self.closed = False
+
+    def init(self, connection):
+        self.connection = connection
+        connection.cursors.append(weakref.ref(self))
+
+    def descr_init(self, space, w_connection):
+        connection = space.interp_w(W_Connection, w_connection)
+        connection.check_usable()
+        self.init(connection)
+
+    def check_usable(self):
+        space = self.space
+        if self.connection is None:
+            raise OperationError(get_error(space, "ProgrammingError"),
+                space.wrap("Base Cursor.__init__ not called."))
+        self.connection.check_usable()
+        if self.closed:
+            raise OperationError(get_error(space, "ProgrammingError"),
+                space.wrap("Cannot operate on a closed cursor."))
+        if self.locked:
+            raise OperationError(get_error(space, "ProgrammingError"),
+                space.wrap("Recursive use of cursors not allowed."))
+
+    def reset_statement(self):
+        if self.statement is not None:
+            self.statement.reset()
+            self.statement = None
+
+    def prepare(self, w_sql):
+        "Get the cached statement for 'w_sql', in a fitting transaction."
+        connection = self.connection
+        sql = sql_w(self.space, w_sql)
+        self.reset_statement()
+        self.reset = False
+        self.w_description = self.space.w_None
+        self.rowcount = -1
+        statement = connection.statement_cache.get(sql)
+        if connection.begin_statement is not None:
+            if statement.kind == DDL:
+                connection.commit()
+            elif statement.kind == DML:
+                connection.begin()
+        return statement
+
+    def execute(self, space, w_sql, w_params=None):
+        self.check_usable()
+        self.locked = True
+        try:
+            statement = self.prepare(w_sql)
+            if w_params is None:
+                w_params = space.w_None
+            statement.set_params(w_sql, w_params)
+            self.statement = statement
+            # the row factory may look at the description of the first row
+            self.w_description = statement.get_description()
+            statement.start(self)
+            if statement.kind == DML:
+                statement.reset()
+                self.statement = None
+                self.rowcount = intmask(
+                    csqlite.sqlite3_changes(self.connection.db))
+            elif statement.exhausted:
+                self.statement = None
+        finally:
+            self.locked = False
+        return space.wrap(self)
+
+    def executemany(self, space, w_sql, w_many_params):
+        self.check_usable()
+        self.locked = True
+        try:
+            statement = self.prepare(w_sql)
+            if statement.kind != DML:
+                raise OperationError(get_error(space, "ProgrammingError"),
+                    space.wrap("executemany is only for DML statements"))
+            db = self.connection.db
+            self.rowcount = 0
+            w_iter = space.iter(w_many_params)
+            while True:
+                try:
+                    w_params = space.next(w_iter)
+                except OperationError, e:
+                    if not e.match(space, space.w_StopIteration):
+                        raise
+                    break
+                statement.set_params(w_sql, w_params)
+                ret = csqlite.sqlite3_step(statement.handle)
+                if ret != csqlite.SQLITE_DONE:
+                    error = self.connection.error(ret)
+                    statement.reset()
+                    raise error
+                statement.reset()
+                self.rowcount += intmask(csqlite.sqlite3_changes(db))
+        finally:
+            self.locked = False
+        return space.wrap(self)
+
+    def executescript(self, space, w_sql):
+        self.check_usable()
+        self.reset_statement()
+        connection = self.connection
+        if space.isinstance_w(w_sql, space.w_unicode):
+            sql = space.str_w(space.call_method(w_sql, 'encode',
+                                                space.wrap('utf-8')))
+        elif space.isinstance_w(w_sql, space.w_str):
+            sql = space.str_w(w_sql)
+        else:
+            raise OperationError(space.w_ValueError, space.wrap(
+                "script argument must be unicode or string."))
+        connection.commit()
+        db = connection.db
+        with lltype.scoped_alloc(rffi.VOIDPP.TO, 1) as result:
+            with lltype.scoped_alloc(rffi.CCHARPP.TO, 1) as tail:
+                with rffi.scoped_str2charp(sql) as ll_sql:
+                    tail[0] = ll_sql
+                    while True:
+                        ret = csqlite.sqlite3_prepare_v2(db, tail[0], -1,
+                                                         result, tail)
+                        if ret != csqlite.SQLITE_OK:
+                            raise connection.error(ret)
+                        handle = result[0]
+                        if handle:
+                            ret = csqlite.sqlite3_step(handle)
+                            while ret == csqlite.SQLITE_ROW:
+                                ret = csqlite.sqlite3_step(handle)
+                            if ret != csqlite.SQLITE_DONE:
+                                error = connection.error(ret)
+                                csqlite.sqlite3_finalize(handle)
+                                raise error
+                            ret = csqlite.sqlite3_finalize(handle)
+                            if ret != csqlite.SQLITE_OK:
+                                raise connection.error(ret)
+                        if not check_remaining_sql(rffi.charp2str(tail[0])):
+                            break
+        return space.wrap(self)
+
+    # ____________________________________________________________
+    # fetching
+
+    def next_row(self):
+        "Return the next row or None, dropping the statement when done."
+        self.check_usable()
+        if self.reset:
+            raise OperationError(get_error(self.space, "InterfaceError"),
+                self.space.wrap("Cursor needed to be reset because of "
+                                "commit/rollback and can no longer be "
+                                "fetched from."))
+        statement = self.statement
+        if statement is None:
+            return None
+        w_row = statement.next(self)
+        if w_row is None:
+            self.statement = None
+        return w_row
+
+    def descr_iter(self, space):
+        return space.wrap(self)
+
+    def descr_next(self, space):
+        w_row = self.next_row()
+        if w_row is None:
+            raise OperationError(space.w_StopIteration, space.w_None)
+        return w_row
+
+    def fetchone(self, space):
+        w_row = self.next_row()
+        if w_row is None:
+            return space.w_None
+        return w_row
+
+    def fetchmany(self, space, w_size=None):
+        if w_size is None or space.is_w(w_size, space.w_None):
+            size = self.arraysize
+        else:
+            size = space.int_w(w_size)
+        rows_w = []
+        while len(rows_w) < size:
+            w_row = self.next_row()
+            if w_row is None:
+                break
+            rows_w.append(w_row)
+        return space.newlist(rows_w)
+
+    def fetchall(self, space):
+        rows_w = []
+        while True:
+            w_row = self.next_row()
+            if w_row is None:
+                break
+            rows_w.append(w_row)
+        return space.newlist(rows_w)
+
+    def close(self, space):
+        if self.connection is None:
+            return
+        self.connection.check_usable()
+        self.reset_statement()
+        self.closed = True
+
+    def setinputsizes(self, space, w_sizes):
+        pass
+
+    def setoutputsize(self, space, w_size, w_column=None):
+        pass
+
+    # ____________________________________________________________
+    # attributes
+
+    def descr_get_description(self, space):
+        return self.w_description
+
+    def descr_get_lastrowid(self, space):
+        if self.connection is None or not self.connection.db:
+            return space.w_None
+        return space.wrap(
+            csqlite.sqlite3_last_insert_rowid(self.connection.db))
+
+    def descr_get_rowcount(self, space):
+        return space.wrap(self.rowcount)
+
+    def descr_get_arraysize(self, space):
+        return space.wrap(self.arraysize)
+
+    def descr_set_arraysize(self, space, w_value):
+        self.arraysize = space.int_w(w_value)
+
+    def descr_get_row_factory(self, space):
+        return self.w_row_factory
+
+    def descr_set_row_factory(self, space, w_value):
+        self.w_row_factory = w_value
+
+    def descr_get_connection(self, space):
+        if self.connection is None:
+            return space.w_None
+        return space.wrap(self.connection)
+
+
+def descr_new_cursor(space, w_subtype, __args__):
+    w_self = space.allocate_instance(W_Cursor, w_subtype)
+    W_Cursor.__init__(space.interp_w(W_Cursor, w_self), space)
+    return w_self
+
+W_Cursor.typedef = TypeDef("Cursor",
+    __module__ = '_sqlite3',
+    __new__ = interp2app(descr_new_cursor),
+    __init__ = interp2app(W_Cursor.descr_init),
+    __iter__ = interp2app(W_Cursor.descr_iter),
+    __weakref__ = make_weakref_descr(W_Cursor),
+    next = interp2app(W_Cursor.descr_next),
+    execute = interp2app(W_Cursor.execute),
+    executemany = interp2app(W_Cursor.executemany),
+    executescript = interp2app(W_Cursor.executescript),
+    fetchone = interp2app(W_Cursor.fetchone),
+    fetchmany = interp2app(W_Cursor.fetchmany),
+    fetchall = interp2app(W_Cursor.fetchall),
+    close = interp2app(W_Cursor.close),
+    setinputsizes = interp2app(W_Cursor.setinputsizes),
+    setoutputsize = interp2app(W_Cursor.setoutputsize),
+    description = GetSetProperty(W_Cursor.descr_get_description),
+    lastrowid = GetSetProperty(W_Cursor.descr_get_lastrowid),
+    rowcount = GetSetProperty(W_Cursor.descr_get_rowcount),
+    arraysize = GetSetProperty(W_Cursor.descr_get_arraysize,
+                               W_Cursor.descr_set_arraysize),
+    row_factory = GetSetProperty(W_Cursor.descr_get_row_factory,
+                                 W_Cursor.descr_set_row_factory),
+    connection = GetSetProperty(W_Cursor.descr_get_connection),
+)
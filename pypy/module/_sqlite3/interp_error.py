@@ -0,0 +1,59 @@
+from pypy.interpreter.error import OperationError
+from pypy.module._sqlite3 import csqlite
+from rpython.rlib.rarithmetic import intmask
+from rpython.rtyper.lltypesystem import rffi
+
+
+def get_error(space, name):
+    "Return one of the exception classes defined in app_sqlite3.py."
+    w_module = space.getbuiltinmodule('_sqlite3')
+    return space.getattr(w_module, space.wrap(name))
+
+def error_name(error_code):
+    if error_code == csqlite.SQLITE_INTERNAL or (
+            error_code == csqlite.SQLITE_NOTFOUND):
+        return "InternalError"
+    elif error_code == csqlite.SQLITE_NOMEM:
+        return None     # MemoryError
+    elif (error_code == csqlite.SQLITE_ERROR or
+          error_code == csqlite.SQLITE_PERM or
+          error_code == csqlite.SQLITE_ABORT or
+          error_code == csqlite.SQLITE_BUSY or
+          error_code == csqlite.SQLITE_LOCKED or
+          error_code == csqlite.SQLITE_READONLY or
+          error_code == csqlite.SQLITE_INTERRUPT or
+          error_code == csqlite.SQLITE_IOERR or
+          error_code == csqlite.SQLITE_FULL or
+          error_code == csqlite.SQLITE_CANTOPEN or
+          error_code == csqlite.SQLITE_PROTOCOL or
+          error_code == csqlite.SQLITE_EMPTY or
+          error_code == csqlite.SQLITE_SCHEMA):
+        return "OperationalError"
+    elif error_code == csqlite.SQLITE_CORRUPT:
+        return "DatabaseError"
+    elif error_code == csqlite.SQLITE_TOOBIG:
+        return "DataError"
+    elif (error_code == csqlite.SQLITE_CONSTRAINT or
+          error_code == csqlite.SQLITE_MISMATCH):
+        return "IntegrityError"
+    elif error_code == csqlite.SQLITE_MISUSE:
+        return "ProgrammingError"
+    else:
+        return "DatabaseError"
+
+def sqlite_error(space, db, error_code=-1):
+    """Return the OperationError for the last error on 'db', which is
+    'error_code' unless that is -1."""
+    if error_code == -1:
+        error_code = intmask(csqlite.sqlite3_errcode(db))
+    message = rffi.charp2str(csqlite.sqlite3_errmsg(db))
+    if error_code == csqlite.SQLITE_OK:
+        return OperationError(space.w_ValueError, space.wrap(
+            "error signalled but got SQLITE_OK"))
+    name = error_name(error_code)
+    if name is None:
+        return OperationError(space.w_MemoryError, space.wrap(message))
+    w_type = get_error(space, name)
+    w_error = space.call_function(w_type, space.wrap(message))
+    space.setattr(w_error, space.wrap('error_code'), space.wrap(error_code))
+    return OperationError(w_type, w_error)
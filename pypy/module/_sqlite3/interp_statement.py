@@ -0,0 +1,517 @@
+from pypy.interpreter.buffer import StringBuffer
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.unicodehelper import PyUnicode_EncodeUTF8
+from pypy.module._sqlite3 import csqlite
+from pypy.module._sqlite3.interp_error import get_error
+from rpython.rlib.rarithmetic import intmask, r_longlong
+from rpython.rtyper.lltypesystem import rffi, lltype
+import sys
+
+DML, DQL, DDL = range(3)
+
+PARSE_COLNAMES = 1
+PARSE_DECLTYPES = 2
+
+
+class State:
+    def __init__(self, space):
+        # set by register_adapter() for int, long, float, str, unicode
+        # and buffer: from then on every parameter goes through adapt()
+        self.base_type_adapted = False
+
+def _base_type_adapted(space):
+    space.fromcache(State).base_type_adapted = True
+
+
+def statement_kind(sql):
+    i = 0
+    while i < len(sql) and sql[i].isspace():
+        i += 1
+    start = i
+    while i < len(sql) and not sql[i].isspace():
+        i += 1
+    assert 0 <= start <= i
+    first_word = sql[start:i].upper()
+    if (first_word == "INSERT" or first_word == "UPDATE" or
+        first_word == "DELETE" or first_word == "REPLACE"):
+        return DML
+    elif first_word == "SELECT" or first_word == "PRAGMA":
+        return DQL
+    else:
+        return DDL
+
+def check_remaining_sql(s):
+    "Return True if 's' contains more than whitespace and comments."
+    state = "NORMAL"
+    for char in s:
+        if char == '\x00':
+            return False
+        elif char == '-':
+            if state == "NORMAL":
+                state = "LINECOMMENT_1"
+            elif state == "LINECOMMENT_1":
+                state = "IN_LINECOMMENT"
+        elif char == ' ' or char == '\t':
+            pass
+        elif char == '\n':
+            if state == "IN_LINECOMMENT":
+                state = "NORMAL"
+        elif char == '/':
+            if state == "NORMAL":
+                state = "COMMENTSTART_1"
+            elif state == "COMMENTEND_1":
+                state = "NORMAL"
+            elif state == "COMMENTSTART_1":
+                return True
+        elif char == '*':
+            if state == "NORMAL":
+                return True
+            elif state == "LINECOMMENT_1":
+                return True
+            elif state == "COMMENTSTART_1":
+                state = "IN_COMMENT"
+            elif state == "IN_COMMENT":
+                state = "COMMENTEND_1"
+        else:
+            if state == "COMMENTEND_1":
+                state = "IN_COMMENT"
+            elif state == "IN_LINECOMMENT":
+                pass
+            elif state == "IN_COMMENT":
+                pass
+            else:
+                return True
+    return False
+
+def fits_in_int(value):
+    return -sys.maxint - 1 <= value <= sys.maxint
+
+
+class Statement(object):
+    """A prepared statement, kept in the statement cache of its connection
+    and reused by every execute() of the same SQL string.  The rows are
+    built directly as tuples, one ahead of what the cursor returned."""
+
+    _immutable_fields_ = ['space', 'connection', 'sql', 'kind',
+                          'column_count', 'param_count']
+
+    def __init__(self, space, connection, sql):
+        self.space = space
+        self.connection = connection
+        self.sql = sql
+        self.w_sql = None
+        self.kind = statement_kind(sql)
+        self.handle = lltype.nullptr(rffi.VOIDP.TO)
+        self.in_use = False
+        self.exhausted = False
+        self.w_item = None
+        self.row_cast_map = None
+        self.last_used = 0
+
+        with lltype.scoped_alloc(rffi.VOIDPP.TO, 1) as result:
+            with lltype.scoped_alloc(rffi.CCHARPP.TO, 1) as tail:
+                with rffi.scoped_str2charp(sql) as ll_sql:
+                    ret = csqlite.sqlite3_prepare_v2(connection.db, ll_sql,
+                                                     -1, result, tail)
+                    remaining = rffi.charp2str(tail[0])
+                if ret == csqlite.SQLITE_OK and not result[0]:
+                    # an empty statement, we work around that, as it's
+                    # the least trouble
+                    with rffi.scoped_str2charp("select 42") as ll_sql:
+                        ret = csqlite.sqlite3_prepare_v2(connection.db,
+                                                         ll_sql, -1, result,
+                                                         tail)
+                    self.kind = DQL
+                if ret != csqlite.SQLITE_OK:
+                    raise connection.error(ret)
+                self.handle = result[0]
+        if check_remaining_sql(remaining):
+            self.finalize()
+            raise OperationError(get_error(space, "Warning"), space.wrap(
+                "You can only execute one statement at a time."))
+        self.column_count = intmask(
+            csqlite.sqlite3_column_count(self.handle))
+        self.param_count = intmask(
+            csqlite.sqlite3_bind_parameter_count(self.handle))
+
+    def __del__(self):
+        if self.handle:
+            csqlite.sqlite3_finalize_nogil(self.handle)
+
+    def finalize(self):
+        if self.handle:
+            csqlite.sqlite3_finalize(self.handle)
+            self.handle = lltype.nullptr(rffi.VOIDP.TO)
+        self.in_use = False
+
+    def reset(self):
+        self.row_cast_map = None
+        self.w_item = None
+        ret = csqlite.sqlite3_reset(self.handle)
+        self.in_use = False
+        self.exhausted = False
+        return ret
+
+    # ____________________________________________________________
+    # binding
+
+    def set_params(self, w_sql, w_params):
+        space = self.space
+        self.w_sql = w_sql
+        ret = csqlite.sqlite3_reset(self.handle)
+        if ret != csqlite.SQLITE_OK:
+            raise self.connection.error(ret)
+        self.in_use = True
+        self.exhausted = False
+        if self.connection.w_taint_auditor is not None:
+            self.audit_sql()
+
+        if space.is_w(w_params, space.w_None):
+            self.check_param_count(0)
+            return
+        if space.isinstance_w(w_params, space.w_dict):
+            self.set_named_params(w_params)
+            return
+        # bulk binding, without looking at the items one by one, for
+        # the lists of ints or strs that the list strategies give us
+        if not space.fromcache(State).base_type_adapted:
+            ints = space.listview_int(w_params)
+            if ints is not None:
+                self.check_param_count(len(ints))
+                if self.connection.w_taint_auditor is None:
+                    for i in range(len(ints)):
+                        self.check(csqlite.sqlite3_bind_int64(
+                            self.handle, i + 1, r_longlong(ints[i])))
+                    return
+            strs = space.listview_str(w_params)
+            if strs is not None:
+                self.check_param_count(len(strs))
+                if self.connection.w_taint_auditor is None:
+                    for i in range(len(strs)):
+                        self.bind_str(i + 1, strs[i])
+                    return
+        params_w = space.fixedview(w_params)
+        self.check_param_count(len(params_w))
+        if (self.connection.w_taint_auditor is None and
+                not space.fromcache(State).base_type_adapted):
+            # tuples have no strategies, but their exact ints and strs
+            # can still be bound without going through set_param()
+            for i in range(len(params_w)):
+                w_param = params_w[i]
+                w_type = space.type(w_param)
+                if space.is_w(w_type, space.w_int):
+                    self.check(csqlite.sqlite3_bind_int64(
+                        self.handle, i + 1, r_longlong(space.int_w(w_param))))
+                elif space.is_w(w_type, space.w_str):
+                    self.bind_str(i + 1, space.str_w(w_param))
+                else:
+                    self.set_param(i + 1, w_param, None)
+            return
+        for i in range(len(params_w)):
+            self.set_param(i + 1, params_w[i], None)
+
+    def set_named_params(self, w_params):
+        space = self.space
+        for idx in range(1, self.param_count + 1):
+            ll_name = csqlite.sqlite3_bind_parameter_name(self.handle, idx)
+            if not ll_name:
+                raise self.programming_error(
+                    "Binding %d has no name, but you supplied a dictionary "
+                    "(which has only names)." % idx)
+            name = rffi.charp2str(ll_name)
+            name = name[1:]
+            w_name = space.wrap(name)
+            try:
+                w_param = space.getitem(w_params, w_name)
+            except OperationError, e:
+                if not e.match(space, space.w_KeyError):
+                    raise
+                raise self.programming_error(
+                    "You did not supply a value for binding %d." % idx)
+            self.set_param(idx, w_param, w_name)
+
+    def check_param_count(self, count):
+        if count != self.param_count:
+            raise self.programming_error(
+                "Incorrect number of bindings supplied. The current "
+                "statement uses %d, and there are %d supplied." % (
+                    self.param_count, count))
+
+    def set_param(self, idx, w_param, w_name):
+        space = self.space
+        if self.connection.w_taint_auditor is not None:
+            if w_param.is_tainted():
+                self.audit_param(idx, w_param, w_name)
+        w_type = space.type(w_param)
+        if (space.fromcache(State).base_type_adapted or not (
+                space.is_w(w_type, space.w_int) or
+                space.is_w(w_type, space.w_long) or
+                space.is_w(w_type, space.w_float) or
+                space.is_w(w_type, space.w_str) or
+                space.is_w(w_type, space.w_unicode) or
+                space.is_w(w_param, space.w_None))):
+            w_module = space.getbuiltinmodule('_sqlite3')
+            w_param = space.call_method(w_module, 'adapt', w_param)
+
+        if space.is_w(w_param, space.w_None):
+            self.check(csqlite.sqlite3_bind_null(self.handle, idx))
+        elif space.isinstance_w(w_param, space.w_int):
+            value = space.int_w(w_param)
+            self.check(csqlite.sqlite3_bind_int64(self.handle, idx,
+                                                  r_longlong(value)))
+        elif space.isinstance_w(w_param, space.w_long):
+            value = space.r_longlong_w(w_param)
+            self.check(csqlite.sqlite3_bind_int64(self.handle, idx, value))
+        elif space.isinstance_w(w_param, space.w_float):
+            value = space.float_w(w_param)
+            self.check(csqlite.sqlite3_bind_double(self.handle, idx, value))
+        elif space.isinstance_w(w_param, space.w_str):
+            self.bind_str(idx, space.str_w(w_param))
+        elif space.isinstance_w(w_param, space.w_unicode):
+            utf8 = PyUnicode_EncodeUTF8(space, space.unicode_w(w_param))
+            self.bind_text(idx, utf8)
+        elif space.isinstance_w(w_param, space.builtin.get('buffer')):
+            data = space.bufferstr_w(w_param)
+            with rffi.scoped_nonmovingbuffer(data) as buf:
+                self.check(csqlite.sqlite3_bind_blob(
+                    self.handle, idx, buf, len(data),
+                    csqlite.SQLITE_TRANSIENT()))
+        else:
+            raise OperationError(
+                get_error(space, "InterfaceError"),
+                space.wrap("Error binding parameter %d - "
+                           "probably unsupported type." % (idx - 1)))
+
+    def bind_str(self, idx, value):
+        if self.connection.text_factory_decodes_utf8():
+            for c in value:
+                if ord(c) & 0x80:
+                    raise self.programming_error(
+                        "You must not use 8-bit bytestrings unless "
+                        "you use a text_factory that can interpret "
+                        "8-bit bytestrings (like text_factory = str). "
+                        "It is highly recommended that you instead "
+                        "just switch your application to Unicode strings.")
+        self.bind_text(idx, value)
+
+    def bind_text(self, idx, value):
+        with rffi.scoped_nonmovingbuffer(value) as buf:
+            self.check(csqlite.sqlite3_bind_text(
+                self.handle, idx, buf, len(value),
+                csqlite.SQLITE_TRANSIENT()))
+
+    def check(self, ret):
+        if ret != csqlite.SQLITE_OK:
+            raise self.connection.error(ret)
+
+    def programming_error(self, msg):
+        space = self.space
+        return OperationError(get_error(space, "ProgrammingError"),
+                              space.wrap(msg))
+
+    # ____________________________________________________________
+    # taint auditing
+
+    def audit_sql(self):
+        "Report a tainted SQL string to the auditor, with a key of None."
+        if self.w_sql.is_tainted():
+            self.audit(self.space.w_None, self.w_sql)
+
+    def audit_param(self, idx, w_param, w_name):
+        space = self.space
+        if w_name is None:
+            w_name = space.wrap(idx)
+        self.audit(w_name, w_param)
+
+    def audit(self, w_key, w_value):
+        space = self.space
+        try:
+            space.call_function(self.connection.w_taint_auditor, self.w_sql,
+                                w_key, w_value.gettaint(space))
+        except OperationError:
+            self.in_use = False
+            csqlite.sqlite3_reset(self.handle)
+            raise
+
+    # ____________________________________________________________
+    # rows
+
+    def build_row_cast_map(self):
+        space = self.space
+        detect_types = self.connection.detect_types
+        if not detect_types:
+            self.row_cast_map = None
+            return
+        w_converters = space.getattr(space.getbuiltinmodule('_sqlite3'),
+                                     space.wrap('converters'))
+        row_cast_map = [None] * self.column_count
+        for i in range(self.column_count):
+            w_converter = None
+            if detect_types & PARSE_COLNAMES:
+                ll_name = csqlite.sqlite3_column_name(self.handle, i)
+                if ll_name:
+                    colname = rffi.charp2str(ll_name)
+                    start = colname.find('[')
+                    if start >= 0:
+                        end = colname.find(']', start + 1)
+                        if end >= 0:
+                            key = colname[start + 1:end].upper()
+                            w_converter = space.finditem_str(w_converters,
+                                                             key)
+            if w_converter is None and detect_types & PARSE_DECLTYPES:
+                ll_decltype = csqlite.sqlite3_column_decltype(self.handle, i)
+                if ll_decltype:
+                    decltype = rffi.charp2str(ll_decltype)
+                    # if multiple words, use first, e.g.
+                    # "INTEGER NOT NULL" => "INTEGER"
+                    end = 0
+                    while (end < len(decltype) and
+                           not decltype[end].isspace() and
+                           decltype[end] != '('):
+                        end += 1
+                    key = decltype[:end].upper()
+                    w_converter = space.finditem_str(w_converters, key)
+            row_cast_map[i] = w_converter
+        self.row_cast_map = row_cast_map
+
+    def readahead(self, cursor):
+        "Build the row at which the statement is, for the next fetch."
+        space = self.space
+        handle = self.handle
+        items_w = [None] * self.column_count
+        for i in range(self.column_count):
+            w_converter = None
+            if self.row_cast_map is not None:
+                w_converter = self.row_cast_map[i]
+            if w_converter is not None:
+                blob = csqlite.sqlite3_column_blob(handle, i)
+                if not blob:
+                    w_value = space.w_None
+                else:
+                    size = intmask(csqlite.sqlite3_column_bytes(handle, i))
+                    w_value = space.call_function(
+                        w_converter, space.wrap(rffi.charpsize2str(blob,
+                                                                   size)))
+            else:
+                w_value = self.column_value(i)
+            items_w[i] = w_value
+        w_row = space.newtuple(items_w)
+        w_row_factory = cursor.w_row_factory
+        if not space.is_w(w_row_factory, space.w_None):
+            w_row = space.call_function(w_row_factory, space.wrap(cursor),
+                                        w_row)
+        self.w_item = w_row
+
+    def column_value(self, i):
+        space = self.space
+        handle = self.handle
+        typ = csqlite.sqlite3_column_type(handle, i)
+        if typ == csqlite.SQLITE_INTEGER:
+            value = csqlite.sqlite3_column_int64(handle, i)
+            if fits_in_int(value):
+                return space.wrap(intmask(value))
+            return space.wrap(value)
+        elif typ == csqlite.SQLITE_FLOAT:
+            return space.wrap(csqlite.sqlite3_column_double(handle, i))
+        elif typ == csqlite.SQLITE_TEXT:
+            text = csqlite.sqlite3_column_text(handle, i)
+            size = intmask(csqlite.sqlite3_column_bytes(handle, i))
+            return self.connection.convert_text(rffi.charpsize2str(text,
+                                                                   size))
+        elif typ == csqlite.SQLITE_BLOB:
+            blob = csqlite.sqlite3_column_blob(handle, i)
+            size = intmask(csqlite.sqlite3_column_bytes(handle, i))
+            return space.wrap(StringBuffer(rffi.charpsize2str(blob, size)))
+        else:
+            return space.w_None
+
+    def start(self, cursor):
+        "Run the statement up to its first row, if it has any."
+        ret = csqlite.sqlite3_step(self.handle)
+        if ret == csqlite.SQLITE_ROW:
+            self.build_row_cast_map()
+            self.readahead(cursor)
+        elif ret == csqlite.SQLITE_DONE:
+            self.reset()
+            self.exhausted = True
+        else:
+            error = self.connection.error(ret)
+            self.reset()
+            raise error
+
+    def next(self, cursor):
+        "Return the prefetched row and step to the next one, or None."
+        if self.exhausted:
+            return None
+        w_item = self.w_item
+        ret = csqlite.sqlite3_step(self.handle)
+        if ret == csqlite.SQLITE_ROW:
+            self.readahead(cursor)
+        elif ret == csqlite.SQLITE_DONE:
+            # give the statement back to the cache
+            self.reset()
+            self.exhausted = True
+        else:
+            error = self.connection.error(ret)
+            self.reset()
+            raise error
+        return w_item
+
+    def get_description(self):
+        space = self.space
+        if self.kind == DML:
+            return space.w_None
+        items_w = []
+        for i in range(self.column_count):
+            name = rffi.charp2str(csqlite.sqlite3_column_name(self.handle, i))
+            end = name.find('[')
+            if end >= 0:
+                name = name[:end]
+            name = name.strip(' ')
+            w_none = space.w_None
+            items_w.append(space.newtuple([space.wrap(name), w_none, w_none,
+                                           w_none, w_none, w_none, w_none]))
+        return space.newlist(items_w)
+
+
+class StatementCache(object):
+    """The statements prepared for the last 'maxcount' SQL strings used on
+    a connection, so that executing the same SQL again skips the parsing
+    and planning in sqlite3_prepare_v2()."""
+
+    def __init__(self, space, connection, maxcount):
+        self.space = space
+        self.connection = connection
+        self.maxcount = maxcount
+        self.cache = {}
+        self.clock = 0
+
+    def get(self, sql):
+        self.clock += 1
+        stmt = self.cache.get(sql, None)
+        if stmt is None or not stmt.handle:
+            stmt = Statement(self.space, self.connection, sql)
+            if self.maxcount > 0:
+                if len(self.cache) >= self.maxcount:
+                    self.evict()
+                self.cache[sql] = stmt
+            self.connection.remember_statement(stmt)
+        elif stmt.in_use:
+            # a cursor is still iterating over it: use a private copy
+            stmt = Statement(self.space, self.connection, sql)
+            self.connection.remember_statement(stmt)
+        stmt.last_used = self.clock
+        return stmt
+
+    def evict(self):
+        "Drop the least recently used statement."
+        oldest = None
+        for stmt in self.cache.values():
+            if not stmt.in_use and (oldest is None or
+                                    stmt.last_used < oldest.last_used):
+                oldest = stmt
+        if oldest is not None:
+            del self.cache[oldest.sql]
+
+    def clear(self):
+        self.cache.clear()
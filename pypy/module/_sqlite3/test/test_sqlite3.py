@@ -0,0 +1,319 @@
+"""
+Tests for the interp-level _sqlite3 module.
+"""
+
+
+class AppTestSQLite(object):
+    spaceconfig = dict(usemodules=['_sqlite3', '__pypy__', 'struct',
+                                   'binascii', 'itertools', 'time'])
+
+    def test_execute_fetch(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        cur = con.cursor()
+        cur.execute("create table t (i integer, f real, s text, b blob)")
+        cur.execute("insert into t values (?, ?, ?, ?)",
+                    (1, 2.5, u"hello", buffer("\x00\x01")))
+        assert cur.rowcount == 1
+        assert cur.lastrowid == 1
+        cur.execute("insert into t values (?, ?, ?, ?)",
+                    (2 ** 40, None, "ascii", None))
+        cur.execute("select * from t order by i")
+        assert [d[0] for d in cur.description] == ['i', 'f', 's', 'b']
+        row = cur.fetchone()
+        assert row[:3] == (1, 2.5, u"hello")
+        assert type(row[2]) is unicode
+        assert str(row[3]) == "\x00\x01"
+        assert cur.fetchall() == [(2 ** 40, None, u"ascii", None)]
+        assert cur.fetchone() is None
+        con.close()
+
+    def test_iteration_and_fetchmany(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        con.execute("create table t (x)")
+        con.executemany("insert into t values (?)", [[i] for i in range(10)])
+        cur = con.execute("select x from t order by x")
+        assert cur.fetchmany(3) == [(0,), (1,), (2,)]
+        cur.arraysize = 2
+        assert cur.fetchmany() == [(3,), (4,)]
+        assert [row[0] for row in cur] == [5, 6, 7, 8, 9]
+        assert list(con.execute("select x from t where x > 100")) == []
+
+    def test_named_params(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        cur = con.execute("select :a, :b", {"a": 1, "b": u"x"})
+        assert cur.fetchone() == (1, u"x")
+        raises(_sqlite3.ProgrammingError, con.execute, "select :a",
+               {"b": 1})
+        raises(_sqlite3.ProgrammingError, con.execute, "select ?, ?", (1,))
+        raises(_sqlite3.ProgrammingError, con.execute, "select ?")
+
+    def test_executemany_strategies(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        con.execute("create table t (a, b)")
+        cur = con.executemany("insert into t values (?, ?)",
+                              [[i, i * 2] for i in range(100)])
+        assert cur.rowcount == 100
+        con.executemany("insert into t values (?, ?)",
+                        [["x", "y"], ["z", "w"]])
+        assert con.execute("select count(*), sum(b) from t "
+                           "where typeof(a) = 'integer'").fetchone() == (
+            100, 9900)
+        assert con.execute("select a, b from t where a = 'z'"
+                           ).fetchall() == [(u"z", u"w")]
+        raises(_sqlite3.ProgrammingError, con.executemany, "select ?",
+               [[1]])
+
+    def test_executemany_tuples(self):
+        import _sqlite3
+        class MyInt(int):
+            pass
+        con = _sqlite3.connect(":memory:")
+        con.execute("create table t (a, b)")
+        cur = con.executemany("insert into t values (?, ?)",
+                              [(i, str(i)) for i in range(100)])
+        assert cur.rowcount == 100
+        con.executemany("insert into t values (?, ?)",
+                        [(MyInt(5), None), (1.5, u"x")])
+        assert con.execute("select count(*), sum(a) from t "
+                           "where typeof(a) = 'integer' and "
+                           "typeof(b) = 'text'").fetchone() == (100, 4950)
+        assert con.execute("select a, b from t where a >= 1.5 and b is null "
+                           "or b = 'x'").fetchall() == [(5, None), (1.5, u"x")]
+        raises(_sqlite3.ProgrammingError, con.executemany,
+               "insert into t values (?, ?)", [(1,)])
+        raises(_sqlite3.ProgrammingError, con.execute,
+               "insert into t values (?, ?)", (1, "\xff"))
+
+    def test_statement_cache(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:", cached_statements=2)
+        con.execute("create table t (x)")
+        for i in range(20):
+            con.execute("insert into t values (?)", (i,))
+            con.execute("select %d" % (i % 3,)).fetchone()
+        # two cursors iterating over the same cached statement
+        cur1 = con.execute("select x from t order by x")
+        cur2 = con.execute("select x from t order by x")
+        assert cur1.fetchone() == (0,)
+        assert cur2.fetchone() == (0,)
+        assert cur1.fetchone() == (1,)
+        assert len(cur2.fetchall()) == 19
+
+    def test_transactions(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        con.execute("create table t (x)")
+        con.execute("insert into t values (1)")
+        con.rollback()
+        assert con.execute("select count(*) from t").fetchone() == (0,)
+        with con:
+            con.execute("insert into t values (2)")
+        con.rollback()
+        assert con.execute("select x from t").fetchall() == [(2,)]
+        con.isolation_level = None
+        assert con.isolation_level is None
+        con.execute("insert into t values (3)")
+        con.rollback()
+        assert con.total_changes == 3
+        raises(ValueError, setattr, con, 'isolation_level', 'FOO')
+
+    def test_errors(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        exc = raises(_sqlite3.OperationalError, con.execute, "selec 1")
+        assert "syntax error" in str(exc.value)
+        con.execute("create table t (x unique)")
+        con.execute("insert into t values (1)")
+        raises(_sqlite3.IntegrityError, con.execute,
+               "insert into t values (1)")
+        raises(_sqlite3.Warning, con.execute, "select 1; select 2")
+        raises(_sqlite3.InterfaceError, con.execute, "select ?", (object(),))
+        raises(ValueError, con.execute, 42)
+        assert con.Error is _sqlite3.Error
+        assert issubclass(_sqlite3.IntegrityError, _sqlite3.DatabaseError)
+        con.close()
+        raises(_sqlite3.ProgrammingError, con.execute, "select 1")
+
+    def test_text_factory(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        raises(_sqlite3.ProgrammingError, con.execute, "select ?",
+               ("\xff",))
+        con.text_factory = str
+        assert con.execute("select ?", ("\xff",)).fetchone() == ("\xff",)
+        con.text_factory = _sqlite3.OptimizedUnicode
+        row = con.execute("select 'a', ?", (u"\xe9",)).fetchone()
+        assert type(row[0]) is str and row[1] == u"\xe9"
+
+    def test_row_factory(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        con.row_factory = _sqlite3.Row
+        row = con.execute("select 1 as a, 2 as b").fetchone()
+        assert row["A"] == 1 and row[1] == 2
+        assert row.keys() == ["a", "b"]
+        cur = con.cursor()
+        cur.row_factory = lambda cursor, row: list(row)
+        assert cur.execute("select 3").fetchone() == [3]
+
+    def test_detect_types(self):
+        import _sqlite3
+        _sqlite3.register_converter("point", lambda s: tuple(
+            map(float, s.split(";"))))
+        con = _sqlite3.connect(":memory:",
+                               detect_types=_sqlite3.PARSE_DECLTYPES |
+                                            _sqlite3.PARSE_COLNAMES)
+        con.execute("create table t (p point)")
+        con.execute("insert into t values ('1;2')")
+        assert con.execute("select p from t").fetchone() == ((1.0, 2.0),)
+        row = con.execute('select "3;4" as "p [point]"').fetchone()
+        assert row == ((3.0, 4.0),)
+        assert con.execute('select "3;4" as "p [point]"').description[0][0] \
+            == "p"
+
+    def test_adapters(self):
+        import _sqlite3
+        class Point(object):
+            def __init__(self, x, y):
+                self.x, self.y = x, y
+            def __conform__(self, protocol):
+                if protocol is _sqlite3.PrepareProtocol:
+                    return "%f;%f" % (self.x, self.y)
+        class Other(object):
+            pass
+        _sqlite3.register_adapter(Other, lambda o: 42)
+        con = _sqlite3.connect(":memory:")
+        assert con.execute("select ?", (Point(1, 2),)).fetchone() == (
+            u"1.000000;2.000000",)
+        assert con.execute("select ?", (Other(),)).fetchone() == (42,)
+
+    def test_create_function(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        con.create_function("myadd", 2, lambda a, b: a + b)
+        con.create_function("fail", 0, lambda: 1 / 0)
+        assert con.execute("select myadd(1, 2), myadd('a', 'b')").fetchone() == (
+            3, u"ab")
+        exc = raises(_sqlite3.OperationalError, con.execute, "select fail()")
+        assert "user-defined function raised exception" in str(exc.value)
+
+    def test_create_aggregate(self):
+        import _sqlite3
+        class MySum(object):
+            def __init__(self):
+                self.total = 0
+            def step(self, value):
+                self.total += value
+            def finalize(self):
+                return self.total
+        con = _sqlite3.connect(":memory:")
+        con.create_aggregate("mysum", 1, MySum)
+        con.execute("create table t (x)")
+        con.executemany("insert into t values (?)", [(1,), (2,), (3,)])
+        assert con.execute("select mysum(x) from t").fetchone() == (6,)
+
+    def test_create_collation(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        con.create_collation("reverse", lambda a, b: -cmp(a, b))
+        con.execute("create table t (x)")
+        con.executemany("insert into t values (?)", [("a",), ("c",), ("b",)])
+        rows = con.execute("select x from t order by x collate reverse")
+        assert rows.fetchall() == [(u"c",), (u"b",), (u"a",)]
+        raises(_sqlite3.ProgrammingError, con.create_collation, "a b",
+               cmp)
+
+    def test_authorizer_and_progress(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        con.execute("create table t (x, secret)")
+        def authorizer(action, arg1, arg2, dbname, source):
+            if action == _sqlite3.SQLITE_READ and arg2 == "secret":
+                return _sqlite3.SQLITE_DENY
+            return _sqlite3.SQLITE_OK
+        con.set_authorizer(authorizer)
+        con.execute("select x from t")
+        raises(_sqlite3.DatabaseError, con.execute, "select secret from t")
+        con.set_authorizer(None)
+        calls = []
+        con.set_progress_handler(lambda: calls.append(1), 1)
+        con.execute("select 1").fetchall()
+        assert calls
+        con.set_progress_handler(lambda: 1, 1)
+        raises(_sqlite3.OperationalError, con.execute, "select 1")
+
+    def test_executescript(self):
+        import _sqlite3
+        con = _sqlite3.connect(":memory:")
+        con.executescript("""
+            create table t (x);
+            -- a comment
+            insert into t values (1);
+            insert into t values (2);
+        """)
+        assert con.execute("select sum(x) from t").fetchone() == (3,)
+        raises(_sqlite3.OperationalError, con.executescript, "selec 1;")
+
+    def test_subclasses(self):
+        import _sqlite3
+        class MyCursor(_sqlite3.Cursor):
+            pass
+        class MyConnection(_sqlite3.Connection):
+            def __init__(self, *args, **kwargs):
+                _sqlite3.Connection.__init__(self, *args, **kwargs)
+                self.extra = True
+        con = _sqlite3.connect(":memory:", factory=MyConnection)
+        assert con.extra
+        cur = con.cursor(MyCursor)
+        assert isinstance(cur, MyCursor)
+        assert cur.execute("select 1").fetchone() == (1,)
+        assert cur.connection is con
+
+    def test_taint_auditor(self):
+        import _sqlite3
+        from __pypy__.taint import add_taint
+        con = _sqlite3.connect(":memory:")
+        con.execute("create table t (x)")
+        seen = []
+        def auditor(sql, key, taints):
+            seen.append((sql, key, taints))
+            if 13 in taints:
+                raise ValueError("refused")
+        con.set_taint_auditor(auditor)
+        value = "user " + "input"
+        add_taint(value, 7)
+        con.execute("insert into t values (?)", (value,))
+        assert seen == [("insert into t values (?)", 1, [7])]
+        del seen[:]
+        con.execute("select :name", {"name": value})
+        assert seen[0][1:] == ("name", [7])
+        del seen[:]
+        con.executemany("insert into t values (?)", [["a"], [value]])
+        assert [s[1] for s in seen] == [1]
+        sql = "select * from t where x = '" + "1'"
+        add_taint(sql, 13)
+        raises(ValueError, con.execute, sql)
+        assert seen[-1][1] is None
+        # untainted values are never reported
+        del seen[:]
+        con.execute("select ?", ("clean",))
+        assert seen == []
+        con.set_taint_auditor(None)
+        con.execute(sql)
+
+    def test_sqlite3_package(self):
+        import sqlite3
+        assert sqlite3.sqlite_version_info >= (3, 0, 0)
+        con = sqlite3.connect(":memory:")
+        assert con.execute("select ?", (1,)).fetchone() == (1,)
+        con.execute("create table t (x)")
+        con.execute("insert into t values ('a')")
+        assert list(con.iterdump()) == [
+            "BEGIN TRANSACTION;",
+            "CREATE TABLE t (x);",
+            "INSERT INTO \"t\" VALUES('a');",
+            "COMMIT;"]
@@ -168,6 +168,12 @@ class ArrayBuffer(RWBuffer):
     def get_raw_address(self):
         return self.array._charbuf_start()
 
+    def pin(self):
+        self.array.exports += 1
+
+    def unpin(self):
+        self.array.exports -= 1
+
 def make_array(mytype):
     W_ArrayBase = globals()['W_ArrayBase']
 
@@ -184,6 +190,7 @@ def make_array(mytype):
             self.len = 0
             self.allocated = 0
             self.buffer = lltype.nullptr(mytype.arraytype)
+            self.exports = 0
 
         def item_w(self, w_item):
             space = self.space
@@ -228,7 +235,15 @@ def make_array(mytype):
             # length
             self.setlen(0)
 
+        def raise_exported(self):
+            # the memory is in use by a call that released the GIL,
+            # see ArrayBuffer.pin()
+            raise OperationError(self.space.w_BufferError, self.space.wrap(
+                "cannot resize an array that is exporting buffers"))
+
         def setlen(self, size, zero=False, overallocate=True):
+            if self.exports and size != self.len:
+                self.raise_exported()
             if size > 0:
                 if size > self.allocated or size < self.allocated / 2:
                     if overallocate:
@@ -485,6 +500,8 @@ def make_array(mytype):
             j = self.len
         if i >= j:
             return None
+        if self.exports:
+            self.raise_exported()
         oldbuffer = self.buffer
         self.buffer = lltype.malloc(mytype.arraytype,
                       max(self.len - (j - i), 0), flavor='raw',
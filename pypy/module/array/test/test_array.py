@@ -2,6 +2,8 @@ import sys
 import py
 import py.test
 
+from pypy.interpreter.gateway import interp2app
+
 
 ## class AppTestSimpleArray:
 ##     spaceconfig = dict(usemodules=('array',))
@@ -889,6 +891,35 @@ class AppTestArray(BaseArrayTests):
         cls.w_tempfile = cls.space.wrap(
             str(py.test.ensuretemp('array').join('tmpfile')))
         cls.w_maxint = cls.space.wrap(sys.maxint)
+        cls.w_call_pinned = cls.space.wrap(interp2app(cls.call_pinned))
+
+    @staticmethod
+    def call_pinned(space, w_obj, w_callable):
+        # like a call that releases the GIL and uses the raw address
+        buf = space.buffer_w(w_obj)
+        buf.pin()
+        try:
+            return space.call_function(w_callable)
+        finally:
+            buf.unpin()
+
+    def test_resize_pinned(self):
+        a = self.array('c', 'abcd')
+        def resize():
+            raises(BufferError, a.append, 'e')
+            raises(BufferError, a.extend, 'ef')
+            raises(BufferError, a.fromstring, 'ef')
+            raises(BufferError, a.pop)
+            raises(BufferError, a.__delslice__, 0, 1)
+            raises(BufferError, a.__delitem__, 0)
+            a[0] = 'x'
+            a[1:3] = self.array('c', 'yz')
+            a.extend('')
+        self.call_pinned(memoryview(a)[1:], resize)
+        assert a.tostring() == 'xyzd'
+        a.append('e')
+        del a[0]
+        assert a.tostring() == 'yzde'
 
     def test_buffer_info(self):
         a = self.array('c', 'Hi!')
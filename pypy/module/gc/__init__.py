@@ -9,12 +9,18 @@ class Module(MixedModule):
         'enable_finalizers': 'interp_gc.enable_finalizers',
         'disable_finalizers': 'interp_gc.disable_finalizers',
         'garbage' : 'space.newlist([])',
+        'get_stats': 'interp_gc.get_stats',
+        'set_stats_callback': 'interp_gc.set_stats_callback',
         #'dump_heap_stats': 'interp_gc.dump_heap_stats',
     }
     appleveldefs = {
     }
 
     def __init__(self, space, w_name):
+        "NOT_RPYTHON"
+        from pypy.module.gc.interp_gc import GcStatsAction
+        space.actionflag.register_periodic_action(
+            space.fromcache(GcStatsAction), use_bytecode_counter=False)
         if (not space.config.translating or
             space.config.translation.gctransformer == "framework"):
             self.appleveldefs.update({
@@ -1,6 +1,8 @@
 from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.error import OperationError
+from pypy.interpreter.executioncontext import PeriodicAsyncAction
 from rpython.rlib import rgc
+from rpython.rlib.unroll import unrolling_iterable
 from rpython.rlib.streamio import open_file_as_stream
 
 def collect(space):
@@ -15,6 +17,7 @@ def collect(space):
             cache = space.fromcache(IndexCache)
             cache.clear()
     rgc.collect()
+    space.fromcache(GcStatsAction).perform(None, None)
     return space.wrap(0)
 
 def enable(space):
@@ -49,6 +52,87 @@ def disable_finalizers(space):
 
 # ____________________________________________________________
 
+_stats_counters = unrolling_iterable([
+    ('minor_collections',   rgc.STAT_MINOR_COLLECTIONS),
+    ('major_collections',   rgc.STAT_MAJOR_COLLECTIONS),
+    ('major_steps',         rgc.STAT_MAJOR_STEPS),
+    ('minor_pause_total',   rgc.STAT_MINOR_PAUSE_TOTAL),
+    ('minor_pause_max',     rgc.STAT_MINOR_PAUSE_MAX),
+    ('major_pause_total',   rgc.STAT_MAJOR_PAUSE_TOTAL),
+    ('major_pause_max',     rgc.STAT_MAJOR_PAUSE_MAX),
+    ('bytes_promoted',      rgc.STAT_BYTES_PROMOTED),
+    ('cards_marked',        rgc.STAT_CARDS_MARKED),
+    ('rawmalloced_total',   rgc.STAT_RAWMALLOCED_TOTAL),
+    ('rawmalloced_current', rgc.STAT_RAWMALLOCED_CURRENT),
+    ('nursery_size',        rgc.STAT_NURSERY_SIZE),
+    ('total_memory_used',   rgc.STAT_TOTAL_MEMORY_USED),
+    ])
+_stats_histograms = unrolling_iterable([
+    ('minor_pause_histogram', rgc.STAT_MINOR_HISTOGRAM),
+    ('major_pause_histogram', rgc.STAT_MAJOR_HISTOGRAM),
+    ])
+
+def get_stats(space):
+    """Return a dict with the statistics recorded by the GC since the
+    process started.  The values are -1 if the GC doesn't record them.
+    Pause durations are in ticks of the CPU timestamp counter.  The two
+    histograms are lists where the item i counts the pauses that lasted
+    between 2**i and 2**(i+1) ticks."""
+    w_result = space.newdict()
+    for name, index in _stats_counters:
+        space.setitem_str(w_result, name, space.wrap(rgc.get_stats(index)))
+    for name, start in _stats_histograms:
+        items_w = [space.wrap(rgc.get_stats(start + i))
+                   for i in range(rgc.STAT_HISTOGRAM_SIZE)]
+        space.setitem_str(w_result, name, space.newlist(items_w))
+    return w_result
+
+def set_stats_callback(space, w_callback):
+    """Set a function called with the result of get_stats() after one or
+    more collections occurred, or None to remove it.  It is called
+    between two bytecodes, from the periodic check done every
+    sys.getcheckinterval() bytecodes (only if the thread or signal module
+    is enabled), or from gc.collect()."""
+    action = space.fromcache(GcStatsAction)
+    if space.is_w(w_callback, space.w_None):
+        action.w_callback = None
+    else:
+        action.w_callback = w_callback
+        action.seen = action.count_collections()
+
+class GcStatsAction(PeriodicAsyncAction):
+    """Calls the function set by gc.set_stats_callback()."""
+
+    def __init__(self, space):
+        PeriodicAsyncAction.__init__(self, space)
+        self.w_callback = None
+        self.seen = 0
+        self.running = False
+
+    def count_collections(self):
+        return (rgc.get_stats(rgc.STAT_MINOR_COLLECTIONS) +
+                rgc.get_stats(rgc.STAT_MAJOR_STEPS))
+
+    def perform(self, executioncontext, frame):
+        w_callback = self.w_callback
+        if w_callback is None or self.running:
+            return
+        count = self.count_collections()
+        if count == self.seen:
+            return
+        self.seen = count
+        space = self.space
+        self.running = True
+        try:
+            try:
+                space.call_function(w_callback, get_stats(space))
+            except OperationError, e:
+                e.write_unraisable(space, "gc stats callback ", w_callback)
+        finally:
+            self.running = False
+
+# ____________________________________________________________
+
 @unwrap_spec(filename='str0')
 def dump_heap_stats(space, filename):
     tb = rgc._heap_stats()
@@ -68,6 +68,53 @@ class AppTestGC(object):
         gc.enable()
         assert gc.isenabled()
 
+class AppTestGcStats(object):
+    def setup_class(cls):
+        from rpython.rlib import rgc
+        stats = [0] * rgc.STAT_COUNT
+        def fake_get_stats(index):
+            if index == rgc.STAT_MINOR_COLLECTIONS:
+                stats[index] += 1    # one minor collection per call
+            return stats[index]
+        cls._get_stats = rgc.get_stats
+        rgc.get_stats = fake_get_stats
+
+    def teardown_class(cls):
+        from rpython.rlib import rgc
+        rgc.get_stats = cls._get_stats
+
+    def test_get_stats(self):
+        import gc
+        stats = gc.get_stats()
+        assert stats['minor_collections'] > 0
+        assert stats['major_collections'] == 0
+        assert stats['nursery_size'] == 0
+        assert len(stats['minor_pause_histogram']) == 40
+        assert len(stats['major_pause_histogram']) == 40
+
+    def test_stats_callback(self):
+        import gc
+        seen = []
+        gc.set_stats_callback(seen.append)
+        try:
+            gc.collect()
+        finally:
+            gc.set_stats_callback(None)
+        assert len(seen) == 1
+        assert seen[0]['minor_collections'] > 0
+        gc.collect()
+        assert len(seen) == 1
+
+    def test_stats_callback_error(self):
+        import gc
+        def callback(stats):
+            raise ValueError
+        gc.set_stats_callback(callback)
+        try:
+            gc.collect()     # the error is printed and ignored
+        finally:
+            gc.set_stats_callback(None)
+
 class AppTestGcDumpHeap(object):
     pytestmark = py.test.mark.xfail(run=False)
 
@@ -48,3 +48,8 @@ class Module(MixedModule):
         add_fork_hook('parent', interp_imp.release_lock)
         add_fork_hook('child', interp_imp.reinit_lock)
 
+    def shutdown(self, space):
+        if space.config.objspace.importindex:
+            from pypy.module.imp.importindex import get_import_index
+            get_import_index(space).save()
+
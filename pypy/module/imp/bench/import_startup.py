@@ -0,0 +1,61 @@
+""" Measure the time to import modules from the end of a long sys.path,
+as with many installed packages: every import looks for its module in
+each of the directories before.  Run it once with a PyPy translated
+without and once with --objspace-importindex, and with PYPY_IMPORT_INDEX
+set to a file to start from the listings saved by the previous run.
+'strace -c -f' shows the stat() calls that are saved.
+
+Usage:
+    pypy import_startup.py [directories [modules [repeat]]]
+"""
+
+import sys, os, time, tempfile, shutil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, os.pardir, os.pardir))
+from pypy.tool.bench.timing import best_time
+
+def make_tree(root, directories, modules):
+    paths = []
+    for i in range(directories):
+        path = os.path.join(root, 'dir%d' % i)
+        os.mkdir(path)
+        for j in range(5):
+            f = open(os.path.join(path, 'other%d_%d.py' % (i, j)), 'w')
+            f.write('x = %d\n' % j)
+            f.close()
+        paths.append(path)
+    for j in range(modules):
+        f = open(os.path.join(paths[-1], 'mod%d.py' % j), 'w')
+        f.write('x = %d\n' % j)
+        f.close()
+    # an index only keeps listings of directories not modified recently
+    old = time.time() - 60
+    for path in paths:
+        os.utime(path, (old, old))
+    return paths
+
+def import_all(modules):
+    for j in range(modules):
+        __import__('mod%d' % j)
+    # unload them for the next run (negligible next to the imports)
+    for j in range(modules):
+        del sys.modules['mod%d' % j]
+
+def main(directories, modules, repeat):
+    root = tempfile.mkdtemp()
+    try:
+        paths = make_tree(root, directories, modules)
+        saved_path = sys.path[:]
+        sys.path[:0] = paths
+        best = best_time(lambda: import_all(modules), repeat)
+        sys.path[:] = saved_path
+    finally:
+        shutil.rmtree(root)
+    print '%d modules behind %d directories: %.1f ms' % (
+        modules, directories, best * 1000)
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    directories, modules, repeat = (args + [200, 100, 5][len(args):])[:3]
+    main(directories, modules, repeat)
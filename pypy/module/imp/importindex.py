@@ -0,0 +1,160 @@
+"""
+The import index: listings of the sys.path directories, so that the
+import logic can tell that a module is not in a directory without a
+stat() per candidate file.  Enabled with the objspace.importindex option.
+
+A listing is checked against the mtime of its directory, at the cost of
+one stat() per directory and import.  Listings of directories modified
+in the last RECENT seconds are not kept, as a file could be added
+without changing the mtime seen.  If the PYPY_IMPORT_INDEX environment
+variable names a file, the listings are read from it at the first
+import and written back at exit.
+"""
+
+import os, stat, time
+
+from rpython.rlib.rfloat import formatd, rstring_to_float
+
+RECENT = 2.0
+MAGIC = 'pypy-import-index-1'
+
+
+class DirListing(object):
+    """The names in a directory.  Only the absence of a name is trusted;
+    a name that is there is still checked with a stat()."""
+
+    def __init__(self, path, mtime, names):
+        self.path = path
+        self.prefix = os.path.join(path, '')
+        self.mtime = mtime
+        self.names = {}
+        for name in names:
+            self.names[name] = None
+
+    def getname(self, path):
+        start = len(self.prefix)
+        assert path.startswith(self.prefix)
+        assert start >= 0
+        return path[start:]
+
+    def isfile(self, path):
+        """Tests whether 'path', a file in this directory, exists."""
+        return self.getname(path) in self.names and os.path.isfile(path)
+
+    def isdir(self, path):
+        return self.getname(path) in self.names and os.path.isdir(path)
+
+    def serialize(self, result):
+        result.append(self.path)
+        result.append(formatd(self.mtime, 'r', 0))
+        result.append(str(len(self.names)))
+        for name in self.names:
+            result.append(name)
+
+
+class ImportIndex(object):
+    def __init__(self, space):
+        self.listings = {}
+        self.filename = None
+        self.loaded = False
+        self.changed = False
+
+    def listdir(self, path):
+        """The DirListing of the directory 'path', empty if it is not a
+        directory."""
+        if not self.loaded:
+            self.loaded = True
+            filename = os.environ.get('PYPY_IMPORT_INDEX')
+            if filename is not None and filename:
+                self.filename = filename
+                self.load(filename)
+        dirname = path or os.curdir
+        try:
+            st = os.stat(dirname)
+        except OSError:
+            return DirListing(path, 0.0, [])
+        if not stat.S_ISDIR(st.st_mode):
+            return DirListing(path, 0.0, [])
+        mtime = st.st_mtime
+        listing = self.listings.get(path, None)
+        if listing is not None and listing.mtime == mtime:
+            return listing
+        try:
+            names = os.listdir(dirname)
+        except OSError:
+            return DirListing(path, 0.0, [])
+        listing = DirListing(path, mtime, names)
+        if time.time() - mtime > RECENT:
+            self.listings[path] = listing
+            self.changed = True
+        return listing
+
+    def load(self, filename):
+        try:
+            data = read_file(filename)
+        except OSError:
+            return
+        items = data.split('\0')
+        if len(items) < 1 or items[0] != MAGIC:
+            return
+        i = 1
+        while i + 3 <= len(items):
+            path = items[i]
+            try:
+                mtime = rstring_to_float(items[i + 1])
+                count = int(items[i + 2])
+            except ValueError:
+                return
+            i += 3
+            if count < 0 or i + count > len(items):
+                return
+            self.listings[path] = DirListing(path, mtime,
+                                             items[i:i + count])
+            i += count
+
+    def save(self):
+        filename = self.filename
+        if filename is None or not self.changed:
+            return
+        result = [MAGIC]
+        for listing in self.listings.values():
+            listing.serialize(result)
+        # a name of our own: other processes may save at the same time,
+        # and the last rename() wins
+        tmpname = '%s.%d.tmp' % (filename, os.getpid())
+        try:
+            fd = os.open(tmpname, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                         0644)
+            try:
+                data = '\0'.join(result)
+                while data:
+                    count = os.write(fd, data)
+                    data = data[count:]
+            finally:
+                os.close(fd)
+            os.rename(tmpname, filename)
+        except OSError:
+            try:
+                os.unlink(tmpname)
+            except OSError:
+                pass
+            return
+        self.changed = False
+
+
+def read_file(filename):
+    # the whole file is split into strings at once, so it is simply read
+    fd = os.open(filename, os.O_RDONLY, 0)
+    try:
+        result = []
+        while True:
+            data = os.read(fd, 65536)
+            if not data:
+                break
+            result.append(data)
+        return ''.join(result)
+    finally:
+        os.close(fd)
+
+def get_import_index(space):
+    return space.fromcache(ImportIndex)
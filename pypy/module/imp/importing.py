@@ -15,6 +15,7 @@ from rpython.rlib import streamio, jit
 from rpython.rlib.streamio import StreamErrors
 from rpython.rlib.objectmodel import we_are_translated, specialize
 from pypy.module.sys.version import PYPY_VERSION
+from pypy.module.imp.importindex import get_import_index
 
 SEARCH_ERROR = 0
 PY_SOURCE = 1
@@ -49,24 +50,40 @@ def get_so_extension(space):
 
     return '.' + soabi + SO
 
-def file_exists(path):
-    """Tests whether the given path is an existing regular file."""
+def file_exists(path, listing=None):
+    """Tests whether the given path is an existing regular file.  With
+    the 'listing' of its directory from the import index, a missing file
+    is found out without a stat()."""
+    if listing is not None:
+        return listing.isfile(path)
     return os.path.isfile(path) and case_ok(path)
 
-def find_modtype(space, filepart):
+def dir_exists(path, listing=None):
+    if listing is not None:
+        return listing.isdir(path)
+    return os.path.isdir(path) and case_ok(path)
+
+def get_listing(space, path):
+    """The listing of the directory 'path' from the import index, or
+    None if the index is not enabled."""
+    if not space.config.objspace.importindex:
+        return None
+    return get_import_index(space).listdir(path)
+
+def find_modtype(space, filepart, listing=None):
     """Check which kind of module to import for the given filepart,
     which is a path without extension.  Returns PY_SOURCE, PY_COMPILED or
     SEARCH_ERROR.
     """
     # check the .py file
     pyfile = filepart + ".py"
-    if file_exists(pyfile):
+    if file_exists(pyfile, listing):
         return PY_SOURCE, ".py", "U"
 
     # on Windows, also check for a .pyw file
     if CHECK_FOR_PYW:
         pyfile = filepart + ".pyw"
-        if file_exists(pyfile):
+        if file_exists(pyfile, listing):
             return PY_SOURCE, ".pyw", "U"
 
     # The .py file does not exist.  By default on PyPy, lonepycfiles
@@ -77,14 +94,14 @@ def find_modtype(space, filepart):
     # check the .pyc file
     if space.config.objspace.usepycfiles and space.config.objspace.lonepycfiles:
         pycfile = filepart + ".pyc"
-        if file_exists(pycfile):
+        if file_exists(pycfile, listing):
             # existing .pyc file
             return PY_COMPILED, ".pyc", "rb"
 
     if space.config.objspace.usemodules.cpyext:
         so_extension = get_so_extension(space)
         pydfile = filepart + so_extension
-        if file_exists(pydfile):
+        if file_exists(pydfile, listing):
             return C_EXTENSION, so_extension, "rb"
 
     return SEARCH_ERROR, None, None
@@ -527,16 +544,18 @@ def find_module(space, modulename, w_modulename, partname, w_path,
 
             path = space.str0_w(w_pathitem)
             filepart = os.path.join(path, partname)
-            if os.path.isdir(filepart) and case_ok(filepart):
+            listing = get_listing(space, path)
+            if dir_exists(filepart, listing):
                 initfile = os.path.join(filepart, '__init__')
-                modtype, _, _ = find_modtype(space, initfile)
+                modtype, _, _ = find_modtype(space, initfile,
+                                             get_listing(space, filepart))
                 if modtype in (PY_SOURCE, PY_COMPILED):
                     return FindInfo(PKG_DIRECTORY, filepart, None)
                 else:
                     msg = "Not importing directory " +\
                             "'%s' missing __init__.py" % (filepart,)
                     space.warn(msg, space.w_ImportWarning)
-            modtype, suffix, filemode = find_modtype(space, filepart)
+            modtype, suffix, filemode = find_modtype(space, filepart, listing)
             try:
                 if modtype in (PY_SOURCE, PY_COMPILED, C_EXTENSION):
                     assert suffix is not None
@@ -24,6 +24,10 @@ def setuppkg(pkgname, **entries):
     print >> f, "# package"
     f.close()
     for filename, content in entries.items():
+        # a .pyc left by an earlier test class could have the same mtime
+        pyc = p.join(filename + '.pyc')
+        if pyc.check():
+            pyc.remove()
         filename += '.py'
         f = p.join(filename).open('w')
         print >> f, '#', filename
@@ -643,6 +647,87 @@ class AppTestImport:
         assert module.__file__ == 'invalid_path_name'
 
 
+class AppTestImportWithIndex(AppTestImport):
+    spaceconfig = {
+        "usemodules": ['_md5', 'rctime'],
+        "objspace.importindex": True,
+    }
+
+
+class TestImportIndex:
+    def setup_method(self, meth):
+        from pypy.module.imp.importindex import ImportIndex
+        self.index = ImportIndex(None)
+        self.index.loaded = True
+        self.dir = udir.ensure('importindex', meth.__name__, dir=1)
+        self.dir.join('mod.py').write('x = 1\n')
+        self.dir.ensure('pkg', dir=1)
+
+    def age(self, path):
+        old = os.stat(str(path)).st_mtime - 60
+        os.utime(str(path), (old, old))
+
+    def test_listing(self):
+        path = str(self.dir)
+        listing = self.index.listdir(path)
+        assert listing.isfile(os.path.join(path, 'mod.py'))
+        assert not listing.isfile(os.path.join(path, 'Mod.py'))
+        assert not listing.isfile(os.path.join(path, 'other.py'))
+        assert not listing.isfile(os.path.join(path, 'pkg'))
+        assert listing.isdir(os.path.join(path, 'pkg'))
+        assert not listing.isdir(os.path.join(path, 'mod.py'))
+        listing = self.index.listdir(os.path.join(path, 'mod.py'))
+        assert not listing.isfile(os.path.join(path, 'mod.py', 'x.py'))
+
+    def test_recent_directory_not_kept(self):
+        path = str(self.dir)
+        self.index.listdir(path)
+        assert path not in self.index.listings
+        self.age(self.dir)
+        listing = self.index.listdir(path)
+        assert self.index.listings[path] is listing
+        assert self.index.listdir(path) is listing
+
+    def test_invalidated_by_mtime(self):
+        path = str(self.dir)
+        self.age(self.dir)
+        listing = self.index.listdir(path)
+        self.dir.join('new.py').write('')
+        self.age(self.dir)
+        listing2 = self.index.listdir(path)
+        assert listing2 is not listing
+        assert listing2.isfile(os.path.join(path, 'new.py'))
+
+    def test_save_and_load(self):
+        from pypy.module.imp.importindex import ImportIndex
+        path = str(self.dir)
+        self.age(self.dir)
+        self.index.filename = str(self.dir.dirpath().join('index'))
+        self.index.listdir(path)
+        self.index.save()
+        assert not self.index.changed
+        assert [p for p in self.dir.dirpath().listdir()
+                if p.basename.endswith('.tmp')] == []
+        index = ImportIndex(None)
+        index.loaded = True
+        index.load(self.index.filename)
+        listing = index.listings[path]
+        assert listing.mtime == self.index.listings[path].mtime
+        assert sorted(listing.names) == ['mod.py', 'pkg']
+        assert index.listdir(path) is listing
+
+    def test_load_bad_file(self):
+        from pypy.module.imp.importindex import ImportIndex, MAGIC
+        for data in ['', 'garbage', MAGIC + '\0/x\0bad\x003',
+                     MAGIC + '\0/x\0001.5\x005\0a']:
+            filename = self.dir.join('index')
+            filename.write(data)
+            index = ImportIndex(None)
+            index.load(str(filename))
+            assert index.listings == {}
+        index.load(str(self.dir.join('missing')))
+
+
 class TestAbi:
     def test_abi_tag(self):
         space1 = maketestobjspace(make_config(None, soabi='TEST'))
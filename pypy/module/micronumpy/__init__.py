@@ -16,11 +16,16 @@ class Module(MixedModule):
         'ones': 'interp_numarray.ones',
         'dot': 'interp_arrayops.dot',
         'fromstring': 'interp_support.fromstring',
+        'memmap': 'interp_support.memmap',
         'flatiter': 'interp_flatiter.W_FlatIterator',
         'concatenate': 'interp_arrayops.concatenate',
         'repeat': 'interp_arrayops.repeat',
         'where': 'interp_arrayops.where',
         'count_nonzero': 'interp_arrayops.count_nonzero',
+        'set_num_threads': 'parallel.set_num_threads',
+        'get_num_threads': 'parallel.get_num_threads',
+        'set_lazy_evaluation': 'lazy.set_lazy_evaluation',
+        'get_lazy_evaluation': 'lazy.get_lazy_evaluation',
 
         'set_string_function': 'appbridge.set_string_function',
 
@@ -1,8 +1,26 @@
 
 class BaseArrayImplementation(object):
+    # the taints of the data, shared by all the views on it
+    taints = None
+    _jit_taint_fields_ = ['taints']
+
     def is_scalar(self):
         return False
 
+    def get_taint_owner(self):
+        return self
+
+    def is_writable(self):
+        return True
+
+    def add_taints_from(self, other):
+        taints = other.get_taint_owner().taints
+        if taints:
+            owner = self.get_taint_owner()
+            if owner.taints is None:
+                owner.taints = {}
+            owner.taints.update(taints)
+
 class BaseArrayIterator(object):
     def next(self):
         raise NotImplementedError # purely abstract base class
@@ -9,7 +9,8 @@ from pypy.module.micronumpy.iter import Chunk, Chunks, NewAxisChunk, RecordChunk
 from pypy.interpreter.error import OperationError, operationerrfmt
 from rpython.rtyper.lltypesystem import rffi, lltype
 from rpython.rlib import jit
-from rpython.rlib.rawstorage import free_raw_storage, RAW_STORAGE
+from rpython.rlib.rawstorage import free_raw_storage, RAW_STORAGE,\
+     RAW_STORAGE_PTR
 from rpython.rlib.debug import make_sure_not_resized
 
 class ConcreteArrayIterator(base.BaseArrayIterator):
@@ -202,6 +203,7 @@ class BaseConcreteArray(base.BaseArrayImplementation):
 
     def setslice(self, space, arr):
         impl = arr.implementation
+        self.add_taints_from(impl)
         if impl.is_scalar():
             self.fill(impl.get_scalar_value())
             return
@@ -213,6 +215,11 @@ class BaseConcreteArray(base.BaseArrayImplementation):
     def get_size(self):
         return self.size // self.dtype.itemtype.get_element_size()
 
+    def get_taint_owner(self):
+        if self.parent is not None:
+            return self.parent
+        return self
+
     def reshape(self, space, new_shape):
         # Since we got to here, prod(new_shape) == self.size
         new_strides = None
@@ -404,6 +411,7 @@ class BaseConcreteArray(base.BaseArrayImplementation):
                                                     self.order)
         impl = ConcreteArray(self.get_shape(), self.dtype, self.order, strides,
                              backstrides)
+        impl.add_taints_from(self)
         return loop.setslice(self.get_shape(), impl, self)
 
     def create_axis_iter(self, shape, dim):
@@ -469,6 +477,23 @@ class ConcreteArray(ConcreteArrayNotOwning):
         free_raw_storage(self.storage, track_allocation=False)
 
 
+class MMapArray(ConcreteArrayNotOwning):
+    """ An array on the memory of a file mapped with rmmap.  The mapping
+    stays alive as long as the array or any of its views is alive, and is
+    unmapped by MMap.__del__.
+    """
+    def __init__(self, shape, dtype, order, strides, backstrides, mmap,
+                 start, writable):
+        storage = rffi.cast(RAW_STORAGE_PTR, mmap.getptr(start))
+        ConcreteArrayNotOwning.__init__(self, shape, dtype, order, strides,
+                                        backstrides, storage)
+        self.mmap = mmap
+        self.writable = writable
+
+    def is_writable(self):
+        return self.writable
+
+
 class NonWritableArray(ConcreteArray):
     def descr_setitem(self, space, w_index, w_value):
         raise OperationError(space.w_RuntimeError, space.wrap(
@@ -494,6 +519,9 @@ class SliceArray(BaseConcreteArray):
     def fill(self, box):
         loop.fill(self, box.convert_to(self.dtype))
 
+    def is_writable(self):
+        return self.parent.is_writable()
+
     def create_iter(self, shape=None):
         if shape is not None and shape != self.get_shape():
             r = calculate_broadcast_strides(self.get_strides(),
@@ -49,6 +49,7 @@ class Scalar(base.BaseArrayImplementation):
     def copy(self):
         scalar = Scalar(self.dtype)
         scalar.value = self.value
+        scalar.add_taints_from(self)
         return scalar
 
     def get_size(self):
@@ -79,6 +80,7 @@ class Scalar(base.BaseArrayImplementation):
             arr = W_NDimArray.from_shape(new_shape, self.dtype)
             arr_iter = arr.create_iter(new_shape)
             arr_iter.setitem(self.value)
+            arr.implementation.add_taints_from(self)
             return arr.implementation
         raise OperationError(space.w_ValueError, space.wrap(
             "total size of the array must be unchanged"))
@@ -1,5 +1,7 @@
 
 from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.pyopcode import merge_taints, checked_settaint
 from rpython.tool.pairtype import extendabletype
 from pypy.module.micronumpy.support import calc_strides
 
@@ -53,6 +55,68 @@ class W_NDimArray(Wrappable):
             w_val = dtype.coerce(space, w_val)
         return W_NDimArray(scalar.Scalar(dtype, w_val))
 
+    def check_writable(self, space):
+        if not self.implementation.is_writable():
+            raise OperationError(space.w_ValueError, space.wrap(
+                "assignment destination is read-only"))
+
+    # Taints are recorded for the array as a whole, on the implementation
+    # that owns the data, so that all the views of an array share them.
+
+    def gettaint(self, space):
+        taints = self.gettaint_unwrapped()
+        return space.newlist([space.newint(z) for z in taints.keys()])
+
+    def is_tainted(self):
+        taints = self.implementation.get_taint_owner().taints
+        return taints is not None and len(taints) > 0
+
+    def gettaint_unwrapped(self):
+        taints = self.implementation.get_taint_owner().taints
+        if not taints:
+            return {}
+        return taints
+
+    def cleartaint(self, space):
+        self.implementation.get_taint_owner().taints = None
+
+    def addtaint(self, space, w_int):
+        owner = self.implementation.get_taint_owner()
+        if not owner.taints:
+            owner.taints = {}
+        owner.taints[space.int_w(w_int)] = 1
+
+    def settaint(self, space, taints):
+        if not taints:
+            self.implementation.get_taint_owner().taints = None
+            return
+        new_taints = {}
+        new_taints.update(taints)
+        self.implementation.get_taint_owner().taints = new_taints
+
+def _merge_taints(args_w):
+    for w_arg in args_w:
+        if w_arg is not None and w_arg.is_tainted():
+            return merge_taints([w_arg for w_arg in args_w
+                                 if w_arg is not None])
+    return None
+
+def taint_array(space, arr, args_w):
+    """Add to the array 'arr' the taints of the objects in 'args_w', some
+    of which can be None.  Arrays are tainted as a whole, so this is done
+    once per operation and never per element."""
+    taints = _merge_taints([arr] + args_w)
+    if taints is not None:
+        arr.settaint(space, taints)
+
+def taint_result(space, w_result, args_w):
+    """Like taint_array(), for any result: returns either 'w_result' or a
+    copy of it if it is a prebuilt object like True."""
+    taints = _merge_taints([w_result] + args_w)
+    if taints is None:
+        return w_result
+    return checked_settaint(w_result, space, taints)
+
 def convert_to_array(space, w_obj):
     from pypy.module.micronumpy.interp_numarray import array
     from pypy.module.micronumpy import interp_ufuncs
@@ -65,4 +129,6 @@ def convert_to_array(space, w_obj):
     else:
         # If it's a scalar
         dtype = interp_ufuncs.find_dtype_for_scalar(space, w_obj)
-        return W_NDimArray.new_scalar(space, dtype, w_obj)
+        w_arr = W_NDimArray.new_scalar(space, dtype, w_obj)
+        taint_array(space, w_arr, [w_obj])
+        return w_arr
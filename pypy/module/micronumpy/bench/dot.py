@@ -0,0 +1,38 @@
+""" Measure the speed of dot() on square matrices, in GFLOP/s.  The
+contiguous float64 and int matrices use the blocked kernel; the transposed
+ones (not contiguous) use the generic loop.
+
+Usage:
+    pypy dot.py [size...]
+"""
+
+import sys, os
+try:
+    import numpypy as numpy
+except ImportError:
+    import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, os.pardir, os.pardir))
+from pypy.tool.bench.timing import best_time
+
+def gflops(n, func, repeat=3):
+    return 2.0 * n * n * n / best_time(func, repeat) / 1e9
+
+def main(sizes):
+    print '%8s %12s %12s %12s' % ('size', 'float64', 'int', 'transposed')
+    for n in sizes:
+        a = numpy.ones((n, n)) * 0.5
+        b = numpy.ones((n, n)) * 1.5
+        ai = numpy.ones((n, n), dtype=int)
+        bi = numpy.ones((n, n), dtype=int)
+        at = a.T
+        bt = b.T
+        print '%8d %12.3f %12.3f %12.3f' % (
+            n, gflops(n, lambda: numpy.dot(a, b)),
+            gflops(n, lambda: numpy.dot(ai, bi)),
+            gflops(n, lambda: numpy.dot(at, bt)))
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 200, 500, 1000]
+    main(sizes)
@@ -0,0 +1,48 @@
+""" Measure how the simple ufuncs and reductions scale with the number of
+threads given to _numpypy.set_num_threads().
+
+Usage:
+    pypy parallel.py [size] [max-threads]
+"""
+
+import sys, os
+import _numpypy as numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, os.pardir, os.pardir))
+from pypy.tool.bench.timing import best_time
+
+def main(size, max_threads):
+    a = numpy.ones(size) * 1.5
+    b = numpy.ones(size) * 2.5
+    i = numpy.ones(size, dtype=int)
+    cases = [
+        ('a + b', lambda: a + b),
+        ('a * b', lambda: a * b),
+        ('sqrt(a)', lambda: numpy.sqrt(a)),
+        ('a.sum()', lambda: a.sum()),
+        ('i + i', lambda: i + i),
+        ('i.sum()', lambda: i.sum()),
+    ]
+    nthreads = [1]
+    while nthreads[-1] * 2 <= max_threads:
+        nthreads.append(nthreads[-1] * 2)
+    print '%-10s' % ('threads',) + ''.join(['%10d' % n for n in nthreads])
+    for name, func in cases:
+        times = []
+        for n in nthreads:
+            numpy.set_num_threads(n)
+            func()     # warm up
+            times.append(best_time(func, 10))
+        print '%-10s' % (name,) + ''.join(['%9.2fx' % (times[0] / t)
+                                           for t in times])
+    numpy.set_num_threads(1)
+
+if __name__ == '__main__':
+    size = 10000000
+    max_threads = 8
+    if len(sys.argv) > 1:
+        size = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        max_threads = int(sys.argv[2])
+    main(size, max_threads)
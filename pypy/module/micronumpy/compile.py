@@ -111,6 +111,12 @@ class FakeSpace(object):
     def newlist(self, items):
         return ListObject(items)
 
+    def newbool(self, b):
+        return BoolObject(b)
+
+    def newint(self, i):
+        return IntObject(i)
+
     def newcomplex(self, r, i):
         return ComplexObject(r, i)
 
@@ -217,6 +223,9 @@ class BoolObject(W_Root):
     def __init__(self, boolval):
         self.boolval = boolval
 
+FakeSpace.w_True = BoolObject(True)
+FakeSpace.w_False = BoolObject(False)
+
 class IntObject(W_Root):
     tp = FakeSpace.w_int
     def __init__(self, intval):
@@ -1,5 +1,6 @@
 
 from pypy.module.micronumpy.base import convert_to_array, W_NDimArray
+from pypy.module.micronumpy.base import taint_array
 from pypy.module.micronumpy import loop, interp_ufuncs
 from pypy.module.micronumpy.iter import Chunk, Chunks
 from pypy.module.micronumpy.strides import shape_agreement
@@ -87,7 +88,9 @@ def where(space, w_arr, w_x=None, w_y=None):
     shape = shape_agreement(space, arr.get_shape(), x)
     shape = shape_agreement(space, shape, y)
     out = W_NDimArray.from_shape(shape, dtype)
-    return loop.where(out, shape, arr, x, y, dtype)
+    loop.where(out, shape, arr, x, y, dtype)
+    taint_array(space, out, [arr, x, y])
+    return out
 
 def dot(space, w_obj1, w_obj2):
     w_arr = convert_to_array(space, w_obj1)
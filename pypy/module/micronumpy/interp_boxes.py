@@ -11,6 +11,7 @@ from rpython.rlib.rarithmetic import LONG_BIT
 from rpython.rtyper.lltypesystem import rffi
 from rpython.tool.sourcetools import func_with_new_name
 from pypy.module.micronumpy.arrayimpl.voidbox import VoidBoxStorage
+from pypy.module.micronumpy.base import taint_result
 
 MIXIN_32 = (int_typedef,) if LONG_BIT == 32 else ()
 MIXIN_64 = (int_typedef,) if LONG_BIT == 64 else ()
@@ -79,12 +80,12 @@ class W_GenericBox(Wrappable):
     def descr_int(self, space):
         box = self.convert_to(W_LongBox._get_dtype(space))
         assert isinstance(box, W_LongBox)
-        return space.wrap(box.value)
+        return taint_result(space, space.wrap(box.value), [self])
 
     def descr_float(self, space):
         box = self.convert_to(W_Float64Box._get_dtype(space))
         assert isinstance(box, W_Float64Box)
-        return space.wrap(box.value)
+        return taint_result(space, space.wrap(box.value), [self])
 
     def descr_nonzero(self, space):
         dtype = self.get_dtype(space)
@@ -165,7 +166,8 @@ class W_GenericBox(Wrappable):
         return space.hash(self.item(space))
 
     def item(self, space):
-        return self.get_dtype(space).itemtype.to_builtin_type(space, self)
+        w_res = self.get_dtype(space).itemtype.to_builtin_type(space, self)
+        return taint_result(space, w_res, [self])
 
 class W_BoolBox(W_GenericBox, PrimitiveBox):
     descr__new__, _get_dtype = new_dtype_getter("bool")
@@ -1,6 +1,7 @@
 
 from pypy.module.micronumpy.base import W_NDimArray, convert_to_array
-from pypy.module.micronumpy import loop
+from pypy.module.micronumpy.base import taint_array, taint_result
+from pypy.module.micronumpy import loop, lazy
 from pypy.module.micronumpy.arrayimpl.base import BaseArrayImplementation
 from pypy.interpreter.error import OperationError
 
@@ -19,6 +20,9 @@ class FakeArrayImplementation(BaseArrayImplementation):
     def create_iter(self, shape=None):
         return self.base.create_iter()
 
+    def get_taint_owner(self):
+        return self.base.implementation.get_taint_owner()
+
 class W_FlatIterator(W_NDimArray):
     def __init__(self, arr):
         self.base = arr
@@ -39,7 +43,7 @@ class W_FlatIterator(W_NDimArray):
         w_res = self.iter.getitem()
         self.iter.next()
         self.index += 1
-        return w_res
+        return taint_result(space, w_res, [self])
 
     def descr_index(self, space):
         return space.wrap(self.index)
@@ -59,10 +63,12 @@ class W_FlatIterator(W_NDimArray):
         base_iter = base.create_iter()
         base_iter.next_skip_x(start)
         if length == 1:
-            return base_iter.getitem()
+            return taint_result(space, base_iter.getitem(), [base])
         res = W_NDimArray.from_shape([length], base.get_dtype(),
                                      base.get_order())
-        return loop.flatiter_getitem(res, base_iter, step)
+        loop.flatiter_getitem(res, base_iter, step)
+        taint_array(space, res, [base])
+        return res
 
     def descr_setitem(self, space, w_idx, w_value):
         if not (space.isinstance_w(w_idx, space.w_int) or
@@ -72,7 +78,10 @@ class W_FlatIterator(W_NDimArray):
         base = self.base
         start, stop, step, length = space.decode_index4(w_idx, base.get_size())
         arr = convert_to_array(space, w_value)
+        base.check_writable(space)
+        lazy.force_pending(space)
         loop.flatiter_setitem(self.base, arr, start, step, length)
+        taint_array(space, base, [arr])
 
     def descr_iter(self):
         return self
@@ -3,14 +3,14 @@ from pypy.interpreter.error import operationerrfmt, OperationError
 from pypy.interpreter.typedef import TypeDef, GetSetProperty, make_weakref_descr
 from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
 from pypy.module.micronumpy.base import W_NDimArray, convert_to_array,\
-     ArrayArgumentException, issequence_w
+     ArrayArgumentException, issequence_w, taint_array, taint_result
 from pypy.module.micronumpy import interp_dtype, interp_ufuncs, interp_boxes
 from pypy.module.micronumpy.strides import find_shape_and_elems,\
      get_shape_from_iterable, to_coords, shape_agreement
 from pypy.module.micronumpy.interp_flatiter import W_FlatIterator
 from pypy.module.micronumpy.interp_support import unwrap_axis_arg
 from pypy.module.micronumpy.appbridge import get_appbridge_cache
-from pypy.module.micronumpy import loop
+from pypy.module.micronumpy import loop, lazy
 from pypy.module.micronumpy.dot import match_dot_shapes
 from pypy.module.micronumpy.interp_arrayops import repeat
 from rpython.tool.sourcetools import func_with_new_name
@@ -63,6 +63,8 @@ class __extend__(W_NDimArray):
         return space.wrap(self.get_size() * self.get_dtype().itemtype.get_element_size())
 
     def descr_fill(self, space, w_value):
+        self.check_writable(space)
+        lazy.force_pending(space)
         self.fill(self.get_dtype().coerce(space, w_value))
 
     def descr_tostring(self, space):
@@ -77,7 +79,9 @@ class __extend__(W_NDimArray):
                                  space.wrap("index out of range for array"))
         size = loop.count_all_true(arr)
         res = W_NDimArray.from_shape([size], self.get_dtype())
-        return loop.getitem_filter(res, self, arr)
+        loop.getitem_filter(res, self, arr)
+        taint_array(space, res, [self, arr])
+        return res
 
     def setitem_filter(self, space, idx, val):
         if len(idx.get_shape()) > 1 and idx.get_shape() != self.get_shape():
@@ -137,8 +141,9 @@ class __extend__(W_NDimArray):
         res = W_NDimArray.from_shape(shape, self.get_dtype(), self.get_order())
         if not res.get_size():
             return res
-        return loop.getitem_array_int(space, self, res, iter_shape, indexes,
-                                      prefix)
+        loop.getitem_array_int(space, self, res, iter_shape, indexes, prefix)
+        taint_array(space, res, [self])
+        return res
 
     def setitem_array_int(self, space, w_index, w_value):
         val_arr = convert_to_array(space, w_value)
@@ -152,19 +157,28 @@ class __extend__(W_NDimArray):
             w_idx.get_dtype().is_bool_type()):
             return self.getitem_filter(space, w_idx)
         try:
-            return self.implementation.descr_getitem(space, w_idx)
+            w_res = self.implementation.descr_getitem(space, w_idx)
         except ArrayArgumentException:
             return self.getitem_array_int(space, w_idx)
         except OperationError:
             raise OperationError(space.w_IndexError, space.wrap("wrong index"))
+        # views share the taints of 'self' already, but not single items
+        if isinstance(w_res, W_NDimArray):
+            return w_res
+        return taint_result(space, w_res, [self])
 
     def getitem(self, space, index_list):
-        return self.implementation.getitem_index(space, index_list)
+        w_res = self.implementation.getitem_index(space, index_list)
+        return taint_result(space, w_res, [self])
 
     def setitem(self, space, index_list, w_value):
+        self.check_writable(space)
+        lazy.force_pending(space)
         self.implementation.setitem_index(space, index_list, w_value)
 
     def descr_setitem(self, space, w_idx, w_value):
+        self.check_writable(space)
+        lazy.force_pending(space)
         if (isinstance(w_idx, W_NDimArray) and
             w_idx.get_dtype().is_bool_type()):
             return self.setitem_filter(space, w_idx,
@@ -173,6 +187,7 @@ class __extend__(W_NDimArray):
             self.implementation.descr_setitem(space, w_idx, w_value)
         except ArrayArgumentException:
             self.setitem_array_int(space, w_idx, w_value)
+        taint_array(space, self, [w_value])
 
     def descr_len(self, space):
         shape = self.get_shape()
@@ -251,6 +266,8 @@ class __extend__(W_NDimArray):
 
     def descr_set_real(self, space, w_value):
         # copy (broadcast) values into self
+        self.check_writable(space)
+        lazy.force_pending(space)
         tmp = self.implementation.get_real()
         tmp.setslice(space, convert_to_array(space, w_value))
 
@@ -259,6 +276,8 @@ class __extend__(W_NDimArray):
         if not self.get_dtype().is_complex_type():
             raise OperationError(space.w_TypeError, 
                     space.wrap('array does not have imaginary part to set'))
+        self.check_writable(space)
+        lazy.force_pending(space)
         tmp = self.implementation.get_imag()
         tmp.setslice(space, convert_to_array(space, w_value))
 
@@ -312,7 +331,8 @@ class __extend__(W_NDimArray):
 
     def descr_tolist(self, space):
         if len(self.get_shape()) == 0:
-            return self.get_scalar_value().item(space)
+            w_res = self.get_scalar_value().item(space)
+            return taint_result(space, w_res, [self])
         l_w = []
         for i in range(self.get_shape()[0]):
             l_w.append(space.call_method(self.descr_getitem(space,
@@ -374,7 +394,8 @@ class __extend__(W_NDimArray):
     def descr_item(self, space, w_arg=None):
         if space.is_none(w_arg):
             if self.is_scalar():
-                return self.get_scalar_value().item(space)
+                w_res = self.get_scalar_value().item(space)
+                return taint_result(space, w_res, [self])
             if self.get_size() == 1:
                 w_obj = self.getitem(space,
                                      [0] * len(self.get_shape()))
@@ -394,11 +415,14 @@ class __extend__(W_NDimArray):
             "non-int arg not supported"))
 
     def descr_array_iface(self, space):
+        # the data may be modified directly from now on
+        lazy.force_pending(space)
         addr = self.implementation.get_storage_as_int(space)
         # will explode if it can't
         w_d = space.newdict()
+        readonly = not self.implementation.is_writable()
         space.setitem_str(w_d, 'data', space.newtuple([space.wrap(addr),
-                                                       space.w_False]))
+                                                       space.wrap(readonly)]))
         return w_d
 
     w_pypy_data = None
@@ -506,8 +530,11 @@ class __extend__(W_NDimArray):
         out_shape, other_critical_dim = match_dot_shapes(space, self, other)
         result = W_NDimArray.from_shape(out_shape, dtype)
         # This is the place to add fpypy and blas
-        return loop.multidim_dot(space, self, other,  result, dtype,
-                                 other_critical_dim)
+        if not loop.blocked_dot(self, other, result, dtype):
+            loop.multidim_dot(space, self, other,  result, dtype,
+                              other_critical_dim)
+        taint_array(space, result, [self, other])
+        return result
 
     @unwrap_spec(w_axis = WrappedDefault(None))
     def descr_var(self, space, w_axis):
@@ -705,7 +732,9 @@ def array(space, w_object, w_dtype=None, copy=True, w_order=None, subok=False,
             w_dtype = interp_ufuncs.find_dtype_for_scalar(space, w_object)
         dtype = space.interp_w(interp_dtype.W_Dtype,
           space.call_function(space.gettypefor(interp_dtype.W_Dtype), w_dtype))
-        return W_NDimArray.new_scalar(space, dtype, w_object)
+        w_arr = W_NDimArray.new_scalar(space, dtype, w_object)
+        taint_array(space, w_arr, [w_object])
+        return w_arr
     if space.is_none(w_order):
         order = 'C'
     else:
@@ -739,6 +768,8 @@ def array(space, w_object, w_dtype=None, copy=True, w_order=None, subok=False,
     for w_elem in elems_w:
         arr_iter.setitem(dtype.coerce(space, w_elem))
         arr_iter.next()
+    # the elements are Python objects here, not raw data
+    taint_array(space, arr, [w_object] + elems_w)
     return arr
 
 @unwrap_spec(order=str)
@@ -1,9 +1,13 @@
-from pypy.interpreter.error import OperationError, operationerrfmt
+import os, stat
+from pypy.interpreter.error import OperationError, operationerrfmt, \
+     wrap_oserror, wrap_oserror2
 from pypy.interpreter.gateway import unwrap_spec, WrappedDefault
 from rpython.rtyper.lltypesystem import lltype, rffi
-from pypy.module.micronumpy import interp_dtype, loop
+from pypy.module.micronumpy import interp_dtype, loop, support
 from pypy.objspace.std.strutil import strip_spaces
+from rpython.rlib import rmmap
 from rpython.rlib.rarithmetic import maxint
+from rpython.rlib.rmmap import RValueError, RTypeError
 from pypy.module.micronumpy.base import W_NDimArray
 
 FLOAT_SIZE = rffi.sizeof(lltype.Float)
@@ -86,6 +90,94 @@ def fromstring(space, s, w_dtype=None, count=-1, sep=''):
     else:
         return _fromstring_text(space, s, count, sep, length, dtype)
 
+def _memmap_fd(space, fd, dtype, access, offset, w_shape, order):
+    from pypy.module.micronumpy.interp_numarray import _find_shape
+    from pypy.module.micronumpy.arrayimpl import concrete
+
+    itemsize = dtype.get_size()
+    if space.is_none(w_shape):
+        try:
+            st = os.fstat(fd)
+        except OSError, e:
+            raise wrap_oserror(space, e)
+        size = st[stat.ST_SIZE]
+        if offset > size:
+            raise OperationError(space.w_ValueError, space.wrap(
+                "offset is greater than the file size"))
+        shape = [int(size - offset) // itemsize]
+    else:
+        shape = _find_shape(space, w_shape)
+    for dim in shape:
+        if dim < 0:
+            raise OperationError(space.w_ValueError, space.wrap(
+                "negative dimensions are not allowed"))
+    length = support.product(shape) * itemsize
+    if not shape or length == 0:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "cannot map an empty array"))
+    # the offset of the mapping must be a multiple of the granularity
+    start = offset % rmmap.ALLOCATIONGRANULARITY
+    try:
+        mmap = rmmap.mmap(fd, start + length, access=access,
+                          offset=offset - start)
+    except RValueError, e:
+        raise OperationError(space.w_ValueError, space.wrap(e.message))
+    except RTypeError, e:
+        raise OperationError(space.w_TypeError, space.wrap(e.message))
+    except OSError, e:
+        raise wrap_oserror(space, e)
+    strides, backstrides = support.calc_strides(shape, dtype, order)
+    impl = concrete.MMapArray(shape, dtype, order, strides, backstrides,
+                              mmap, start, access != rmmap.ACCESS_READ)
+    return W_NDimArray(impl)
+
+@unwrap_spec(mode=str, offset=int, order=str)
+def memmap(space, w_file, w_dtype=None, mode='r', offset=0, w_shape=None,
+           order='C'):
+    """ Return an array on the content of a file, which is mapped in memory
+    instead of being read.  'w_file' is a file name or an object with a
+    fileno() method.  The mode is 'r' for a read-only array, 'c' for a
+    copy-on-write one, whose changes are not written to the file, or 'r+'
+    to write to the file.  If the shape is not given, the array is 1-d and
+    goes up to the end of the file.  The default dtype is uint8.
+    """
+    if space.is_none(w_dtype):
+        dtype = interp_dtype.get_dtype_cache(space).w_uint8dtype
+    else:
+        dtype = space.interp_w(interp_dtype.W_Dtype,
+            space.call_function(space.gettypefor(interp_dtype.W_Dtype),
+                                w_dtype))
+    if mode == 'r':
+        access = rmmap.ACCESS_READ
+        flags = os.O_RDONLY
+    elif mode == 'c':
+        access = rmmap.ACCESS_COPY
+        flags = os.O_RDONLY
+    elif mode == 'r+':
+        access = rmmap.ACCESS_WRITE
+        flags = os.O_RDWR
+    else:
+        raise operationerrfmt(space.w_ValueError,
+                              "mode must be 'r', 'c' or 'r+', not '%s'", mode)
+    if offset < 0:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "offset must be non-negative"))
+    if order != 'C' and order != 'F':
+        raise operationerrfmt(space.w_ValueError,
+                              "order must be 'C' or 'F', not '%s'", order)
+    if not space.isinstance_w(w_file, space.w_str):
+        fd = space.c_filedescriptor_w(w_file)
+        return _memmap_fd(space, fd, dtype, access, offset, w_shape, order)
+    try:
+        fd = os.open(space.str_w(w_file), flags, 0)
+    except OSError, e:
+        raise wrap_oserror2(space, e, w_file, exception_name='w_IOError')
+    try:
+        # the mapping keeps its own duplicate of the file descriptor
+        return _memmap_fd(space, fd, dtype, access, offset, w_shape, order)
+    finally:
+        os.close(fd)
+
 def unwrap_axis_arg(space, shapelen, w_axis):
     if space.is_none(w_axis):
         axis = maxint
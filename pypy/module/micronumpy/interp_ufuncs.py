@@ -2,13 +2,15 @@ from pypy.interpreter.baseobjspace import Wrappable
 from pypy.interpreter.error import OperationError, operationerrfmt
 from pypy.interpreter.gateway import interp2app, unwrap_spec
 from pypy.interpreter.typedef import TypeDef, GetSetProperty, interp_attrproperty
-from pypy.module.micronumpy import interp_boxes, interp_dtype, loop
+from pypy.module.micronumpy import interp_boxes, interp_dtype, loop, parallel
+from pypy.module.micronumpy import lazy
 from rpython.rlib import jit
 from rpython.rlib.rarithmetic import LONG_BIT
 from rpython.tool.sourcetools import func_with_new_name
 from pypy.module.micronumpy.interp_support import unwrap_axis_arg
 from pypy.module.micronumpy.strides import shape_agreement
 from pypy.module.micronumpy.base import convert_to_array, W_NDimArray
+from pypy.module.micronumpy.base import taint_result
 
 def done_if_true(dtype, val):
     return dtype.itemtype.bool(val)
@@ -143,8 +145,28 @@ class W_Ufunc(Wrappable):
         return self.reduce(space, w_obj, False, False, w_axis, keepdims, out,
                            w_dtype)
 
+    def call(self, space, args_w):
+        if len(args_w) > self.argcount:
+            # descr_call and the operators always pass 'out', maybe None
+            w_out = args_w[self.argcount]
+            if isinstance(w_out, W_NDimArray):
+                w_out.check_writable(space)
+                lazy.force_pending(space)    # before writing into 'out'
+        # the result is tainted by all the operands, as a whole
+        w_res = self._call(space, args_w)
+        return taint_result(space, w_res, args_w)
+
     def reduce(self, space, w_obj, multidim, promote_to_largest, w_axis,
                keepdims=False, out=None, dtype=None):
+        if out is not None:
+            out.check_writable(space)
+            lazy.force_pending(space)
+        w_res = self._reduce(space, w_obj, multidim, promote_to_largest,
+                             w_axis, keepdims, out, dtype)
+        return taint_result(space, w_res, [w_obj])
+
+    def _reduce(self, space, w_obj, multidim, promote_to_largest, w_axis,
+                keepdims, out, dtype):
         if self.argcount != 2:
             raise OperationError(space.w_ValueError, space.wrap("reduce only "
                 "supported for binary functions"))
@@ -209,8 +231,10 @@ class W_Ufunc(Wrappable):
                               "for reduction operation %s has too many"
                               " dimensions",self.name)
             dtype = out.get_dtype()
-        res = loop.compute_reduce(obj, dtype, self.func, self.done_func,
-                                  self.identity)
+        res = parallel.compute_reduce(self.name, obj, dtype)
+        if res is None:
+            res = loop.compute_reduce(obj, dtype, self.func, self.done_func,
+                                      self.identity)
         if out:
             out.set_scalar_value(res)
             return out
@@ -230,7 +254,7 @@ class W_Ufunc1(W_Ufunc):
         self.func = func
         self.bool_result = bool_result
 
-    def call(self, space, args_w):
+    def _call(self, space, args_w):
         w_obj = args_w[0]
         out = None
         if len(args_w) > 1:
@@ -275,6 +299,13 @@ class W_Ufunc1(W_Ufunc):
             return out
         shape = shape_agreement(space, w_obj.get_shape(), out,
                                 broadcast_down=False)
+        if out is None and lazy.is_enabled(space):
+            return lazy.call1(space, self.func, self.name, shape,
+                              calc_dtype, res_dtype, w_obj)
+        w_res = parallel.call1(self.name, shape, calc_dtype, res_dtype,
+                               w_obj, out)
+        if w_res is not None:
+            return w_res
         return loop.call1(shape, self.func, calc_dtype, res_dtype,
                           w_obj, out)
 
@@ -299,7 +330,7 @@ class W_Ufunc2(W_Ufunc):
             self.done_func = None
 
     @jit.unroll_safe
-    def call(self, space, args_w):
+    def _call(self, space, args_w):
         if len(args_w) > 2:
             [w_lhs, w_rhs, w_out] = args_w
         else:
@@ -345,6 +376,13 @@ class W_Ufunc2(W_Ufunc):
             return out
         new_shape = shape_agreement(space, w_lhs.get_shape(), w_rhs)
         new_shape = shape_agreement(space, new_shape, out, broadcast_down=False)
+        if out is None and lazy.is_enabled(space):
+            return lazy.call2(space, self.func, self.name, new_shape,
+                              calc_dtype, res_dtype, w_lhs, w_rhs)
+        w_res = parallel.call2(self.name, new_shape, calc_dtype, res_dtype,
+                               w_lhs, w_rhs, out)
+        if w_res is not None:
+            return w_res
         return loop.call2(new_shape, self.func, calc_dtype,
                           res_dtype, w_lhs, w_rhs, out)
 
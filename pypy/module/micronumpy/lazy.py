@@ -0,0 +1,258 @@
+""" Deferred evaluation of ufuncs.
+
+When it is enabled with _numpypy.set_lazy_evaluation(True), calling an
+elementwise ufunc without an 'out' argument does not compute anything.
+It returns an array whose implementation is a LazyArray, which records the
+expression as a Signature tree and its operands.  A ufunc applied to lazy
+arrays builds a bigger tree instead of forcing them, so that an expression
+like a*b + c*d - e is computed by a single loop, loop.lazy_eval(), without
+any temporary array.  The LazyArray is forced (i.e. its storage is
+allocated and computed) as soon as anything else than a ufunc needs it:
+indexing, printing, reductions, views, and so on.
+
+Before writing into any array, all the lazy arrays that are still pending
+are forced, because they may read the array that is about to change.
+"""
+
+import weakref
+
+from rpython.rlib.rawstorage import free_raw_storage, RAW_STORAGE
+from rpython.rtyper.lltypesystem import lltype
+from rpython.tool.sourcetools import func_with_new_name
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.module.micronumpy import support, loop
+from pypy.module.micronumpy.base import W_NDimArray
+from pypy.module.micronumpy.arrayimpl.concrete import (ConcreteArray,
+     ConcreteArrayNotOwning)
+
+# the largest number of operands fused in a single loop
+MAX_LEAVES = 8
+
+
+class Signature(object):
+    """ The green part of a lazy expression.  Signatures are interned, so
+    that the same expression on other arrays reuses the same JIT loop.
+    """
+    _immutable_fields_ = ['num_leaves']
+
+    def eval(self, iters):
+        raise NotImplementedError
+
+    def shifted(self, space, n):
+        """ The same signature, reading the leaves n positions later. """
+        raise NotImplementedError
+
+
+class LeafSignature(Signature):
+    _immutable_fields_ = ['index']
+
+    def __init__(self, index):
+        self.index = index
+        self.num_leaves = index + 1
+
+    def eval(self, iters):
+        return iters[self.index].getitem()
+
+    def shifted(self, space, n):
+        return leaf_signatures[self.index + n]
+
+leaf_signatures = [LeafSignature(i) for i in range(MAX_LEAVES)]
+
+
+class Call1Signature(Signature):
+    _immutable_fields_ = ['func', 'name', 'calc_dtype', 'res_dtype', 'child']
+
+    def __init__(self, func, name, calc_dtype, res_dtype, child):
+        self.func = func
+        self.name = name
+        self.calc_dtype = calc_dtype
+        self.res_dtype = res_dtype
+        self.child = child
+        self.num_leaves = child.num_leaves
+
+    def eval(self, iters):
+        w_val = self.child.eval(iters).convert_to(self.calc_dtype)
+        return self.func(self.calc_dtype, w_val).convert_to(self.res_dtype)
+
+    def shifted(self, space, n):
+        return make_call1_signature(space, self.func, self.name,
+                                    self.calc_dtype, self.res_dtype,
+                                    self.child.shifted(space, n))
+
+
+class Call2Signature(Signature):
+    _immutable_fields_ = ['func', 'name', 'calc_dtype', 'res_dtype',
+                          'left', 'right']
+
+    def __init__(self, func, name, calc_dtype, res_dtype, left, right):
+        self.func = func
+        self.name = name
+        self.calc_dtype = calc_dtype
+        self.res_dtype = res_dtype
+        self.left = left
+        self.right = right
+        self.num_leaves = max(left.num_leaves, right.num_leaves)
+
+    def eval(self, iters):
+        w_lhs = self.left.eval(iters).convert_to(self.calc_dtype)
+        w_rhs = self.right.eval(iters).convert_to(self.calc_dtype)
+        return self.func(self.calc_dtype, w_lhs, w_rhs).convert_to(
+            self.res_dtype)
+
+    def shifted(self, space, n):
+        return make_call2_signature(space, self.func, self.name,
+                                    self.calc_dtype, self.res_dtype,
+                                    self.left.shifted(space, n),
+                                    self.right.shifted(space, n))
+
+
+def make_call1_signature(space, func, name, calc_dtype, res_dtype, child):
+    cache = get_lazy_state(space).call1_signatures
+    key = (name, calc_dtype, res_dtype, child)
+    try:
+        return cache[key]
+    except KeyError:
+        sig = Call1Signature(func, name, calc_dtype, res_dtype, child)
+        cache[key] = sig
+        return sig
+
+def make_call2_signature(space, func, name, calc_dtype, res_dtype, left,
+                         right):
+    cache = get_lazy_state(space).call2_signatures
+    key = (name, calc_dtype, res_dtype, left, right)
+    try:
+        return cache[key]
+    except KeyError:
+        sig = Call2Signature(func, name, calc_dtype, res_dtype, left, right)
+        cache[key] = sig
+        return sig
+
+
+class LazyArray(ConcreteArray):
+    """ An array whose content is computed only when it is needed.  Until
+    then its storage is NULL.
+    """
+    def __init__(self, shape, dtype, sig, leaves):
+        strides, backstrides = support.calc_strides(shape, dtype, 'C')
+        ConcreteArrayNotOwning.__init__(self, shape, dtype, 'C', strides,
+                                        backstrides,
+                                        lltype.nullptr(RAW_STORAGE))
+        self.sig = sig
+        self.leaves = leaves
+
+    def force(self):
+        sig = self.sig
+        if sig is None:
+            return
+        leaves = self.leaves
+        self.sig = None
+        self.leaves = None
+        self.storage = self.dtype.itemtype.malloc(self.size)
+        shape = self.get_shape()
+        iters = [leaf.create_iter(shape) for leaf in leaves]
+        loop.lazy_eval(sig, shape, ConcreteArrayNotOwning.create_iter(self),
+                       iters)
+
+    def __del__(self):
+        if self.storage:
+            free_raw_storage(self.storage, track_allocation=False)
+
+def _make_forcing_method(name):
+    parent_method = getattr(ConcreteArray, name).im_func
+    def method(self, *args):
+        self.force()
+        return parent_method(self, *args)
+    return func_with_new_name(method, name)
+
+# every method that reads or writes the data, or makes a view of it
+for _name in ['getitem', 'setitem', 'setslice', 'reshape', 'get_real',
+              'get_imag', 'getitem_index', 'setitem_index', 'descr_getitem',
+              'descr_setitem', 'transpose', 'copy', 'create_axis_iter',
+              'create_dot_iter', 'swapaxes', 'get_storage_as_int',
+              'create_iter', 'fill', 'set_shape']:
+    setattr(LazyArray, _name, _make_forcing_method(_name))
+del _name
+
+
+class LazyState(object):
+    def __init__(self, space):
+        self.enabled = False
+        self.pending = []     # weakrefs to the LazyArrays not forced yet
+        self.prune_at = 64
+        self.call1_signatures = {}
+        self.call2_signatures = {}
+
+def get_lazy_state(space):
+    return space.fromcache(LazyState)
+
+@unwrap_spec(enabled=bool)
+def set_lazy_evaluation(space, enabled):
+    """Enable or disable the deferred evaluation of ufuncs."""
+    if not enabled:
+        force_pending(space)
+    get_lazy_state(space).enabled = enabled
+
+def get_lazy_evaluation(space):
+    return space.wrap(get_lazy_state(space).enabled)
+
+def is_enabled(space):
+    return get_lazy_state(space).enabled
+
+def force_pending(space):
+    """Force all the lazy arrays.  Must be called before writing into any
+    array, as it may be an operand of a pending expression."""
+    state = get_lazy_state(space)
+    pending = state.pending
+    if not pending:
+        return
+    state.pending = []
+    state.prune_at = 64
+    for ref in pending:
+        impl = ref()
+        if impl is not None:
+            impl.force()
+
+def _add_pending(space, impl):
+    state = get_lazy_state(space)
+    pending = state.pending
+    if len(pending) >= state.prune_at:
+        pending = [ref for ref in pending if ref() is not None]
+        state.pending = pending
+        state.prune_at = len(pending) * 2 + 64
+    pending.append(weakref.ref(impl))
+
+def _get_operand(space, w_arr, offset, limit):
+    """ Return the signature and the leaves to use for 'w_arr', if it is
+    the operand of a lazy expression whose previous operands have
+    'offset' leaves.  The expression of a lazy 'w_arr' is fused only if
+    the leaves up to its own fit in 'limit'.
+    """
+    impl = w_arr.implementation
+    if isinstance(impl, LazyArray):
+        sig = impl.sig
+        if sig is not None:
+            if offset + sig.num_leaves <= limit:
+                return sig.shifted(space, offset), impl.leaves
+            impl.force()     # too big, it becomes a leaf
+    return leaf_signatures[offset], [w_arr]
+
+def _make_lazy(space, shape, res_dtype, sig, leaves):
+    impl = LazyArray(shape, res_dtype, sig, leaves)
+    _add_pending(space, impl)
+    return W_NDimArray(impl)
+
+def call1(space, func, name, shape, calc_dtype, res_dtype, w_obj):
+    child, leaves = _get_operand(space, w_obj, 0, MAX_LEAVES)
+    sig = make_call1_signature(space, func, name, calc_dtype, res_dtype,
+                               child)
+    return _make_lazy(space, shape, res_dtype, sig, leaves)
+
+def call2(space, func, name, shape, calc_dtype, res_dtype, w_lhs, w_rhs):
+    # keep room for at least one leaf on the right
+    left, left_leaves = _get_operand(space, w_lhs, 0, MAX_LEAVES - 1)
+    right, right_leaves = _get_operand(space, w_rhs, len(left_leaves),
+                                       MAX_LEAVES)
+    sig = make_call2_signature(space, func, name, calc_dtype, res_dtype,
+                               left, right)
+    return _make_lazy(space, shape, res_dtype, sig,
+                      left_leaves + right_leaves)
@@ -6,8 +6,12 @@ over all the array elements.
 
 from rpython.rlib.rstring import StringBuilder
 from rpython.rlib import jit
+from rpython.rlib.objectmodel import specialize, keepalive_until_here
+from rpython.rlib.rawstorage import (RAW_STORAGE, raw_storage_getitem,
+                                     raw_storage_setitem)
 from rpython.rtyper.lltypesystem import lltype, rffi
 from pypy.module.micronumpy.base import W_NDimArray
+from pypy.module.micronumpy import types
 
 call2_driver = jit.JitDriver(name='numpy_call2',
                              greens = ['shapelen', 'func', 'calc_dtype',
@@ -61,6 +65,27 @@ def call1(shape, func, calc_dtype, res_dtype, w_obj, out):
         obj_iter.next()
     return out
 
+lazy_driver = jit.JitDriver(name='numpy_lazy',
+                            greens = ['shapelen', 'sig'],
+                            reds = ['out_iter', 'iters'])
+
+def lazy_eval(sig, shape, out_iter, iters):
+    """ Compute a whole lazy expression, see lazy.py.  'iters' are the
+    iterators of its leaves, all of them over the same 'shape'.
+    """
+    shapelen = len(shape)
+    while not out_iter.done():
+        lazy_driver.jit_merge_point(shapelen=shapelen, sig=sig,
+                                    out_iter=out_iter, iters=iters)
+        out_iter.setitem(sig.eval(iters))
+        out_iter.next()
+        _next_all(iters)
+
+@jit.unroll_safe
+def _next_all(iters):
+    for it in iters:
+        it.next()
+
 setslice_driver = jit.JitDriver(name='numpy_setslice',
                                 greens = ['shapelen', 'dtype'],
                                 reds = ['target', 'source', 'target_iter',
@@ -255,6 +280,89 @@ def multidim_dot(space, left, right, result, dtype, right_critical_dim):
         lefti.next()
     return result
 
+# the size of the square tiles of blocked_dot(), in elements
+DOT_BLOCK = 64
+
+def _get_dot_storage(arr, dtype):
+    from pypy.module.micronumpy.arrayimpl.concrete import \
+         ConcreteArrayNotOwning
+    impl = arr.implementation
+    if (not isinstance(impl, ConcreteArrayNotOwning) or
+            impl.dtype is not dtype or len(impl.get_shape()) > 2 or
+            (impl.order != 'C' and len(impl.get_shape()) == 2)):
+        return lltype.nullptr(RAW_STORAGE)
+    return impl.storage
+
+def blocked_dot(left, right, result, dtype):
+    """ Matrix product of two contiguous arrays with at most two dimensions
+    and with the same dtype as the result, which must be float64, long or
+    int64.  The product is computed in square tiles of DOT_BLOCK elements,
+    so that the tiles of the three arrays stay in the cache.  Returns False
+    if the arrays are not suitable and multidim_dot() must be used.
+    """
+    itemtype = dtype.itemtype
+    if not (isinstance(itemtype, types.Float64) or
+            isinstance(itemtype, types.Long) or
+            isinstance(itemtype, types.Int64)):
+        return False
+    lstorage = _get_dot_storage(left, dtype)
+    rstorage = _get_dot_storage(right, dtype)
+    ostorage = _get_dot_storage(result, dtype)
+    if not lstorage or not rstorage or not ostorage:
+        return False
+    left_shape = left.get_shape()
+    right_shape = right.get_shape()
+    # a 1-d left is a single row, a 1-d right is a single column
+    m = 1
+    if len(left_shape) == 2:
+        m = left_shape[0]
+    p = left_shape[-1]
+    n = 1
+    if len(right_shape) == 2:
+        n = right_shape[1]
+    if isinstance(itemtype, types.Float64):
+        _blocked_dot(rffi.DOUBLE, lstorage, rstorage, ostorage, m, p, n)
+    elif isinstance(itemtype, types.Long):
+        _blocked_dot(rffi.LONG, lstorage, rstorage, ostorage, m, p, n)
+    else:
+        _blocked_dot(rffi.LONGLONG, lstorage, rstorage, ostorage, m, p, n)
+    keepalive_until_here(left)
+    keepalive_until_here(right)
+    keepalive_until_here(result)
+    return True
+
+@jit.dont_look_inside
+@specialize.arg(0)
+def _blocked_dot(T, left, right, out, m, p, n):
+    # out[m, n] += left[m, p] * right[p, n], with 'out' initially zero.
+    # For every element of 'out', the products are still added in the
+    # order of increasing p, like multidim_dot() does.
+    size = rffi.sizeof(T)
+    i0 = 0
+    while i0 < m:
+        i1 = min(i0 + DOT_BLOCK, m)
+        k0 = 0
+        while k0 < p:
+            k1 = min(k0 + DOT_BLOCK, p)
+            j0 = 0
+            while j0 < n:
+                j1 = min(j0 + DOT_BLOCK, n)
+                for i in range(i0, i1):
+                    for k in range(k0, k1):
+                        a = raw_storage_getitem(T, left, (i * p + k) * size)
+                        ofs = (i * n + j0) * size
+                        rofs = (k * n + j0) * size
+                        for j in range(j0, j1):
+                            b = raw_storage_getitem(T, right, rofs)
+                            c = raw_storage_getitem(T, out, ofs)
+                            raw_storage_setitem(out, ofs,
+                                                rffi.cast(T, c + a * b))
+                            ofs += size
+                            rofs += size
+                j0 = j1
+            k0 = k1
+        i0 = i1
+
 count_all_true_driver = jit.JitDriver(name = 'numpy_count',
                                       greens = ['shapelen', 'dtype'],
                                       reds = ['s', 'iter'])
@@ -0,0 +1,475 @@
+""" Parallel execution of the simplest ufuncs on large arrays.
+
+The elements of contiguous arrays of float64, long or int64 are split in
+chunks, which are computed by a pool of OS threads.  This is all done in C,
+without the GIL, directly on the raw storage of the arrays.  Everything
+else, including arrays that are smaller than PARALLEL_THRESHOLD, goes
+through the regular loops of loop.py.  The pool is disabled by default;
+it is enabled by calling _numpypy.set_num_threads(n) with n > 1.
+"""
+
+from rpython.rlib.objectmodel import keepalive_until_here
+from rpython.rlib import rthread
+from rpython.rlib.rawstorage import RAW_STORAGE
+from rpython.rtyper.lltypesystem import lltype, rffi
+from rpython.translator.tool.cbuild import ExternalCompilationInfo
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.module.micronumpy import types
+from pypy.module.micronumpy.base import W_NDimArray
+from pypy.module.micronumpy.arrayimpl.concrete import ConcreteArrayNotOwning
+
+# arrays with fewer elements than this are not worth the synchronization
+PARALLEL_THRESHOLD = 1 << 16
+# the smallest number of elements given to a single thread
+MIN_CHUNK = 1 << 14
+MAX_THREADS = 64
+
+KIND_FLOAT64, KIND_LONG, KIND_INT64 = range(3)
+
+(OP_ADD, OP_SUBTRACT, OP_MULTIPLY, OP_DIVIDE,
+ OP_NEGATIVE, OP_ABSOLUTE, OP_SQRT, OP_SQUARE) = range(8)
+
+# ufunc name -> (op, supported for integers)
+binary_ops = {
+    'add': (OP_ADD, True),
+    'subtract': (OP_SUBTRACT, True),
+    'multiply': (OP_MULTIPLY, True),
+    'divide': (OP_DIVIDE, False),
+    'true_divide': (OP_DIVIDE, False),
+}
+unary_ops = {
+    'negative': (OP_NEGATIVE, True),
+    'absolute': (OP_ABSOLUTE, True),
+    'sqrt': (OP_SQRT, False),
+    'square': (OP_SQUARE, True),
+}
+reduce_ops = {
+    'add': (OP_ADD, True),
+    'multiply': (OP_MULTIPLY, True),
+}
+
+separate_module_source = """
+#include <math.h>
+#ifndef _WIN32
+#include <unistd.h>
+#endif
+
+#define NP_MAX_THREADS %(MAX_THREADS)d
+
+struct np_chunk {
+    int op, kind;
+    char *left, *right, *out;
+    long start, stop;
+    double dresult;
+    long long lresult;
+};
+
+/* np_mutex serializes the users of the pool.  The worker number i
+   waits for np_go[i] to be released, computes np_chunks[i], and then
+   releases np_done[i].  The chunk number 0 is computed by the caller. */
+static struct RPyOpaque_ThreadLock np_mutex;
+static struct RPyOpaque_ThreadLock np_go[NP_MAX_THREADS];
+static struct RPyOpaque_ThreadLock np_done[NP_MAX_THREADS];
+static struct np_chunk np_chunks[NP_MAX_THREADS];
+static int np_initialized = 0;
+static int np_workers = 1;
+static int np_next_worker = 1;
+#ifndef _WIN32
+static pid_t np_pid;     /* after a fork(), the workers are gone */
+#endif
+
+#define NP_MAP_LOOP(T, UT, FLOAT)                                       \\
+    {                                                                   \\
+        T *a = ((T *)c->left) + c->start;                               \\
+        T *b = ((T *)c->right) + c->start;                              \\
+        T *r = ((T *)c->out) + c->start;                                \\
+        long i, n = c->stop - c->start;                                 \\
+        switch (c->op) {                                                \\
+        case %(OP_ADD)d:                                                \\
+            for (i = 0; i < n; i++) r[i] = (T)((UT)a[i] + (UT)b[i]);    \\
+            break;                                                      \\
+        case %(OP_SUBTRACT)d:                                           \\
+            for (i = 0; i < n; i++) r[i] = (T)((UT)a[i] - (UT)b[i]);    \\
+            break;                                                      \\
+        case %(OP_MULTIPLY)d:                                           \\
+            for (i = 0; i < n; i++) r[i] = (T)((UT)a[i] * (UT)b[i]);    \\
+            break;                                                      \\
+        case %(OP_DIVIDE)d:                                             \\
+            for (i = 0; i < n; i++) r[i] = a[i] / b[i];                 \\
+            break;                                                      \\
+        case %(OP_NEGATIVE)d:                                           \\
+            for (i = 0; i < n; i++) r[i] = (T)(-(UT)a[i]);              \\
+            break;                                                      \\
+        case %(OP_ABSOLUTE)d:                                           \\
+            for (i = 0; i < n; i++)                                     \\
+                r[i] = FLOAT ? (T)fabs((double)a[i]) :                  \\
+                       (a[i] < 0 ? (T)(-(UT)a[i]) : a[i]);              \\
+            break;                                                      \\
+        case %(OP_SQRT)d:                                               \\
+            for (i = 0; i < n; i++) r[i] = (T)sqrt((double)a[i]);       \\
+            break;                                                      \\
+        case %(OP_SQUARE)d:                                             \\
+            for (i = 0; i < n; i++) r[i] = (T)((UT)a[i] * (UT)a[i]);    \\
+            break;                                                      \\
+        }                                                               \\
+    }
+
+#define NP_REDUCE_LOOP(T, UT, RESULT)                                   \\
+    {                                                                   \\
+        T *a = ((T *)c->left) + c->start;                               \\
+        long i, n = c->stop - c->start;                                 \\
+        UT acc;                                                         \\
+        if (c->op == %(OP_ADD)d) {                                      \\
+            acc = 0;                                                    \\
+            for (i = 0; i < n; i++) acc += (UT)a[i];                    \\
+        }                                                               \\
+        else {                                                          \\
+            acc = 1;                                                    \\
+            for (i = 0; i < n; i++) acc *= (UT)a[i];                    \\
+        }                                                               \\
+        c->RESULT = (T)acc;                                             \\
+    }
+
+static void np_run_chunk(struct np_chunk *c)
+{
+    if (c->right == NULL && c->op <= %(OP_DIVIDE)d) {
+        /* a reduction */
+        switch (c->kind) {
+        case %(KIND_FLOAT64)d: NP_REDUCE_LOOP(double, double, dresult) break;
+        case %(KIND_LONG)d: NP_REDUCE_LOOP(long, unsigned long, lresult) break;
+        case %(KIND_INT64)d:
+            NP_REDUCE_LOOP(long long, unsigned long long, lresult) break;
+        }
+        return;
+    }
+    if (c->right == NULL)
+        c->right = c->left;    /* unary operation, 'right' is unused */
+    switch (c->kind) {
+    case %(KIND_FLOAT64)d: NP_MAP_LOOP(double, double, 1) break;
+    case %(KIND_LONG)d: NP_MAP_LOOP(long, unsigned long, 0) break;
+    case %(KIND_INT64)d:
+        NP_MAP_LOOP(long long, unsigned long long, 0) break;
+    }
+}
+
+static void np_worker(void)
+{
+    int i;
+    RPyThreadAcquireLock(&np_mutex, 1);
+    i = np_next_worker++;
+    RPyThreadReleaseLock(&np_mutex);
+    while (1) {
+        RPyThreadAcquireLock(&np_go[i], 1);
+        np_run_chunk(&np_chunks[i]);
+        RPyThreadReleaseLock(&np_done[i]);
+    }
+}
+
+int pypy_numpy_parallel_setup(int nthreads)
+{
+    if (!np_initialized) {
+        if (!RPyThreadLockInit(&np_mutex))
+            return -1;
+        np_initialized = 1;
+#ifndef _WIN32
+        np_pid = getpid();
+#endif
+    }
+    if (nthreads > NP_MAX_THREADS)
+        nthreads = NP_MAX_THREADS;
+    RPyThreadAcquireLock(&np_mutex, 1);
+#ifndef _WIN32
+    if (np_pid != getpid()) {
+        np_pid = getpid();
+        np_workers = 1;
+        np_next_worker = 1;
+    }
+#endif
+    while (np_workers < nthreads) {
+        int i = np_workers;
+        if (!RPyThreadLockInit(&np_go[i]) || !RPyThreadLockInit(&np_done[i]))
+            break;
+        RPyThreadAcquireLock(&np_go[i], 1);
+        RPyThreadAcquireLock(&np_done[i], 1);
+        if (RPyThreadStart(np_worker) == -1)
+            break;
+        np_workers++;
+    }
+    nthreads = np_workers;
+    RPyThreadReleaseLock(&np_mutex);
+    return nthreads;
+}
+
+static int np_run(int op, int kind, char *left, char *right, char *out,
+                  long length, int nthreads)
+{
+    long start = 0;
+    int i;
+    RPyThreadAcquireLock(&np_mutex, 1);
+    if (nthreads > np_workers)
+        nthreads = np_workers;
+#ifndef _WIN32
+    if (np_pid != getpid())
+        nthreads = 1;
+#endif
+    for (i = 0; i < nthreads; i++) {
+        struct np_chunk *c = &np_chunks[i];
+        c->op = op;
+        c->kind = kind;
+        c->left = left;
+        c->right = right;
+        c->out = out;
+        c->start = start;
+        start = length / nthreads * (i + 1) + (i + 1 == nthreads ?
+                                               length %% nthreads : 0);
+        c->stop = start;
+        if (i > 0)
+            RPyThreadReleaseLock(&np_go[i]);
+    }
+    np_run_chunk(&np_chunks[0]);
+    for (i = 1; i < nthreads; i++)
+        RPyThreadAcquireLock(&np_done[i], 1);
+    return nthreads;   /* the caller releases np_mutex */
+}
+
+void pypy_numpy_parallel_map(int op, int kind, char *left, char *right,
+                             char *out, long length, int nthreads)
+{
+    np_run(op, kind, left, right, out, length, nthreads);
+    RPyThreadReleaseLock(&np_mutex);
+}
+
+double pypy_numpy_parallel_reduce_float(int op, char *array, long length,
+                                        int nthreads)
+{
+    double result = (op == %(OP_ADD)d) ? 0.0 : 1.0;
+    int i;
+    nthreads = np_run(op, %(KIND_FLOAT64)d, array, NULL, NULL, length,
+                      nthreads);
+    for (i = 0; i < nthreads; i++) {
+        if (op == %(OP_ADD)d)
+            result += np_chunks[i].dresult;
+        else
+            result *= np_chunks[i].dresult;
+    }
+    RPyThreadReleaseLock(&np_mutex);
+    return result;
+}
+
+long long pypy_numpy_parallel_reduce_int(int op, int kind, char *array,
+                                         long length, int nthreads)
+{
+    unsigned long long result = (op == %(OP_ADD)d) ? 0 : 1;
+    int i;
+    nthreads = np_run(op, kind, array, NULL, NULL, length, nthreads);
+    for (i = 0; i < nthreads; i++) {
+        if (op == %(OP_ADD)d)
+            result += (unsigned long long)np_chunks[i].lresult;
+        else
+            result *= (unsigned long long)np_chunks[i].lresult;
+    }
+    RPyThreadReleaseLock(&np_mutex);
+    if (kind == %(KIND_LONG)d)
+        return (long)result;
+    return (long long)result;
+}
+""" % dict(MAX_THREADS=MAX_THREADS,
+           KIND_FLOAT64=KIND_FLOAT64, KIND_LONG=KIND_LONG,
+           KIND_INT64=KIND_INT64,
+           OP_ADD=OP_ADD, OP_SUBTRACT=OP_SUBTRACT, OP_MULTIPLY=OP_MULTIPLY,
+           OP_DIVIDE=OP_DIVIDE, OP_NEGATIVE=OP_NEGATIVE,
+           OP_ABSOLUTE=OP_ABSOLUTE, OP_SQRT=OP_SQRT, OP_SQUARE=OP_SQUARE)
+
+eci = rthread.eci.merge(ExternalCompilationInfo(
+    separate_module_sources=[separate_module_source],
+    post_include_bits=[
+        "int pypy_numpy_parallel_setup(int);",
+        "void pypy_numpy_parallel_map(int, int, char *, char *, char *, "
+                                     "long, int);",
+        "double pypy_numpy_parallel_reduce_float(int, char *, long, int);",
+        "long long pypy_numpy_parallel_reduce_int(int, int, char *, long, "
+                                                 "int);"],
+    export_symbols=['pypy_numpy_parallel_setup', 'pypy_numpy_parallel_map',
+                    'pypy_numpy_parallel_reduce_float',
+                    'pypy_numpy_parallel_reduce_int'],
+))
+
+# starting the workers is done with the GIL held; the computations release
+# the GIL, and only touch the raw storage of the arrays
+c_setup = rffi.llexternal('pypy_numpy_parallel_setup', [rffi.INT], rffi.INT,
+                          compilation_info=eci, threadsafe=False)
+c_map = rffi.llexternal('pypy_numpy_parallel_map',
+                        [rffi.INT, rffi.INT, rffi.CCHARP, rffi.CCHARP,
+                         rffi.CCHARP, rffi.LONG, rffi.INT], lltype.Void,
+                        compilation_info=eci, threadsafe=True)
+c_reduce_float = rffi.llexternal('pypy_numpy_parallel_reduce_float',
+                                 [rffi.INT, rffi.CCHARP, rffi.LONG, rffi.INT],
+                                 rffi.DOUBLE,
+                                 compilation_info=eci, threadsafe=True)
+c_reduce_int = rffi.llexternal('pypy_numpy_parallel_reduce_int',
+                               [rffi.INT, rffi.INT, rffi.CCHARP, rffi.LONG,
+                                rffi.INT], rffi.LONGLONG,
+                               compilation_info=eci, threadsafe=True)
+
+
+class ParallelState(object):
+    def __init__(self):
+        self.num_threads = 1
+
+parallel_state = ParallelState()
+
+@unwrap_spec(n=int)
+def set_num_threads(space, n):
+    """Set the number of threads used for large arrays.  1 disables the
+    parallel execution.  Returns the number of threads actually
+    available."""
+    if n <= 1:
+        parallel_state.num_threads = 1
+        return space.wrap(1)
+    n = rffi.cast(lltype.Signed, c_setup(rffi.cast(rffi.INT, n)))
+    if n < 1:
+        n = 1
+    parallel_state.num_threads = n
+    return space.wrap(n)
+
+def get_num_threads(space):
+    return space.wrap(parallel_state.num_threads)
+
+
+def get_kind(dtype):
+    itemtype = dtype.itemtype
+    if isinstance(itemtype, types.Float64):
+        return KIND_FLOAT64
+    if isinstance(itemtype, types.Long):
+        return KIND_LONG
+    if isinstance(itemtype, types.Int64):
+        return KIND_INT64
+    return -1
+
+def get_storage(arr, dtype):
+    """Return the raw storage of 'arr' if its data is contiguous and made
+    of elements of 'dtype', and NULL otherwise."""
+    impl = arr.implementation
+    if not isinstance(impl, ConcreteArrayNotOwning) or impl.dtype is not dtype:
+        return lltype.nullptr(RAW_STORAGE)
+    return impl.storage
+
+def get_num_threads_for(size):
+    n = parallel_state.num_threads
+    if n <= 1 or size < PARALLEL_THRESHOLD:
+        return 1
+    return min(n, size // MIN_CHUNK)
+
+def _find_op(ops, name, kind):
+    try:
+        op, int_ok = ops[name]
+    except KeyError:
+        return -1
+    if kind != KIND_FLOAT64 and not int_ok:
+        return -1
+    return op
+
+def call2(name, shape, calc_dtype, res_dtype, w_lhs, w_rhs, out):
+    """Compute the ufunc 'name' in parallel and return the result, or
+    return None if it is not possible for these arguments."""
+    if parallel_state.num_threads <= 1:
+        return None
+    kind = get_kind(calc_dtype)
+    if kind < 0 or res_dtype is not calc_dtype:
+        return None
+    op = _find_op(binary_ops, name, kind)
+    if op < 0:
+        return None
+    left = get_storage(w_lhs, calc_dtype)
+    right = get_storage(w_rhs, calc_dtype)
+    if not left or not right:
+        return None
+    size = w_lhs.get_size()
+    nthreads = get_num_threads_for(size)
+    if nthreads <= 1:
+        return None
+    if w_lhs.get_shape() != shape or w_rhs.get_shape() != shape:
+        return None      # broadcasting
+    order = w_lhs.implementation.order
+    if w_rhs.implementation.order != order:
+        return None
+    if out is None:
+        out = W_NDimArray.from_shape(shape, res_dtype, order)
+    elif out.implementation.order != order:
+        return None
+    result = get_storage(out, res_dtype)
+    if not result:
+        return None
+    c_map(rffi.cast(rffi.INT, op), rffi.cast(rffi.INT, kind),
+          rffi.cast(rffi.CCHARP, left), rffi.cast(rffi.CCHARP, right),
+          rffi.cast(rffi.CCHARP, result), size,
+          rffi.cast(rffi.INT, nthreads))
+    keepalive_until_here(w_lhs)
+    keepalive_until_here(w_rhs)
+    keepalive_until_here(out)
+    return out
+
+def call1(name, shape, calc_dtype, res_dtype, w_obj, out):
+    """Like call2(), for the unary ufuncs."""
+    if parallel_state.num_threads <= 1:
+        return None
+    kind = get_kind(calc_dtype)
+    if kind < 0 or res_dtype is not calc_dtype:
+        return None
+    op = _find_op(unary_ops, name, kind)
+    if op < 0:
+        return None
+    source = get_storage(w_obj, calc_dtype)
+    if not source:
+        return None
+    size = w_obj.get_size()
+    nthreads = get_num_threads_for(size)
+    if nthreads <= 1 or w_obj.get_shape() != shape:
+        return None
+    order = w_obj.implementation.order
+    if out is None:
+        out = W_NDimArray.from_shape(shape, res_dtype, order)
+    elif out.implementation.order != order:
+        return None
+    result = get_storage(out, res_dtype)
+    if not result:
+        return None
+    c_map(rffi.cast(rffi.INT, op), rffi.cast(rffi.INT, kind),
+          rffi.cast(rffi.CCHARP, source), lltype.nullptr(rffi.CCHARP.TO),
+          rffi.cast(rffi.CCHARP, result), size,
+          rffi.cast(rffi.INT, nthreads))
+    keepalive_until_here(w_obj)
+    keepalive_until_here(out)
+    return out
+
+def compute_reduce(name, obj, calc_dtype):
+    """Compute the reduction of the whole array 'obj' with the ufunc 'name'
+    in parallel and return the result as a box, or return None if it is not
+    possible."""
+    if parallel_state.num_threads <= 1:
+        return None
+    kind = get_kind(calc_dtype)
+    if kind < 0:
+        return None
+    op = _find_op(reduce_ops, name, kind)
+    if op < 0:
+        return None
+    storage = get_storage(obj, calc_dtype)
+    if not storage:
+        return None
+    size = obj.get_size()
+    nthreads = get_num_threads_for(size)
+    if nthreads <= 1:
+        return None
+    if kind == KIND_FLOAT64:
+        fres = c_reduce_float(rffi.cast(rffi.INT, op),
+                              rffi.cast(rffi.CCHARP, storage), size,
+                              rffi.cast(rffi.INT, nthreads))
+        w_res = calc_dtype.box(fres)
+    else:
+        ires = c_reduce_int(rffi.cast(rffi.INT, op), rffi.cast(rffi.INT, kind),
+                            rffi.cast(rffi.CCHARP, storage), size,
+                            rffi.cast(rffi.INT, nthreads))
+        w_res = calc_dtype.box(ires)
+    keepalive_until_here(obj)
+    return w_res
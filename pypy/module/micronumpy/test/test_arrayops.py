@@ -83,3 +83,47 @@ class AppTestNumSupport(BaseNumpyAppTest):
         assert c == 12.0
         c = array(3.0).dot(array(4))
         assert c == 12.0
+
+
+class AppTestBlockedDot(BaseNumpyAppTest):
+    def setup_class(cls):
+        from pypy.module.micronumpy import loop
+        BaseNumpyAppTest.setup_class.im_func(cls)
+        # small tiles, so that the borders of the tiles are tested
+        cls.saved_block = loop.DOT_BLOCK
+        loop.DOT_BLOCK = 2
+
+    def teardown_class(cls):
+        from pypy.module.micronumpy import loop
+        loop.DOT_BLOCK = cls.saved_block
+
+    def test_dot_blocked(self):
+        from _numpypy import array, dot
+        def matmul(a, b):
+            return [[sum([a[i][k] * b[k][j] for k in range(len(b))])
+                     for j in range(len(b[0]))] for i in range(len(a))]
+        a = [[i * 7 + k - 10 for k in range(7)] for i in range(5)]
+        b = [[k * 3 + j + 0.5 for j in range(3)] for k in range(7)]
+        expected = matmul(a, b)
+        for dtype in [float, int, 'int64']:
+            c = dot(array(a, dtype=dtype), array(b, dtype=dtype))
+            assert c.dtype == array(0, dtype=dtype).dtype
+            assert c.tolist() == matmul(array(a, dtype=dtype).tolist(),
+                                             array(b, dtype=dtype).tolist())
+        c = dot(array(a, dtype=float), array(b, dtype=float))
+        assert c.tolist() == expected
+        # not contiguous, or mixed dtypes: the generic loop is used
+        c = dot(array(b).T, array(a).T)
+        assert c.tolist() == [list(x) for x in zip(*expected)]
+        c = dot(array(a), array(b))
+        assert c.tolist() == expected
+        c = dot(array(a, dtype='float32'), array(b, dtype='float32'))
+        assert c.tolist() == expected
+
+    def test_dot_blocked_vector(self):
+        from _numpypy import array, dot
+        a = array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+        assert dot(a, array([1.0, 10.0, 100.0])).tolist() == [321.0, 654.0]
+        assert dot(array([1.0, 10.0]), a).tolist() == [41.0, 52.0, 63.0]
+        b = array(range(12)).reshape(4, 3)
+        assert dot(array(range(4)), b).tolist() == [42, 48, 54]
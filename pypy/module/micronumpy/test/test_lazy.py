@@ -0,0 +1,178 @@
+from pypy.module.micronumpy.test.test_base import BaseNumpyAppTest
+from pypy.module.micronumpy import lazy
+
+
+class TestSignatures(object):
+    def test_interned(self, space):
+        from pypy.module.micronumpy.interp_dtype import get_dtype_cache
+        from pypy.module.micronumpy.interp_ufuncs import get
+        dtype = get_dtype_cache(space).w_float64dtype
+        add = get(space).add
+        leaf0, leaf1 = lazy.leaf_signatures[:2]
+        sig1 = lazy.make_call2_signature(space, add.func, 'add', dtype,
+                                         dtype, leaf0, leaf1)
+        sig2 = lazy.make_call2_signature(space, add.func, 'add', dtype,
+                                         dtype, leaf0, leaf1)
+        assert sig1 is sig2
+        assert sig1.num_leaves == 2
+        sig3 = sig1.shifted(space, 2)
+        assert sig3.left is lazy.leaf_signatures[2]
+        assert sig3.right is lazy.leaf_signatures[3]
+        assert sig3.num_leaves == 4
+        assert sig3.shifted(space, 0) is sig3
+
+
+class TestFusion(object):
+    spaceconfig = dict(usemodules=['micronumpy'])
+
+    def test_fused(self):
+        space = self.space
+        w_res = space.appexec([], """():
+            import _numpypy
+            _numpypy.set_lazy_evaluation(True)
+            a = _numpypy.array([1.0, 2.0, 3.0])
+            b = _numpypy.array([4.0, 5.0, 6.0])
+            return (a * b + b, _numpypy.add(_numpypy.multiply(a, b), b),
+                    a * b + b * a - a)
+        """)
+        try:
+            w_c, w_d, w_e = space.fixedview(w_res)
+            impls = [w_c.implementation, w_d.implementation,
+                     w_e.implementation]
+            for impl, num_leaves in zip(impls, [3, 3, 5]):
+                assert isinstance(impl, lazy.LazyArray)
+                assert impl.sig is not None
+                assert impl.sig.num_leaves == num_leaves
+                assert len(impl.leaves) == num_leaves
+                for w_leaf in impl.leaves:
+                    assert not isinstance(w_leaf.implementation,
+                                          lazy.LazyArray)
+            # the same expression gives the same signature
+            assert impls[0].sig is impls[1].sig
+            assert isinstance(impls[0].sig.left, lazy.Call2Signature)
+        finally:
+            space.appexec([], """():
+                import _numpypy
+                _numpypy.set_lazy_evaluation(False)
+            """)
+        assert space.unwrap(space.call_method(w_e, 'tolist')) == [
+            7.0, 18.0, 33.0]
+
+
+class AppTestLazy(BaseNumpyAppTest):
+    def setup_method(self, meth):
+        self.space.appexec([], """():
+            import _numpypy
+            _numpypy.set_lazy_evaluation(True)
+        """)
+
+    def teardown_method(self, meth):
+        self.space.appexec([], """():
+            import _numpypy
+            _numpypy.set_lazy_evaluation(False)
+        """)
+
+    def test_enabled(self):
+        from _numpypy import get_lazy_evaluation
+        assert get_lazy_evaluation()
+
+    def test_expression(self):
+        from _numpypy import array, sqrt
+        a = array([1.0, 2.0, 3.0])
+        b = array([4.0, 5.0, 6.0])
+        c = a * b + b * a - 1
+        assert c.shape == (3,)
+        assert c.dtype == a.dtype
+        assert list(c) == [7.0, 19.0, 35.0]
+        d = -sqrt(a * a)
+        assert list(d) == [-1.0, -2.0, -3.0]
+        assert (a + b == [5.0, 7.0, 9.0]).all()
+
+    def test_dtypes_and_broadcast(self):
+        from _numpypy import array
+        a = array([[1, 2, 3], [4, 5, 6]])
+        b = array([0.5, 1.5, 2.5])
+        c = a * 2 + b
+        assert c.dtype.name == 'float64'
+        assert c.tolist() == [[2.5, 5.5, 8.5], [8.5, 11.5, 14.5]]
+        d = (a > 2) + (a < 5)
+        assert d.dtype.name == 'bool'
+        assert d.tolist() == [[True, True, True], [True, True, True]]
+        assert ((a // 2) * 2).tolist() == [[0, 2, 2], [4, 4, 6]]
+
+    def test_reductions_and_views(self):
+        from _numpypy import array
+        a = array(range(10))
+        b = a * a + 1
+        assert b.sum() == 295
+        assert b[3] == 10
+        assert list(b[::3]) == [1, 10, 37, 82]
+        assert (b.reshape(2, 5).T)[1, 1] == 37
+        c = a + a
+        assert c.max() == 18
+        assert '16, 18' in repr(c)
+
+    def test_write_forces_pending(self):
+        from _numpypy import array, add
+        a = array([1, 2, 3])
+        b = a + 10
+        c = a * 2
+        a[0] = 100
+        assert list(b) == [11, 12, 13]
+        assert list(c) == [2, 4, 6]
+        d = a + 1
+        a.fill(0)
+        assert list(d) == [101, 3, 4]
+        e = a + 5
+        add(a, 1, out=a)
+        assert list(e) == [5, 5, 5]
+        assert list(a) == [1, 1, 1]
+        f = a - 1
+        a += 1
+        assert list(f) == [0, 0, 0]
+        g = a * 3
+        a.flat[1] = 7
+        assert list(g) == [6, 6, 6]
+
+    def test_write_into_lazy(self):
+        from _numpypy import array
+        a = array([1.0, 2.0, 3.0])
+        b = a + 1
+        b[1] = 0
+        assert list(b) == [2.0, 0.0, 4.0]
+        c = a + 1
+        c += c
+        assert list(c) == [4.0, 6.0, 8.0]
+
+    def test_long_chain(self):
+        from _numpypy import array
+        a = array([1, 2, 3])
+        b = a
+        for i in range(50):
+            b = b + a
+        assert list(b) == [51, 102, 153]
+        c = a
+        for i in range(20):
+            c = a + (c + a)
+        assert list(c) == [41, 82, 123]
+
+    def test_disable_forces(self):
+        from _numpypy import array, set_lazy_evaluation
+        a = array([1, 2, 3])
+        b = a + 1
+        set_lazy_evaluation(False)
+        a[0] = 10
+        assert list(b) == [2, 3, 4]
+        set_lazy_evaluation(True)
+
+    def test_taint(self):
+        from _numpypy import array
+        try:
+            from __pypy__.taint import add_taint, get_taint
+        except ImportError:
+            skip("no taint support")
+        a = array([1.0, 2.0])
+        add_taint(a, 4)
+        b = a * 2 + 1
+        assert get_taint(b) == [4]
+        assert list(b) == [3.0, 5.0]
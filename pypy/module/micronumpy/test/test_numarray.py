@@ -2234,6 +2234,81 @@ class AppTestSupport(BaseNumpyAppTest):
         assert array([1, 2, 3], '<i2')[::2].tostring() == '\x01\x00\x03\x00'
         assert array([1, 2, 3], '>i2')[::2].tostring() == '\x00\x01\x00\x03'
 
+class AppTestMemmap(BaseNumpyAppTest):
+    def setup_class(cls):
+        import struct
+        from rpython.tool.udir import udir
+        BaseNumpyAppTest.setup_class.im_func(cls)
+        cls.tmpfile = udir.join('test_memmap.bin')
+        cls.raw_data = 'head' + struct.pack('dddddd', 1, 2, 3, 4, 5, 6)
+        cls.w_data = cls.space.wrap(cls.raw_data)
+        cls.w_fname = cls.space.wrap(str(cls.tmpfile))
+
+    def setup_method(self, meth):
+        self.tmpfile.write(self.raw_data, 'wb')
+
+    def test_read(self):
+        from _numpypy import memmap, uint8, float64
+        a = memmap(self.fname, dtype=float64, offset=4, shape=(2, 3))
+        assert a.shape == (2, 3)
+        assert a.dtype == float64
+        assert a.tolist() == [[1, 2, 3], [4, 5, 6]]
+        assert (a.T[2] == [3, 6]).all()
+        assert (a * 2)[1, 2] == 12
+        assert a.sum() == 21
+        b = memmap(self.fname)
+        assert b.dtype == uint8
+        assert b.shape == (len(self.data),)
+        assert b[:4].tostring() == 'head'
+        f = open(self.fname, 'rb')
+        c = memmap(f, dtype=float64, offset=12)
+        f.close()
+        assert list(c) == [2, 3, 4, 5, 6]
+
+    def test_readonly(self):
+        from _numpypy import memmap, float64, add
+        a = memmap(self.fname, dtype=float64, offset=4)
+        raises(ValueError, "a[0] = 3")
+        raises(ValueError, "a[1:3] = 3")
+        raises(ValueError, "a.reshape(2, 3)[0, 0] = 3")
+        raises(ValueError, "a.fill(0)")
+        raises(ValueError, "a.flat[2] = 1")
+        raises(ValueError, add, 1, 2, a)
+        raises(ValueError, "add.reduce(a.reshape(2, 3), 0, out=a[:3])")
+        assert a.__array_interface__['data'][1]
+        assert list(a) == [1, 2, 3, 4, 5, 6]
+        b = a.copy()
+        b[0] = 7
+        assert b[0] == 7
+        assert not b.__array_interface__['data'][1]
+
+    def test_copy_on_write(self):
+        from _numpypy import memmap, float64
+        a = memmap(self.fname, dtype=float64, mode='c', offset=4)
+        a[0] = 10
+        a[1:3] += 1
+        assert list(a) == [10, 3, 4, 4, 5, 6]
+        assert open(self.fname, 'rb').read() == self.data
+
+    def test_write(self):
+        from _numpypy import memmap, float64
+        a = memmap(self.fname, dtype=float64, mode='r+', offset=4)
+        a[5] = 42
+        del a
+        import gc; gc.collect()
+        b = memmap(self.fname, dtype=float64, offset=4)
+        assert list(b) == [1, 2, 3, 4, 5, 42]
+        assert open(self.fname, 'rb').read()[:4] == 'head'
+
+    def test_errors(self):
+        from _numpypy import memmap, float64
+        raises(ValueError, memmap, self.fname, mode='w')
+        raises(ValueError, memmap, self.fname, offset=-1)
+        raises(ValueError, memmap, self.fname, offset=100)
+        raises(ValueError, memmap, self.fname, dtype=float64, shape=(10,))
+        raises(ValueError, memmap, self.fname, shape=0)
+        raises(IOError, memmap, self.fname + '.missing')
+
 class AppTestRanges(BaseNumpyAppTest):
     def test_arange(self):
         from _numpypy import arange, array, dtype
@@ -2416,3 +2491,63 @@ class AppTestPyPy(BaseNumpyAppTest):
         del x.__pypy_data__
         assert x.__pypy_data__ is None
     
+
+class AppTestTaint(BaseNumpyAppTest):
+    spaceconfig = dict(usemodules=['micronumpy', '__pypy__'])
+
+    def test_untainted(self):
+        from _numpypy import array
+        from __pypy__.taint import get_taint
+        a = array([1, 2, 3])
+        assert get_taint(a) == []
+        assert get_taint(a + a) == []
+        assert get_taint(a[1]) == []
+
+    def test_ufunc(self):
+        from _numpypy import array, add, sin
+        from __pypy__.taint import add_taint, get_taint
+        a = array([1.0, 2.0, 3.0])
+        b = array([4.0, 5.0, 6.0])
+        add_taint(a, 1)
+        add_taint(b, 2)
+        assert sorted(get_taint(a + b)) == [1, 2]
+        assert sorted(get_taint(add(a, b))) == [1, 2]
+        assert get_taint(sin(a)) == [1]
+        assert get_taint(a.sum()) == [1]
+        assert get_taint(b.max()) == [2]
+        assert sorted(get_taint(a.dot(b))) == [1, 2]
+
+    def test_views(self):
+        from _numpypy import array
+        from __pypy__.taint import add_taint, get_taint, clear_taint
+        a = array([[1, 2], [3, 4]])
+        v = a[1]
+        add_taint(v, 5)
+        assert get_taint(a) == [5]
+        assert get_taint(a.T) == [5]
+        assert get_taint(a.copy()) == [5]
+        assert get_taint(a[a > 2]) == [5]
+        clear_taint(a)
+        assert get_taint(v) == []
+
+    def test_scalars(self):
+        from _numpypy import array
+        from __pypy__.taint import add_taint, get_taint
+        a = array([1, 2, 3])
+        add_taint(a, 3)
+        assert get_taint(a[0]) == [3]
+        assert get_taint(a.item(1)) == [3]
+        assert get_taint(int(a[2])) == [3]
+        assert get_taint(a.tolist()[0]) == [3]
+        assert get_taint((a > 2)[0]) == [3]
+
+    def test_setitem(self):
+        from _numpypy import array
+        from __pypy__.taint import add_taint, get_taint
+        a = array([1, 2, 3])
+        x = 42
+        add_taint(x, 7)
+        a[1:] = x
+        assert get_taint(a) == [7]
+        b = array([x, 1])
+        assert get_taint(b) == [7]
@@ -1,3 +1,4 @@
+import py
 from pypy.conftest import option
 from pypy.interpreter.gateway import interp2app
 from pypy.module.micronumpy.test.test_base import BaseNumpyAppTest
@@ -879,3 +880,91 @@ class AppTestUfuncs(BaseNumpyAppTest):
         assert logaddexp2(float('inf'), float('inf')) == float('inf')
 
 
+
+
+class AppTestParallelUfuncs(BaseNumpyAppTest):
+    def setup_class(cls):
+        from pypy.module.micronumpy import parallel
+        BaseNumpyAppTest.setup_class.im_func(cls)
+        if option.runappdirect:
+            py.test.skip("needs small thresholds")
+        cls.saved = parallel.PARALLEL_THRESHOLD, parallel.MIN_CHUNK
+        parallel.PARALLEL_THRESHOLD = 64
+        parallel.MIN_CHUNK = 16
+
+    def teardown_class(cls):
+        from pypy.module.micronumpy import parallel
+        parallel.PARALLEL_THRESHOLD, parallel.MIN_CHUNK = cls.saved
+        parallel.parallel_state.num_threads = 1
+
+    def test_num_threads(self):
+        from _numpypy import set_num_threads, get_num_threads
+        assert get_num_threads() == 1
+        assert set_num_threads(3) == 3
+        assert get_num_threads() == 3
+        assert set_num_threads(0) == 1
+        assert get_num_threads() == 1
+
+    def test_binary(self):
+        from _numpypy import array, set_num_threads, add, divide
+        a = array(range(101), dtype=float)
+        b = array(range(101, 202), dtype=float)
+        set_num_threads(4)
+        try:
+            assert list(a + b) == [x + y for x, y in zip(range(101),
+                                                          range(101, 202))]
+            assert list(a - b) == [-101.0] * 101
+            assert list(b * a) == [x * (x + 101.0) for x in range(101)]
+            assert list(a / b) == [x / (x + 101.0) for x in range(101)]
+            c = array(range(101))
+            assert list(c * c) == [x * x for x in range(101)]
+            assert list(c - 3) == [x - 3 for x in range(101)]
+            assert list(c / c)[1:] == [1] * 100
+            out = array([0.0] * 101)
+            add(a, a, out)
+            assert list(out) == [x * 2.0 for x in range(101)]
+            a += b
+            assert list(a) == [x * 2.0 + 101 for x in range(101)]
+        finally:
+            set_num_threads(1)
+
+    def test_unary(self):
+        from _numpypy import array, set_num_threads, sqrt, negative, absolute
+        a = array(range(-50, 50))
+        set_num_threads(4)
+        try:
+            assert list(negative(a)) == range(50, -50, -1)
+            assert list(absolute(a)) == map(abs, range(-50, 50))
+            b = sqrt(array(range(100), dtype=float))
+            assert list(b) == [x ** 0.5 for x in range(100)]
+            assert str(sqrt(a)[0]) == 'nan'
+        finally:
+            set_num_threads(1)
+
+    def test_reduce(self):
+        from _numpypy import array, set_num_threads
+        a = array(range(1000), dtype=float)
+        b = array(range(1000))
+        set_num_threads(4)
+        try:
+            assert a.sum() == 499500.0
+            assert b.sum() == 499500
+            assert array([1.5] * 100).prod() == 1.5 ** 100
+            assert array([-1] * 101).prod() == -1
+            assert array(range(1000), dtype='int32').sum() == 499500
+        finally:
+            set_num_threads(1)
+
+    def test_not_contiguous(self):
+        from _numpypy import array, set_num_threads
+        a = array(range(200), dtype=float)
+        set_num_threads(4)
+        try:
+            assert list(a[::2] + a[1::2]) == [x * 4.0 + 1 for x in range(100)]
+            assert a[::2].sum() == sum(range(0, 200, 2))
+            b = a.reshape((2, 100))
+            assert list((b.T + b.T)[3]) == [6.0, 206.0]
+            assert list((b + array(range(100)))[1]) == [100.0 + 2 * x
+                                                        for x in range(100)]
+        finally:
+            set_num_threads(1)
@@ -11,6 +11,8 @@ class Module(MixedModule):
         'set_optimize_hook': 'interp_resop.set_optimize_hook',
         'set_abort_hook': 'interp_resop.set_abort_hook',
         'get_stats_snapshot': 'interp_resop.get_stats_snapshot',
+        'set_warmup_cache': 'interp_warmup.set_warmup_cache',
+        'save_warmup_cache': 'interp_warmup.save_warmup_cache',
         'enable_debug': 'interp_resop.enable_debug',
         'disable_debug': 'interp_resop.disable_debug',
         'ResOperation': 'interp_resop.WrappedOp',
@@ -31,3 +33,7 @@ class Module(MixedModule):
         w_obj = space.wrap(PARAMETERS)
         space.setattr(space.wrap(self), space.wrap('defaults'), w_obj)
         pypy_hooks.space = space
+
+    def shutdown(self, space):
+        from pypy.module.pypyjit.interp_warmup import shutdown
+        shutdown(space)
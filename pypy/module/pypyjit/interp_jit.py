@@ -13,6 +13,7 @@ from pypy.interpreter.error import OperationError, operationerrfmt
 from pypy.interpreter.pycode import PyCode, CO_GENERATOR
 from pypy.interpreter.pyframe import PyFrame
 from pypy.interpreter.pyopcode import ExitFrame
+from pypy.module.pypyjit import interp_warmup
 from opcode import opmap
 
 PyFrame._virtualizable2_ = ['last_instr', 'pycode',
@@ -47,6 +48,9 @@ def can_never_inline(next_instr, is_being_profiled, bytecode):
 def should_unroll_one_iteration(next_instr, is_being_profiled, bytecode):
     return (bytecode.co_flags & CO_GENERATOR) != 0
 
+def is_warm_key(next_instr, is_being_profiled, bytecode):
+    return interp_warmup.is_warm_key(bytecode, next_instr, is_being_profiled)
+
 class PyPyJitDriver(JitDriver):
     reds = ['frame', 'ec']
     greens = ['next_instr', 'is_being_profiled', 'pycode']
@@ -59,6 +63,7 @@ pypyjitdriver = PyPyJitDriver(get_printable_location = get_printable_location,
                               can_never_inline = can_never_inline,
                               should_unroll_one_iteration =
                               should_unroll_one_iteration,
+                              is_warm_key = is_warm_key,
                               name='pypyjit')
 
 class __extend__(PyFrame):
@@ -0,0 +1,146 @@
+""" Keep the JIT warm across restarts.
+
+When a file is given with pypyjit.set_warmup_cache(), the loops compiled
+by the JIT are recorded by their code object and bytecode offset, and
+written to the file when the process exits.  On the next run, the same
+call reads the file, and the JitCells of these loops start with a counter
+that makes them hot after 'warm_threshold' iterations instead of
+'threshold' ones (see JitDriver.is_warm_key).
+
+A code object is identified by its name, filename and first line, and by
+a hash of its bytecode, so that a loop is not considered warm any more
+after the source is changed.
+"""
+
+import os
+
+from rpython.rlib import streamio
+from rpython.rlib.rmd5 import RMD5
+from rpython.rtyper.annlowlevel import cast_base_ptr_to_instance
+from rpython.rtyper.lltypesystem import lltype
+from rpython.rtyper.lltypesystem.rclass import OBJECT
+from pypy.interpreter.pycode import PyCode
+from pypy.interpreter.streamutil import wrap_oserror_as_ioerror
+
+
+class WarmupCache(object):
+    def __init__(self, space):
+        self.filename = None
+        self.warm = {}     # {code key: {next_instr: None}} of the last run
+        self.hot = {}      # {code key: {next_instr: None}} of this run
+
+    def load(self, filename):
+        self.warm = {}
+        try:
+            stream = streamio.open_file_as_stream(filename, 'r')
+        except streamio.StreamErrors:
+            return     # no previous run
+        try:
+            try:
+                data = stream.readall()
+            except streamio.StreamErrors:
+                return
+        finally:
+            stream.close()
+        for line in data.split('\n'):
+            parts = line.split(' ', 1)
+            if len(parts) != 2:
+                continue
+            try:
+                next_instr = int(parts[0])
+            except ValueError:
+                continue
+            self.warm.setdefault(parts[1], {})[next_instr] = None
+
+    def save(self):
+        """ Write the hot keys to the file, replacing it atomically. """
+        filename = self.filename
+        assert filename is not None
+        # a name of our own: other processes sharing the cache may save at
+        # the same time, and the last rename() wins
+        tmpname = '%s.%d.tmp' % (filename, os.getpid())
+        try:
+            stream = streamio.open_file_as_stream(tmpname, 'w')
+            try:
+                for key, offsets in self.hot.items():
+                    for next_instr in offsets:
+                        stream.write('%d %s\n' % (next_instr, key))
+            finally:
+                stream.close()
+            os.rename(tmpname, filename)
+        except OSError:
+            try:
+                os.unlink(tmpname)
+            except OSError:
+                pass
+            raise
+
+def get_code_key(pycode):
+    digest = RMD5(pycode.co_code).hexdigest()
+    return '%s %d %s %s' % (digest, pycode.co_firstlineno, pycode.co_name,
+                            pycode.co_filename)
+
+def is_warm_key(pycode, next_instr, is_being_profiled):
+    cache = pycode.space.fromcache(WarmupCache)
+    if not cache.warm or is_being_profiled:
+        return False
+    offsets = cache.warm.get(get_code_key(pycode), None)
+    return offsets is not None and next_instr in offsets
+
+def record_hot_key(space, jitdriver, greenkey):
+    """ Called when a loop is compiled for 'greenkey'. """
+    cache = space.fromcache(WarmupCache)
+    if cache.filename is None or jitdriver.name != 'pypyjit':
+        return
+    next_instr = greenkey[0].getint()
+    is_being_profiled = greenkey[1].getint()
+    if is_being_profiled:
+        return
+    ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                     greenkey[2].getref_base())
+    pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+    cache.hot.setdefault(get_code_key(pycode), {})[next_instr] = None
+
+def shutdown(space):
+    cache = space.fromcache(WarmupCache)
+    if cache.filename is not None:
+        try:
+            cache.save()
+        except streamio.StreamErrors:
+            pass     # too late to report it
+
+# ____________________________________________________________
+#
+# Public interface
+
+def set_warmup_cache(space, w_filename):
+    """ set_warmup_cache(filename)
+
+    Make the loops that were compiled by the JIT in the previous run, as
+    recorded in 'filename', become hot sooner.  Record the loops compiled
+    during this run, and write them to 'filename' at exit.  Pass None to
+    stop recording.
+    """
+    cache = space.fromcache(WarmupCache)
+    cache.hot = {}
+    if space.is_none(w_filename):
+        cache.filename = None
+        cache.warm = {}
+    else:
+        filename = space.str0_w(w_filename)
+        cache.filename = filename
+        cache.load(filename)
+
+def save_warmup_cache(space):
+    """ save_warmup_cache()
+
+    Write the loops compiled so far to the file given to set_warmup_cache(),
+    without waiting for the exit.
+    """
+    cache = space.fromcache(WarmupCache)
+    if cache.filename is None:
+        return
+    try:
+        cache.save()
+    except OSError, e:
+        raise wrap_oserror_as_ioerror(space, e, space.wrap(cache.filename))
@@ -4,6 +4,7 @@ from rpython.rlib import jit_hooks
 from pypy.interpreter.error import OperationError
 from pypy.module.pypyjit.interp_resop import Cache, wrap_greenkey,\
      WrappedOp, W_JitLoopInfo
+from pypy.module.pypyjit.interp_warmup import record_hot_key
 
 class PyPyJitIface(JitHookInterface):
     def on_abort(self, reason, jitdriver, greenkey, greenkey_repr):
@@ -40,6 +41,9 @@ class PyPyJitIface(JitHookInterface):
 
     def _compile_hook(self, debug_info, is_bridge):
         space = self.space
+        if not is_bridge:
+            record_hot_key(space, debug_info.get_jitdriver(),
+                           debug_info.greenkey)
         cache = space.fromcache(Cache)
         if cache.in_recursion:
             return
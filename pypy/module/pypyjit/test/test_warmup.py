@@ -0,0 +1,117 @@
+import py
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.pycode import PyCode
+from pypy.module.pypyjit.interp_jit import pypyjitdriver
+from pypy.module.pypyjit.policy import pypy_hooks
+from pypy.module.pypyjit import interp_warmup
+from rpython.tool.udir import udir
+from rpython.jit.metainterp.history import JitCellToken, ConstInt, ConstPtr
+from rpython.rtyper.annlowlevel import cast_instance_to_base_ptr
+from rpython.rtyper.lltypesystem import lltype, llmemory
+from rpython.rlib.jit import JitDebugInfo
+
+class MockJitDriverSD(object):
+    jitdriver = pypyjitdriver
+
+SOURCE = "def function(n):\n    while n:\n        n -= 1\n"
+
+class AppTestWarmup(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+        w_f = space.appexec([space.wrap(SOURCE)], """(source):
+            d = {}
+            exec compile(source, 'warm.py', 'exec') in d
+            return d['function']
+        """)
+        ll_code = cast_instance_to_base_ptr(w_f.code)
+        code_gcref = lltype.cast_opaque_ptr(llmemory.GCREF, ll_code)
+
+        def interp_on_compile(next_instr):
+            greenkey = [ConstInt(next_instr), ConstInt(0),
+                        ConstPtr(code_gcref)]
+            di_loop = JitDebugInfo(MockJitDriverSD, None, JitCellToken(), [],
+                                   'loop', greenkey)
+            pypy_hooks.after_compile(di_loop)
+
+        @unwrap_spec(next_instr=int)
+        def interp_is_warm(space, w_code, next_instr):
+            code = space.interp_w(PyCode, w_code)
+            return space.wrap(interp_warmup.is_warm_key(code, next_instr,
+                                                        False))
+
+        def interp_shutdown(space):
+            interp_warmup.shutdown(space)
+
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile,
+                                                 unwrap_spec=[int]))
+        cls.w_is_warm = space.wrap(interp2app(interp_is_warm))
+        cls.w_shutdown = space.wrap(interp2app(interp_shutdown))
+        cls.w_f = w_f
+        cls.w_source = space.wrap(SOURCE)
+
+    def setup_method(self, meth):
+        self.w_tmpname = self.space.wrap(str(udir.join('jit-warmup-%s' %
+                                                     meth.__name__)))
+
+    def teardown_method(self, meth):
+        self.space.appexec([], """():
+            import pypyjit
+            pypyjit.set_warmup_cache(None)
+        """)
+
+    def test_record_and_load(self):
+        import pypyjit
+        code = self.f.__code__
+        pypyjit.set_warmup_cache(self.tmpname)
+        assert not self.is_warm(code, 7)
+        self.on_compile(7)
+        pypyjit.save_warmup_cache()
+        # the next run
+        pypyjit.set_warmup_cache(self.tmpname)
+        assert self.is_warm(code, 7)
+        assert not self.is_warm(code, 10)
+        pypyjit.set_warmup_cache(None)
+        assert not self.is_warm(code, 7)
+
+    def test_same_source(self):
+        import pypyjit
+        pypyjit.set_warmup_cache(self.tmpname)
+        self.on_compile(7)
+        pypyjit.save_warmup_cache()
+        pypyjit.set_warmup_cache(self.tmpname)
+        d = {}
+        exec compile(self.source, 'warm.py', 'exec') in d
+        assert self.is_warm(d['function'].__code__, 7)
+        # the source changed
+        d = {}
+        source = self.source.replace('n -= 1', 'n = n - 1')
+        exec compile(source, 'warm.py', 'exec') in d
+        assert not self.is_warm(d['function'].__code__, 7)
+        d = {}
+        exec compile(self.source, 'other.py', 'exec') in d
+        assert not self.is_warm(d['function'].__code__, 7)
+
+    def test_saved_at_exit(self):
+        import pypyjit, os
+        pypyjit.set_warmup_cache(self.tmpname)
+        assert not os.path.exists(self.tmpname)
+        self.on_compile(7)
+        self.shutdown()
+        assert not os.path.exists('%s.%d.tmp' % (self.tmpname, os.getpid()))
+        with open(self.tmpname) as f:
+            line = f.read()
+        assert line.startswith('7 ')
+        assert line.endswith(' 1 function warm.py\n')
+
+    def test_bad_file(self):
+        import pypyjit
+        with open(self.tmpname, 'w') as f:
+            f.write('garbage\nx y\n\n')
+        pypyjit.set_warmup_cache(self.tmpname)
+        assert not self.is_warm(self.f.__code__, 7)
+        pypyjit.set_warmup_cache(self.tmpname + '/nonexistent')
+        raises(IOError, pypyjit.save_warmup_cache)
@@ -0,0 +1,25 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+
+class Module(MixedModule):
+    """Fast implementation of the datetime module.
+
+The date, time, datetime and timedelta instances store their fields as
+unboxed integers, and isoformat(), strftime() and strptime() are done at
+interpreter-level for the common numeric formats.  lib_pypy/datetime.py
+remains the fallback when this module is disabled."""
+
+    applevel_name = 'datetime'
+
+    appleveldefs = {
+        }
+
+    interpleveldefs = {
+        'MINYEAR':   'space.wrap(support.MINYEAR)',
+        'MAXYEAR':   'space.wrap(support.MAXYEAR)',
+        'date':      'interp_date.W_Date',
+        'datetime':  'interp_date.W_DateTime',
+        'time':      'interp_time.W_Time',
+        'timedelta': 'interp_timedelta.W_TimeDelta',
+        'tzinfo':    'interp_tzinfo.W_TzInfo',
+        }
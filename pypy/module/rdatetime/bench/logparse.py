@@ -0,0 +1,68 @@
+""" Measure the built-in datetime module against the pure Python version
+in lib_pypy, in lines/s, on log-processing workloads: parsing ISO-like
+timestamps with strptime(), bucketing them by minute with arithmetic and
+comparisons, and writing them back with isoformat() and strftime().
+
+Usage:
+    pypy logparse.py [repeat]
+"""
+
+import sys, os, imp
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                    os.pardir, os.pardir, os.pardir, os.pardir)
+lib_pypy = os.path.join(root, 'lib_pypy')
+
+sys.path.insert(0, root)
+from pypy.tool.bench.timing import best_time
+
+import datetime
+pure_datetime = imp.load_source('_datetime_pure',
+                                os.path.join(lib_pypy, 'datetime.py'))
+
+LINES = 50000
+
+def make_log(module):
+    start = module.datetime(2013, 3, 1, 23, 58, 10)
+    step = module.timedelta(seconds=1, microseconds=1234)
+    lines = []
+    for i in range(LINES):
+        stamp = (start + step * i).strftime('%Y-%m-%d %H:%M:%S.%f')
+        lines.append('%s GET /index.html 200 %d' % (stamp, i % 1000))
+    return lines
+
+def rate(func, repeat):
+    return LINES / best_time(func, repeat)
+
+def run(module, repeat):
+    datetime, timedelta = module.datetime, module.timedelta
+    lines = make_log(module)
+    stamps = [datetime.strptime(line[:26], '%Y-%m-%d %H:%M:%S.%f')
+              for line in lines]
+    def parse():
+        for line in lines:
+            datetime.strptime(line[:26], '%Y-%m-%d %H:%M:%S.%f')
+    def bucket():
+        counts = {}
+        minute = timedelta(minutes=1)
+        end = stamps[0].replace(second=0, microsecond=0) + minute
+        for stamp in stamps:
+            while stamp >= end:
+                end += minute
+            counts[end] = counts.get(end, 0) + 1
+    def write():
+        for stamp in stamps:
+            stamp.isoformat()
+            stamp.strftime('%d/%m/%Y:%H:%M:%S')
+    return rate(parse, repeat), rate(bucket, repeat), rate(write, repeat)
+
+def main(repeat):
+    print '%10s %14s %14s %14s' % ('', 'strptime', 'bucket', 'format')
+    for name, module in [('lib_pypy', pure_datetime), ('built-in', datetime)]:
+        print '%10s %14.0f %14.0f %14.0f' % ((name,) + run(module, repeat))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(5)
@@ -0,0 +1,783 @@
+from pypy.interpreter import gateway
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
+from pypy.interpreter.typedef import (TypeDef, interp_attrproperty,
+                                      interp_attrproperty_w)
+from pypy.module.rdatetime import support
+from pypy.module.rdatetime.interp_format import (wrap_strftime, descr_format,
+    format_offset, build_struct_time, unpickle_state, slow_strptime, ASK_DST)
+from pypy.module.rdatetime.interp_time import (W_Time, check_time_fields,
+    field_or, append_microsecond_state, microsecond_from_state)
+from pypy.module.rdatetime.interp_timedelta import (W_TimeDelta, cmperror,
+                                                    new_timedelta)
+from pypy.module.rdatetime.interp_tzinfo import (check_tzinfo_arg,
+    call_offset, call_tzname, wrap_offset, NO_OFFSET)
+from rpython.rlib.rstring import StringBuilder
+
+
+MAX_ORDINAL = support.ymd2ord(support.MAXYEAR, 12, 31)
+
+
+class W_Date(Wrappable):
+    """Concrete date type: year, month and day."""
+
+    _immutable_fields_ = ['year', 'month', 'day']
+
+    def __init__(self, year, month, day):
+        self.year = year
+        self.month = month
+        self.day = day
+
+    def toordinal(self):
+        return support.ymd2ord(self.year, self.month, self.day)
+
+    def descr_repr(self, space):
+        builder = StringBuilder()
+        builder.append('datetime.')
+        builder.append(space.type(self).getname(space))
+        builder.append('(')
+        builder.append(str(self.year))
+        builder.append(', ')
+        builder.append(str(self.month))
+        builder.append(', ')
+        builder.append(str(self.day))
+        builder.append(')')
+        return space.wrap(builder.build())
+
+    def descr_isoformat(self, space):
+        builder = StringBuilder(10)
+        support.append_date(builder, self.year, self.month, self.day)
+        return space.wrap(builder.build())
+
+    def descr_ctime(self, space):
+        return space.wrap(support.format_ctime(self.year, self.month,
+                                               self.day, 0, 0, 0))
+
+    @unwrap_spec(format=str)
+    def descr_strftime(self, space, format):
+        return wrap_strftime(space, format, self.year, self.month, self.day,
+                             0, 0, 0, 0, None, space.w_None, -1)
+
+    def descr_format(self, space, w_fmt):
+        return descr_format(space, space.wrap(self), w_fmt)
+
+    def descr_timetuple(self, space):
+        return build_struct_time(space, self.year, self.month, self.day,
+                                 0, 0, 0, -1)
+
+    def descr_toordinal(self, space):
+        return space.wrap(self.toordinal())
+
+    def descr_weekday(self, space):
+        return space.wrap(support.weekday(self.year, self.month, self.day))
+
+    def descr_isoweekday(self, space):
+        return space.wrap(support.weekday(self.year, self.month,
+                                          self.day) + 1)
+
+    def descr_isocalendar(self, space):
+        year, week, day = support.isocalendar(self.year, self.month,
+                                              self.day)
+        return space.newtuple([space.wrap(year), space.wrap(week),
+                               space.wrap(day)])
+
+    @unwrap_spec(w_year=WrappedDefault(None), w_month=WrappedDefault(None),
+                 w_day=WrappedDefault(None))
+    def descr_replace(self, space, w_year, w_month, w_day):
+        "Return a new date with new values for the specified fields."
+        year = field_or(space, w_year, self.year)
+        month = field_or(space, w_month, self.month)
+        day = field_or(space, w_day, self.day)
+        check_date_fields(space, year, month, day)
+        return allocate_date(space, space.type(self), year, month, day)
+
+    def compare_date(self, other):
+        if self.year != other.year:
+            return support.compare(self.year, other.year)
+        if self.month != other.month:
+            return support.compare(self.month, other.month)
+        return support.compare(self.day, other.day)
+
+    def descr_eq(self, space, w_other):
+        if isinstance(w_other, W_Date):
+            return space.newbool(self.compare_date(w_other) == 0)
+        if space.findattr(w_other, space.wrap('timetuple')) is not None:
+            return space.w_NotImplemented
+        return space.w_False
+
+    def descr_ne(self, space, w_other):
+        if isinstance(w_other, W_Date):
+            return space.newbool(self.compare_date(w_other) != 0)
+        if space.findattr(w_other, space.wrap('timetuple')) is not None:
+            return space.w_NotImplemented
+        return space.w_True
+
+    def richcompare(self, space, w_other):
+        """The ordering of 'self' and 'w_other', as -1, 0 or 1, or 2 if
+        the comparison is NotImplemented."""
+        if isinstance(w_other, W_Date):
+            return self.compare_date(w_other)
+        if space.findattr(w_other, space.wrap('timetuple')) is not None:
+            return 2
+        raise cmperror(space, space.wrap(self), w_other)
+
+    def descr_lt(self, space, w_other):
+        result = self.richcompare(space, w_other)
+        if result == 2:
+            return space.w_NotImplemented
+        return space.newbool(result < 0)
+
+    def descr_le(self, space, w_other):
+        result = self.richcompare(space, w_other)
+        if result == 2:
+            return space.w_NotImplemented
+        return space.newbool(result <= 0)
+
+    def descr_gt(self, space, w_other):
+        result = self.richcompare(space, w_other)
+        if result == 2:
+            return space.w_NotImplemented
+        return space.newbool(result > 0)
+
+    def descr_ge(self, space, w_other):
+        result = self.richcompare(space, w_other)
+        if result == 2:
+            return space.w_NotImplemented
+        return space.newbool(result >= 0)
+
+    def descr_hash(self, space):
+        return space.hash(space.newtuple([space.wrap(self.year),
+                                          space.wrap(self.month),
+                                          space.wrap(self.day)]))
+
+    def add_days(self, space, days):
+        ordinal = self.toordinal() + days
+        if not 1 <= ordinal <= MAX_ORDINAL:
+            raise OperationError(space.w_OverflowError, space.wrap(
+                "date value out of range"))
+        year, month, day = support.ord2ymd(ordinal)
+        return space.wrap(W_Date(year, month, day))
+
+    def descr_add(self, space, w_other):
+        if isinstance(w_other, W_TimeDelta):
+            return self.add_days(space, w_other.days)
+        return space.w_NotImplemented
+
+    def descr_sub(self, space, w_other):
+        if isinstance(w_other, W_TimeDelta):
+            return self.add_days(space, -w_other.days)
+        if isinstance(w_other, W_Date):
+            return space.wrap(new_timedelta(space, self.toordinal() -
+                                            w_other.toordinal(), 0, 0))
+        return space.w_NotImplemented
+
+    def getstate(self, builder):
+        builder.append(chr(self.year >> 8))
+        builder.append(chr(self.year & 0xff))
+        builder.append(chr(self.month))
+        builder.append(chr(self.day))
+
+    def descr_reduce(self, space):
+        builder = StringBuilder(4)
+        self.getstate(builder)
+        return space.newtuple([space.type(self), space.newtuple([
+            space.wrap(builder.build())])])
+
+
+def check_date_fields(space, year, month, day):
+    if not support.MINYEAR <= year <= support.MAXYEAR:
+        raise operationerrfmt(space.w_ValueError, "year must be in %d..%d",
+                              support.MINYEAR, support.MAXYEAR)
+    if not 1 <= month <= 12:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "month must be in 1..12"))
+    dim = support.days_in_month(year, month)
+    if not 1 <= day <= dim:
+        raise operationerrfmt(space.w_ValueError, "day must be in 1..%d",
+                              dim)
+
+def allocate_date(space, w_subtype, year, month, day):
+    if space.is_w(w_subtype, space.gettypefor(W_Date)):
+        return space.wrap(W_Date(year, month, day))
+    w_self = space.allocate_instance(W_Date, w_subtype)
+    W_Date.__init__(space.interp_w(W_Date, w_self), year, month, day)
+    return w_self
+
+def date_from_state(space, state):
+    month = ord(state[2])
+    if not 1 <= month <= 12:
+        raise OperationError(space.w_TypeError, space.wrap(
+            "an integer is required"))
+    return (ord(state[0]) << 8) | ord(state[1]), month, ord(state[3])
+
+@unwrap_spec(w_month=WrappedDefault(None), w_day=WrappedDefault(None))
+def descr_new_date(space, w_subtype, w_year, w_month, w_day):
+    state = unpickle_state(space, w_year, 4)
+    if state is not None:
+        # pickle support: date(state)
+        year, month, day = date_from_state(space, state)
+        return allocate_date(space, w_subtype, year, month, day)
+    year = space.int_w(w_year)
+    month = space.int_w(w_month)
+    day = space.int_w(w_day)
+    check_date_fields(space, year, month, day)
+    return allocate_date(space, w_subtype, year, month, day)
+
+def descr_fromordinal(space, w_cls, w_ordinal):
+    "Contruct a date from a proleptic Gregorian ordinal."
+    ordinal = space.int_w(w_ordinal)
+    if ordinal < 1:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "ordinal must be >= 1"))
+    year, month, day = support.ord2ymd(ordinal)
+    return space.call_function(w_cls, space.wrap(year), space.wrap(month),
+                               space.wrap(day))
+
+def descr_date_fromtimestamp(space, w_cls, w_timestamp):
+    "Construct a date from a POSIX timestamp (like time.time())."
+    return date_fromtimestamp(space, w_cls, w_timestamp)
+
+def descr_today(space, w_cls):
+    "Construct a date from time.time()."
+    return date_today(space, w_cls)
+
+# ____________________________________________________________
+
+
+class W_DateTime(W_Date):
+    """A date and a time, with a tzinfo which is None for naive
+    datetimes."""
+
+    _immutable_fields_ = ['hour', 'minute', 'second', 'microsecond',
+                          'w_tzinfo']
+
+    def __init__(self, year, month, day, hour, minute, second, microsecond,
+                 w_tzinfo):
+        W_Date.__init__(self, year, month, day)
+        self.hour = hour
+        self.minute = minute
+        self.second = second
+        self.microsecond = microsecond
+        self.w_tzinfo = w_tzinfo
+
+    def utcoffset_minutes(self, space):
+        return call_offset(space, self.w_tzinfo, space.wrap(self),
+                           'utcoffset')
+
+    def dst_minutes(self, space):
+        return call_offset(space, self.w_tzinfo, space.wrap(self), 'dst')
+
+    def descr_utcoffset(self, space):
+        return wrap_offset(space, self.utcoffset_minutes(space))
+
+    def descr_dst(self, space):
+        return wrap_offset(space, self.dst_minutes(space))
+
+    def descr_tzname(self, space):
+        return call_tzname(space, self.w_tzinfo, space.wrap(self))
+
+    def descr_repr(self, space):
+        builder = StringBuilder()
+        builder.append('datetime.')
+        builder.append(space.type(self).getname(space))
+        builder.append('(')
+        builder.append(str(self.year))
+        builder.append(', ')
+        builder.append(str(self.month))
+        builder.append(', ')
+        builder.append(str(self.day))
+        builder.append(', ')
+        builder.append(str(self.hour))
+        builder.append(', ')
+        builder.append(str(self.minute))
+        if self.second or self.microsecond:
+            builder.append(', ')
+            builder.append(str(self.second))
+        if self.microsecond:
+            builder.append(', ')
+            builder.append(str(self.microsecond))
+        if self.w_tzinfo is not None:
+            builder.append(', tzinfo=')
+            builder.append(space.str_w(space.repr(self.w_tzinfo)))
+        builder.append(')')
+        return space.wrap(builder.build())
+
+    def isoformat(self, space, sep):
+        builder = StringBuilder(32)
+        support.append_date(builder, self.year, self.month, self.day)
+        builder.append(sep)
+        support.append_time(builder, self.hour, self.minute, self.second,
+                            self.microsecond)
+        if self.w_tzinfo is not None:
+            builder.append(format_offset(self.utcoffset_minutes(space), ':'))
+        return space.wrap(builder.build())
+
+    @unwrap_spec(sep=str)
+    def descr_isoformat(self, space, sep='T'):
+        return self.isoformat(space, sep)
+
+    def descr_str(self, space):
+        return self.isoformat(space, ' ')
+
+    def descr_ctime(self, space):
+        return space.wrap(support.format_ctime(self.year, self.month,
+            self.day, self.hour, self.minute, self.second))
+
+    @unwrap_spec(format=str)
+    def descr_strftime(self, space, format):
+        return wrap_strftime(space, format, self.year, self.month, self.day,
+                             self.hour, self.minute, self.second,
+                             self.microsecond, self.w_tzinfo,
+                             space.wrap(self), ASK_DST)
+
+    def descr_timetuple(self, space):
+        dst = self.dst_minutes(space)
+        if dst == NO_OFFSET:
+            dstflag = -1
+        elif dst != 0:
+            dstflag = 1
+        else:
+            dstflag = 0
+        return build_struct_time(space, self.year, self.month, self.day,
+                                 self.hour, self.minute, self.second,
+                                 dstflag)
+
+    def descr_utctimetuple(self, space):
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        year, month, day, hour, minute, second, _ = (
+            support.normalize_datetime(self.year, self.month, self.day,
+                                       self.hour, self.minute - offset,
+                                       self.second, 0))
+        return build_struct_time(space, year, month, day, hour, minute,
+                                 second, 0)
+
+    def descr_date(self, space):
+        return space.wrap(W_Date(self.year, self.month, self.day))
+
+    def descr_time(self, space):
+        return space.wrap(W_Time(self.hour, self.minute, self.second,
+                                 self.microsecond, None))
+
+    def descr_timetz(self, space):
+        return space.wrap(W_Time(self.hour, self.minute, self.second,
+                                 self.microsecond, self.w_tzinfo))
+
+    @unwrap_spec(w_year=WrappedDefault(None), w_month=WrappedDefault(None),
+                 w_day=WrappedDefault(None), w_hour=WrappedDefault(None),
+                 w_minute=WrappedDefault(None), w_second=WrappedDefault(None),
+                 w_microsecond=WrappedDefault(None))
+    def descr_replace(self, space, w_year, w_month, w_day, w_hour, w_minute,
+                      w_second, w_microsecond, w_tzinfo=None):
+        "Return a new datetime with new values for the specified fields."
+        year = field_or(space, w_year, self.year)
+        month = field_or(space, w_month, self.month)
+        day = field_or(space, w_day, self.day)
+        hour = field_or(space, w_hour, self.hour)
+        minute = field_or(space, w_minute, self.minute)
+        second = field_or(space, w_second, self.second)
+        microsecond = field_or(space, w_microsecond, self.microsecond)
+        if w_tzinfo is None:
+            w_tzinfo = self.w_tzinfo
+        else:
+            w_tzinfo = check_tzinfo_arg(space, w_tzinfo)
+        check_date_fields(space, year, month, day)
+        check_time_fields(space, hour, minute, second, microsecond)
+        return allocate_datetime(space, space.type(self), year, month, day,
+                                 hour, minute, second, microsecond, w_tzinfo)
+
+    def descr_astimezone(self, space, w_tz):
+        return datetime_astimezone(space, space.wrap(self), w_tz)
+
+    def seconds_of_day(self):
+        return self.hour * 3600 + self.minute * 60 + self.second
+
+    def utc_days_seconds(self, offset):
+        "(days, seconds) since the start of the calendar, in UTC."
+        seconds = self.seconds_of_day() - offset * 60
+        return self.toordinal() + seconds // 86400, seconds % 86400
+
+    def compare(self, space, other):
+        offset1 = offset2 = 0
+        if self.w_tzinfo is not other.w_tzinfo:
+            offset1 = self.utcoffset_minutes(space)
+            offset2 = other.utcoffset_minutes(space)
+            if offset1 != offset2 and (offset1 == NO_OFFSET or
+                                       offset2 == NO_OFFSET):
+                raise OperationError(space.w_TypeError, space.wrap(
+                    "cannot compare naive and aware datetimes"))
+        if offset1 == offset2:
+            result = self.compare_date(other)
+            if result != 0:
+                return result
+            seconds1 = self.seconds_of_day()
+            seconds2 = other.seconds_of_day()
+        else:
+            days1, seconds1 = self.utc_days_seconds(offset1)
+            days2, seconds2 = other.utc_days_seconds(offset2)
+            if days1 != days2:
+                return support.compare(days1, days2)
+        if seconds1 != seconds2:
+            return support.compare(seconds1, seconds2)
+        return support.compare(self.microsecond, other.microsecond)
+
+    def richcompare(self, space, w_other):
+        if isinstance(w_other, W_DateTime):
+            return self.compare(space, w_other)
+        if not isinstance(w_other, W_Date) and (
+                space.findattr(w_other, space.wrap('timetuple')) is not None):
+            return 2
+        raise cmperror(space, space.wrap(self), w_other)
+
+    def descr_eq(self, space, w_other):
+        if isinstance(w_other, W_DateTime):
+            return space.newbool(self.compare(space, w_other) == 0)
+        if not isinstance(w_other, W_Date) and (
+                space.findattr(w_other, space.wrap('timetuple')) is not None):
+            return space.w_NotImplemented
+        return space.w_False
+
+    def descr_ne(self, space, w_other):
+        if isinstance(w_other, W_DateTime):
+            return space.newbool(self.compare(space, w_other) != 0)
+        if not isinstance(w_other, W_Date) and (
+                space.findattr(w_other, space.wrap('timetuple')) is not None):
+            return space.w_NotImplemented
+        return space.w_True
+
+    def descr_hash(self, space):
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        days, seconds = self.utc_days_seconds(offset)
+        return space.hash(space.newtuple([space.wrap(days),
+                                          space.wrap(seconds),
+                                          space.wrap(self.microsecond)]))
+
+    def add_delta(self, space, days, seconds, microseconds):
+        year, month, day, hour, minute, second, microsecond = (
+            support.normalize_datetime(self.year, self.month,
+                                       self.day + days, self.hour,
+                                       self.minute, self.second + seconds,
+                                       self.microsecond + microseconds))
+        if not support.MINYEAR <= year <= support.MAXYEAR:
+            raise OperationError(space.w_OverflowError, space.wrap(
+                "date value out of range"))
+        return space.wrap(W_DateTime(year, month, day, hour, minute, second,
+                                     microsecond, self.w_tzinfo))
+
+    def descr_add(self, space, w_other):
+        if isinstance(w_other, W_TimeDelta):
+            return self.add_delta(space, w_other.days, w_other.seconds,
+                                  w_other.microseconds)
+        return space.w_NotImplemented
+
+    def descr_sub(self, space, w_other):
+        if isinstance(w_other, W_TimeDelta):
+            return self.add_delta(space, -w_other.days, -w_other.seconds,
+                                  -w_other.microseconds)
+        if not isinstance(w_other, W_DateTime):
+            return space.w_NotImplemented
+        days = self.toordinal() - w_other.toordinal()
+        seconds = self.seconds_of_day() - w_other.seconds_of_day()
+        microseconds = self.microsecond - w_other.microsecond
+        if self.w_tzinfo is not w_other.w_tzinfo:
+            offset1 = self.utcoffset_minutes(space)
+            offset2 = w_other.utcoffset_minutes(space)
+            if offset1 != offset2:
+                if offset1 == NO_OFFSET or offset2 == NO_OFFSET:
+                    raise OperationError(space.w_TypeError, space.wrap(
+                        "cannot mix naive and timezone-aware time"))
+                seconds += (offset2 - offset1) * 60
+        return space.wrap(new_timedelta(space, days, seconds, microseconds))
+
+    def getstate(self, builder):
+        W_Date.getstate(self, builder)
+        builder.append(chr(self.hour))
+        builder.append(chr(self.minute))
+        builder.append(chr(self.second))
+        append_microsecond_state(builder, self.microsecond)
+
+    def descr_reduce(self, space):
+        builder = StringBuilder(10)
+        self.getstate(builder)
+        args_w = [space.wrap(builder.build())]
+        if self.w_tzinfo is not None:
+            args_w.append(self.w_tzinfo)
+        return space.newtuple([space.type(self), space.newtuple(args_w)])
+
+
+def allocate_datetime(space, w_subtype, year, month, day, hour, minute,
+                      second, microsecond, w_tzinfo):
+    if space.is_w(w_subtype, space.gettypefor(W_DateTime)):
+        return space.wrap(W_DateTime(year, month, day, hour, minute, second,
+                                     microsecond, w_tzinfo))
+    w_self = space.allocate_instance(W_DateTime, w_subtype)
+    W_DateTime.__init__(space.interp_w(W_DateTime, w_self), year, month, day,
+                        hour, minute, second, microsecond, w_tzinfo)
+    return w_self
+
+def call_datetime_class(space, w_cls, fields, w_tzinfo):
+    """cls(*fields, tzinfo=w_tzinfo), without a call if 'w_cls' is
+    datetime itself."""
+    year, month, day, hour, minute, second, microsecond = fields
+    if space.is_w(w_cls, space.gettypefor(W_DateTime)):
+        check_date_fields(space, year, month, day)
+        check_time_fields(space, hour, minute, second, microsecond)
+        return space.wrap(W_DateTime(year, month, day, hour, minute, second,
+                                     microsecond, w_tzinfo))
+    args_w = [space.wrap(year), space.wrap(month), space.wrap(day),
+              space.wrap(hour), space.wrap(minute), space.wrap(second),
+              space.wrap(microsecond)]
+    if w_tzinfo is not None:
+        args_w.append(w_tzinfo)
+    return space.call(w_cls, space.newtuple(args_w))
+
+@unwrap_spec(w_month=WrappedDefault(None), w_day=WrappedDefault(None),
+             w_hour=WrappedDefault(0), w_minute=WrappedDefault(0),
+             w_second=WrappedDefault(0), w_microsecond=WrappedDefault(0),
+             w_tzinfo=WrappedDefault(None))
+def descr_new_datetime(space, w_subtype, w_year, w_month, w_day, w_hour,
+                       w_minute, w_second, w_microsecond, w_tzinfo):
+    state = unpickle_state(space, w_year, 10)
+    if state is not None:
+        # pickle support: datetime(state[, tzinfo])
+        year, month, day = date_from_state(space, state)
+        return allocate_datetime(space, w_subtype, year, month, day,
+                                 ord(state[4]), ord(state[5]), ord(state[6]),
+                                 microsecond_from_state(state, 7),
+                                 check_tzinfo_arg(space, w_month))
+    w_tzinfo = check_tzinfo_arg(space, w_tzinfo)
+    year = space.int_w(w_year)
+    month = space.int_w(w_month)
+    day = space.int_w(w_day)
+    hour = space.int_w(w_hour)
+    minute = space.int_w(w_minute)
+    second = space.int_w(w_second)
+    microsecond = space.int_w(w_microsecond)
+    check_date_fields(space, year, month, day)
+    check_time_fields(space, hour, minute, second, microsecond)
+    return allocate_datetime(space, w_subtype, year, month, day, hour,
+                             minute, second, microsecond, w_tzinfo)
+
+def descr_combine(space, w_cls, w_date, w_time):
+    "Construct a datetime from a given date and a given time."
+    if not isinstance(w_date, W_Date):
+        raise OperationError(space.w_TypeError, space.wrap(
+            "date argument must be a date instance"))
+    if not isinstance(w_time, W_Time):
+        raise OperationError(space.w_TypeError, space.wrap(
+            "time argument must be a time instance"))
+    return call_datetime_class(space, w_cls,
+        (w_date.year, w_date.month, w_date.day, w_time.hour, w_time.minute,
+         w_time.second, w_time.microsecond), w_time.w_tzinfo)
+
+@unwrap_spec(date_string=str, format=str)
+def descr_strptime(space, w_cls, date_string, format):
+    """string, format -> new datetime parsed from a string (like
+    time.strptime())."""
+    fields = support.fast_strptime(date_string, format)
+    if fields is None:
+        return slow_strptime(space, w_cls, space.wrap(date_string),
+                             space.wrap(format))
+    return call_datetime_class(space, w_cls,
+        (fields[0], fields[1], fields[2], fields[3], fields[4], fields[5],
+         fields[6]), None)
+
+@unwrap_spec(w_tz=WrappedDefault(None))
+def descr_datetime_fromtimestamp(space, w_cls, w_timestamp, w_tz):
+    """Construct a datetime from a POSIX timestamp (like time.time()).
+    A timezone info object may be passed in as well."""
+    return datetime_fromtimestamp(space, w_cls, w_timestamp, w_tz)
+
+def descr_utcfromtimestamp(space, w_cls, w_timestamp):
+    "Construct a UTC datetime from a POSIX timestamp (like time.time())."
+    return datetime_utcfromtimestamp(space, w_cls, w_timestamp)
+
+@unwrap_spec(w_tz=WrappedDefault(None))
+def descr_now(space, w_cls, w_tz):
+    "Construct a datetime from time.time() and optional time zone info."
+    return datetime_now(space, w_cls, w_tz)
+
+def descr_utcnow(space, w_cls):
+    "Construct a UTC datetime from time.time()."
+    return datetime_utcnow(space, w_cls)
+
+
+app = gateway.applevel(r'''
+    import time as _time
+
+    def date_fromtimestamp(cls, t):
+        y, m, d, hh, mm, ss, weekday, jday, dst = _time.localtime(t)
+        return cls(y, m, d)
+
+    def date_today(cls):
+        t = _time.time()
+        return cls.fromtimestamp(t)
+
+    def datetime_fromtimestamp(cls, t, tz):
+        from datetime import tzinfo
+        if tz is not None and not isinstance(tz, tzinfo):
+            raise TypeError("tzinfo argument must be None or of a tzinfo "
+                            "subclass")
+        if tz is None:
+            converter = _time.localtime
+        else:
+            converter = _time.gmtime
+        if t < 0.0:
+            us = int(round(((-t) % 1.0) * 1000000))
+            if us > 0:
+                us = 1000000 - us
+                t -= 1.0
+        else:
+            us = int(round((t % 1.0) * 1000000))
+            if us == 1000000:
+                us = 0
+                t += 1.0
+        y, m, d, hh, mm, ss, weekday, jday, dst = converter(t)
+        ss = min(ss, 59)    # clamp out leap seconds if the platform has them
+        result = cls(y, m, d, hh, mm, ss, us, tz)
+        if tz is not None:
+            result = tz.fromutc(result)
+        return result
+
+    def datetime_utcfromtimestamp(cls, t):
+        t, frac = divmod(t, 1.0)
+        us = int(round(frac * 1e6))
+        # a timestamp less than one microsecond smaller than a full
+        # second can round up to 1000000 microseconds
+        if us == 1000000:
+            t += 1
+            us = 0
+        y, m, d, hh, mm, ss, weekday, jday, dst = _time.gmtime(t)
+        ss = min(ss, 59)    # clamp out leap seconds if the platform has them
+        return cls(y, m, d, hh, mm, ss, us)
+
+    def datetime_now(cls, tz):
+        t = _time.time()
+        return cls.fromtimestamp(t, tz)
+
+    def datetime_utcnow(cls):
+        t = _time.time()
+        return cls.utcfromtimestamp(t)
+
+    def datetime_astimezone(self, tz):
+        from datetime import tzinfo
+        if not isinstance(tz, tzinfo):
+            raise TypeError("tz argument must be an instance of tzinfo")
+        mytz = self.tzinfo
+        if mytz is None:
+            raise ValueError("astimezone() requires an aware datetime")
+        if tz is mytz:
+            return self
+        # convert self to UTC, and attach the new time zone object
+        myoffset = self.utcoffset()
+        if myoffset is None:
+            raise ValueError("astimezone() requires an aware datetime")
+        utc = (self - myoffset).replace(tzinfo=tz)
+        # convert from UTC to tz's local time
+        return tz.fromutc(utc)
+''', filename=__file__)
+
+date_fromtimestamp = app.interphook('date_fromtimestamp')
+date_today = app.interphook('date_today')
+datetime_fromtimestamp = app.interphook('datetime_fromtimestamp')
+datetime_utcfromtimestamp = app.interphook('datetime_utcfromtimestamp')
+datetime_now = app.interphook('datetime_now')
+datetime_utcnow = app.interphook('datetime_utcnow')
+datetime_astimezone = app.interphook('datetime_astimezone')
+
+
+W_Date.typedef = TypeDef("date",
+    __module__ = 'datetime',
+    __doc__ = """date(year, month, day) --> date object""",
+    __new__ = interp2app(descr_new_date),
+    __repr__ = interp2app(W_Date.descr_repr),
+    __str__ = interp2app(W_Date.descr_isoformat),
+    __format__ = interp2app(W_Date.descr_format),
+    __eq__ = interp2app(W_Date.descr_eq),
+    __ne__ = interp2app(W_Date.descr_ne),
+    __lt__ = interp2app(W_Date.descr_lt),
+    __le__ = interp2app(W_Date.descr_le),
+    __gt__ = interp2app(W_Date.descr_gt),
+    __ge__ = interp2app(W_Date.descr_ge),
+    __hash__ = interp2app(W_Date.descr_hash),
+    __add__ = interp2app(W_Date.descr_add),
+    __radd__ = interp2app(W_Date.descr_add),
+    __sub__ = interp2app(W_Date.descr_sub),
+    __reduce__ = interp2app(W_Date.descr_reduce),
+    fromtimestamp = interp2app(descr_date_fromtimestamp,
+                               as_classmethod=True),
+    today = interp2app(descr_today, as_classmethod=True),
+    fromordinal = interp2app(descr_fromordinal, as_classmethod=True),
+    ctime = interp2app(W_Date.descr_ctime),
+    strftime = interp2app(W_Date.descr_strftime),
+    isoformat = interp2app(W_Date.descr_isoformat),
+    timetuple = interp2app(W_Date.descr_timetuple),
+    toordinal = interp2app(W_Date.descr_toordinal),
+    weekday = interp2app(W_Date.descr_weekday),
+    isoweekday = interp2app(W_Date.descr_isoweekday),
+    isocalendar = interp2app(W_Date.descr_isocalendar),
+    replace = interp2app(W_Date.descr_replace),
+    year = interp_attrproperty('year', W_Date, doc="year (1-9999)"),
+    month = interp_attrproperty('month', W_Date, doc="month (1-12)"),
+    day = interp_attrproperty('day', W_Date, doc="day (1-31)"),
+    min = W_Date(support.MINYEAR, 1, 1),
+    max = W_Date(support.MAXYEAR, 12, 31),
+    resolution = W_TimeDelta(1, 0, 0),
+)
+
+W_DateTime.typedef = TypeDef("datetime", W_Date.typedef,
+    __module__ = 'datetime',
+    __doc__ = """datetime(year, month, day[, hour[, minute[, second[, microsecond[,tzinfo]]]]])
+
+The year, month and day arguments are required. tzinfo may be None, or an
+instance of a tzinfo subclass. The remaining arguments may be ints or longs.""",
+    __new__ = interp2app(descr_new_datetime),
+    __repr__ = interp2app(W_DateTime.descr_repr),
+    __str__ = interp2app(W_DateTime.descr_str),
+    __eq__ = interp2app(W_DateTime.descr_eq),
+    __ne__ = interp2app(W_DateTime.descr_ne),
+    __lt__ = interp2app(W_DateTime.descr_lt),
+    __le__ = interp2app(W_DateTime.descr_le),
+    __gt__ = interp2app(W_DateTime.descr_gt),
+    __ge__ = interp2app(W_DateTime.descr_ge),
+    __hash__ = interp2app(W_DateTime.descr_hash),
+    __add__ = interp2app(W_DateTime.descr_add),
+    __radd__ = interp2app(W_DateTime.descr_add),
+    __sub__ = interp2app(W_DateTime.descr_sub),
+    __reduce__ = interp2app(W_DateTime.descr_reduce),
+    fromtimestamp = interp2app(descr_datetime_fromtimestamp,
+                               as_classmethod=True),
+    utcfromtimestamp = interp2app(descr_utcfromtimestamp,
+                                  as_classmethod=True),
+    now = interp2app(descr_now, as_classmethod=True),
+    utcnow = interp2app(descr_utcnow, as_classmethod=True),
+    combine = interp2app(descr_combine, as_classmethod=True),
+    strptime = interp2app(descr_strptime, as_classmethod=True),
+    ctime = interp2app(W_DateTime.descr_ctime),
+    strftime = interp2app(W_DateTime.descr_strftime),
+    isoformat = interp2app(W_DateTime.descr_isoformat),
+    timetuple = interp2app(W_DateTime.descr_timetuple),
+    utctimetuple = interp2app(W_DateTime.descr_utctimetuple),
+    date = interp2app(W_DateTime.descr_date),
+    time = interp2app(W_DateTime.descr_time),
+    timetz = interp2app(W_DateTime.descr_timetz),
+    utcoffset = interp2app(W_DateTime.descr_utcoffset),
+    tzname = interp2app(W_DateTime.descr_tzname),
+    dst = interp2app(W_DateTime.descr_dst),
+    replace = interp2app(W_DateTime.descr_replace),
+    astimezone = interp2app(W_DateTime.descr_astimezone),
+    hour = interp_attrproperty('hour', W_DateTime, doc="hour (0-23)"),
+    minute = interp_attrproperty('minute', W_DateTime, doc="minute (0-59)"),
+    second = interp_attrproperty('second', W_DateTime, doc="second (0-59)"),
+    microsecond = interp_attrproperty('microsecond', W_DateTime,
+                                      doc="microsecond (0-999999)"),
+    tzinfo = interp_attrproperty_w('w_tzinfo', W_DateTime,
+                                   doc="timezone info object"),
+    min = W_DateTime(support.MINYEAR, 1, 1, 0, 0, 0, 0, None),
+    max = W_DateTime(support.MAXYEAR, 12, 31, 23, 59, 59, 999999, None),
+    resolution = W_TimeDelta(0, 0, 1),
+)
@@ -0,0 +1,112 @@
+from pypy.interpreter import gateway
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.module.rdatetime import support
+from pypy.module.rdatetime.interp_tzinfo import (call_offset, call_tzname,
+                                                 NO_OFFSET)
+from rpython.rlib.rstring import StringBuilder
+
+
+ASK_DST = -2
+
+
+def format_offset(offset, sep):
+    "'+HH<sep>MM' for an offset in minutes, or '' for NO_OFFSET."
+    if offset == NO_OFFSET:
+        return ''
+    builder = StringBuilder(6)
+    support.append_offset(builder, offset, sep)
+    return builder.build()
+
+def build_struct_time(space, year, month, day, hour, minute, second,
+                      dstflag):
+    wday = support.weekday(year, month, day)
+    yday = support.days_before_month(year, month) + day
+    return make_struct_time(space, space.newtuple([
+        space.wrap(year), space.wrap(month), space.wrap(day),
+        space.wrap(hour), space.wrap(minute), space.wrap(second),
+        space.wrap(wday), space.wrap(yday), space.wrap(dstflag)]))
+
+def wrap_strftime(space, format, year, month, day, hour, minute, second,
+                  microsecond, w_tzinfo, w_tzarg, dstflag):
+    """strftime() of a date, time or datetime.  The purely numeric
+    directives are formatted here; anything else goes through
+    time.strftime() after substituting %z, %Z and %f.  'dstflag' is
+    the flag of the time tuple, or ASK_DST to get it from the tzinfo."""
+    if year < 1900:
+        raise operationerrfmt(space.w_ValueError,
+            "year=%d is before 1900; the datetime strftime() methods "
+            "require year >= 1900", year)
+    needs = support.strftime_needs(format)
+    zreplace = ''
+    Zreplace = ''
+    if needs & support.NEEDS_UTCOFFSET:
+        zreplace = format_offset(call_offset(space, w_tzinfo, w_tzarg,
+                                             'utcoffset'), '')
+    if needs & support.NEEDS_TZNAME:
+        w_name = call_tzname(space, w_tzinfo, w_tzarg)
+        if not space.is_w(w_name, space.w_None):
+            if not space.is_w(space.type(w_name), space.w_str):
+                # like CPython, call replace() on str subclasses, which
+                # must give a string
+                space.str_w(space.call_method(w_name, 'replace',
+                                              space.wrap('%'),
+                                              space.wrap('%%')))
+            Zreplace = space.str_w(w_name)
+    result = support.fast_strftime(format, year, month, day, hour, minute,
+                                   second, microsecond, zreplace, Zreplace)
+    if result is not None:
+        return space.wrap(result)
+    newformat = support.substitute_strftime(format, microsecond, zreplace,
+                                            Zreplace)
+    if dstflag == ASK_DST:
+        dst = call_offset(space, w_tzinfo, w_tzarg, 'dst')
+        if dst == NO_OFFSET:
+            dstflag = -1
+        elif dst != 0:
+            dstflag = 1
+        else:
+            dstflag = 0
+    w_timetuple = build_struct_time(space, year, month, day, hour, minute,
+                                    second, dstflag)
+    w_time = space.getbuiltinmodule('time')
+    return space.call_method(w_time, 'strftime', space.wrap(newformat),
+                             w_timetuple)
+
+def descr_format(space, w_self, w_fmt):
+    "The __format__() of the datetime types."
+    if not space.isinstance_w(w_fmt, space.w_basestring):
+        raise operationerrfmt(space.w_ValueError,
+            "__format__ excepts str or unicode, not %s",
+            space.type(w_fmt).getname(space))
+    if space.len_w(w_fmt) != 0:
+        return space.call_method(w_self, 'strftime', w_fmt)
+    return space.str(w_self)
+
+def unpickle_state(space, w_state, size):
+    """The bytes of the pickled state 'w_state' if it is a string of
+    'size' characters, for the 'if isinstance(year, str)' constructors.
+    Return None if it is not a string at all."""
+    if not space.is_w(space.type(w_state), space.w_str):
+        return None
+    state = space.str_w(w_state)
+    if len(state) != size:
+        raise OperationError(space.w_TypeError, space.wrap(
+            "an integer is required"))
+    return state
+
+
+app = gateway.applevel(r'''
+    def make_struct_time(fields):
+        import time
+        return time.struct_time(fields)
+
+    def slow_strptime(cls, date_string, format):
+        from _strptime import _strptime
+        # _strptime._strptime returns a two-element tuple: a
+        # time.struct_time object and the microseconds
+        struct, micros = _strptime(date_string, format)
+        return cls(*(struct[0:6] + (micros,)))
+''', filename=__file__)
+
+make_struct_time = app.interphook('make_struct_time')
+slow_strptime = app.interphook('slow_strptime')
@@ -0,0 +1,281 @@
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
+from pypy.interpreter.typedef import (TypeDef, interp_attrproperty,
+                                      interp_attrproperty_w)
+from pypy.module.rdatetime import support
+from pypy.module.rdatetime.interp_format import (wrap_strftime, descr_format,
+                                                 format_offset, unpickle_state)
+from pypy.module.rdatetime.interp_timedelta import W_TimeDelta, cmperror
+from pypy.module.rdatetime.interp_tzinfo import (check_tzinfo_arg,
+    call_offset, call_tzname, wrap_offset, NO_OFFSET)
+from rpython.rlib.rstring import StringBuilder
+
+
+class W_Time(Wrappable):
+    """Time with time zone: hour, minute, second, microsecond and a
+    tzinfo, which is None for naive times."""
+
+    _immutable_fields_ = ['hour', 'minute', 'second', 'microsecond',
+                          'w_tzinfo']
+
+    def __init__(self, hour, minute, second, microsecond, w_tzinfo):
+        self.hour = hour
+        self.minute = minute
+        self.second = second
+        self.microsecond = microsecond
+        self.w_tzinfo = w_tzinfo
+
+    def utcoffset_minutes(self, space):
+        return call_offset(space, self.w_tzinfo, space.w_None, 'utcoffset')
+
+    def descr_utcoffset(self, space):
+        return wrap_offset(space, self.utcoffset_minutes(space))
+
+    def descr_dst(self, space):
+        return wrap_offset(space, call_offset(space, self.w_tzinfo,
+                                              space.w_None, 'dst'))
+
+    def descr_tzname(self, space):
+        return call_tzname(space, self.w_tzinfo, space.w_None)
+
+    def descr_repr(self, space):
+        builder = StringBuilder()
+        builder.append('datetime.')
+        builder.append(space.type(self).getname(space))
+        builder.append('(')
+        builder.append(str(self.hour))
+        builder.append(', ')
+        builder.append(str(self.minute))
+        if self.second or self.microsecond:
+            builder.append(', ')
+            builder.append(str(self.second))
+        if self.microsecond:
+            builder.append(', ')
+            builder.append(str(self.microsecond))
+        if self.w_tzinfo is not None:
+            builder.append(', tzinfo=')
+            builder.append(space.str_w(space.repr(self.w_tzinfo)))
+        builder.append(')')
+        return space.wrap(builder.build())
+
+    def descr_isoformat(self, space):
+        builder = StringBuilder(21)
+        support.append_time(builder, self.hour, self.minute, self.second,
+                            self.microsecond)
+        if self.w_tzinfo is not None:
+            builder.append(format_offset(self.utcoffset_minutes(space), ':'))
+        return space.wrap(builder.build())
+
+    @unwrap_spec(format=str)
+    def descr_strftime(self, space, format):
+        # the date part of the time tuple is 1900-01-01
+        return wrap_strftime(space, format, 1900, 1, 1, self.hour,
+                             self.minute, self.second, self.microsecond,
+                             self.w_tzinfo, space.w_None, -1)
+
+    def descr_format(self, space, w_fmt):
+        return descr_format(space, space.wrap(self), w_fmt)
+
+    def compare(self, space, other):
+        offset1 = offset2 = 0
+        if self.w_tzinfo is not other.w_tzinfo:
+            offset1 = self.utcoffset_minutes(space)
+            offset2 = other.utcoffset_minutes(space)
+            if offset1 != offset2 and (offset1 == NO_OFFSET or
+                                       offset2 == NO_OFFSET):
+                raise OperationError(space.w_TypeError, space.wrap(
+                    "cannot compare naive and aware times"))
+            if offset1 == offset2:
+                offset1 = offset2 = 0
+        minutes1 = self.hour * 60 + self.minute - offset1
+        minutes2 = other.hour * 60 + other.minute - offset2
+        if minutes1 != minutes2:
+            return support.compare(minutes1, minutes2)
+        if self.second != other.second:
+            return support.compare(self.second, other.second)
+        return support.compare(self.microsecond, other.microsecond)
+
+    def descr_eq(self, space, w_other):
+        if isinstance(w_other, W_Time):
+            return space.newbool(self.compare(space, w_other) == 0)
+        return space.w_False
+
+    def descr_ne(self, space, w_other):
+        if isinstance(w_other, W_Time):
+            return space.newbool(self.compare(space, w_other) != 0)
+        return space.w_True
+
+    def check_time(self, space, w_other):
+        if not isinstance(w_other, W_Time):
+            raise cmperror(space, space.wrap(self), w_other)
+        return w_other
+
+    def descr_lt(self, space, w_other):
+        return space.newbool(self.compare(space,
+                             self.check_time(space, w_other)) < 0)
+
+    def descr_le(self, space, w_other):
+        return space.newbool(self.compare(space,
+                             self.check_time(space, w_other)) <= 0)
+
+    def descr_gt(self, space, w_other):
+        return space.newbool(self.compare(space,
+                             self.check_time(space, w_other)) > 0)
+
+    def descr_ge(self, space, w_other):
+        return space.newbool(self.compare(space,
+                             self.check_time(space, w_other)) >= 0)
+
+    def descr_hash(self, space):
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        return space.hash(space.newtuple([
+            space.wrap(self.hour * 60 + self.minute - offset),
+            space.wrap(self.second), space.wrap(self.microsecond)]))
+
+    def descr_nonzero(self, space):
+        if self.second or self.microsecond:
+            return space.w_True
+        offset = self.utcoffset_minutes(space)
+        if offset == NO_OFFSET:
+            offset = 0
+        return space.newbool(self.hour * 60 + self.minute - offset != 0)
+
+    @unwrap_spec(w_hour=WrappedDefault(None), w_minute=WrappedDefault(None),
+                 w_second=WrappedDefault(None),
+                 w_microsecond=WrappedDefault(None))
+    def descr_replace(self, space, w_hour, w_minute, w_second,
+                      w_microsecond, w_tzinfo=None):
+        "Return a new time with new values for the specified fields."
+        hour = field_or(space, w_hour, self.hour)
+        minute = field_or(space, w_minute, self.minute)
+        second = field_or(space, w_second, self.second)
+        microsecond = field_or(space, w_microsecond, self.microsecond)
+        if w_tzinfo is None:
+            w_tzinfo = self.w_tzinfo
+        else:
+            w_tzinfo = check_tzinfo_arg(space, w_tzinfo)
+        check_time_fields(space, hour, minute, second, microsecond)
+        return allocate_time(space, space.type(self), hour, minute, second,
+                             microsecond, w_tzinfo)
+
+    def getstate(self, builder):
+        builder.append(chr(self.hour))
+        builder.append(chr(self.minute))
+        builder.append(chr(self.second))
+        append_microsecond_state(builder, self.microsecond)
+
+    def descr_reduce(self, space):
+        builder = StringBuilder(6)
+        self.getstate(builder)
+        args_w = [space.wrap(builder.build())]
+        if self.w_tzinfo is not None:
+            args_w.append(self.w_tzinfo)
+        return space.newtuple([space.type(self), space.newtuple(args_w)])
+
+
+def field_or(space, w_value, default):
+    if space.is_w(w_value, space.w_None):
+        return default
+    return space.int_w(w_value)
+
+def append_microsecond_state(builder, microsecond):
+    builder.append(chr(microsecond >> 16))
+    builder.append(chr((microsecond >> 8) & 0xff))
+    builder.append(chr(microsecond & 0xff))
+
+def microsecond_from_state(state, start):
+    return ((ord(state[start]) << 16) | (ord(state[start + 1]) << 8) |
+            ord(state[start + 2]))
+
+def check_time_fields(space, hour, minute, second, microsecond):
+    if not 0 <= hour <= 23:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "hour must be in 0..23"))
+    if not 0 <= minute <= 59:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "minute must be in 0..59"))
+    if not 0 <= second <= 59:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "second must be in 0..59"))
+    if not 0 <= microsecond <= 999999:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "microsecond must be in 0..999999"))
+
+def allocate_time(space, w_subtype, hour, minute, second, microsecond,
+                  w_tzinfo):
+    if space.is_w(w_subtype, space.gettypefor(W_Time)):
+        return space.wrap(W_Time(hour, minute, second, microsecond,
+                                 w_tzinfo))
+    w_self = space.allocate_instance(W_Time, w_subtype)
+    W_Time.__init__(space.interp_w(W_Time, w_self), hour, minute, second,
+                    microsecond, w_tzinfo)
+    return w_self
+
+@unwrap_spec(w_hour=WrappedDefault(0), w_minute=WrappedDefault(0),
+             w_second=WrappedDefault(0), w_microsecond=WrappedDefault(0),
+             w_tzinfo=WrappedDefault(None))
+def descr_new_time(space, w_subtype, w_hour, w_minute, w_second,
+                   w_microsecond, w_tzinfo):
+    state = unpickle_state(space, w_hour, 6)
+    if state is not None:
+        # pickle support: time(state[, tzinfo])
+        hour = ord(state[0])
+        if hour >= 24:
+            raise OperationError(space.w_TypeError, space.wrap(
+                "an integer is required"))
+        w_tzinfo = w_minute
+        if not space.is_true(w_tzinfo):
+            w_tzinfo = space.w_None
+        return allocate_time(space, w_subtype, hour, ord(state[1]),
+                             ord(state[2]), microsecond_from_state(state, 3),
+                             check_tzinfo_arg(space, w_tzinfo))
+    w_tzinfo = check_tzinfo_arg(space, w_tzinfo)
+    hour = space.int_w(w_hour)
+    minute = space.int_w(w_minute)
+    second = space.int_w(w_second)
+    microsecond = space.int_w(w_microsecond)
+    check_time_fields(space, hour, minute, second, microsecond)
+    return allocate_time(space, w_subtype, hour, minute, second,
+                         microsecond, w_tzinfo)
+
+
+W_Time.typedef = TypeDef("time",
+    __module__ = 'datetime',
+    __doc__ = """time([hour[, minute[, second[, microsecond[, tzinfo]]]]])
+--> a time object
+
+All arguments are optional. tzinfo may be None, or an instance of
+a tzinfo subclass. The remaining arguments may be ints or longs.""",
+    __new__ = interp2app(descr_new_time),
+    __repr__ = interp2app(W_Time.descr_repr),
+    __str__ = interp2app(W_Time.descr_isoformat),
+    __format__ = interp2app(W_Time.descr_format),
+    __eq__ = interp2app(W_Time.descr_eq),
+    __ne__ = interp2app(W_Time.descr_ne),
+    __lt__ = interp2app(W_Time.descr_lt),
+    __le__ = interp2app(W_Time.descr_le),
+    __gt__ = interp2app(W_Time.descr_gt),
+    __ge__ = interp2app(W_Time.descr_ge),
+    __hash__ = interp2app(W_Time.descr_hash),
+    __nonzero__ = interp2app(W_Time.descr_nonzero),
+    __reduce__ = interp2app(W_Time.descr_reduce),
+    isoformat = interp2app(W_Time.descr_isoformat),
+    strftime = interp2app(W_Time.descr_strftime),
+    utcoffset = interp2app(W_Time.descr_utcoffset),
+    tzname = interp2app(W_Time.descr_tzname),
+    dst = interp2app(W_Time.descr_dst),
+    replace = interp2app(W_Time.descr_replace),
+    hour = interp_attrproperty('hour', W_Time, doc="hour (0-23)"),
+    minute = interp_attrproperty('minute', W_Time, doc="minute (0-59)"),
+    second = interp_attrproperty('second', W_Time, doc="second (0-59)"),
+    microsecond = interp_attrproperty('microsecond', W_Time,
+                                      doc="microsecond (0-999999)"),
+    tzinfo = interp_attrproperty_w('w_tzinfo', W_Time,
+                                   doc="timezone info object"),
+    min = W_Time(0, 0, 0, 0, None),
+    max = W_Time(23, 59, 59, 999999, None),
+    resolution = W_TimeDelta(0, 0, 1),
+)
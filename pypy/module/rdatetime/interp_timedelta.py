@@ -0,0 +1,355 @@
+from pypy.interpreter import gateway
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app, unwrap_spec, WrappedDefault
+from pypy.interpreter.typedef import TypeDef, interp_attrproperty
+from pypy.module.rdatetime import support
+from rpython.rlib.rarithmetic import ovfcheck
+from rpython.rlib.rstring import StringBuilder
+
+
+class W_TimeDelta(Wrappable):
+    """The difference between two datetimes, as a normalized number of
+    days, seconds (0..86399) and microseconds (0..999999)."""
+
+    _immutable_fields_ = ['days', 'seconds', 'microseconds']
+
+    def __init__(self, days, seconds, microseconds):
+        self.days = days
+        self.seconds = seconds
+        self.microseconds = microseconds
+
+    def descr_repr(self, space):
+        builder = StringBuilder()
+        builder.append('datetime.')
+        builder.append(space.type(self).getname(space))
+        builder.append('(')
+        builder.append(str(self.days))
+        if self.seconds or self.microseconds:
+            builder.append(', ')
+            builder.append(str(self.seconds))
+        if self.microseconds:
+            builder.append(', ')
+            builder.append(str(self.microseconds))
+        builder.append(')')
+        return space.wrap(builder.build())
+
+    def descr_str(self, space):
+        builder = StringBuilder()
+        if self.days:
+            builder.append(str(self.days))
+            if self.days == 1 or self.days == -1:
+                builder.append(' day, ')
+            else:
+                builder.append(' days, ')
+        builder.append(str(self.seconds // 3600))
+        builder.append(':')
+        support.append_padded(builder, self.seconds // 60 % 60, 2)
+        builder.append(':')
+        support.append_padded(builder, self.seconds % 60, 2)
+        if self.microseconds:
+            builder.append('.')
+            support.append_padded(builder, self.microseconds, 6)
+        return space.wrap(builder.build())
+
+    def descr_total_seconds(self, space):
+        # divide the exact number of microseconds if it fits in a word
+        try:
+            total = ovfcheck(ovfcheck(ovfcheck(self.days * 86400) +
+                                      self.seconds) * 1000000)
+            total = ovfcheck(total + self.microseconds)
+        except OverflowError:
+            return space.wrap(((self.days * 86400.0 + self.seconds) * 1e6 +
+                               self.microseconds) / 1e6)
+        return space.wrap(total / 1e6)
+
+    def descr_add(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return new_timedelta(space, self.days + w_other.days,
+                             self.seconds + w_other.seconds,
+                             self.microseconds + w_other.microseconds)
+
+    def descr_sub(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return new_timedelta(space, self.days - w_other.days,
+                             self.seconds - w_other.seconds,
+                             self.microseconds - w_other.microseconds)
+
+    def descr_rsub(self, space, w_other):
+        if not isinstance(w_other, W_TimeDelta):
+            return space.w_NotImplemented
+        return w_other.descr_sub(space, self)
+
+    def neg(self, space):
+        return new_timedelta(space, -self.days, -self.seconds,
+                             -self.microseconds)
+
+    def descr_neg(self, space):
+        return self.neg(space)
+
+    def descr_pos(self, space):
+        return space.wrap(self)
+
+    def descr_abs(self, space):
+        if self.days < 0:
+            return self.neg(space)
+        return space.wrap(self)
+
+    def descr_mul(self, space, w_other):
+        if space.is_w(space.type(w_other), space.w_int):
+            factor = space.int_w(w_other)
+            try:
+                days = ovfcheck(self.days * factor)
+                seconds = ovfcheck(self.seconds * factor)
+                microseconds = ovfcheck(self.microseconds * factor)
+            except OverflowError:
+                pass
+            else:
+                return new_timedelta(space, days, seconds, microseconds)
+        elif not space.isinstance_w(w_other, space.w_int) and (
+                not space.isinstance_w(w_other, space.w_long)):
+            return space.w_NotImplemented
+        return timedelta_mul(space, space.wrap(self), w_other)
+
+    def descr_div(self, space, w_other):
+        if space.is_w(space.type(w_other), space.w_int):
+            divisor = space.int_w(w_other)
+            # the total number of microseconds fits in a machine word
+            if divisor != 0 and -100000 < self.days < 100000:
+                total = ((self.days * 86400 + self.seconds) * 1000000 +
+                         self.microseconds)
+                return new_timedelta(space, 0, 0, total // divisor)
+        elif not space.isinstance_w(w_other, space.w_int) and (
+                not space.isinstance_w(w_other, space.w_long)):
+            return space.w_NotImplemented
+        return timedelta_div(space, space.wrap(self), w_other)
+
+    def compare(self, other):
+        if self.days != other.days:
+            return support.compare(self.days, other.days)
+        if self.seconds != other.seconds:
+            return support.compare(self.seconds, other.seconds)
+        return support.compare(self.microseconds, other.microseconds)
+
+    def descr_eq(self, space, w_other):
+        if isinstance(w_other, W_TimeDelta):
+            return space.newbool(self.compare(w_other) == 0)
+        return space.w_False
+
+    def descr_ne(self, space, w_other):
+        if isinstance(w_other, W_TimeDelta):
+            return space.newbool(self.compare(w_other) != 0)
+        return space.w_True
+
+    def descr_lt(self, space, w_other):
+        return space.newbool(self.compare(check_timedelta(space, self,
+                                                          w_other)) < 0)
+
+    def descr_le(self, space, w_other):
+        return space.newbool(self.compare(check_timedelta(space, self,
+                                                          w_other)) <= 0)
+
+    def descr_gt(self, space, w_other):
+        return space.newbool(self.compare(check_timedelta(space, self,
+                                                          w_other)) > 0)
+
+    def descr_ge(self, space, w_other):
+        return space.newbool(self.compare(check_timedelta(space, self,
+                                                          w_other)) >= 0)
+
+    def descr_hash(self, space):
+        return space.hash(space.newtuple([space.wrap(self.days),
+                                          space.wrap(self.seconds),
+                                          space.wrap(self.microseconds)]))
+
+    def descr_nonzero(self, space):
+        return space.newbool(self.days != 0 or self.seconds != 0 or
+                             self.microseconds != 0)
+
+    def descr_reduce(self, space):
+        return space.newtuple([space.type(self), space.newtuple([
+            space.wrap(self.days), space.wrap(self.seconds),
+            space.wrap(self.microseconds)])])
+
+
+def check_timedelta(space, w_self, w_other):
+    if not isinstance(w_other, W_TimeDelta):
+        raise cmperror(space, w_self, w_other)
+    return w_other
+
+def cmperror(space, w_x, w_y):
+    return operationerrfmt(space.w_TypeError, "can't compare '%s' to '%s'",
+                           space.type(w_x).getname(space),
+                           space.type(w_y).getname(space))
+
+def new_timedelta(space, days, seconds, microseconds):
+    """A timedelta (never of a subclass, like the arithmetic operations
+    return) normalized from fields with any sign and size."""
+    seconds += microseconds // 1000000
+    microseconds = microseconds % 1000000
+    days += seconds // 86400
+    seconds = seconds % 86400
+    if not -support.MAX_DELTA_DAYS <= days <= support.MAX_DELTA_DAYS:
+        raise operationerrfmt(space.w_OverflowError,
+            "days=%d; must have magnitude <= %d", days,
+            support.MAX_DELTA_DAYS)
+    return W_TimeDelta(days, seconds, microseconds)
+
+def allocate_timedelta(space, w_subtype, days, seconds, microseconds):
+    if space.is_w(w_subtype, space.gettypefor(W_TimeDelta)):
+        return space.wrap(new_timedelta(space, days, seconds, microseconds))
+    delta = new_timedelta(space, days, seconds, microseconds)
+    w_self = space.allocate_instance(W_TimeDelta, w_subtype)
+    self = space.interp_w(W_TimeDelta, w_self)
+    W_TimeDelta.__init__(self, delta.days, delta.seconds, delta.microseconds)
+    return w_self
+
+@unwrap_spec(w_days=WrappedDefault(0), w_seconds=WrappedDefault(0),
+             w_microseconds=WrappedDefault(0),
+             w_milliseconds=WrappedDefault(0), w_minutes=WrappedDefault(0),
+             w_hours=WrappedDefault(0), w_weeks=WrappedDefault(0))
+def descr_new_timedelta(space, w_subtype, w_days, w_seconds, w_microseconds,
+                        w_milliseconds, w_minutes, w_hours, w_weeks):
+    args_w = [w_days, w_seconds, w_microseconds, w_milliseconds, w_minutes,
+              w_hours, w_weeks]
+    w_int = space.w_int
+    for w_arg in args_w:
+        if not space.is_w(space.type(w_arg), w_int):
+            break
+    else:
+        # all plain ints: no fractions to carry
+        try:
+            days = ovfcheck(space.int_w(w_days) +
+                            ovfcheck(space.int_w(w_weeks) * 7))
+            seconds = ovfcheck(space.int_w(w_seconds) +
+                               ovfcheck(ovfcheck(space.int_w(w_minutes) * 60)
+                                   + ovfcheck(space.int_w(w_hours) * 3600)))
+            microseconds = ovfcheck(space.int_w(w_microseconds) +
+                               ovfcheck(space.int_w(w_milliseconds) * 1000))
+            days = ovfcheck(days + seconds // 86400)
+        except OverflowError:
+            pass
+        else:
+            return allocate_timedelta(space, w_subtype, days,
+                                      seconds % 86400, microseconds)
+    w_fields = timedelta_fields(space, w_days, w_seconds, w_microseconds,
+                                w_milliseconds, w_minutes, w_hours, w_weeks)
+    days_w = space.fixedview(w_fields, 3)
+    return allocate_timedelta(space, w_subtype, space.int_w(days_w[0]),
+                              space.int_w(days_w[1]), space.int_w(days_w[2]))
+
+
+app = gateway.applevel(r'''
+    import math as _math
+
+    def timedelta_fields(days, seconds, microseconds, milliseconds,
+                         minutes, hours, weeks):
+        "The normalization of timedelta() with floats and longs."
+        d = s = us = 0
+        days += weeks*7
+        seconds += minutes*60 + hours*3600
+        microseconds += milliseconds*1000
+
+        if isinstance(days, float):
+            dayfrac, days = _math.modf(days)
+            daysecondsfrac, daysecondswhole = _math.modf(dayfrac * (24.*3600.))
+            s = int(daysecondswhole)
+            d = long(days)
+        else:
+            daysecondsfrac = 0.0
+            d = days
+
+        if isinstance(seconds, float):
+            secondsfrac, seconds = _math.modf(seconds)
+            seconds = long(seconds)
+            secondsfrac += daysecondsfrac
+        else:
+            secondsfrac = daysecondsfrac
+
+        days, seconds = divmod(seconds, 24*3600)
+        d += days
+        s += int(seconds)
+        usdouble = secondsfrac * 1e6
+
+        if isinstance(microseconds, float):
+            microseconds += usdouble
+            microseconds = round(microseconds)
+            seconds, microseconds = divmod(microseconds, 1e6)
+            days, seconds = divmod(seconds, 24.*3600.)
+            d += long(days)
+            s += int(seconds)
+        else:
+            seconds, microseconds = divmod(microseconds, 1000000)
+            days, seconds = divmod(seconds, 24*3600)
+            d += days
+            s += int(seconds)
+            microseconds = float(microseconds)
+            microseconds += usdouble
+            microseconds = round(microseconds)
+
+        us = int(microseconds)
+        seconds, us = divmod(us, 1000000)
+        s += seconds
+        days, s = divmod(s, 24*3600)
+        d += days
+        if abs(d) > 999999999:
+            raise OverflowError("days=%d; must have magnitude <= 999999999"
+                                % d)
+        return d, s, us
+
+    def timedelta_mul(delta, other):
+        from datetime import timedelta
+        return timedelta(delta.days * other, delta.seconds * other,
+                         delta.microseconds * other)
+
+    def timedelta_div(delta, other):
+        from datetime import timedelta
+        usec = ((delta.days * (24*3600L) + delta.seconds) * 1000000 +
+                delta.microseconds)
+        return timedelta(0, 0, usec // other)
+''', filename=__file__)
+
+timedelta_fields = app.interphook('timedelta_fields')
+timedelta_mul = app.interphook('timedelta_mul')
+timedelta_div = app.interphook('timedelta_div')
+
+
+W_TimeDelta.typedef = TypeDef("timedelta",
+    __module__ = 'datetime',
+    __doc__ = """Difference between two datetime values.""",
+    __new__ = interp2app(descr_new_timedelta),
+    __repr__ = interp2app(W_TimeDelta.descr_repr),
+    __str__ = interp2app(W_TimeDelta.descr_str),
+    __add__ = interp2app(W_TimeDelta.descr_add),
+    __radd__ = interp2app(W_TimeDelta.descr_add),
+    __sub__ = interp2app(W_TimeDelta.descr_sub),
+    __rsub__ = interp2app(W_TimeDelta.descr_rsub),
+    __neg__ = interp2app(W_TimeDelta.descr_neg),
+    __pos__ = interp2app(W_TimeDelta.descr_pos),
+    __abs__ = interp2app(W_TimeDelta.descr_abs),
+    __mul__ = interp2app(W_TimeDelta.descr_mul),
+    __rmul__ = interp2app(W_TimeDelta.descr_mul),
+    __div__ = interp2app(W_TimeDelta.descr_div),
+    __floordiv__ = interp2app(W_TimeDelta.descr_div),
+    __eq__ = interp2app(W_TimeDelta.descr_eq),
+    __ne__ = interp2app(W_TimeDelta.descr_ne),
+    __lt__ = interp2app(W_TimeDelta.descr_lt),
+    __le__ = interp2app(W_TimeDelta.descr_le),
+    __gt__ = interp2app(W_TimeDelta.descr_gt),
+    __ge__ = interp2app(W_TimeDelta.descr_ge),
+    __hash__ = interp2app(W_TimeDelta.descr_hash),
+    __nonzero__ = interp2app(W_TimeDelta.descr_nonzero),
+    __reduce__ = interp2app(W_TimeDelta.descr_reduce),
+    total_seconds = interp2app(W_TimeDelta.descr_total_seconds),
+    days = interp_attrproperty('days', W_TimeDelta,
+                               doc="Number of days."),
+    seconds = interp_attrproperty('seconds', W_TimeDelta,
+        doc="Number of seconds (>= 0 and less than 1 day)."),
+    microseconds = interp_attrproperty('microseconds', W_TimeDelta,
+        doc="Number of microseconds (>= 0 and less than 1 second)."),
+    min = W_TimeDelta(-support.MAX_DELTA_DAYS, 0, 0),
+    max = W_TimeDelta(support.MAX_DELTA_DAYS, 86399, 999999),
+    resolution = W_TimeDelta(0, 0, 1),
+)
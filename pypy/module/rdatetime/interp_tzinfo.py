@@ -0,0 +1,151 @@
+from pypy.interpreter import gateway
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import TypeDef
+from pypy.module.rdatetime.interp_timedelta import W_TimeDelta, new_timedelta
+
+
+NO_OFFSET = 1440     # outside of -1439..1439: the tzinfo returned None
+
+
+class W_TzInfo(Wrappable):
+    """Abstract base class for time zone info classes, which must override
+    tzname(), utcoffset() and dst()."""
+
+    def descr_tzname(self, space, w_dt):
+        raise OperationError(space.w_NotImplementedError, space.wrap(
+            "tzinfo subclass must override tzname()"))
+
+    def descr_utcoffset(self, space, w_dt):
+        raise OperationError(space.w_NotImplementedError, space.wrap(
+            "tzinfo subclass must override utcoffset()"))
+
+    def descr_dst(self, space, w_dt):
+        raise OperationError(space.w_NotImplementedError, space.wrap(
+            "tzinfo subclass must override dst()"))
+
+    def descr_fromutc(self, space, w_dt):
+        return tzinfo_fromutc(space, space.wrap(self), w_dt)
+
+    def descr_reduce(self, space):
+        return tzinfo_reduce(space, space.wrap(self))
+
+
+def descr_new_tzinfo(space, w_subtype, __args__):
+    w_self = space.allocate_instance(W_TzInfo, w_subtype)
+    W_TzInfo.__init__(space.interp_w(W_TzInfo, w_self))
+    return w_self
+
+def check_tzinfo_arg(space, w_tzinfo):
+    """Return the tzinfo to store, None for naive objects."""
+    if w_tzinfo is None or space.is_w(w_tzinfo, space.w_None):
+        return None
+    if not isinstance(w_tzinfo, W_TzInfo):
+        raise OperationError(space.w_TypeError, space.wrap(
+            "tzinfo argument must be None or of a tzinfo subclass"))
+    return w_tzinfo
+
+def call_offset(space, w_tzinfo, w_dt, name):
+    """Call the 'utcoffset' or 'dst' method named by 'name' and check
+    its result.  Return the offset in minutes, or NO_OFFSET for None."""
+    if w_tzinfo is None:
+        return NO_OFFSET
+    w_offset = space.call_method(w_tzinfo, name, w_dt)
+    if space.is_w(w_offset, space.w_None):
+        return NO_OFFSET
+    if not isinstance(w_offset, W_TimeDelta):
+        raise operationerrfmt(space.w_TypeError,
+            "tzinfo.%s() must return None or timedelta, not '%s'", name,
+            space.type(w_offset).getname(space))
+    days = w_offset.days
+    if days < -1 or days > 0:
+        minutes = NO_OFFSET
+    else:
+        seconds = days * 86400 + w_offset.seconds
+        if seconds % 60 != 0 or w_offset.microseconds != 0:
+            raise operationerrfmt(space.w_ValueError,
+                "tzinfo.%s() must return a whole number of minutes", name)
+        minutes = seconds // 60
+    if not -1440 < minutes < 1440:
+        raise operationerrfmt(space.w_ValueError,
+            "%s()=%d, must be in -1439..1439", name, minutes)
+    return minutes
+
+def wrap_offset(space, minutes):
+    if minutes == NO_OFFSET:
+        return space.w_None
+    return space.wrap(new_timedelta(space, 0, minutes * 60, 0))
+
+def call_tzname(space, w_tzinfo, w_dt):
+    if w_tzinfo is None:
+        return space.w_None
+    w_name = space.call_method(w_tzinfo, 'tzname', w_dt)
+    if not space.is_w(w_name, space.w_None) and (
+            not space.isinstance_w(w_name, space.w_str)):
+        raise operationerrfmt(space.w_TypeError,
+            "tzinfo.tzname() must return None or string, not '%s'",
+            space.type(w_name).getname(space))
+    return w_name
+
+
+app = gateway.applevel(r'''
+    def tzinfo_fromutc(self, dt):
+        "datetime in UTC -> datetime in local time."
+        from datetime import datetime
+        if not isinstance(dt, datetime):
+            raise TypeError("fromutc() requires a datetime argument")
+        if dt.tzinfo is not self:
+            raise ValueError("dt.tzinfo is not self")
+
+        dtoff = dt.utcoffset()
+        if dtoff is None:
+            raise ValueError("fromutc() requires a non-None utcoffset() "
+                             "result")
+        # see the comment at the end of lib_pypy/datetime.py
+        dtdst = dt.dst()
+        if dtdst is None:
+            raise ValueError("fromutc() requires a non-None dst() result")
+        delta = dtoff - dtdst
+        if delta:
+            dt += delta
+            dtdst = dt.dst()
+            if dtdst is None:
+                raise ValueError("fromutc(): dt.dst gave inconsistent "
+                                 "results; cannot convert")
+        if dtdst:
+            return dt + dtdst
+        else:
+            return dt
+
+    def tzinfo_reduce(self):
+        getinitargs = getattr(self, "__getinitargs__", None)
+        if getinitargs:
+            args = getinitargs()
+        else:
+            args = ()
+        getstate = getattr(self, "__getstate__", None)
+        if getstate:
+            state = getstate()
+        else:
+            state = getattr(self, "__dict__", None) or None
+        if state is None:
+            return (self.__class__, args)
+        else:
+            return (self.__class__, args, state)
+''', filename=__file__)
+
+tzinfo_fromutc = app.interphook('tzinfo_fromutc')
+tzinfo_reduce = app.interphook('tzinfo_reduce')
+
+
+W_TzInfo.typedef = TypeDef("tzinfo",
+    __module__ = 'datetime',
+    __doc__ = W_TzInfo.__doc__,
+    __new__ = interp2app(descr_new_tzinfo),
+    __reduce__ = interp2app(W_TzInfo.descr_reduce),
+    tzname = interp2app(W_TzInfo.descr_tzname),
+    utcoffset = interp2app(W_TzInfo.descr_utcoffset),
+    dst = interp2app(W_TzInfo.descr_dst),
+    fromutc = interp2app(W_TzInfo.descr_fromutc),
+)
@@ -0,0 +1,401 @@
+"""Calendar arithmetic and formatting used by the datetime types.
+
+Like lib_pypy/datetime.py this uses the proleptic Gregorian calendar,
+with January 1 of year 1 as day number 1.  Nothing here needs a space.
+"""
+
+from rpython.rlib.rstring import StringBuilder
+
+MINYEAR = 1
+MAXYEAR = 9999
+MAX_DELTA_DAYS = 999999999
+
+DAYS_IN_MONTH = [-1, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+DAYS_BEFORE_MONTH = [-1, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304,
+                     334]
+
+MONTHNAMES = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+              "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+DAYNAMES = ["", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def compare(x, y):
+    "cmp() of two integers, which RPython does not have."
+    if x < y:
+        return -1
+    if x > y:
+        return 1
+    return 0
+
+def is_leap(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+def days_in_month(year, month):
+    if month == 2 and is_leap(year):
+        return 29
+    return DAYS_IN_MONTH[month]
+
+def days_before_year(year):
+    "The number of days before January 1st of 'year'."
+    y = year - 1
+    return y * 365 + y // 4 - y // 100 + y // 400
+
+def days_before_month(year, month):
+    "The number of days in 'year' before the first day of 'month'."
+    result = DAYS_BEFORE_MONTH[month]
+    if month > 2 and is_leap(year):
+        result += 1
+    return result
+
+def ymd2ord(year, month, day):
+    return days_before_year(year) + days_before_month(year, month) + day
+
+DI400Y = days_before_year(401)    # number of days in 400 years
+DI100Y = days_before_year(101)    #    "    "   "   " 100   "
+DI4Y = days_before_year(5)        #    "    "   "   "   4   "
+
+def ord2ymd(n):
+    "ordinal -> (year, month, day); see _ord2ymd() in lib_pypy."
+    n -= 1
+    n400 = n // DI400Y
+    n = n % DI400Y
+    year = n400 * 400 + 1
+    n100 = n // DI100Y
+    n = n % DI100Y
+    n4 = n // DI4Y
+    n = n % DI4Y
+    n1 = n // 365
+    n = n % 365
+    year += n100 * 100 + n4 * 4 + n1
+    if n1 == 4 or n100 == 4:
+        return year - 1, 12, 31
+    leapyear = n1 == 3 and (n4 != 24 or n100 == 3)
+    month = (n + 50) >> 5
+    preceding = DAYS_BEFORE_MONTH[month]
+    if month > 2 and leapyear:
+        preceding += 1
+    if preceding > n:   # the estimate is one too large
+        month -= 1
+        preceding -= DAYS_IN_MONTH[month]
+        if month == 2 and leapyear:
+            preceding -= 1
+    return year, month, n - preceding + 1
+
+def weekday(year, month, day):
+    "Monday == 0 ... Sunday == 6."
+    return (ymd2ord(year, month, day) + 6) % 7
+
+def iso_week1_monday(year):
+    "The ordinal of the Monday starting the first ISO week of 'year'."
+    firstday = ymd2ord(year, 1, 1)
+    firstweekday = (firstday + 6) % 7
+    week1monday = firstday - firstweekday
+    if firstweekday > 3:     # after Thursday
+        week1monday += 7
+    return week1monday
+
+def isocalendar(year, month, day):
+    "-> (ISO year, ISO week number, ISO weekday)"
+    week1monday = iso_week1_monday(year)
+    today = ymd2ord(year, month, day)
+    week = (today - week1monday) // 7
+    day = (today - week1monday) % 7
+    if week < 0:
+        year -= 1
+        week1monday = iso_week1_monday(year)
+        week = (today - week1monday) // 7
+        day = (today - week1monday) % 7
+    elif week >= 52:
+        if today >= iso_week1_monday(year + 1):
+            year += 1
+            week = 0
+    return year, week + 1, day + 1
+
+def normalize_date(year, month, day):
+    """Bring 'month' into 1..12 and 'day' into the days of that month,
+    carrying into the year; the year itself is not checked."""
+    if not 1 <= month <= 12:
+        year += (month - 1) // 12
+        month = (month - 1) % 12 + 1
+    dim = days_in_month(year, month)
+    if not 1 <= day <= dim:
+        # first try to get off cheap if we're only one day out of range
+        if day == 0:
+            month -= 1
+            if month > 0:
+                day = days_in_month(year, month)
+            else:
+                year, month, day = year - 1, 12, 31
+        elif day == dim + 1:
+            month += 1
+            day = 1
+            if month > 12:
+                month = 1
+                year += 1
+        else:
+            year, month, day = ord2ymd(ymd2ord(year, month, 1) + (day - 1))
+    return year, month, day
+
+def normalize_datetime(year, month, day, hour, minute, second, microsecond):
+    "The same as normalize_date(), carrying from the time fields first."
+    if not 0 <= microsecond <= 999999:
+        second += microsecond // 1000000
+        microsecond = microsecond % 1000000
+    if not 0 <= second <= 59:
+        minute += second // 60
+        second = second % 60
+    if not 0 <= minute <= 59:
+        hour += minute // 60
+        minute = minute % 60
+    if not 0 <= hour <= 23:
+        day += hour // 24
+        hour = hour % 24
+    year, month, day = normalize_date(year, month, day)
+    return year, month, day, hour, minute, second, microsecond
+
+# ____________________________________________________________
+# formatting
+
+def append_padded(builder, value, width):
+    "Append the non-negative 'value' in decimal, with leading zeroes."
+    s = str(value)
+    for i in range(width - len(s)):
+        builder.append('0')
+    builder.append(s)
+
+def append_date(builder, year, month, day):
+    append_padded(builder, year, 4)
+    builder.append('-')
+    append_padded(builder, month, 2)
+    builder.append('-')
+    append_padded(builder, day, 2)
+
+def append_time(builder, hour, minute, second, microsecond):
+    "HH:MM:SS, followed by .mmmmmm unless 'microsecond' is zero."
+    append_padded(builder, hour, 2)
+    builder.append(':')
+    append_padded(builder, minute, 2)
+    builder.append(':')
+    append_padded(builder, second, 2)
+    if microsecond:
+        builder.append('.')
+        append_padded(builder, microsecond, 6)
+
+def append_offset(builder, offset, sep):
+    "An UTC offset in minutes as +HH<sep>MM."
+    if offset < 0:
+        builder.append('-')
+        offset = -offset
+    else:
+        builder.append('+')
+    append_padded(builder, offset // 60, 2)
+    builder.append(sep)
+    append_padded(builder, offset % 60, 2)
+
+def format_ctime(year, month, day, hour, minute, second):
+    builder = StringBuilder(24)
+    builder.append(DAYNAMES[weekday(year, month, day) + 1])
+    builder.append(' ')
+    builder.append(MONTHNAMES[month])
+    builder.append(' ')
+    if day < 10:
+        builder.append(' ')
+    builder.append(str(day))
+    builder.append(' ')
+    append_time(builder, hour, minute, second, 0)
+    builder.append(' ')
+    append_padded(builder, year, 4)
+    return builder.build()
+
+# ____________________________________________________________
+# strftime() and strptime() of the common, locale-independent formats
+
+NEEDS_UTCOFFSET = 1
+NEEDS_TZNAME = 2
+
+def strftime_needs(format):
+    "Which of %z and %Z appear in 'format', as NEEDS_* flags."
+    flags = 0
+    i = 0
+    n = len(format)
+    while i < n:
+        if format[i] == '%' and i + 1 < n:
+            ch = format[i + 1]
+            if ch == 'z':
+                flags |= NEEDS_UTCOFFSET
+            elif ch == 'Z':
+                flags |= NEEDS_TZNAME
+            i += 2
+        else:
+            i += 1
+    return flags
+
+def fast_strftime(format, year, month, day, hour, minute, second,
+                  microsecond, zreplace, Zreplace):
+    """Format the numeric directives directly, giving the same result as
+    the C strftime() would.  Return None if 'format' uses any other
+    directive, whose result can depend on the locale."""
+    builder = StringBuilder(len(format) + 16)
+    i = 0
+    n = len(format)
+    while i < n:
+        ch = format[i]
+        i += 1
+        if ch != '%':
+            builder.append(ch)
+            continue
+        if i == n:
+            return None
+        ch = format[i]
+        i += 1
+        if ch == 'Y':
+            append_padded(builder, year, 4)
+        elif ch == 'm':
+            append_padded(builder, month, 2)
+        elif ch == 'd':
+            append_padded(builder, day, 2)
+        elif ch == 'H':
+            append_padded(builder, hour, 2)
+        elif ch == 'M':
+            append_padded(builder, minute, 2)
+        elif ch == 'S':
+            append_padded(builder, second, 2)
+        elif ch == 'f':
+            append_padded(builder, microsecond, 6)
+        elif ch == 'y':
+            append_padded(builder, year % 100, 2)
+        elif ch == 'I':
+            append_padded(builder, (hour + 11) % 12 + 1, 2)
+        elif ch == 'j':
+            append_padded(builder, days_before_month(year, month) + day, 3)
+        elif ch == 'w':
+            builder.append(str((weekday(year, month, day) + 1) % 7))
+        elif ch == 'z':
+            builder.append(zreplace)
+        elif ch == 'Z':
+            builder.append(Zreplace)
+        elif ch == '%':
+            builder.append('%')
+        else:
+            return None
+    return builder.build()
+
+def substitute_strftime(format, microsecond, zreplace, Zreplace):
+    """Replace %z, %Z and %f in 'format' before passing it to the C
+    strftime(), like _wrap_strftime() in lib_pypy."""
+    builder = StringBuilder(len(format))
+    i = 0
+    n = len(format)
+    while i < n:
+        ch = format[i]
+        i += 1
+        if ch != '%':
+            builder.append(ch)
+        elif i == n:
+            builder.append('%')
+        else:
+            ch = format[i]
+            i += 1
+            if ch == 'z':
+                builder.append(zreplace)
+            elif ch == 'Z':
+                # strftime() is going to have at this: escape %
+                for c in Zreplace:
+                    if c == '%':
+                        builder.append('%')
+                    builder.append(c)
+            elif ch == 'f':
+                append_padded(builder, microsecond, 6)
+            else:
+                builder.append('%')
+                builder.append(ch)
+    return builder.build()
+
+def _isdigit(ch):
+    return '0' <= ch <= '9'
+
+def _isspace(ch):
+    return ch == ' ' or ch == '\t' or ch == '\n' or ch == '\r' or (
+        ch == '\f' or ch == '\v')
+
+def _lower(ch):
+    if 'A' <= ch <= 'Z':
+        return chr(ord(ch) + 32)
+    return ch
+
+def fast_strptime(data, format):
+    """Parse 'data' when 'format' only uses %Y, %m, %d, %H, %M, %S and %f
+    and every field is followed by a non-digit or the end of the string.
+    Return [year, month, day, hour, minute, second, microsecond], or None
+    if _strptime has to decide: either the format is not one of those,
+    or the string does not match, or a field is out of range."""
+    fields = [1900, 1, 1, 0, 0, 0, 0]
+    i = 0      # position in format
+    j = 0      # position in data
+    n = len(format)
+    m = len(data)
+    while i < n:
+        ch = format[i]
+        if _isspace(ch):
+            # whitespace in the format matches one or more in the data
+            while i < n and _isspace(format[i]):
+                i += 1
+            if j == m or not _isspace(data[j]):
+                return None
+            while j < m and _isspace(data[j]):
+                j += 1
+            continue
+        i += 1
+        if ch != '%':
+            if j == m or _lower(data[j]) != _lower(ch):
+                return None
+            j += 1
+            continue
+        if i == n:
+            return None
+        ch = format[i]
+        i += 1
+        if ch == '%':
+            if j == m or data[j] != '%':
+                return None
+            j += 1
+            continue
+        if ch == 'Y':
+            index, mindigits, maxdigits = 0, 4, 4
+        elif ch == 'm':
+            index, mindigits, maxdigits = 1, 1, 2
+        elif ch == 'd':
+            index, mindigits, maxdigits = 2, 1, 2
+        elif ch == 'H':
+            index, mindigits, maxdigits = 3, 1, 2
+        elif ch == 'M':
+            index, mindigits, maxdigits = 4, 1, 2
+        elif ch == 'S':
+            index, mindigits, maxdigits = 5, 1, 2
+        elif ch == 'f':
+            index, mindigits, maxdigits = 6, 1, 6
+        else:
+            return None
+        start = j
+        value = 0
+        while j < m and j - start < maxdigits and _isdigit(data[j]):
+            value = value * 10 + (ord(data[j]) - ord('0'))
+            j += 1
+        if j - start < mindigits:
+            return None
+        if j < m and _isdigit(data[j]):
+            return None     # ambiguous, leave it to the regular expressions
+        if index == 6:
+            for k in range(6 - (j - start)):
+                value *= 10
+        fields[index] = value
+    if j != m:
+        return None
+    year, month, day = fields[0], fields[1], fields[2]
+    if year < MINYEAR or not 1 <= month <= 12:
+        return None
+    if not 1 <= day <= days_in_month(year, month):
+        return None
+    if fields[3] > 23 or fields[4] > 59 or fields[5] > 59:
+        return None
+    return fields
@@ -0,0 +1,231 @@
+"""
+Tests for the interp-level datetime module.  The whole of
+lib-python/2.7/test/test_datetime.py runs against it too.
+"""
+
+
+class AppTestDatetime(object):
+    spaceconfig = dict(usemodules=['rdatetime', 'rctime', 'binascii',
+                                   'struct', 'itertools'])
+
+    def setup_class(cls):
+        cls.w_FixedOffset = cls.space.appexec([], """():
+            import datetime
+            class FixedOffset(datetime.tzinfo):
+                def __init__(self, minutes, name):
+                    self.offset = datetime.timedelta(minutes=minutes)
+                    self.name = name
+                def utcoffset(self, dt):
+                    return self.offset
+                def tzname(self, dt):
+                    return self.name
+                def dst(self, dt):
+                    return datetime.timedelta(0)
+                def __repr__(self):
+                    return self.name
+            return FixedOffset
+        """)
+
+    def test_builtin(self):
+        import datetime, sys
+        assert 'datetime' in sys.builtin_module_names
+        assert datetime.MINYEAR == 1 and datetime.MAXYEAR == 9999
+        assert issubclass(datetime.datetime, datetime.date)
+        assert datetime.date.__module__ == 'datetime'
+
+    def test_timedelta(self):
+        from datetime import timedelta
+        td = timedelta(days=1, hours=-1, milliseconds=5)
+        assert (td.days, td.seconds, td.microseconds) == (0, 82800, 5000)
+        assert repr(td) == 'datetime.timedelta(0, 82800, 5000)'
+        assert str(td) == '23:00:00.005000'
+        assert str(timedelta(-1, 1)) == '-1 day, 0:00:01'
+        assert str(timedelta(2)) == '2 days, 0:00:00'
+        assert timedelta(hours=1.5) == timedelta(0, 5400)
+        assert timedelta(microseconds=0.25) == timedelta(0)
+        assert timedelta(seconds=2 ** 40) == timedelta(12725829, 2 ** 40 %
+                                                       86400)
+        assert -timedelta(0, 1) == timedelta(-1, 86399)
+        assert abs(timedelta(-1, 86399)) == timedelta(0, 1)
+        assert timedelta(1) * 3 == 3 * timedelta(1) == timedelta(3)
+        assert timedelta(1) // 4 == timedelta(0, 21600)
+        assert timedelta(1) / 10 ** 20 == timedelta(0)
+        assert timedelta(0, 1) - timedelta(0, 2) == timedelta(0, -1)
+        assert timedelta(1, 2, 3).total_seconds() == 86402.000003
+        assert timedelta(0) < timedelta(0, 0, 1)
+        assert not timedelta(0)
+        assert timedelta(0) != 0
+        raises(TypeError, "timedelta(0) < 0")
+        raises(OverflowError, timedelta, 1000000000)
+        assert timedelta.max == timedelta(999999999, 86399, 999999)
+        assert hash(timedelta(1)) == hash(timedelta(0, 86400))
+
+    def test_date(self):
+        from datetime import date, timedelta
+        d = date(2012, 2, 28)
+        assert (d.year, d.month, d.day) == (2012, 2, 28)
+        assert repr(d) == 'datetime.date(2012, 2, 28)'
+        assert str(d) == d.isoformat() == '2012-02-28'
+        assert d + timedelta(1) == date(2012, 2, 29)
+        assert timedelta(2) + d == date(2012, 3, 1)
+        assert d - timedelta(59) == date(2011, 12, 31)
+        assert date(2013, 1, 1) - d == timedelta(308)
+        assert d.toordinal() == 734561
+        assert date.fromordinal(734561) == d
+        assert d.weekday() == 1 and d.isoweekday() == 2
+        assert d.isocalendar() == (2012, 9, 2)
+        assert date(2010, 1, 3).isocalendar() == (2009, 53, 7)
+        assert d.ctime() == 'Tue Feb 28 00:00:00 2012'
+        assert d.timetuple()[:] == (2012, 2, 28, 0, 0, 0, 1, 59, -1)
+        assert d.replace(day=1) == date(2012, 2, 1)
+        assert date(2012, 1, 1) < d <= d
+        assert hash(d) == hash(date(2012, 2, 28))
+        raises(ValueError, date, 2011, 2, 29)
+        raises(ValueError, date, 0, 1, 1)
+        raises(ValueError, date, 2000, 13, 1)
+        raises(TypeError, date, 2000)
+        raises(TypeError, date, 2000, 1.5, 1)
+        raises(OverflowError, "date.max + timedelta(1)")
+        raises(TypeError, "d < 5")
+        assert d != 5
+
+    def test_datetime(self):
+        from datetime import datetime, date, time, timedelta
+        dt = datetime(2013, 12, 31, 23, 59, 59, 999999)
+        assert repr(dt) == (
+            'datetime.datetime(2013, 12, 31, 23, 59, 59, 999999)')
+        assert str(dt) == '2013-12-31 23:59:59.999999'
+        assert dt.isoformat() == '2013-12-31T23:59:59.999999'
+        assert datetime(2013, 1, 1, 5).isoformat('_') == '2013-01-01_05:00:00'
+        assert repr(datetime(2013, 1, 1)) == (
+            'datetime.datetime(2013, 1, 1, 0, 0)')
+        nxt = dt + timedelta(microseconds=1)
+        assert nxt == datetime(2014, 1, 1)
+        assert type(nxt) is datetime
+        assert nxt - dt == timedelta(0, 0, 1)
+        assert dt - timedelta(days=365) == datetime(2012, 12, 31, 23, 59, 59,
+                                                    999999)
+        assert dt.date() == date(2013, 12, 31)
+        assert dt.time() == time(23, 59, 59, 999999)
+        assert datetime.combine(dt.date(), dt.time()) == dt
+        assert dt.ctime() == 'Tue Dec 31 23:59:59 2013'
+        assert dt.timetuple()[:] == (2013, 12, 31, 23, 59, 59, 1, 365, -1)
+        assert dt.replace(year=2000, microsecond=0) == datetime(
+            2000, 12, 31, 23, 59, 59)
+        assert dt > datetime(2013, 12, 31)
+        assert dt != dt.date()
+        raises(TypeError, "dt < dt.date()")
+        assert hash(dt) == hash(datetime(2013, 12, 31, 23, 59, 59, 999999))
+        raises(ValueError, datetime, 2013, 1, 1, 24)
+        raises(OverflowError, "datetime.max + timedelta(0, 0, 1)")
+        t = datetime.utcfromtimestamp(86400 * 365 + 0.5)
+        assert t == datetime(1971, 1, 1, 0, 0, 0, 500000)
+        assert isinstance(datetime.now(), datetime)
+
+    def test_time(self):
+        from datetime import time
+        t = time(12, 30, 5)
+        assert repr(t) == 'datetime.time(12, 30, 5)'
+        assert str(t) == '12:30:05'
+        assert time(1, 2, 3, 4).isoformat() == '01:02:03.000004'
+        assert t.replace(second=0) == time(12, 30)
+        assert time(0) < t
+        assert not time(0)
+        assert t
+        assert hash(t) == hash(time(12, 30, 5))
+        raises(ValueError, time, 12, 60)
+
+    def test_tzinfo(self):
+        from datetime import datetime, time, timedelta, tzinfo
+        utc = self.FixedOffset(0, 'UTC')
+        cet = self.FixedOffset(60, 'CET')
+        dt = datetime(2013, 6, 1, 12, 0, tzinfo=cet)
+        assert dt.utcoffset() == timedelta(hours=1)
+        assert dt.tzname() == 'CET'
+        assert dt.isoformat() == '2013-06-01T12:00:00+01:00'
+        assert repr(dt) == 'datetime.datetime(2013, 6, 1, 12, 0, tzinfo=CET)'
+        assert dt == datetime(2013, 6, 1, 11, 0, tzinfo=utc)
+        assert hash(dt) == hash(datetime(2013, 6, 1, 11, 0, tzinfo=utc))
+        assert dt - datetime(2013, 6, 1, 12, 0, tzinfo=utc) == timedelta(
+            hours=-1)
+        assert dt.astimezone(utc) == dt
+        assert dt.astimezone(utc).hour == 11
+        assert dt.utctimetuple()[:6] == (2013, 6, 1, 11, 0, 0)
+        raises(TypeError, "dt < datetime(2013, 6, 1)")
+        raises(TypeError, "dt - datetime(2013, 6, 1)")
+        assert time(12, tzinfo=cet) == time(11, tzinfo=utc)
+        assert time(12, tzinfo=cet).isoformat() == '12:00:00+01:00'
+        raises(TypeError, datetime, 2000, 1, 1, tzinfo=5)
+        raises(NotImplementedError, tzinfo().utcoffset, None)
+        class Bad(tzinfo):
+            def utcoffset(self, dt):
+                return timedelta(seconds=30)
+        raises(ValueError, datetime(2000, 1, 1, tzinfo=Bad()).utcoffset)
+
+    def test_strftime(self):
+        from datetime import datetime, date, time
+        dt = datetime(2013, 2, 3, 4, 5, 6, 7)
+        assert dt.strftime('%Y-%m-%d %H:%M:%S.%f') == (
+            '2013-02-03 04:05:06.000007')
+        assert dt.strftime('%y %I %j %w %% %z%Z') == '13 04 034 0 % '
+        assert dt.strftime('%d %b %Y') == '03 Feb 2013'
+        assert dt.strftime('%a %p %f') == 'Sun AM 000007'
+        assert date(2013, 2, 3).strftime('%Y %f') == '2013 000000'
+        assert time(13, 1).strftime('%H:%M %I') == '13:01 01'
+        tz = self.FixedOffset(-90, 'A%B')
+        aware = dt.replace(tzinfo=tz)
+        assert aware.strftime('%z %Z') == '-0130 A%B'
+        assert aware.strftime('%b %Z') == 'Feb A%B'
+        raises(ValueError, datetime(1899, 1, 1).strftime, '%Y')
+        assert format(dt, '%Y') == '2013'
+        assert format(dt, '') == str(dt)
+
+    def test_strptime(self):
+        from datetime import datetime
+        assert datetime.strptime('2013-02-03 04:05:06.5',
+                                 '%Y-%m-%d %H:%M:%S.%f') == datetime(
+            2013, 2, 3, 4, 5, 6, 500000)
+        assert datetime.strptime('3/2/2013', '%d/%m/%Y') == datetime(2013, 2,
+                                                                     3)
+        assert datetime.strptime('T12', 't%H') == datetime(1900, 1, 1, 12)
+        # these go through _strptime
+        assert datetime.strptime('03 Feb 2013', '%d %b %Y') == datetime(
+            2013, 2, 3)
+        assert datetime.strptime('20130203', '%Y%m%d') == datetime(2013, 2, 3)
+        raises(ValueError, datetime.strptime, '2013-02-30', '%Y-%m-%d')
+        raises(ValueError, datetime.strptime, '2013-02-03x', '%Y-%m-%d')
+        class MyDatetime(datetime):
+            pass
+        d = MyDatetime.strptime('2013-02-03', '%Y-%m-%d')
+        assert type(d) is MyDatetime
+
+    def test_subclass(self):
+        from datetime import date, datetime
+        class MyDate(date):
+            def double(self):
+                return self.day * 2
+        d = MyDate(2000, 1, 5)
+        assert d.double() == 10
+        assert repr(d) == 'datetime.MyDate(2000, 1, 5)'
+        assert type(d + (date(2000, 1, 2) - date(2000, 1, 1))) is date
+        assert type(d.replace(day=6)) is MyDate
+        assert type(MyDate.today()) is MyDate
+        assert type(MyDate.fromordinal(5)) is MyDate
+        class MyDatetime(datetime):
+            pass
+        assert type(MyDatetime.combine(d, datetime.now().time())) is MyDatetime
+
+    def test_pickle(self):
+        import pickle
+        from datetime import date, datetime, time, timedelta
+        tz = self.FixedOffset(60, 'CET')
+        for obj in [timedelta(1, 2, 3), date(2000, 1, 2),
+                    datetime(2000, 1, 2, 3, 4, 5, 6),
+                    time(1, 2, 3, 400000)]:
+            for proto in range(3):
+                assert pickle.loads(pickle.dumps(obj, proto)) == obj
+        raises(TypeError, date, '\x07\xd0\x0d\x01')
+        d = datetime(2000, 1, 2, 3, 4, 5, 6, tz)
+        state = d.__reduce__()
+        assert state[0] is datetime
+        assert datetime(*state[1]).tzinfo is tz
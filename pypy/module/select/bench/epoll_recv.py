@@ -0,0 +1,70 @@
+""" Measure the messages/s an epoll loop reads from many connections:
+poll() plus a recv() per ready socket, against poll_recv_into() with
+preallocated buffers.  Every round, a message is sent on 'active' of the
+connections and the loop reads until it has seen all of them.
+
+The connections are socket pairs, so two fds per connection are needed:
+raise 'ulimit -n' for 10000 connections.
+
+Usage:
+    pypy epoll_recv.py [connections [active [repeat]]]
+"""
+
+import sys, os, socket, select
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, os.pardir, os.pardir, os.pardir))
+from pypy.tool.bench.timing import best_time
+
+ROUNDS = 200
+SLOT = 256
+
+def rate(func, messages, repeat):
+    return messages / best_time(func, repeat)
+
+def main(connections, active, repeat):
+    pairs = [socket.socketpair() for i in range(connections)]
+    ep = select.epoll(connections)
+    by_fd = {}
+    for a, b in pairs:
+        b.setblocking(False)
+        ep.register(b.fileno(), select.EPOLLIN)
+        by_fd[b.fileno()] = b
+    senders = [a for a, b in pairs[::max(1, connections // active)]]
+    senders = senders[:active]
+    message = 'x' * 100
+
+    def with_poll():
+        for i in range(ROUNDS):
+            for a in senders:
+                a.send(message)
+            seen = 0
+            while seen < len(senders):
+                for fd, events in ep.poll(1):
+                    by_fd[fd].recv(SLOT)
+                    seen += 1
+
+    events = array('i', [0] * (3 * len(senders)))
+    buffer = array('c', '\0' * (SLOT * len(senders)))
+    def with_poll_recv_into():
+        for i in range(ROUNDS):
+            for a in senders:
+                a.send(message)
+            seen = 0
+            while seen < len(senders):
+                seen += ep.poll_recv_into(events, buffer, SLOT, 1)
+
+    messages = ROUNDS * len(senders)
+    print '%d connections, %d active' % (connections, len(senders))
+    for name, func in [('poll', with_poll),
+                       ('poll_recv_into', with_poll_recv_into)]:
+        print '%16s %14.0f messages/s' % (name, rate(func, messages, repeat))
+    ep.close()
+    for a, b in pairs:
+        a.close()
+        b.close()
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [10000, 1000, 3][len(args):]))
@@ -8,7 +8,7 @@ from pypy.interpreter.error import OperationError, operationerrfmt, exception_fr
 from pypy.interpreter.typedef import TypeDef, GetSetProperty
 from rpython.rtyper.lltypesystem import lltype, rffi
 from rpython.rtyper.tool import rffi_platform
-from rpython.rlib._rsocket_rffi import socketclose, FD_SETSIZE
+from rpython.rlib._rsocket_rffi import socketclose, socketrecv, FD_SETSIZE
 from rpython.rlib.rposix import get_errno
 from rpython.rlib.rarithmetic import intmask
 from rpython.translator.tool.cbuild import ExternalCompilationInfo
@@ -48,6 +48,8 @@ for symbol in public_symbols:
 
 
 epoll_event = cconfig["epoll_event"]
+EVENTS = rffi.CArray(epoll_event)
+EPOLLIN = public_symbols["EPOLLIN"]
 EPOLL_CTL_ADD = cconfig["EPOLL_CTL_ADD"]
 EPOLL_CTL_MOD = cconfig["EPOLL_CTL_MOD"]
 EPOLL_CTL_DEL = cconfig["EPOLL_CTL_DEL"]
@@ -69,9 +71,51 @@ epoll_wait = rffi.llexternal(
 )
 
 
+def raw_int_array(space, rwbuffer, argname):
+    """The address and the length in C ints of a writable buffer with a
+    raw address, like the one of an array.array('i')."""
+    try:
+        address = rwbuffer.get_raw_address()
+    except ValueError:
+        raise operationerrfmt(space.w_TypeError,
+            "%s must be a writable buffer with a raw address, like "
+            "array.array('i')", argname)
+    return (rffi.cast(rffi.INTP, address),
+            rwbuffer.getlength() // rffi.sizeof(rffi.INT))
+
+def recv_into_slot(fd, rwbuffer, offset, size, flags):
+    """recv() at most 'size' bytes into 'rwbuffer' at 'offset'.  Return
+    the number of bytes received, or -errno.  'rwbuffer' must be pinned,
+    as recv() releases the GIL."""
+    try:
+        address = rwbuffer.get_raw_address()
+    except ValueError:
+        address = lltype.nullptr(rffi.CCHARP.TO)
+    if address:
+        received = socketrecv(fd, rffi.ptradd(address, offset), size, flags)
+        received = intmask(received)
+        if received < 0:
+            return -get_errno()
+        return received
+    raw_buf, gc_buf = rffi.alloc_buffer(size)
+    try:
+        received = intmask(socketrecv(fd, raw_buf, size, flags))
+        if received < 0:
+            return -get_errno()
+        if received > 0:
+            rwbuffer.setslice(offset, rffi.str_from_buffer(raw_buf, gc_buf,
+                                                           size, received))
+        return received
+    finally:
+        rffi.keep_buffer_alive_until_here(raw_buf, gc_buf)
+
+
 class W_Epoll(Wrappable):
     def __init__(self, space, epfd):
         self.epfd = epfd
+        # the epoll_event array of the last poll, kept for the next one
+        self.evs = lltype.nullptr(EVENTS)
+        self.evs_size = 0
 
     @unwrap_spec(sizehint=int)
     def descr__new__(space, w_subtype, sizehint=-1):
@@ -107,6 +151,37 @@ class W_Epoll(Wrappable):
         if not self.get_closed():
             socketclose(self.epfd)
             self.epfd = -1
+        if self.evs:
+            lltype.free(self.evs, flavor='raw')
+            self.evs = lltype.nullptr(EVENTS)
+            self.evs_size = 0
+
+    def get_events(self, maxevents):
+        """An epoll_event array of at least 'maxevents' items.  The cached
+        array is taken away while in use, so that another thread polling
+        at the same time gets its own."""
+        evs = self.evs
+        if evs and self.evs_size >= maxevents:
+            self.evs = lltype.nullptr(EVENTS)
+            return evs, self.evs_size
+        return lltype.malloc(EVENTS, maxevents, flavor='raw'), maxevents
+
+    def release_events(self, evs, size):
+        if self.evs or self.get_closed():
+            lltype.free(evs, flavor='raw')
+        else:
+            self.evs = evs
+            self.evs_size = size
+
+    def wait(self, space, evs, timeout, maxevents):
+        if timeout < 0:
+            timeout = -1.0
+        else:
+            timeout *= 1000.0
+        nfds = epoll_wait(self.epfd, evs, maxevents, int(timeout))
+        if nfds < 0:
+            raise exception_from_errno(space, space.w_IOError)
+        return nfds
 
     def epoll_ctl(self, space, ctl, w_fd, eventmask, ignore_ebadf=False):
         fd = space.c_filedescriptor_w(w_fd)
@@ -147,31 +222,114 @@ class W_Epoll(Wrappable):
     @unwrap_spec(timeout=float, maxevents=int)
     def descr_poll(self, space, timeout=-1.0, maxevents=-1):
         self.check_closed(space)
-        if timeout < 0:
-            timeout = -1.0
-        else:
-            timeout *= 1000.0
-
-        if maxevents == -1:
-            maxevents = FD_SETSIZE - 1
-        elif maxevents < 1:
-            raise operationerrfmt(space.w_ValueError,
-                "maxevents must be greater than 0, not %d", maxevents
-            )
-
-        with lltype.scoped_alloc(rffi.CArray(epoll_event), maxevents) as evs:
-            nfds = epoll_wait(self.epfd, evs, maxevents, int(timeout))
-            if nfds < 0:
-                raise exception_from_errno(space, space.w_IOError)
-
+        maxevents = check_maxevents(space, maxevents, FD_SETSIZE - 1)
+        evs, size = self.get_events(maxevents)
+        try:
+            nfds = self.wait(space, evs, timeout, maxevents)
             elist_w = [None] * nfds
             for i in xrange(nfds):
                 event = evs[i]
                 elist_w[i] = space.newtuple(
                     [space.wrap(event.c_data.c_fd), space.wrap(event.c_events)]
                 )
-            return space.newlist(elist_w)
+        finally:
+            self.release_events(evs, size)
+        return space.newlist(elist_w)
+
+    @unwrap_spec(timeout=float, maxevents=int)
+    def descr_poll_into(self, space, w_events, timeout=-1.0, maxevents=-1):
+        """poll_into(events[, timeout=-1[, maxevents=-1]]) -> n
 
+        Like poll(), but store the n ready (fd, events) pairs as
+        2 * n consecutive C ints into the writable buffer 'events',
+        usually a preallocated array.array('i'), instead of returning
+        a new list."""
+        self.check_closed(space)
+        events = space.rwbuffer_w(w_events)
+        ints, length = raw_int_array(space, events, "events")
+        maxevents = check_capacity(space, maxevents, length // 2)
+        evs, size = self.get_events(maxevents)
+        try:
+            nfds = self.wait(space, evs, timeout, maxevents)
+            ints, length = raw_int_array(space, events, "events")
+            nfds = min(nfds, length // 2)
+            for i in xrange(nfds):
+                event = evs[i]
+                ints[2 * i] = event.c_data.c_fd
+                ints[2 * i + 1] = rffi.cast(rffi.INT, event.c_events)
+        finally:
+            self.release_events(evs, size)
+        return space.wrap(nfds)
+
+    @unwrap_spec(slotsize=int, timeout=float, maxevents=int, flags=int)
+    def descr_poll_recv_into(self, space, w_events, w_buffer, slotsize,
+                             timeout=-1.0, maxevents=-1, flags=0):
+        """poll_recv_into(events, buffer, slotsize[, timeout=-1[,
+        maxevents=-1[, flags=0]]]) -> n
+
+        Wait like poll(), then recv() from every fd reported readable.
+        The data of the i-th ready fd goes to buffer[i * slotsize:],
+        at most slotsize bytes, and (fd, events, nbytes) is stored as
+        3 * n consecutive C ints into 'events', a writable buffer like
+        an array.array('i').  nbytes is the number of bytes received,
+        0 at end of file or if EPOLLIN is not set, or -errno if recv()
+        failed.  The fds are typically non-blocking sockets."""
+        self.check_closed(space)
+        if slotsize < 1:
+            raise operationerrfmt(space.w_ValueError,
+                "slotsize must be greater than 0, not %d", slotsize
+            )
+        events = space.rwbuffer_w(w_events)
+        ints, length = raw_int_array(space, events, "events")
+        rwbuffer = space.rwbuffer_w(w_buffer)
+        maxevents = check_capacity(space, maxevents, min(
+            length // 3, rwbuffer.getlength() // slotsize))
+        evs, size = self.get_events(maxevents)
+        try:
+            nfds = self.wait(space, evs, timeout, maxevents)
+            # recv() releases the GIL: no other thread may resize the
+            # buffers while they are written to
+            events.pin()
+            rwbuffer.pin()
+            try:
+                ints, length = raw_int_array(space, events, "events")
+                nfds = min(nfds, min(length // 3,
+                                     rwbuffer.getlength() // slotsize))
+                for i in xrange(nfds):
+                    event = evs[i]
+                    fd = rffi.cast(lltype.Signed, event.c_data.c_fd)
+                    eventmask = rffi.cast(lltype.Signed, event.c_events)
+                    received = 0
+                    if eventmask & EPOLLIN:
+                        received = recv_into_slot(fd, rwbuffer, i * slotsize,
+                                                  slotsize, flags)
+                    ints[3 * i] = rffi.cast(rffi.INT, fd)
+                    ints[3 * i + 1] = rffi.cast(rffi.INT, eventmask)
+                    ints[3 * i + 2] = rffi.cast(rffi.INT, received)
+            finally:
+                rwbuffer.unpin()
+                events.unpin()
+        finally:
+            self.release_events(evs, size)
+        return space.wrap(nfds)
+
+
+def check_maxevents(space, maxevents, default):
+    if maxevents == -1:
+        maxevents = default
+    if maxevents < 1:
+        raise operationerrfmt(space.w_ValueError,
+            "maxevents must be greater than 0, not %d", maxevents
+        )
+    return maxevents
+
+def check_capacity(space, maxevents, capacity):
+    """maxevents for a buffer with room for 'capacity' events."""
+    if capacity < 1:
+        raise OperationError(space.w_ValueError,
+            space.wrap("the buffers are too small for a single event")
+        )
+    return min(check_maxevents(space, maxevents, capacity), capacity)
 
 W_Epoll.typedef = TypeDef("select.epoll",
     __new__ = interp2app(W_Epoll.descr__new__.im_func),
@@ -184,5 +342,7 @@ W_Epoll.typedef = TypeDef("select.epoll",
     unregister = interp2app(W_Epoll.descr_unregister),
     modify = interp2app(W_Epoll.descr_modify),
     poll = interp2app(W_Epoll.descr_poll),
+    poll_into = interp2app(W_Epoll.descr_poll_into),
+    poll_recv_into = interp2app(W_Epoll.descr_poll_recv_into),
 )
 W_Epoll.typedef.acceptable_as_base_class = False
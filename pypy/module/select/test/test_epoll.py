@@ -7,7 +7,7 @@ import platform
 
 class AppTestEpoll(object):
     spaceconfig = {
-        "usemodules": ["select", "_socket", "posix", "rctime"],
+        "usemodules": ["select", "_socket", "posix", "rctime", "array"],
     }
 
     def setup_class(cls):
@@ -205,3 +205,74 @@ class AppTestEpoll(object):
         ep = select.epoll()
         ep.close()
         ep.close()
+
+    def test_poll_into(self):
+        import select
+        from array import array
+
+        client, server = self.socket_pair()
+
+        ep = select.epoll(16)
+        ep.register(server.fileno(), select.EPOLLIN | select.EPOLLOUT)
+        ep.register(client.fileno(), select.EPOLLIN | select.EPOLLOUT)
+        client.send("Hello!")
+
+        events = array('i', [0] * 8)
+        for i in range(3):
+            n = ep.poll_into(events, 1)
+            assert n == 2
+            result = [(events[0], events[1]), (events[2], events[3])]
+            assert sorted(result) == sorted(ep.poll(1, 4))
+        assert ep.poll_into(events, 1, 1) == 1
+        assert ep.poll_into(array('i', [0, 0, 0]), 1) == 1
+
+        raises(ValueError, ep.poll_into, array('i', [0]), 1)
+        raises(TypeError, ep.poll_into, bytearray(16), 1)
+        raises(TypeError, ep.poll_into, "x" * 16, 1)
+        ep.close()
+        raises(ValueError, ep.poll_into, events, 1)
+
+    def test_poll_recv_into(self):
+        import errno
+        import select
+        from array import array
+
+        client, server = self.socket_pair()
+        server.setblocking(False)
+
+        ep = select.epoll(16)
+        ep.register(server.fileno(), select.EPOLLIN)
+        events = array('i', [0] * 6)
+        data = array('c', ' ' * 8)
+        assert ep.poll_recv_into(events, data, 4, 0) == 0
+
+        client.send("Hello!")
+        assert ep.poll_recv_into(events, data, 4, 1) == 1
+        assert events[:3] == array('i', [server.fileno(), select.EPOLLIN, 4])
+        assert data.tostring() == "Hell    "
+        assert ep.poll_recv_into(events, data, 4, 1) == 1
+        assert events[2] == 2
+        assert data.tostring()[:2] == "o!"
+
+        # the fallback for buffers without a raw address
+        buf = bytearray(8)
+        client.send("abc")
+        assert ep.poll_recv_into(events, buf, 8, 1) == 1
+        assert events[2] == 3
+        assert buf[:3] == "abc"
+
+        # not readable: nothing received
+        ep.modify(server.fileno(), select.EPOLLOUT)
+        assert ep.poll_recv_into(events, buf, 4, 1) == 1
+        assert events[1] == select.EPOLLOUT
+        assert events[2] == 0
+
+        # end of file
+        ep.modify(server.fileno(), select.EPOLLIN)
+        client.close()
+        assert ep.poll_recv_into(events, buf, 4, 1) == 1
+        assert events[2] == 0
+
+        raises(ValueError, ep.poll_recv_into, events, buf, 0)
+        raises(ValueError, ep.poll_recv_into, events, buf, 16)
+        ep.close()
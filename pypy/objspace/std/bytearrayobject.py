@@ -722,6 +722,17 @@ class BytearrayBuffer(RWBuffer):
     def setitem(self, index, char):
         self.data[index] = char
 
+    def getslice(self, start, stop, step, size):
+        if step == 1:
+            assert 0 <= start <= stop
+            return ''.join(self.data[start:stop])
+        return RWBuffer.getslice(self, start, stop, step, size)
+
+    def setslice(self, start, string):
+        data = self.data
+        for i in range(len(string)):
+            data[start + i] = string[i]
+
 def buffer__Bytearray(space, self):
     b = BytearrayBuffer(self.data)
     return space.wrap(b)
@@ -209,6 +209,9 @@ class EmptyDictStrategy(DictStrategy):
 
     def switch_to_correct_strategy(self, w_dict, w_key):
         withidentitydict = self.space.config.objspace.std.withidentitydict
+        if self.space.is_tainted_w(w_key):
+            self.switch_to_object_strategy(w_dict)
+            return
         if type(w_key) is self.space.StringObjectCls:
             self.switch_to_string_strategy(w_dict)
             return
@@ -461,8 +464,16 @@ class AbstractTypedStrategy(object):
     def _never_equal_to(self, w_lookup_type):
         raise NotImplementedError("abstract base class")
 
+    # the strategies storing unwrapped keys would lose the taints of the
+    # keys, so a tainted key switches the dict to the object strategy
+    unwraps_keys = True
+
+    def can_store(self, w_key):
+        return self.is_correct_type(w_key) and not (
+            self.unwraps_keys and self.space.is_tainted_w(w_key))
+
     def setitem(self, w_dict, w_key, w_value):
-        if self.is_correct_type(w_key):
+        if self.can_store(w_key):
             self.unerase(w_dict.dstorage)[self.unwrap(w_key)] = w_value
             return
         else:
@@ -474,7 +485,7 @@ class AbstractTypedStrategy(object):
         w_dict.setitem(self.space.wrap(key), w_value)
 
     def setdefault(self, w_dict, w_key, w_default):
-        if self.is_correct_type(w_key):
+        if self.can_store(w_key):
             return self.unerase(w_dict.dstorage).setdefault(self.unwrap(w_key), w_default)
         else:
             self.switch_to_object_strategy(w_dict)
@@ -551,6 +562,8 @@ class ObjectDictStrategy(AbstractTypedStrategy, DictStrategy):
     erase = staticmethod(erase)
     unerase = staticmethod(unerase)
 
+    unwraps_keys = False
+
     def wrap(self, unwrapped):
         return unwrapped
 
@@ -58,6 +58,8 @@ class IdentityDictStrategy(AbstractTypedStrategy, DictStrategy):
     erase = staticmethod(erase)
     unerase = staticmethod(unerase)
 
+    unwraps_keys = False
+
     def wrap(self, unwrapped):
         return unwrapped
 
@@ -48,6 +48,11 @@ def get_strategy_from_list_objects(space, list_w, sizehint):
             return SizeListStrategy(space, sizehint)
         return space.fromcache(EmptyListStrategy)
 
+    # the other strategies store the items unwrapped, losing their taints
+    for w_obj in list_w:
+        if space.is_tainted_w(w_obj):
+            return space.fromcache(ObjectListStrategy)
+
     # check for ints
     for w_obj in list_w:
         if not is_W_IntObject(w_obj):
@@ -506,7 +511,9 @@ class EmptyListStrategy(ListStrategy):
         return self.erase(None)
 
     def switch_to_correct_strategy(self, w_list, w_item):
-        if is_W_IntObject(w_item):
+        if self.space.is_tainted_w(w_item):
+            strategy = self.space.fromcache(ObjectListStrategy)
+        elif is_W_IntObject(w_item):
             strategy = self.space.fromcache(IntegerListStrategy)
         elif is_W_StringObject(w_item):
             strategy = self.space.fromcache(StringListStrategy)
@@ -710,7 +717,7 @@ class RangeListStrategy(ListStrategy):
         return w_list.getslice(start, stop, step, length)
 
     def append(self, w_list, w_item):
-        if is_W_IntObject(w_item):
+        if is_W_IntObject(w_item) and not self.space.is_tainted_w(w_item):
             self.switch_to_integer_strategy(w_list)
         else:
             w_list.switch_to_object_strategy()
@@ -793,6 +800,14 @@ class AbstractUnwrappedStrategy(object):
     def is_correct_type(self, w_obj):
         raise NotImplementedError("abstract base class")
 
+    # the strategies storing unwrapped items would lose the taints of the
+    # items, so storing a tainted item switches to the object strategy
+    unwraps_items = True
+
+    def can_store(self, w_obj):
+        return self.is_correct_type(w_obj) and not (
+            self.unwraps_items and self.space.is_tainted_w(w_obj))
+
     def list_is_correct_type(self, w_list):
         raise NotImplementedError("abstract base class")
 
@@ -883,7 +898,7 @@ class AbstractUnwrappedStrategy(object):
             return W_ListObject.from_storage_and_strategy(self.space, storage, self)
 
     def append(self,  w_list, w_item):
-        if self.is_correct_type(w_item):
+        if self.can_store(w_item):
             self.unerase(w_list.lstorage).append(self.unwrap(w_item))
             return
 
@@ -893,7 +908,7 @@ class AbstractUnwrappedStrategy(object):
     def insert(self, w_list, index, w_item):
         l = self.unerase(w_list.lstorage)
 
-        if self.is_correct_type(w_item):
+        if self.can_store(w_item):
             l.insert(index, self.unwrap(w_item))
             return
 
@@ -915,7 +930,7 @@ class AbstractUnwrappedStrategy(object):
     def setitem(self, w_list, index, w_item):
         l = self.unerase(w_list.lstorage)
 
-        if self.is_correct_type(w_item):
+        if self.can_store(w_item):
             try:
                 l[index] = self.unwrap(w_item)
             except IndexError:
@@ -1061,6 +1076,8 @@ class ObjectListStrategy(AbstractUnwrappedStrategy, ListStrategy):
     erase = staticmethod(erase)
     unerase = staticmethod(unerase)
 
+    unwraps_items = False
+
     def is_correct_type(self, w_obj):
         return True
 
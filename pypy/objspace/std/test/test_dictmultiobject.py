@@ -825,6 +825,20 @@ class AppTestStrategies(object):
         assert "IntDictStrategy" in self.get_strategy(d)
         assert d[1L] == "hi"
 
+    def test_tainted_keys(self):
+        from __pypy__.taint import add_taint, get_taint
+        key = 'a' * len('xy')
+        add_taint(key, 3)
+        d = {}
+        d[key] = 1
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert get_taint(d.keys()[0]) == [3]
+        d = {'b': 2}
+        d[key] = 1
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d['aa'] == 1
+        assert [get_taint(k) for k in sorted(d)] == [[3], []]
+
     def test_iter_dict_length_change(self):
         d = {1: 2, 3: 4, 5: 6}
         it = d.iteritems()
@@ -882,6 +896,8 @@ class FakeSpace:
     def is_(self, x, y):
         return x is y
     is_w = is_
+    def is_tainted_w(self, x):
+        return False
     def eq(self, x, y):
         return x == y
     eq_w = eq
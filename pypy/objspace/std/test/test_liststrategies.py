@@ -3,6 +3,43 @@ from pypy.objspace.std.listobject import W_ListObject, EmptyListStrategy, Object
 from pypy.objspace.std import listobject
 from pypy.objspace.std.test.test_listobject import TestW_ListObject
 
+class TestTaintedItems(object):
+    spaceconfig = {"objspace.std.withliststrategies": True}
+
+    def test_tainted_items(self):
+        space = self.space
+        w = space.wrap
+        w_tainted = w(2)
+        w_tainted.addtaint(space, w(5))
+        l = W_ListObject(space, [w(1), w_tainted])
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert l.getitem(1) is w_tainted
+
+    def test_store_tainted_items(self):
+        space = self.space
+        w = space.wrap
+        w_int = w(2)
+        w_int.addtaint(space, w(5))
+        w_str = w('b')
+        w_str.addtaint(space, w(5))
+        for w_list, w_item, store in [
+                (W_ListObject(space, [w(1), w(3)]), w_int,
+                 lambda l, w_item: l.append(w_item)),
+                (W_ListObject(space, [w(1), w(3)]), w_int,
+                 lambda l, w_item: l.insert(1, w_item)),
+                (W_ListObject(space, [w('a'), w('c')]), w_str,
+                 lambda l, w_item: l.setitem(1, w_item)),
+                (W_ListObject(space, []), w_str,
+                 lambda l, w_item: l.append(w_item)),
+                (make_range_list(space, 1, 1, 2), w_int,
+                 lambda l, w_item: l.append(w_item))]:
+            assert not isinstance(w_list.strategy, ObjectListStrategy)
+            store(w_list, w_item)
+            assert isinstance(w_list.strategy, ObjectListStrategy)
+            items_w = w_list.getitems()
+            assert [w_x for w_x in items_w if w_x is w_item] == [w_item]
+
+
 class TestW_ListStrategies(TestW_ListObject):
 
     def test_check_strategy(self):
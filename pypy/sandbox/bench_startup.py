@@ -0,0 +1,48 @@
+#! /usr/bin/env python
+
+"""Measure the startup time of a PyPy translated with --sandbox, with and
+without the controller-side cache of lib-python and lib_pypy.
+
+Usage:
+    bench_startup.py [-n N] <executable> [<args...>]
+
+By default the subprocess runs 'import os, re, json'.
+"""
+
+import sys, os, time
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from pypy.sandbox.pypy_interact import PyPySandboxedProc
+
+
+def run_once(executable, arguments, vfs_cache):
+    sandproc = PyPySandboxedProc(executable, arguments, debug=False,
+                                 vfs_cache=vfs_cache)
+    t0 = time.time()
+    try:
+        output, error = sandproc.communicate("")
+    finally:
+        sandproc.kill()
+    if sandproc.wait() != 0:
+        raise OSError("the sandboxed subprocess failed:\n" + error)
+    return time.time() - t0
+
+def main():
+    from getopt import getopt
+    options, arguments = getopt(sys.argv[1:], 'n:')
+    runs = 5
+    for option, value in options:
+        if option == '-n':
+            runs = int(value)
+    if len(arguments) < 1:
+        print >> sys.stderr, __doc__
+        sys.exit(2)
+    executable = arguments[0]
+    arguments = arguments[1:] or ['-c', 'import os, re, json']
+    for vfs_cache in [False, True]:
+        times = [run_once(executable, arguments, vfs_cache)
+                 for i in range(runs)]
+        print 'vfs_cache=%-5s  best %.3fs  average %.3fs' % (
+            vfs_cache, min(times), sum(times) / len(times))
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,7 @@ Options:
     --timeout=N   limit execution time to N (real-time) seconds.
     --log=FILE    log all user input into the FILE.
     --verbose     log all proxied system calls.
+    --no-vfs-cache  don't cache lib-python and lib_pypy in the controller.
 
 Note that you can get readline-like behavior with a tool like 'ledit',
 provided you use enough -u options:
@@ -25,6 +26,7 @@ sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..'
 from rpython.translator.sandbox.sandlib import SimpleIOSandboxedProc
 from rpython.translator.sandbox.sandlib import VirtualizedSandboxedProc
 from rpython.translator.sandbox.vfs import Dir, RealDir, RealFile
+from rpython.translator.sandbox.vfs import CachedRealDir
 import pypy
 LIB_ROOT = os.path.dirname(os.path.dirname(pypy.__file__))
 
@@ -34,10 +36,12 @@ class PyPySandboxedProc(VirtualizedSandboxedProc, SimpleIOSandboxedProc):
     virtual_env = {}
     virtual_console_isatty = True
 
-    def __init__(self, executable, arguments, tmpdir=None, debug=True):
+    def __init__(self, executable, arguments, tmpdir=None, debug=True,
+                 vfs_cache=True):
         self.executable = executable = os.path.abspath(executable)
         self.tmpdir = tmpdir
         self.debug = debug
+        self.vfs_cache = vfs_cache
         super(PyPySandboxedProc, self).__init__([self.argv0] + arguments,
                                                 executable=executable)
 
@@ -46,33 +50,55 @@ class PyPySandboxedProc(VirtualizedSandboxedProc, SimpleIOSandboxedProc):
         # * can access its own executable
         # * can access the pure Python libraries
         # * can access the temporary usession directory as /tmp
+        # * lookups in the libraries are memoized unless vfs_cache=False
         exclude = ['.pyc', '.pyo']
         if self.tmpdir is None:
             tmpdirnode = Dir({})
         else:
             tmpdirnode = RealDir(self.tmpdir, exclude=exclude)
         libroot = str(LIB_ROOT)
+        if self.vfs_cache:
+            LibDir = CachedRealDir
+        else:
+            LibDir = RealDir
 
         return Dir({
             'bin': Dir({
                 'pypy-c': RealFile(self.executable),
-                'lib-python': RealDir(os.path.join(libroot, 'lib-python'),
-                                      exclude=exclude), 
-                'lib_pypy': RealDir(os.path.join(libroot, 'lib_pypy'),
-                                      exclude=exclude),
+                'lib-python': LibDir(os.path.join(libroot, 'lib-python'),
+                                     exclude=exclude),
+                'lib_pypy': LibDir(os.path.join(libroot, 'lib_pypy'),
+                                     exclude=exclude),
                 }),
              'tmp': tmpdirnode,
              })
 
+def parse_heapsize(value):
+    value = value.lower()
+    if value.endswith('k'):
+        bytes = int(value[:-1]) * 1024
+    elif value.endswith('m'):
+        bytes = int(value[:-1]) * 1024 * 1024
+    elif value.endswith('g'):
+        bytes = int(value[:-1]) * 1024 * 1024 * 1024
+    else:
+        bytes = int(value)
+    if bytes <= 0:
+        raise ValueError
+    if bytes > sys.maxint:
+        raise OverflowError("--heapsize maximum is %d" % sys.maxint)
+    return bytes
+
 def main():
     from getopt import getopt      # and not gnu_getopt!
     options, arguments = getopt(sys.argv[1:], 't:hv', 
                                 ['tmp=', 'heapsize=', 'timeout=', 'log=',
-                                 'verbose', 'help'])
+                                 'verbose', 'help', 'no-vfs-cache'])
     tmpdir = None
     timeout = None
     logfile = None
     debug = False
+    vfs_cache = True
     extraoptions = []
 
     def help():
@@ -86,19 +112,7 @@ def main():
                 raise OSError("%r is not a directory" % (value,))
             tmpdir = value
         elif option == '--heapsize':
-            value = value.lower()
-            if value.endswith('k'):
-                bytes = int(value[:-1]) * 1024
-            elif value.endswith('m'):
-                bytes = int(value[:-1]) * 1024 * 1024
-            elif value.endswith('g'):
-                bytes = int(value[:-1]) * 1024 * 1024 * 1024
-            else:
-                bytes = int(value)
-            if bytes <= 0:
-                raise ValueError
-            if bytes > sys.maxint:
-                raise OverflowError("--heapsize maximum is %d" % sys.maxint)
+            bytes = parse_heapsize(value)
             extraoptions[:0] = ['--heapsize', str(bytes)]
         elif option == '--timeout':
             timeout = int(value)
@@ -106,6 +120,8 @@ def main():
             logfile = value
         elif option in ['-v', '--verbose']:
             debug = True
+        elif option == '--no-vfs-cache':
+            vfs_cache = False
         elif option in ['-h', '--help']:
             help()
         else:
@@ -115,7 +131,8 @@ def main():
         help()
 
     sandproc = PyPySandboxedProc(arguments[0], extraoptions + arguments[1:],
-                                 tmpdir=tmpdir, debug=debug)
+                                 tmpdir=tmpdir, debug=debug,
+                                 vfs_cache=vfs_cache)
     if timeout is not None:
         sandproc.settimeout(timeout, interrupt_main=True)
     if logfile is not None:
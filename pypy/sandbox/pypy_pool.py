@@ -0,0 +1,348 @@
+#! /usr/bin/env python
+
+"""Runs Python scripts as jobs in a pool of warm PyPy subprocesses
+translated with --sandbox.
+
+Usage:
+    pypy_pool.py [options] <executable> <script.py...>
+
+Options:
+    --tmp=DIR       the real directory that corresponds to the virtual /tmp,
+                    which is the virtual current dir (always read-only for now)
+    --heapsize=N    limit memory usage of each interpreter to N bytes, or
+                    kilo- mega- giga-bytes with the 'k', 'm' or 'g' suffix.
+    --timeout=N     limit the execution time of each job to N (real-time)
+                    seconds; the interpreter running it is killed.
+    --size=N        number of interpreters kept warm (default 2).
+    --warmup=MODS   comma-separated modules imported before the first job.
+    --max-jobs=N    number of jobs run by an interpreter before it is
+                    replaced by a fresh one (default 1: every job starts
+                    from a clean interpreter, but without the startup cost;
+                    jobs run by the same interpreter share its modules).
+    --verbose       log all proxied system calls.
+"""
+
+import sys, os, time, errno
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from rpython.translator.sandbox.sandlib import read_message
+from pypy.sandbox.pypy_interact import PyPySandboxedProc, parse_heapsize
+
+
+# The file descriptor on which the pooled interpreters receive their jobs.
+# It is outside the virtual_fd_range, so it is never given to an open file.
+JOB_FD = 50
+READY = 'ready'
+
+# The program run by each pooled interpreter.  It imports the warmup
+# modules, then runs jobs forever with __pypy__.sandbox_serve_jobs(): that
+# writes READY to JOB_FD to say that the interpreter is idle, and then
+# reads from JOB_FD a token, a newline, a decimal length, a newline and
+# that many bytes of source code.  When the job is done, it writes READY
+# followed by the token.  The token is random and changes for every job.
+# It is only kept at interp-level, where no frame, global or object of
+# the job can see it, so a job cannot end itself early by writing READY
+# and stay around to read the next job.
+# A job reading its stdin gets an empty file.
+BOOTSTRAP = '''\
+import sys
+%(warmup)s
+def _pool_run(source, compile=compile):
+    import traceback
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    try:
+        exec compile(source, "<job>", "exec") in namespace
+    except SystemExit:
+        pass
+    except MemoryError:
+        raise SystemExit(3)
+    except:
+        traceback.print_exc()
+    del namespace, source
+    sys.stdout.flush()
+    sys.stderr.flush()
+from __pypy__ import sandbox_serve_jobs
+sandbox_serve_jobs(%(job_fd)d, "%(ready)s", _pool_run)
+'''
+
+
+class JobFailed(Exception):
+    """The interpreter running a job died before finishing it (for
+    example because it was killed by the timeout, or it ran out of
+    its --heapsize)."""
+
+
+class PooledSandboxedProc(PyPySandboxedProc):
+    """A PyPySandboxedProc running BOOTSTRAP, which can run several jobs
+    one after the other.  Jobs are sent on JOB_FD, the stdin of every job
+    is empty, and its stdout and stderr are collected.  JOB_FD refuses
+    everything but the handshake expected from BOOTSTRAP.
+    """
+    virtual_console_isatty = False
+
+    def __init__(self, executable, arguments, warmup=(), tmpdir=None,
+                 debug=False, vfs_cache=True):
+        source = BOOTSTRAP % {'warmup': ''.join(['import %s\n' % (mod,)
+                                                for mod in warmup]),
+                              'job_fd': JOB_FD, 'ready': READY}
+        super(PooledSandboxedProc, self).__init__(
+            executable, arguments + ['-c', source], tmpdir=tmpdir,
+            debug=debug, vfs_cache=vfs_cache)
+        self.jobs_done = 0
+        self._job_input = ''
+        self._ready = READY
+        self._pending_ready = None
+        self._answer_ready = False
+
+    def run_until_idle(self):
+        """Serve the subprocess until it writes the expected READY marker
+        to JOB_FD.  Returns False if it exited instead.
+        """
+        child_stdout = self.popen.stdout
+        while True:
+            try:
+                fnname = read_message(child_stdout)
+                args   = read_message(child_stdout)
+            except EOFError:
+                return False
+            if (fnname == 'll_os.ll_os_write' and args[0] == JOB_FD and
+                    args[1] == self._ready):
+                self._pending_ready = args
+                return True
+            if not self.handle_messages([(fnname, args)]):
+                return False
+
+    def warmup(self):
+        """Serve the subprocess until it is ready for its first job.
+        Its output during warmup is discarded.
+        """
+        import cStringIO
+        self._output = cStringIO.StringIO()
+        self._error = cStringIO.StringIO()
+        try:
+            finished = self.run_until_idle()
+            error = self._error.getvalue()
+        finally:
+            self._output = None
+            self._error = None
+        if not finished:
+            raise JobFailed("the interpreter exited during warmup:\n" +
+                            error)
+
+    def run_job(self, source):
+        """Run 'source' and return its (output, error)."""
+        import cStringIO
+        assert self._pending_ready is not None, "not idle"
+        token = os.urandom(16).encode('hex')
+        self._job_input = '%s\n%d\n%s' % (token, len(source), source)
+        self._output = cStringIO.StringIO()
+        self._error = cStringIO.StringIO()
+        args = self._pending_ready
+        self._pending_ready = None
+        self._ready = READY + token
+        self._answer_ready = True
+        try:
+            self.handle_messages([('ll_os.ll_os_write', args)])
+            finished = self.run_until_idle()
+            output = self._output.getvalue()
+            error = self._error.getvalue()
+        finally:
+            self._job_input = ''
+            self._output = None
+            self._error = None
+        if not finished:
+            raise JobFailed(error)
+        self.jobs_done += 1
+        return output, error
+
+    def do_ll_os__ll_os_read(self, fd, size):
+        if fd == JOB_FD:
+            if not self._job_input:
+                raise OSError(errno.EBADF, "bad file descriptor")
+            data = self._job_input[:size]
+            self._job_input = self._job_input[size:]
+            return data
+        return super(PooledSandboxedProc, self).do_ll_os__ll_os_read(fd, size)
+
+    def do_ll_os__ll_os_write(self, fd, data):
+        if fd == JOB_FD:
+            # only the READY answered by run_job() is accepted
+            if not self._answer_ready:
+                raise OSError(errno.EBADF, "bad file descriptor")
+            self._answer_ready = False
+            return len(data)
+        return super(PooledSandboxedProc, self).do_ll_os__ll_os_write(fd,
+                                                                      data)
+
+
+class SandboxPool(object):
+    """Keep 'size' sandboxed interpreters warmed up, and hand out jobs to
+    them.  An interpreter is killed and replaced after 'max_jobs' jobs,
+    after a job that failed, or when a job runs for more than 'timeout'
+    seconds.  New interpreters are warmed up in background threads.
+    """
+    ProcClass = PooledSandboxedProc
+
+    def __init__(self, executable, arguments=[], size=2, warmup=(),
+                 max_jobs=1, timeout=None, heapsize=None, tmpdir=None,
+                 debug=False):
+        import thread
+        self.executable = executable
+        self.arguments = list(arguments)
+        if heapsize is not None:
+            self.arguments[:0] = ['--heapsize', str(heapsize)]
+        self.size = size
+        self.warmup_modules = list(warmup)
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.tmpdir = tmpdir
+        self.debug = debug
+        self.lock = thread.allocate_lock()
+        self.idle = []
+        self.starting = 0
+        self.started = 0
+        self.closed = False
+        for i in range(size):
+            self._start_one()
+
+    def _start_one(self):
+        import thread
+        self.lock.acquire()
+        self.starting += 1
+        self.started += 1
+        self.lock.release()
+        thread.start_new_thread(self._warm_one, ())
+
+    def _warm_one(self):
+        proc = None
+        try:
+            proc = self.ProcClass(self.executable, self.arguments,
+                                  warmup=self.warmup_modules,
+                                  tmpdir=self.tmpdir, debug=self.debug)
+            proc.warmup()
+        except Exception:
+            if proc is not None:
+                proc.kill()
+            proc = None
+        self.lock.acquire()
+        try:
+            self.starting -= 1
+            if proc is not None:
+                if self.closed:
+                    proc.kill()
+                else:
+                    self.idle.append(proc)
+        finally:
+            self.lock.release()
+
+    def _get_idle(self):
+        while True:
+            self.lock.acquire()
+            try:
+                if self.idle:
+                    return self.idle.pop(0)
+                if not self.starting:
+                    raise JobFailed("no interpreter could be started")
+            finally:
+                self.lock.release()
+            time.sleep(0.001)
+
+    def run_job(self, source):
+        """Run 'source' on a warm interpreter and return its
+        (output, error).  Raises JobFailed if the interpreter died.
+        """
+        proc = self._get_idle()
+        if self.timeout is not None:
+            proc.settimeout(self.timeout)
+        try:
+            result = proc.run_job(source)
+        except:
+            proc.kill()
+            proc.wait()
+            self._start_one()
+            raise
+        proc.canceltimeout()
+        if proc.jobs_done >= self.max_jobs:
+            proc.kill()
+            proc.wait()
+            self._start_one()
+        else:
+            self.lock.acquire()
+            self.idle.append(proc)
+            self.lock.release()
+        return result
+
+    def close(self):
+        self.lock.acquire()
+        try:
+            self.closed = True
+            procs = self.idle
+            self.idle = []
+        finally:
+            self.lock.release()
+        for proc in procs:
+            proc.kill()
+            proc.wait()
+
+
+def main():
+    from getopt import getopt      # and not gnu_getopt!
+    options, arguments = getopt(sys.argv[1:], 't:hv',
+                                ['tmp=', 'heapsize=', 'timeout=', 'size=',
+                                 'warmup=', 'max-jobs=', 'verbose', 'help'])
+    tmpdir = None
+    timeout = None
+    heapsize = None
+    size = 2
+    warmup = []
+    max_jobs = 1
+    debug = False
+
+    def help():
+        print >> sys.stderr, __doc__
+        sys.exit(2)
+
+    for option, value in options:
+        if option in ['-t', '--tmp']:
+            value = os.path.abspath(value)
+            if not os.path.isdir(value):
+                raise OSError("%r is not a directory" % (value,))
+            tmpdir = value
+        elif option == '--heapsize':
+            heapsize = parse_heapsize(value)
+        elif option == '--timeout':
+            timeout = int(value)
+        elif option == '--size':
+            size = int(value)
+        elif option == '--warmup':
+            warmup = [mod for mod in value.split(',') if mod]
+        elif option == '--max-jobs':
+            max_jobs = int(value)
+        elif option in ['-v', '--verbose']:
+            debug = True
+        elif option in ['-h', '--help']:
+            help()
+        else:
+            raise ValueError(option)
+
+    if len(arguments) < 2:
+        help()
+
+    pool = SandboxPool(arguments[0], size=size, warmup=warmup,
+                       max_jobs=max_jobs, timeout=timeout,
+                       heapsize=heapsize, tmpdir=tmpdir, debug=debug)
+    try:
+        for filename in arguments[1:]:
+            source = open(filename).read()
+            t0 = time.time()
+            try:
+                output, error = pool.run_job(source)
+            except JobFailed, e:
+                output, error = '', '%s\n[Interpreter died]\n' % (e,)
+            sys.stdout.write(output)
+            sys.stderr.write(error)
+            print >> sys.stderr, '[%s: %.3fs]' % (filename, time.time() - t0)
+    finally:
+        pool.close()
+
+if __name__ == '__main__':
+    main()
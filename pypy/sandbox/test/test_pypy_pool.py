@@ -0,0 +1,212 @@
+import os
+from pypy.sandbox.pypy_pool import PooledSandboxedProc, SandboxPool, JobFailed
+from pypy.sandbox.pypy_pool import JOB_FD, READY
+from rpython.translator.interactive import Translation
+
+
+def mini_pool_entry_point(argv):
+    """An RPython standalone executable that reads jobs from JOB_FD the
+    same way as pypy_pool.BOOTSTRAP.
+    """
+    os.write(1, "warming up\n")
+    token = ''
+    while True:
+        os.write(JOB_FD, READY + token)
+        data = os.read(JOB_FD, 65536)
+        if not data:
+            return 0
+        i = data.find('\n')
+        assert i >= 0
+        token = data[:i]
+        j = data.find('\n', i + 1)
+        assert j >= 0
+        length = int(data[i+1:j])
+        source = data[j+1:]
+        while len(source) < length:
+            source += os.read(JOB_FD, length - len(source))
+        if source == 'crash':
+            return 1
+        if source == 'readstdin':
+            # like a job doing sys.stdin.read()
+            while True:
+                data = os.read(0, 4096)
+                if not data:
+                    break
+                os.write(1, 'stdin ' + data)
+        os.write(1, 'ran ' + source)
+        os.write(2, 'ok')
+
+
+# A stand-in for pypy-c-sandbox that runs the '-c' source on the host
+# Python, sending os.read() and os.write() to the controller like the
+# sandboxed interpreter does.  It is enough to run the real BOOTSTRAP.
+FAKE_PYPY = '''#! %(python)s
+import sys, os
+sys.path.insert(0, %(root)r)
+from rpython.translator.sandbox import _marshal as marshal
+_to_controller = os.fdopen(1, 'wb')
+_from_controller = os.fdopen(0, 'rb')
+def _call(fnname, *args):
+    marshal.dump(fnname, _to_controller, 0)
+    marshal.dump(args, _to_controller, 0)
+    _to_controller.flush()
+    error = marshal.load(_from_controller)
+    if error == 1:
+        raise OSError(marshal.load(_from_controller), "sandboxed")
+    assert error == 0, error
+    return marshal.load(_from_controller)
+os.read = lambda fd, size: _call('ll_os.ll_os_read', fd, size)
+os.write = lambda fd, data: _call('ll_os.ll_os_write', fd, data)
+class _Output(object):
+    def __init__(self, fd):
+        self.fd = fd
+    def write(self, data):
+        os.write(self.fd, data)
+    def flush(self):
+        pass
+class _Input(object):
+    def read(self):
+        result = []
+        while True:
+            data = os.read(0, 4096)
+            if not data:
+                return ''.join(result)
+            result.append(data)
+sys.stdin = _Input()
+# __pypy__.sandbox_serve_jobs() keeps the token at interp-level; this copy
+# keeps it in an attribute, out of the f_locals of any frame
+class _Job(object):
+    pass
+def sandbox_serve_jobs(job_fd, ready, run):
+    job = _Job()
+    job.token = ''
+    while True:
+        os.write(job_fd, ready + job.token)
+        data = os.read(job_fd, 65536)
+        if not data:
+            return
+        job.token, length, source = data.split('\\n', 2)
+        while len(source) < int(length):
+            source += os.read(job_fd, int(length) - len(source))
+        run(source)
+        del source
+sys.modules['__pypy__'] = type(sys)('__pypy__')
+sys.modules['__pypy__'].sandbox_serve_jobs = sandbox_serve_jobs
+sys.stdout = _Output(1)
+sys.stderr = _Output(2)
+source = sys.argv[sys.argv.index('-c') + 1]
+exec compile(source, '<string>', 'exec') in {'__name__': '__main__'}
+'''
+
+def setup_module(mod):
+    import sys
+    from rpython.tool.udir import udir
+    import pypy
+    t = Translation(mini_pool_entry_point, backend='c', sandbox=True)
+    mod.executable = str(t.compile())
+    root = os.path.dirname(os.path.dirname(os.path.abspath(pypy.__file__)))
+    path = udir.join('fake-pypy-c-sandbox')
+    path.write(FAKE_PYPY % {'python': sys.executable, 'root': root})
+    path.chmod(0755)
+    mod.fake_pypy = str(path)
+
+
+def test_proc():
+    proc = PooledSandboxedProc(executable, [], warmup=['os'])
+    proc.warmup()
+    assert proc.run_job('job1') == ('ran job1', 'ok')
+    big = 'x' * 200000
+    assert proc.run_job(big) == ('ran ' + big, 'ok')
+    assert proc.jobs_done == 2
+    proc.kill()
+    proc.wait()
+
+def test_pool():
+    pool = SandboxPool(executable, size=2, max_jobs=2)
+    try:
+        for i in range(5):
+            assert pool.run_job('job%d' % i) == ('ran job%d' % i, 'ok')
+        assert pool.started == 4
+        try:
+            pool.run_job('crash')
+        except JobFailed:
+            pass
+        else:
+            raise AssertionError("JobFailed not raised")
+        assert pool.started == 5
+        assert pool.run_job('again') == ('ran again', 'ok')
+    finally:
+        pool.close()
+
+def test_job_reading_stdin():
+    proc = PooledSandboxedProc(executable, [])
+    proc.warmup()
+    assert proc.run_job('readstdin') == ('ran readstdin', 'ok')
+    assert proc.run_job('job2') == ('ran job2', 'ok')
+    assert proc.run_job('readstdin') == ('ran readstdin', 'ok')
+    assert proc.jobs_done == 3
+    proc.kill()
+    proc.wait()
+
+
+def test_bootstrap():
+    proc = PooledSandboxedProc(fake_pypy, [], warmup=['os'])
+    proc.warmup()
+    assert proc.run_job('print 6 * 7') == ('42\n', '')
+    output, error = proc.run_job('1 / 0')
+    assert output == '' and 'ZeroDivisionError' in error
+    assert proc.run_job('import sys; print sys.stdin.read()') == ('\n', '')
+    proc.kill()
+    proc.wait()
+
+def test_bootstrap_spoofed_ready():
+    # a job cannot end itself early and then read the next job
+    proc = PooledSandboxedProc(fake_pypy, [])
+    proc.warmup()
+    output, error = proc.run_job(
+        'import os\n'
+        'try:\n'
+        '    os.write(%d, %r)\n'
+        'except OSError:\n'
+        '    print "refused write"\n'
+        'try:\n'
+        '    os.read(%d, 100)\n'
+        'except OSError:\n'
+        '    print "refused read"\n'
+        'print "job1 done"\n' % (JOB_FD, READY, JOB_FD))
+    assert (output, error) == (
+        'refused write\nrefused read\njob1 done\n', '')
+    assert proc.run_job('print "job2"') == ('job2\n', '')
+    proc.kill()
+    proc.wait()
+
+def test_bootstrap_token_not_visible():
+    # the token of the job is in no frame of the bootstrap, and running
+    # the job loop again from a job does not end the job either
+    proc = PooledSandboxedProc(fake_pypy, [])
+    proc.warmup()
+    proc.run_job('print "job1"')
+    output, error = proc.run_job(
+        'import os, sys\n'
+        'frame = sys._getframe()\n'
+        'forged = 0\n'
+        'while frame is not None:\n'
+        '    for value in frame.f_locals.values() + frame.f_globals.values():\n'
+        '        if isinstance(value, str):\n'
+        '            try:\n'
+        '                os.write(%d, %r + value)\n'
+        '            except OSError:\n'
+        '                pass\n'
+        '            else:\n'
+        '                forged += 1\n'
+        '    frame = frame.f_back\n'
+        'from __pypy__ import sandbox_serve_jobs\n'
+        'try:\n'
+        '    sandbox_serve_jobs(%d, %r, lambda source: None)\n'
+        'except OSError:\n'
+        '    print "refused"\n'
+        'print forged\n' % (JOB_FD, READY, JOB_FD, READY))
+    assert (output, error) == ('refused\n0\n', '')
+    assert proc.run_job('print "job3"') == ('job3\n', '')
+    proc.kill()
+    proc.wait()
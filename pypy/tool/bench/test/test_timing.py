@@ -0,0 +1,13 @@
+from pypy.tool.bench import timing
+
+
+def test_best_time(monkeypatch):
+    clock = [0.0]
+    durations = [3.0, 1.0, 2.0]
+    def fake_time():
+        return clock[0]
+    def func():
+        clock[0] += durations.pop(0)
+    monkeypatch.setattr(timing.time, 'time', fake_time)
+    assert timing.best_time(func, 3) == 1.0
+    assert durations == []
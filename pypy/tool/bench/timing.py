@@ -0,0 +1,21 @@
+""" Timing helper for the benchmark scripts in pypy/module/*/bench.  They
+are run directly, so they first put the root of the checkout on sys.path:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(
+        __file__)), os.pardir, os.pardir, os.pardir, os.pardir))
+"""
+
+import time
+
+
+def best_time(func, repeat):
+    """Call func() 'repeat' times and return the time taken by the fastest
+    call, in seconds."""
+    best = None
+    for i in range(repeat):
+        t0 = time.time()
+        func()
+        t = time.time() - t0
+        if best is None or t < best:
+            best = t
+    return best
@@ -1,4 +1,4 @@
-import re, sys
+import re, sys, os
 
 from rpython.jit.metainterp.resoperation import opname
 from rpython.jit.tool.oparser import OpParser
@@ -444,3 +444,201 @@ def parse_log_counts(input, loops):
         if line:
             num, count = line.split(':', 2)
             mapping[num].count = int(count)
+
+# ____________________________________________________________
+# Streaming mode: the functions above load the whole log in memory, which
+# is not possible for logs of several GBs.  The following ones read it
+# section by section, and build an index of the offsets of the loops and
+# the bridges, so that they can be parsed one at a time.
+
+color = "(?:\x1b.*?m)?"
+r_section_start = re.compile(color + r"\[([0-9a-fA-F]+)\] \{([\w-]+)" +
+                             color + "$")
+r_section_stop = re.compile(color + r"\[([0-9a-fA-F]+)\] ([\w-]+)\}" +
+                            color + "$")
+
+def open_log(logname):
+    """ Open a PYPYLOG file, which may be compressed with bzip2. """
+    f = open(logname, 'rb')
+    if f.read(2) == 'BZ':
+        f.close()
+        import bz2
+        f = bz2.BZ2File(logname, 'r')
+    else:
+        f.seek(0)
+    return f
+
+def iter_log_sections(f, catprefix=''):
+    """ Yield (category, offset, length, text) for each section of the
+    file 'f' whose category starts with 'catprefix'.  'offset' and
+    'length' give the position of the content of the section in the file,
+    without the start and stop lines.  Nested sections are not part of the
+    text.  Only one section is kept in memory at a time.
+    """
+    offset = 0
+    category = None
+    depth = 0
+    for line in f:
+        linestart = offset
+        offset += len(line)
+        if category is None:
+            match = r_section_start.match(line.rstrip())
+            if match and match.group(2).startswith(catprefix):
+                category = match.group(2)
+                start = offset
+                stop = offset
+                lines = []
+            continue
+        stripped = line.rstrip()
+        if r_section_start.match(stripped):
+            depth += 1
+        elif r_section_stop.match(stripped):
+            if depth == 0:
+                yield category, start, stop - start, '\n'.join(lines)
+                category = None
+            else:
+                depth -= 1
+        elif depth == 0:
+            lines.append(stripped)
+            stop = offset
+    if category is not None:
+        # the log is truncated
+        yield category, start, stop - start, '\n'.join(lines)
+
+def trace_name(comment):
+    """ The name of a trace, as in split_trace() and in the
+    jit-backend-counts section: 'entry N' or 'bridge N'. """
+    m = re.search('bridge out of Guard (\w+)', comment)
+    if m:
+        return 'bridge ' + m.group(1)
+    m = re.search('Loop (\d+)', comment)
+    if m:
+        return 'entry ' + m.group(1)
+    return None
+
+def parse_trace(text, ParserCls=SimpleParser):
+    parser = ParserCls(text, None, {}, 'lltype', None, nonstrict=True)
+    return parser.parse()
+
+def iter_loops(logname, ParserCls=SimpleParser):
+    """ Like the loops returned by import_log(), but as a generator that
+    parses them while the log is read.  The assembler is not available.
+    """
+    f = open_log(logname)
+    try:
+        for _, _, _, text in iter_log_sections(f, 'jit-log-opt'):
+            for part in split_trace(parse_trace(text, ParserCls)):
+                yield part
+    finally:
+        f.close()
+
+
+class LogIndex(object):
+    """ The offsets of the loops and bridges of a log, by trace_name().
+    The index is stored next to the log, in a file with the extension
+    '.index', and it is rebuilt when the log changes.
+    """
+    VERSION = 1
+
+    def __init__(self, logname, entries, stamp):
+        self.logname = logname
+        self.stamp = stamp          # the size and mtime of the log
+        self.entries = entries      # [(name, offset, length)]
+        self.offsets = {}
+        for name, offset, length in entries:
+            self.offsets[name] = (offset, length)
+
+    @staticmethod
+    def _stamp(logname):
+        st = os.stat(logname)
+        return '%d %d' % (st.st_size, int(st.st_mtime))
+
+    @classmethod
+    def build(cls, logname):
+        stamp = cls._stamp(logname)
+        entries = []
+        f = open_log(logname)
+        try:
+            for _, offset, length, text in iter_log_sections(f,
+                                                             'jit-log-opt'):
+                name = None
+                for line in text.splitlines():
+                    if line.startswith('#'):
+                        name = trace_name(line)
+                        break
+                if name is None:
+                    name = 'trace at %d' % (offset,)
+                entries.append((name, offset, length))
+        finally:
+            f.close()
+        return cls(logname, entries, stamp)
+
+    @classmethod
+    def load(cls, logname, indexname=None):
+        """ Return the index of 'logname', reading it from 'indexname'
+        if it is up to date, or building and writing it otherwise. """
+        if indexname is None:
+            indexname = logname + '.index'
+        stamp = cls._stamp(logname)
+        try:
+            f = open(indexname, 'r')
+        except IOError:
+            pass
+        else:
+            try:
+                header = f.readline().rstrip('\n')
+                if header == 'jitlogparser-index %d %s' % (cls.VERSION,
+                                                           stamp):
+                    entries = []
+                    for line in f:
+                        name, offset, length = line.rstrip('\n').split('\t')
+                        entries.append((name, int(offset), int(length)))
+                    return cls(logname, entries, stamp)
+            finally:
+                f.close()
+        index = cls.build(logname)
+        try:
+            index.save(indexname)
+        except (IOError, OSError):
+            pass     # read-only directory: keep the index in memory only
+        return index
+
+    def save(self, indexname):
+        f = open(indexname, 'w')
+        try:
+            f.write('jitlogparser-index %d %s\n' % (self.VERSION, self.stamp))
+            for entry in self.entries:
+                f.write('%s\t%d\t%d\n' % entry)
+        finally:
+            f.close()
+
+    def names(self):
+        return [name for name, _, _ in self.entries]
+
+    def get_text(self, name):
+        offset, length = self.offsets[name]
+        f = open_log(self.logname)
+        try:
+            f.seek(offset)
+            data = f.read(length)
+        finally:
+            f.close()
+        # like in iter_log_sections(), nested sections are not included
+        lines = []
+        depth = 0
+        for line in data.splitlines():
+            line = line.rstrip()
+            if r_section_start.match(line):
+                depth += 1
+            elif r_section_stop.match(line):
+                depth -= 1
+            elif depth == 0:
+                lines.append(line)
+        return '\n'.join(lines)
+
+    def get_trace(self, name, ParserCls=SimpleParser):
+        """ Parse the loop or bridge 'name' only. """
+        return parse_trace(self.get_text(name), ParserCls)
+
+    def get_loops(self, name, ParserCls=SimpleParser):
+        return split_trace(self.get_trace(name, ParserCls))
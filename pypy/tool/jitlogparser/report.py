@@ -0,0 +1,363 @@
+#! /usr/bin/env python
+"""
+Produces a report of the loops compiled by the JIT, ranked by how much they
+are worth optimizing, from a logfile generated with the PYPYLOG env variable.
+
+Run your program like this::
+
+    $ PYPYLOG=jit-log-opt,jit-backend:logfile pypy your-program.py
+
+and then::
+
+    $ python report.py logfile
+
+For every loop, the report gives:
+
+    runs      how many times the loop was entered or iterated, as given
+              by the jit-backend-counts section at the end of the log
+    fail%     how many times its guards failed into a bridge, relative
+              to the runs
+    bridges   the number of bridges attached to the loop, including the
+              bridges out of its bridges
+    size      the number of bytes of machine code of the loop and of all
+              its bridges
+    ops       the number of operations of the loop and of all its bridges
+
+followed by the source lines that produced most of its operations.  The
+lines are the first lines of the code objects, unless the source files can
+be found, in which case they are the lines of the bytecodes.
+
+The log is read line by line and only a summary of each trace is kept, so
+this works on logs that are too large to be loaded with import_log().
+"""
+
+import re, sys
+import optparse
+
+from pypy.tool.jitlogparser.parser import (parse_code_data, open_log,
+                                           r_section_start, r_section_stop)
+from pypy.tool.jitlogparser.storage import LoopStorage
+
+r_loop_comment = re.compile(r"# Loop (\d+)")
+r_bridge_comment = re.compile(r"# bridge out of Guard (\w+)")
+r_offset = re.compile(r"\+\d+: ")
+r_guard = re.compile(r"guard_\w+\(.*descr=<Guard(\w+)>")
+r_label = re.compile(r"label\(.*descr=(.+)\)$")
+r_merge_point = re.compile(r"debug_merge_point\(.*?'(.*)'\)$")
+r_loop_addr = re.compile(r"Loop (\d+) .*has address (\w+) to (\w+) "
+                         r"\(bootstrap (\w+)\)")
+r_bridge_addr = re.compile(r"Bridge out of guard (\w+) has address "
+                           r"(\w+) to (\w+)")
+
+SORT_KEYS = ['runs', 'failures', 'bridges', 'size']
+
+
+class TraceSummary(object):
+    """ What is kept of a loop or a bridge: its operations are counted and
+    attributed to their source code, but not stored.
+    """
+    def __init__(self, name, kind):
+        self.name = name          # 'entry N' or 'bridge N'
+        self.kind = kind          # 'loop', 'entry bridge' or 'bridge'
+        self.guard = None         # for bridges, the guard it comes out of
+        self.parent = None
+        self.bridges = []
+        self.labels = []
+        self.num_ops = 0
+        self.size = 0
+        self.count = 0
+        self.locations = {}       # {(filename, lineno, name): num_ops}
+
+    def all_bridges(self):
+        result = []
+        todo = self.bridges[:]
+        while todo:
+            bridge = todo.pop()
+            result.append(bridge)
+            todo.extend(bridge.bridges)
+        return result
+
+    def runs(self, counts):
+        """ The number of times the loop was entered, plus the number of
+        iterations of each of its labels. """
+        total = self.count
+        for label in self.labels:
+            total += counts.get(label, 0)
+        return total
+
+    def guard_failures(self):
+        total = 0
+        for bridge in self.bridges:
+            total += bridge.count
+        return total
+
+
+class LogReport(object):
+    """ Reads a PYPYLOG file incrementally and collects a TraceSummary for
+    each loop and bridge.
+    """
+    def __init__(self, storage=None):
+        if storage is None:
+            storage = LoopStorage()
+        self.storage = storage
+        self.traces = []
+        self.sizes = {}
+        self.counts = {}
+        self._linenos = {}
+        self._guard_owners = {}
+        self._trace = None
+        self._location = None
+        self._new_counts = None
+        self._stack = []          # the categories of the open sections
+
+    def feed(self, lines):
+        stack = self._stack
+        for line in lines:
+            line = line.rstrip()
+            match = r_section_start.match(line)
+            if match:
+                category = match.group(2)
+                stack.append(category)
+                if category == 'jit-backend-counts':
+                    self._new_counts = {}
+                continue
+            match = r_section_stop.match(line)
+            if match:
+                if stack:
+                    category = stack.pop()
+                    if category.startswith('jit-log-opt'):
+                        self._trace = None
+                    elif category == 'jit-backend-counts':
+                        # only the last section has the final counts
+                        self.counts = self._new_counts
+                continue
+            if not stack:
+                continue
+            category = stack[-1]
+            if category.startswith('jit-log-opt'):
+                self._parse_trace_line(line)
+            elif category == 'jit-backend-addr':
+                self._parse_addr_line(line)
+            elif category == 'jit-backend-counts':
+                self._parse_count_line(line)
+
+    def _parse_trace_line(self, line):
+        if line.startswith('#'):
+            if self._trace is None:
+                self._start_trace(line)
+            return
+        trace = self._trace
+        if trace is None or line.startswith('['):
+            return
+        match = r_offset.match(line)
+        if match:
+            line = line[match.end():]
+        if line.startswith('--end'):
+            return
+        if line.startswith('debug_merge_point'):
+            match = r_merge_point.match(line)
+            if match:
+                self._location = self._get_location(match.group(1))
+            return
+        trace.num_ops += 1
+        if self._location is not None:
+            locations = trace.locations
+            locations[self._location] = locations.get(self._location, 0) + 1
+        match = r_guard.match(line)
+        if match:
+            self._guard_owners[match.group(1)] = trace
+            return
+        match = r_label.match(line)
+        if match:
+            trace.labels.append(match.group(1))
+
+    def _start_trace(self, comment):
+        match = r_bridge_comment.match(comment)
+        if match:
+            trace = TraceSummary('bridge ' + match.group(1), 'bridge')
+            trace.guard = match.group(1)
+        else:
+            match = r_loop_comment.match(comment)
+            if match is None:
+                return
+            if 'entry bridge' in comment:
+                kind = 'entry bridge'
+            else:
+                kind = 'loop'
+            trace = TraceSummary('entry ' + match.group(1), kind)
+        self.traces.append(trace)
+        self._trace = trace
+        self._location = None
+
+    def _get_location(self, arg):
+        name, bytecode_name, filename, startlineno, bytecode_no = \
+              parse_code_data(arg)
+        if filename is None:
+            return None
+        key = (filename, startlineno, name, bytecode_no)
+        try:
+            lineno = self._linenos[key]
+        except KeyError:
+            lineno = self._find_lineno(filename, startlineno, name,
+                                       bytecode_no)
+            self._linenos[key] = lineno
+        return (filename, lineno, name)
+
+    def _find_lineno(self, filename, startlineno, name, bytecode_no):
+        try:
+            code = self.storage.disassemble_code(filename, startlineno, name)
+        except (IOError, SyntaxError):
+            code = None
+        if code is not None:
+            try:
+                return code.map[bytecode_no].lineno
+            except KeyError:
+                pass
+        return startlineno
+
+    def _parse_addr_line(self, line):
+        match = r_loop_addr.search(line)
+        if match:
+            start = min(int(match.group(2), 16), int(match.group(4), 16))
+            self.sizes['entry ' + match.group(1)] = (
+                int(match.group(3), 16) - start)
+            return
+        match = r_bridge_addr.search(line)
+        if match:
+            self.sizes['bridge ' + match.group(1)] = (
+                int(match.group(3), 16) - int(match.group(2), 16))
+
+    def _parse_count_line(self, line):
+        if ':' not in line:
+            return
+        name, count = line.rsplit(':', 1)
+        try:
+            self._new_counts[name] = int(count)
+        except ValueError:
+            pass
+
+    def finish(self):
+        """ Connect the bridges to their loops and give them their sizes
+        and counts.  Returns the list of the loops. """
+        counts = self.counts
+        guard_owners = self._guard_owners
+        loops = []
+        for i, trace in enumerate(self.traces):
+            trace.size = self.sizes.get(trace.name, 0)
+            if trace.name in counts:
+                trace.count = counts[trace.name]
+            else:
+                # older logs number the loops and the bridges together,
+                # in the order in which they are compiled
+                trace.count = counts.get(str(i), 0)
+            if trace.guard is not None:
+                parent = guard_owners.get(trace.guard)
+                if parent is not None and parent is not trace:
+                    trace.parent = parent
+                    parent.bridges.append(trace)
+                    continue
+            loops.append(trace)
+        return loops
+
+
+def read_log(filename, storage=None):
+    """ Read the PYPYLOG file 'filename' and return the list of the
+    TraceSummary of its loops, and the counts of its labels. """
+    f = open_log(filename)
+    report = LogReport(storage)
+    try:
+        report.feed(f)
+    finally:
+        f.close()
+    return report.finish(), report.counts
+
+
+class LoopInfo(object):
+    """ The numbers reported for a loop, including all its bridges. """
+    def __init__(self, loop, counts):
+        self.loop = loop
+        bridges = loop.all_bridges()
+        self.runs = loop.runs(counts)
+        self.failures = loop.guard_failures()
+        if self.runs:
+            self.failure_rate = float(self.failures) / self.runs
+        else:
+            self.failure_rate = 0.0
+        self.num_bridges = len(bridges)
+        self.size = loop.size
+        self.num_ops = loop.num_ops
+        locations = loop.locations.copy()
+        for bridge in bridges:
+            self.size += bridge.size
+            self.num_ops += bridge.num_ops
+            for key, num in bridge.locations.iteritems():
+                locations[key] = locations.get(key, 0) + num
+        self.locations = sorted(locations.items(),
+                                key=lambda (key, num): (-num, key))
+
+    def sort_key(self, sort):
+        if sort == 'runs':
+            value = self.runs
+        elif sort == 'failures':
+            value = self.failure_rate
+        elif sort == 'bridges':
+            value = self.num_bridges
+        elif sort == 'size':
+            value = self.size
+        else:
+            raise ValueError("unknown sort key: %r" % (sort,))
+        return (-value, -self.runs, self.loop.name)
+
+
+def rank_loops(loops, counts, sort='runs'):
+    infos = [LoopInfo(loop, counts) for loop in loops]
+    infos.sort(key=lambda info: info.sort_key(sort))
+    return infos
+
+
+def print_report(infos, out=sys.stdout, limit=None, num_lines=3):
+    if limit is not None:
+        infos = infos[:limit]
+    out.write('%4s  %-16s %12s %7s %7s %8s %6s\n' % (
+        'rank', 'loop', 'runs', 'fail%', 'bridges', 'size', 'ops'))
+    for i, info in enumerate(infos):
+        loop = info.loop
+        name = loop.name
+        if loop.kind == 'entry bridge':
+            name += '*'
+        out.write('%4d  %-16s %12d %6.1f%% %7d %8d %6d\n' % (
+            i + 1, name, info.runs, info.failure_rate * 100.0,
+            info.num_bridges, info.size, info.num_ops))
+        for (filename, lineno, codename), num in info.locations[:num_lines]:
+            out.write('%6s%s:%d (%s): %d ops\n' % ('', filename, lineno,
+                                                   codename, num))
+    if [info for info in infos if info.loop.kind == 'entry bridge']:
+        out.write('\n* entry bridge\n')
+
+
+def main(argv):
+    parser = optparse.OptionParser(usage="%prog [options] logfile")
+    parser.format_description = lambda fmt: __doc__
+    parser.description = __doc__
+    parser.add_option('-s', '--sort', dest='sort', default='runs',
+                      type='choice', choices=SORT_KEYS,
+                      help='rank the loops by %s (default: runs)' %
+                           ', '.join(SORT_KEYS))
+    parser.add_option('-n', '--limit', dest='limit', default=None,
+                      type=int, help='report only the first LIMIT loops')
+    parser.add_option('-l', '--lines', dest='lines', default=3, type=int,
+                      help='the number of source lines reported per loop')
+    parser.add_option('-p', '--source-path', dest='source_path',
+                      default=None, metavar='DIR',
+                      help='where to look for the relative source files')
+    options, args = parser.parse_args(argv)
+    if len(args) != 1:
+        parser.print_help()
+        return 2
+    loops, counts = read_log(args[0], LoopStorage(options.source_path))
+    print_report(rank_loops(loops, counts, options.sort), sys.stdout,
+                 options.limit, options.lines)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,7 +1,9 @@
 from pypy.tool.jitlogparser.parser import (SimpleParser, TraceForOpcode,
                                            Function, adjust_bridges,
                                            import_log, split_trace, Op,
-                                           parse_log_counts)
+                                           parse_log_counts, iter_loops,
+                                           iter_log_sections, trace_name,
+                                           LogIndex)
 from pypy.tool.jitlogparser.storage import LoopStorage
 import py, sys
 from rpython.jit.backend.detect_cpu import autodetect_main_model
@@ -376,3 +378,95 @@ def test_parse_from_inside():
     f = Function.from_operations(loop.operations, LoopStorage())
     assert len(f.chunks) == 2
     
+
+def test_iter_log_sections():
+    from cStringIO import StringIO
+    log = StringIO("""\
+[1] {jit-log-opt-loop
+# Loop 0 : loop with 1 ops
+[i0]
+[2] {jit-other
+hidden
+[3] jit-other}
+jump(i0)
+[4] jit-log-opt-loop}
+[5] {jit-backend-counts
+entry 0:5
+[6] jit-backend-counts}
+[7] {jit-log-opt-bridge
+# bridge out of Guard 3 with 0 ops
+""")
+    data = log.getvalue()
+    sections = list(iter_log_sections(log, 'jit-log-opt'))
+    assert [s[0] for s in sections] == ['jit-log-opt-loop',
+                                        'jit-log-opt-bridge']
+    _, offset, length, text = sections[0]
+    assert text == '# Loop 0 : loop with 1 ops\n[i0]\njump(i0)'
+    assert data[offset:offset + length].startswith('# Loop 0')
+    assert data[offset:offset + length].endswith('jump(i0)\n')
+    # the log is truncated in the middle of the last section
+    assert sections[1][3] == '# bridge out of Guard 3 with 0 ops'
+
+def test_log_index_nested_section(tmpdir):
+    logname = tmpdir.join('log')
+    logname.write("""\
+[1] {jit-log-opt-loop
+# Loop 0 : loop with 2 ops
+[i0]
+[2] {jit-log-compiling
+compiling something
+[3] jit-log-compiling}
+i1 = int_add(i0, 1)
+jump(i1)
+[4] jit-log-opt-loop}
+""")
+    index = LogIndex.load(str(logname))
+    [(_, _, _, text)] = list(iter_log_sections(open(str(logname)),
+                                               'jit-log-opt'))
+    assert index.get_text('entry 0') == text
+    assert 'compiling something' not in text
+
+def test_trace_name():
+    assert trace_name('# Loop 3 : loop with 26 ops') == 'entry 3'
+    assert trace_name('# Loop 1 (<code object f>) : entry bridge') == 'entry 1'
+    assert trace_name('# bridge out of Guard 4 with 16 ops') == 'bridge 4'
+    assert trace_name('# bridge out of Guard 0x7f12 with 1 ops') == (
+        'bridge 0x7f12')
+    assert trace_name('# something else') is None
+
+def test_iter_loops():
+    logname = str(py.path.local(__file__).join('..', 'logtest2.log'))
+    _, loops = import_log(logname)
+    streamed = iter_loops(logname)
+    assert not isinstance(streamed, list)
+    streamed = list(streamed)
+    assert [l.descr for l in streamed] == [l.descr for l in loops]
+    for loop1, loop2 in zip(streamed, loops):
+        assert ([op.repr() for op in loop1.operations] ==
+                [op.repr() for op in loop2.operations])
+
+def test_log_index(tmpdir, monkeypatch):
+    logname = tmpdir.join('log')
+    py.path.local(__file__).join('..', 'logtest2.log').copy(logname)
+    logname = str(logname)
+    index = LogIndex.load(logname)
+    assert index.names() == ['entry 0', 'entry 1', 'entry 2', 'bridge 4']
+    assert tmpdir.join('log.index').check()
+    bridge = index.get_trace('bridge 4')
+    assert bridge.comment.startswith('# bridge out of Guard 4')
+    assert len(bridge.operations) == 16
+    [part] = index.get_loops('entry 2')
+    assert part.descr == 'entry 2'
+    assert part.operations[-1].name == 'jump'
+    # reading it back does not parse the log again
+    monkeypatch.setattr(LogIndex, 'build', None)
+    index2 = LogIndex.load(logname)
+    monkeypatch.undo()
+    assert index2.entries == index.entries
+    # the index is rebuilt when the log changes
+    f = open(logname, 'a')
+    f.write('[1f600916545] {jit-log-opt-loop\n# Loop 3 : loop with 0 ops\n'
+            '[1f600916546] jit-log-opt-loop}\n')
+    f.close()
+    index3 = LogIndex.load(logname)
+    assert index3.names()[-1] == 'entry 3'
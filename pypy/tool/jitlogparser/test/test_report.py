@@ -0,0 +1,141 @@
+import py
+from cStringIO import StringIO
+from pypy.tool.jitlogparser.report import (LogReport, read_log, rank_loops,
+                                           print_report, main)
+
+def logfile(name):
+    return str(py.path.local(__file__).join('..', name))
+
+LOG = '''\
+[1a] {jit-log-opt-loop
+# Loop 0 : loop with 4 ops
+[i0]
+debug_merge_point(0, 0, '<code object f. file 'x.py'. line 2> #9 LOAD_FAST')
++10: i1 = int_lt(i0, 10)
++14: guard_true(i1, descr=<Guard7>) [i0]
++20: label(i0, descr=TargetToken(1234))
+debug_merge_point(0, 0, '<code object g. file 'y.py'. line 12> #3 LOAD_FAST')
++24: i2 = int_add(i0, 1)
++30: jump(i2, descr=TargetToken(1234))
++40: --end of the loop--
+[1b] jit-log-opt-loop}
+[1c] {jit-backend
+[1d] {jit-backend-addr
+Bridge out of guard 7 has address 0x100 to 0x140
+[1e] jit-backend-addr}
+[1f] jit-backend}
+[20] {jit-log-opt-bridge
+# bridge out of Guard 7 with 2 ops
+[i0]
+debug_merge_point(0, 0, '<code object g. file 'y.py'. line 12> #6 LOAD_CONST')
++10: guard_false(i0, descr=<Guard8>) [i0]
++20: finish(i0)
+[21] jit-log-opt-bridge}
+[22] {jit-log-opt-bridge
+# bridge out of Guard 8 with 1 ops
+[i0]
++10: finish(i0)
+[23] jit-log-opt-bridge}
+[24] {jit-log-opt-loop
+# Loop 1 : entry bridge with 1 ops
+[i0]
++10: jump(i0, descr=TargetToken(1234))
+[25] jit-log-opt-loop}
+[26] {jit-backend-counts
+entry 0:1
+[27] jit-backend-counts}
+[28] {jit-backend-counts
+entry 0:5
+TargetToken(1234):95
+bridge 7:20
+bridge 8:3
+entry 1:2
+[29] jit-backend-counts}
+'''
+
+def read(log=LOG):
+    report = LogReport()
+    report.feed(StringIO(log))
+    return report.finish(), report.counts
+
+def test_summaries():
+    loops, counts = read()
+    assert [loop.name for loop in loops] == ['entry 0', 'entry 1']
+    loop, entry_bridge = loops
+    assert loop.kind == 'loop'
+    assert entry_bridge.kind == 'entry bridge'
+    assert loop.num_ops == 5
+    assert loop.labels == ['TargetToken(1234)']
+    assert loop.locations == {('x.py', 2, 'f'): 3, ('y.py', 12, 'g'): 2}
+    assert loop.runs(counts) == 100
+    [bridge] = loop.bridges
+    assert bridge.name == 'bridge 7'
+    assert bridge.size == 0x40
+    assert bridge.count == 20
+    assert [b.name for b in bridge.bridges] == ['bridge 8']
+    assert loop.guard_failures() == 20
+
+def test_feed_in_pieces():
+    # a section can span several feed() calls
+    report = LogReport()
+    lines = LOG.splitlines(True)
+    for i in range(0, len(lines), 3):
+        report.feed(lines[i:i + 3])
+    loops = report.finish()
+    expected, expected_counts = read()
+    assert [loop.name for loop in loops] == ['entry 0', 'entry 1']
+    assert loops[0].num_ops == expected[0].num_ops
+    assert loops[0].bridges[0].size == 0x40
+    assert report.counts == expected_counts
+
+def test_rank():
+    loops, counts = read()
+    infos = rank_loops(loops, counts)
+    assert [info.loop.name for info in infos] == ['entry 0', 'entry 1']
+    info = infos[0]
+    assert info.num_bridges == 2
+    assert info.size == 0x40
+    assert info.num_ops == 8
+    assert info.failure_rate == 0.2
+    assert info.locations == [(('y.py', 12, 'g'), 4), (('x.py', 2, 'f'), 3)]
+    infos = rank_loops(loops, counts, 'bridges')
+    assert infos[0].loop.name == 'entry 0'
+    py.test.raises(ValueError, rank_loops, loops, counts, 'foo')
+
+def test_source_lines(tmpdir):
+    source = tmpdir.join('z.py')
+    source.write('def f(a):\n    a += 1\n    return a\n')
+    code = ("<code object f. file '%s'. line 1> #%d LOAD_FAST" %
+            (source, 10))
+    log = LOG.replace("<code object f. file 'x.py'. line 2> #9 LOAD_FAST",
+                      code)
+    loops, counts = read(log)
+    infos = rank_loops(loops, counts)
+    assert dict(infos[0].locations)[str(source), 3, 'f'] == 3
+
+def test_print_report():
+    loops, counts = read()
+    out = StringIO()
+    print_report(rank_loops(loops, counts), out, limit=1, num_lines=1)
+    lines = out.getvalue().splitlines()
+    assert lines[0].split() == ['rank', 'loop', 'runs', 'fail%', 'bridges',
+                                'size', 'ops']
+    assert lines[1].split() == ['1', 'entry', '0', '100', '20.0%', '2', '64',
+                                '8']
+    assert lines[2].strip() == 'y.py:12 (g): 4 ops'
+    assert len(lines) == 3
+
+def test_read_log():
+    loops, counts = read_log(logfile('logtest2.log'))
+    assert [loop.name for loop in loops] == ['entry 0', 'entry 1', 'entry 2']
+    assert [loop.count for loop in loops] == [1982, 1985, 0]
+    [bridge] = loops[0].bridges
+    assert bridge.count == 1782
+    assert loops[0].size == 0x7f8907a0b4c3 - 0x7f8907a0b3d5
+    assert bridge.size == 0x7f8907a0bab1 - 0x7f8907a0b9b7
+
+def test_main(capsys):
+    assert main(['-s', 'failures', logfile('logtest2.log')]) == 0
+    out, err = capsys.readouterr()
+    assert out.splitlines()[1].split()[:3] == ['1', 'entry', '0']
+    assert main([]) == 2
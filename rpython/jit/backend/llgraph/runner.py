@@ -106,6 +106,9 @@ class FieldDescr(AbstractDescr):
     def is_pointer_field(self):
         return getkind(self.FIELD) == 'ref'
 
+    def is_taint_field(self):
+        return self.fieldname in self.S._hints.get('taint_fields', ())
+
     def is_float_field(self):
         return getkind(self.FIELD) == 'float'
 
@@ -81,6 +81,7 @@ class FieldDescr(AbstractDescr):
     offset = 0      # help translation
     field_size = 0
     flag = '\x00'
+    taint = False
 
     def __init__(self, name, offset, field_size, flag):
         self.name = name
@@ -97,6 +98,9 @@ class FieldDescr(AbstractDescr):
     def is_field_signed(self):
         return self.flag == FLAG_SIGNED
 
+    def is_taint_field(self):
+        return self.taint
+
     def sort_key(self):
         return self.offset
 
@@ -115,6 +119,8 @@ def get_field_descr(gccache, STRUCT, fieldname):
         flag = get_type_flag(FIELDTYPE)
         name = '%s.%s' % (STRUCT._name, fieldname)
         fielddescr = FieldDescr(name, offset, size, flag)
+        if fieldname in STRUCT._hints.get('taint_fields', ()):
+            fielddescr.taint = True
         cachedict = cache.setdefault(STRUCT, {})
         cachedict[fieldname] = fielddescr
         return fielddescr
@@ -364,7 +364,10 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type):
                                       name=loopname)
     #
     if metainterp_sd.warmrunnerdesc is not None:    # for tests
-        metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(original_jitcell_token)
+        memmgr = metainterp_sd.warmrunnerdesc.memory_manager
+        if asminfo is not None:
+            memmgr.record_code_size(original_jitcell_token, asminfo.asmlen)
+        memmgr.keep_loop_alive(original_jitcell_token)
 
 def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
                            operations, original_loop_token):
@@ -405,6 +408,14 @@ def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
         ops_offset = None
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, n, ops_offset)
     #
+    if metainterp_sd.warmrunnerdesc is not None:    # for tests
+        if asminfo is not None:
+            asmlen = asminfo.asmlen
+        else:
+            asmlen = 0
+        metainterp_sd.warmrunnerdesc.memory_manager.record_code_size(
+            original_loop_token, asmlen, is_bridge=True)
+    #
     #if metainterp_sd.warmrunnerdesc is not None:    # for tests
     #    metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(
     #        original_loop_token)
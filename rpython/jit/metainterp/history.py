@@ -145,6 +145,10 @@ class AbstractDescr(AbstractValue):
     def repr_of_descr(self):
         return '%r' % (self,)
 
+    def is_taint_field(self):
+        """For field descrs: is it a field listed in _jit_taint_fields_?"""
+        return False
+
     def _clone_if_mutable(self):
         return self
     def clone_if_mutable(self):
@@ -673,6 +677,10 @@ class JitCellToken(AbstractDescr):
     # and more data specified by the backend when the loop is compiled
     number = -1
     generation = r_int64(0)
+    # for the memory manager: the size of the machine code of the loop and
+    # its bridges, and how much it was used
+    code_size = 0
+    use_count = 0
     # one purpose of LoopToken is to keep alive the CompiledLoopToken
     # returned by the backend.  When the LoopToken goes away, the
     # CompiledLoopToken has its __del__ called, which frees the assembler
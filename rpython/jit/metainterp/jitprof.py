@@ -11,7 +11,8 @@ from rpython.rlib.jit import Counters
 
 JITPROF_LINES = Counters.ncounters + 1 + 1
 # one for TOTAL, 1 for calls, update if needed
-_CPU_LINES = 4       # the last 4 lines are stored on the cpu
+_CPU_LINES = 4       # these 4 lines are stored on the cpu
+_MEMMGR_LINES = 4    # the last 4 lines are stored on the memory manager
 
 class BaseProfiler(object):
     pass
@@ -56,12 +57,14 @@ class Profiler(BaseProfiler):
     calls = 0
     current = None
     cpu = None
+    memmgr = None
 
     def start(self):
         self.starttime = self.timer()
         self.t1 = self.starttime
         self.times = [0, 0]
-        self.counters = [0] * (Counters.ncounters - _CPU_LINES)
+        self.counters = [0] * (Counters.ncounters - _CPU_LINES -
+                               _MEMMGR_LINES)
         self.calls = 0
         self.current = []
 
@@ -107,6 +110,14 @@ class Profiler(BaseProfiler):
             return self.cpu.total_freed_loops
         elif num == Counters.TOTAL_FREED_BRIDGES:
             return self.cpu.total_freed_bridges
+        elif num == Counters.LOOPS_FREED_BY_AGE:
+            return self.memmgr.loops_freed_by_age
+        elif num == Counters.LOOPS_FREED_BY_BUDGET:
+            return self.memmgr.loops_freed_by_budget
+        elif num == Counters.LOOPS_RECOMPILED:
+            return self.memmgr.loops_recompiled
+        elif num == Counters.LOOP_CODE_SIZE:
+            return self.memmgr.alive_code_size
         return self.counters[num]
 
     def count_ops(self, opnum, kind=Counters.OPS):
@@ -158,6 +169,16 @@ class Profiler(BaseProfiler):
                                 cpu.total_freed_loops)
             self._print_intline("Freed # of bridges",
                                 cpu.total_freed_bridges)
+        memmgr = self.memmgr
+        if memmgr is not None:   # for some tests
+            self._print_intline("Freed by age",
+                                memmgr.loops_freed_by_age)
+            self._print_intline("Freed by budget",
+                                memmgr.loops_freed_by_budget)
+            self._print_intline("Recompiled loops",
+                                memmgr.loops_recompiled)
+            self._print_intline("Loop code size",
+                                memmgr.alive_code_size)
 
     def _print_line_time(self, string, i, tim):
         final = "%s:%s\t%d\t%f" % (string, " " * max(0, 13-len(string)), i, tim)
@@ -2,6 +2,7 @@ import math
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.listsort import make_timsort_class
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,6 +20,15 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Independently of the age, a budget can be given for the total size of
+# the machine code of the loops in 'alive_loops'.  When it is exceeded,
+# the loops with the smallest number of uses per byte of machine code are
+# removed from the set, apart from the ones used in the current generation.
+# The uses are the number of times the loop was entered from the
+# interpreter, plus the number of bridges attached to it.  They are halved
+# after each such collection, so that loops that are not used any more
+# can eventually be removed too.
+#
 
 class MemoryManager(object):
 
@@ -38,6 +48,12 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.code_budget = 0           # in bytes; 0 means no budget
+        self.alive_code_size = 0       # of the loops in 'alive_loops'
+        # statistics
+        self.loops_freed_by_age = 0
+        self.loops_freed_by_budget = 0
+        self.loops_recompiled = 0
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,16 +65,45 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_code_budget(self, budget_kb):
+        if budget_kb <= 0:
+            self.code_budget = 0
+        else:
+            self.code_budget = budget_kb * 1024
+
     def next_generation(self):
+        # check the budget before the generation ends, so that the loops
+        # used in it are still recognized as the current ones
+        if self.code_budget > 0 and self.alive_code_size > self.code_budget:
+            self._kill_loops_over_budget_now()
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
 
     def keep_loop_alive(self, looptoken):
+        looptoken.use_count += 1
         if looptoken.generation != self.current_generation:
             looptoken.generation = self.current_generation
-            self.alive_loops[looptoken] = None
+            if looptoken not in self.alive_loops:
+                self.alive_loops[looptoken] = None
+                self.alive_code_size += looptoken.code_size
+
+    def record_code_size(self, looptoken, size, is_bridge=False):
+        """Called when a loop, or a bridge attached to it, is compiled
+        into 'size' bytes of machine code."""
+        looptoken.code_size += size
+        if looptoken in self.alive_loops:
+            self.alive_code_size += size
+        if is_bridge:
+            looptoken.use_count += 1
+
+    def record_recompilation(self):
+        self.loops_recompiled += 1
+
+    def _remove_loop(self, looptoken):
+        del self.alive_loops[looptoken]
+        self.alive_code_size -= looptoken.code_size
 
     def _kill_old_loops_now(self):
         debug_start("jit-mem-collect")
@@ -70,8 +115,9 @@ class MemoryManager(object):
         for looptoken in self.alive_loops.keys():
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
-                del self.alive_loops[looptoken]
+                self._remove_loop(looptoken)
         newtotal = len(self.alive_loops)
+        self.loops_freed_by_age += oldtotal - newtotal
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
         #print self.alive_loops.keys()
@@ -81,3 +127,47 @@ class MemoryManager(object):
             # a single one is not enough for all tests :-(
             rgc.collect(); rgc.collect(); rgc.collect()
         debug_stop("jit-mem-collect")
+
+    def _kill_loops_over_budget_now(self):
+        debug_start("jit-mem-budget")
+        oldtotal = len(self.alive_loops)
+        debug_print("Current generation:", self.current_generation)
+        debug_print("Code size before:  ", self.alive_code_size)
+        # free down to 3/4 of the budget, to avoid doing it again
+        # at the next generation
+        target = self.code_budget - self.code_budget // 4
+        candidates = []
+        for looptoken in self.alive_loops.keys():
+            if looptoken.invalidated:
+                self._remove_loop(looptoken)
+            elif looptoken.generation != self.current_generation:
+                candidates.append(looptoken)
+        LoopUsefulnessSort(candidates).sort()
+        for looptoken in candidates:
+            if self.alive_code_size <= target:
+                break
+            self._remove_loop(looptoken)
+        for looptoken in self.alive_loops:
+            looptoken.use_count >>= 1
+        newtotal = len(self.alive_loops)
+        self.loops_freed_by_budget += oldtotal - newtotal
+        debug_print("Loop tokens freed: ", oldtotal - newtotal)
+        debug_print("Loop tokens left:  ", newtotal)
+        debug_print("Code size after:   ", self.alive_code_size)
+        if not we_are_translated() and oldtotal != newtotal:
+            looptoken = None
+            from rpython.rlib import rgc
+            rgc.collect(); rgc.collect(); rgc.collect()
+        debug_stop("jit-mem-budget")
+
+def _uses_per_kb(looptoken):
+    return looptoken.use_count * 1024 // (looptoken.code_size + 1)
+
+class LoopUsefulnessSort(make_timsort_class()):
+    # the least used loops per byte first, then the oldest ones
+    def lt(self, a, b):
+        ua = _uses_per_kb(a)
+        ub = _uses_per_kb(b)
+        if ua != ub:
+            return ua < ub
+        return a.generation < b.generation
@@ -8,6 +8,7 @@ from rpython.jit.metainterp.optimizeopt.unroll import optimize_unroll
 from rpython.jit.metainterp.optimizeopt.simplify import OptSimplify
 from rpython.jit.metainterp.optimizeopt.pure import OptPure
 from rpython.jit.metainterp.optimizeopt.earlyforce import OptEarlyForce
+from rpython.jit.metainterp.optimizeopt.taint import OptTaint
 from rpython.rlib.jit import PARAMETERS, ENABLE_ALL_OPTS
 from rpython.rlib.unroll import unrolling_iterable
 from rpython.rlib.debug import debug_start, debug_stop, debug_print
@@ -19,6 +20,7 @@ ALL_OPTS = [('intbounds', OptIntBounds),
             ('string', OptString),
             ('earlyforce', OptEarlyForce),
             ('pure', OptPure),
+            ('taint', OptTaint),
             ('heap', OptHeap),
             ('unroll', None)]
 # no direct instantiation of unroll
@@ -0,0 +1,107 @@
+from rpython.jit.metainterp.optimizeopt.optimizer import Optimization
+from rpython.jit.metainterp.optimizeopt.util import make_dispatcher_method
+from rpython.jit.metainterp.resoperation import rop
+
+
+class OptTaint(Optimization):
+    """Keeps track of the objects whose taint fields (the fields listed
+    in _jit_taint_fields_) are known to be NULL, i.e. the objects that
+    are known to be clean.  An object is clean after it is allocated,
+    until a non-NULL value is stored in one of its taint fields, and it
+    is clean after NULL is stored in a taint field.  For clean objects,
+    reading a taint field gives NULL, and storing NULL is removed.
+
+    This is what is left to do for objects that were allocated in the
+    loop but escaped: reads of the taint fields of virtuals are already
+    removed by OptVirtualize, and repeated reads by OptHeap.  Prebuilt
+    constants are never known to be clean, because they can be tainted
+    at any time.
+    """
+
+    def __init__(self):
+        # objects whose taint fields are all NULL
+        self.fresh = {}
+        # {descr: {object: None}}: objects whose taint field 'descr' is
+        # known to be NULL
+        self.clean = {}
+
+    def new(self):
+        return OptTaint()
+
+    def propagate_forward(self, op):
+        dispatch_opt(self, op)
+
+    def is_clean(self, value, descr):
+        if value in self.fresh:
+            return True
+        try:
+            return value in self.clean[descr]
+        except KeyError:
+            return False
+
+    def forget_all(self):
+        self.fresh.clear()
+        self.clean.clear()
+
+    def optimize_NEW(self, op):
+        self.emit_operation(op)
+        self.fresh[self.getvalue(op.result)] = None
+
+    optimize_NEW_WITH_VTABLE = optimize_NEW
+
+    def optimize_GETFIELD_GC(self, op):
+        descr = op.getdescr()
+        if (descr.is_taint_field() and
+                self.is_clean(self.getvalue(op.getarg(0)), descr)):
+            self.make_constant(op.result, self.optimizer.cpu.ts.CONST_NULL)
+            return
+        self.emit_operation(op)
+
+    def optimize_SETFIELD_GC(self, op):
+        descr = op.getdescr()
+        if not descr.is_taint_field():
+            self.emit_operation(op)
+            return
+        value = self.getvalue(op.getarg(0))
+        if self.getvalue(op.getarg(1)).is_null():
+            if self.is_clean(value, descr):
+                return      # redundant
+            self.emit_operation(op)
+            self.clean.setdefault(descr, {})[value] = None
+        else:
+            # the object is tainted; as we don't know which other objects
+            # are the same one, forget everything
+            self.emit_operation(op)
+            self.forget_all()
+
+    def optimize_default(self, op):
+        self.emit_operation(op)
+        if op.has_no_side_effect() or op.is_ovf() or op.is_guard():
+            return
+        opnum = op.getopnum()
+        if (opnum == rop.SETFIELD_RAW or
+            opnum == rop.SETARRAYITEM_GC or
+            opnum == rop.SETARRAYITEM_RAW or
+            opnum == rop.SETINTERIORFIELD_RAW or
+            opnum == rop.RAW_STORE or
+            opnum == rop.STRSETITEM or
+            opnum == rop.UNICODESETITEM or
+            opnum == rop.DEBUG_MERGE_POINT or
+            opnum == rop.COPYSTRCONTENT or
+            opnum == rop.COPYUNICODECONTENT):
+            return     # no effect on the taint fields
+        if (opnum == rop.CALL or
+            opnum == rop.CALL_PURE or
+            opnum == rop.CALL_MAY_FORCE or
+            opnum == rop.CALL_RELEASE_GIL):
+            effectinfo = op.getdescr().get_extra_info()
+            if not effectinfo.has_random_effects():
+                for fielddescr in effectinfo.write_descrs_fields:
+                    if fielddescr.is_taint_field():
+                        break
+                else:
+                    return     # the call does not write any taint field
+        self.forget_all()
+
+dispatch_opt = make_dispatcher_method(OptTaint, 'optimize_',
+        default=OptTaint.optimize_default)
@@ -0,0 +1,98 @@
+from rpython.jit.metainterp.optimizeopt.test.test_util import LLtypeMixin
+from rpython.jit.metainterp.optimizeopt.test.test_optimizebasic import \
+     BaseTestBasic
+
+
+class BaseTestTaint(BaseTestBasic):
+
+    enable_opts = "intbounds:rewrite:virtualize:string:earlyforce:pure:taint:heap"
+
+    def test_fresh_escaped(self):
+        ops = """
+        [i0]
+        p1 = new(descr=taintedsize)
+        setfield_gc(p1, i0, descr=taintedvaluedescr)
+        call(p1, descr=nonwritedescr)
+        p2 = getfield_gc(p1, descr=taintdescr)
+        guard_isnull(p2) []
+        setfield_gc(p1, ConstPtr(nullptr), descr=taintdescr)
+        jump(i0)
+        """
+        expected = """
+        [i0]
+        p1 = new(descr=taintedsize)
+        call(p1, descr=nonwritedescr)
+        setfield_gc(p1, i0, descr=taintedvaluedescr)
+        jump(i0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_call_writing_taints(self):
+        ops = """
+        [i0]
+        p1 = new(descr=taintedsize)
+        call(p1, descr=writetaintdescr)
+        p2 = getfield_gc(p1, descr=taintdescr)
+        guard_isnull(p2) []
+        jump(i0)
+        """
+        self.optimize_loop(ops, ops)
+
+    def test_plain_call(self):
+        ops = """
+        [i0]
+        p1 = new(descr=taintedsize)
+        call(p1, descr=plaincalldescr)
+        p2 = getfield_gc(p1, descr=taintdescr)
+        guard_isnull(p2) []
+        jump(i0)
+        """
+        self.optimize_loop(ops, ops)
+
+    def test_cleared_object(self):
+        ops = """
+        [p0]
+        setfield_gc(p0, ConstPtr(nullptr), descr=taintdescr)
+        call(p0, descr=plaincalldescr)
+        setfield_gc(p0, ConstPtr(nullptr), descr=taintdescr)
+        call(p0, descr=nonwritedescr)
+        setfield_gc(p0, ConstPtr(nullptr), descr=taintdescr)
+        p1 = getfield_gc(p0, descr=taintdescr)
+        guard_isnull(p1) []
+        jump(p0)
+        """
+        expected = """
+        [p0]
+        setfield_gc(p0, ConstPtr(nullptr), descr=taintdescr)
+        call(p0, descr=plaincalldescr)
+        call(p0, descr=nonwritedescr)
+        setfield_gc(p0, ConstPtr(nullptr), descr=taintdescr)
+        jump(p0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_tainting_forgets(self):
+        ops = """
+        [p0, p3]
+        p1 = new(descr=taintedsize)
+        call(p1, descr=nonwritedescr)
+        setfield_gc(p0, p3, descr=taintdescr)
+        p2 = getfield_gc(p1, descr=taintdescr)
+        guard_isnull(p2) []
+        jump(p0, p3)
+        """
+        self.optimize_loop(ops, ops)
+
+    def test_other_fields(self):
+        ops = """
+        [i0]
+        p1 = new(descr=taintedsize)
+        call(p1, descr=nonwritedescr)
+        i1 = getfield_gc(p1, descr=taintedvaluedescr)
+        jump(i1)
+        """
+        self.optimize_loop(ops, ops)
+
+
+class TestLLtype(BaseTestTaint, LLtypeMixin):
+    pass
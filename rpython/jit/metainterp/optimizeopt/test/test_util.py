@@ -176,6 +176,14 @@ class LLtypeMixin(object):
     usize = cpu.sizeof(U)
     onedescr = cpu.fielddescrof(U, 'one')
 
+    # a GcStruct with a taint field, see optimizeopt/taint.py
+    TAINTED = lltype.GcStruct('TAINTED', ('inst_taints', lltype.Ptr(S)),
+                              ('inst_value', lltype.Signed),
+                              hints={'taint_fields': ('inst_taints',)})
+    taintedsize = cpu.sizeof(TAINTED)
+    taintdescr = cpu.fielddescrof(TAINTED, 'inst_taints')
+    taintedvaluedescr = cpu.fielddescrof(TAINTED, 'inst_value')
+
     FUNC = lltype.FuncType([lltype.Signed], lltype.Signed)
     plaincalldescr = cpu.calldescrof(FUNC, FUNC.ARGS, FUNC.RESULT,
                                      EffectInfo.MOST_GENERAL)
@@ -187,6 +195,8 @@ class LLtypeMixin(object):
                                   EffectInfo([], [], [adescr], [arraydescr]))
     readadescr = cpu.calldescrof(FUNC, FUNC.ARGS, FUNC.RESULT,
                                  EffectInfo([adescr], [], [], []))
+    writetaintdescr = cpu.calldescrof(FUNC, FUNC.ARGS, FUNC.RESULT,
+                                      EffectInfo([], [], [taintdescr], []))
     mayforcevirtdescr = cpu.calldescrof(FUNC, FUNC.ARGS, FUNC.RESULT,
                  EffectInfo([nextdescr], [], [], [],
                             EffectInfo.EF_FORCES_VIRTUAL_OR_VIRTUALIZABLE,
@@ -1408,6 +1408,7 @@ class MetaInterpStaticData(object):
         self.warmrunnerdesc = warmrunnerdesc
         if warmrunnerdesc:
             self.config = warmrunnerdesc.translator.config
+            self.profiler.memmgr = warmrunnerdesc.memory_manager
         else:
             from rpython.config.translationoption import get_combined_translation_config
             self.config = get_combined_translation_config(translating=True)
@@ -15,12 +15,15 @@ from rpython.jit.metainterp.memmgr import MemoryManager
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.rlib.jit import JitDriver, dont_look_inside
 from rpython.jit.metainterp.warmspot import get_stats
+from rpython.jit.metainterp import pyjitpl
 from rpython.jit.metainterp.warmstate import JitCell
 from rpython.rlib import rgc
 
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    code_size = 0
+    use_count = 0
 
 
 class _TestMemoryManager:
@@ -78,6 +81,73 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_code_size(self):
+        memmgr = MemoryManager()
+        token = FakeLoopToken()
+        memmgr.record_code_size(token, 1000)
+        memmgr.keep_loop_alive(token)
+        assert memmgr.alive_code_size == 1000
+        memmgr.record_code_size(token, 300, is_bridge=True)
+        assert token.code_size == 1300
+        assert token.use_count == 2
+        assert memmgr.alive_code_size == 1300
+
+    def test_budget(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_code_budget(4)     # 4096 bytes
+        tokens = [FakeLoopToken() for i in range(4)]
+        for token in tokens:
+            memmgr.record_code_size(token, 1000)
+            memmgr.keep_loop_alive(token)
+        # tokens[0] is used much more than the others
+        for i in range(10):
+            memmgr.keep_loop_alive(tokens[0])
+        memmgr.next_generation()
+        assert len(memmgr.alive_loops) == 4      # not over budget yet
+        token = FakeLoopToken()
+        memmgr.record_code_size(token, 1000)
+        memmgr.keep_loop_alive(token)
+        memmgr.next_generation()
+        # freed down to 3072 bytes: the least used loops go first, and
+        # the ones used in the current generation are kept
+        assert memmgr.alive_code_size <= 3072
+        assert tokens[0] in memmgr.alive_loops
+        assert memmgr.loops_freed_by_budget == 2
+        assert memmgr.loops_freed_by_age == 0
+        assert tokens[0].use_count == 5
+
+    def test_budget_keeps_current_generation(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_code_budget(1)     # 1024 bytes
+        old = FakeLoopToken()
+        memmgr.record_code_size(old, 1000)
+        for i in range(10):
+            memmgr.keep_loop_alive(old)
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {old: None}
+        # a new loop, compiled and entered once in this generation, is
+        # kept even though the old one is used much more
+        new = FakeLoopToken()
+        memmgr.record_code_size(new, 1000)
+        memmgr.keep_loop_alive(new)
+        memmgr.next_generation()
+        assert memmgr.alive_loops == {new: None}
+        assert memmgr.alive_code_size == 1000
+        assert memmgr.loops_freed_by_budget == 1
+
+    def test_budget_disabled(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        memmgr.set_code_budget(0)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            memmgr.record_code_size(token, 100000)
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert len(memmgr.alive_loops) == 10
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
@@ -184,6 +254,10 @@ class _TestIntegration(LLJitMixin):
         res = self.meta_interp(f, [], loop_longevity=3)
         assert res == 42
         self.check_enter_count(2 + 10*4)
+        memmgr = pyjitpl._warmrunnerdesc.memory_manager
+        assert memmgr.loops_freed_by_age > 0
+        assert memmgr.loops_recompiled > 0
+        assert memmgr.loops_freed_by_budget == 0
 
     def test_call_assembler_keep_alive(self):
         myjitdriver1 = JitDriver(greens=['m'], reds=['n'])
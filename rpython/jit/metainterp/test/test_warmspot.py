@@ -79,6 +79,25 @@ class WarmspotTests(object):
         for loc in get_stats().locations:
             assert loc == (0, 0, 123)
 
+    def test_is_warm_key(self):
+        def is_warm_key(n):
+            return n == 1
+        myjitdriver = JitDriver(greens=['n'], reds=['m'],
+                                is_warm_key=is_warm_key)
+        def f(n, m):
+            set_param(myjitdriver, 'threshold', 100)
+            set_param(myjitdriver, 'warm_threshold', 3)
+            while m > 0:
+                myjitdriver.can_enter_jit(n=n, m=m)
+                myjitdriver.jit_merge_point(n=n, m=m)
+                m -= 1
+            return m
+
+        self.meta_interp(f, [0, 20])
+        self.check_jitcell_token_count(0)
+        self.meta_interp(f, [1, 20])
+        self.check_jitcell_token_count(1)
+
     def test_set_param_enable_opts(self):
         from rpython.rtyper.annlowlevel import llstr, hlstr
 
@@ -151,6 +151,36 @@ def test_make_jitcell_getter_custom():
     assert get_jitcell(False, 42, 0.25) is cell4
     assert cell1 is not cell3 is not cell4 is not cell1
 
+def test_warm_key():
+    IS_WARM_KEY = lltype.Ptr(lltype.FuncType([lltype.Signed], lltype.Bool))
+    def is_warm_key(x):
+        return x == 5
+    class FakeWarmRunnerDesc:
+        rtyper = None
+        cpu = None
+        memory_manager = None
+    class FakeJitDriverSD:
+        _green_args_spec = [lltype.Signed]
+        _get_jitcell_at_ptr = None
+        _is_warm_key_ptr = llhelper(IS_WARM_KEY, is_warm_key)
+    state = WarmEnterState(FakeWarmRunnerDesc(), FakeJitDriverSD())
+    state.set_param_threshold(1000)
+    state.set_param_warm_threshold(10)
+    get_jitcell = state.make_jitcell_getter()
+    assert get_jitcell(True, 4).counter == 0
+    cell = get_jitcell(True, 5)
+    counter = state.get_warm_counter()
+    assert cell.counter == counter
+    assert counter + 10 * state.increment_threshold == state.THRESHOLD_LIMIT
+    # the counter is not changed for an existing cell
+    cell.counter = 42
+    assert get_jitcell(True, 5).counter == 42
+    # disabled
+    state.set_param_warm_threshold(0)
+    assert state.get_warm_counter() == 0
+    state.set_param_warm_threshold(10000)
+    assert state.get_warm_counter() == 0
+
 def test_make_unwrap_greenkey():
     class FakeJitDriverSD:
         _green_args_spec = [lltype.Signed, lltype.Float]
@@ -161,6 +161,10 @@ class JitCell(BaseJitCell):
                 return token
         return None
 
+    def procedure_token_was_freed(self):
+        return (self.wref_procedure_token is not None and
+                self.wref_procedure_token() is None)
+
     def set_procedure_token(self, token):
         self.wref_procedure_token = self._makeref(token)
 
@@ -204,6 +208,20 @@ class WarmEnterState(object):
     def set_param_function_threshold(self, threshold):
         self.increment_function_threshold = self._compute_threshold(threshold)
 
+    def set_param_warm_threshold(self, threshold):
+        self.warm_threshold = threshold
+
+    def get_warm_counter(self):
+        """The initial counter of a new JitCell whose green key was hot in
+        a previous run, according to the is_warm_key() hook: the loop
+        becomes hot after about 'warm_threshold' iterations."""
+        increment = self.increment_threshold
+        warm_threshold = self.warm_threshold
+        if (increment <= 0 or warm_threshold <= 0 or
+                warm_threshold >= self.THRESHOLD_LIMIT // increment):
+            return 0
+        return self.THRESHOLD_LIMIT - increment * warm_threshold
+
     def set_param_trace_eagerness(self, value):
         self.trace_eagerness = value
 
@@ -249,6 +267,12 @@ class WarmEnterState(object):
             if self.warmrunnerdesc.memory_manager:
                 self.warmrunnerdesc.memory_manager.max_unroll_loops = value
 
+    def set_param_loop_memory_budget(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if self.warmrunnerdesc:
+            if self.warmrunnerdesc.memory_manager:
+                self.warmrunnerdesc.memory_manager.set_code_budget(value)
+
     def disable_noninlinable_function(self, greenkey):
         cell = self.jit_cell_at_key(greenkey)
         cell.dont_trace_here = True
@@ -259,6 +283,11 @@ class WarmEnterState(object):
 
     def attach_procedure_to_interp(self, greenkey, procedure_token):
         cell = self.jit_cell_at_key(greenkey)
+        if cell.procedure_token_was_freed():
+            # the memory manager freed the previous loop for this cell
+            if (self.warmrunnerdesc is not None and
+                self.warmrunnerdesc.memory_manager is not None):
+                self.warmrunnerdesc.memory_manager.record_recompilation()
         old_token = cell.get_procedure_token()
         cell.set_procedure_token(procedure_token)
         cell.counter = -1       # valid procedure bridge attached
@@ -445,6 +474,25 @@ class WarmEnterState(object):
         #
         return jit_getter
 
+    def make_is_warm_key(self):
+        "NOT_RPYTHON"
+        if hasattr(self, 'is_warm_key'):
+            return self.is_warm_key
+        #
+        is_warm_key_ptr = getattr(self.jitdriver_sd, '_is_warm_key_ptr',
+                                  None)     # for tests
+        if is_warm_key_ptr is None:
+            def is_warm_key(*greenargs):
+                return False
+        else:
+            rtyper = self.warmrunnerdesc.rtyper
+            #
+            def is_warm_key(*greenargs):
+                fn = support.maybe_on_top_of_llinterp(rtyper, is_warm_key_ptr)
+                return fn(*greenargs)
+        self.is_warm_key = is_warm_key
+        return is_warm_key
+
     def _make_jitcell_getter_default(self):
         "NOT_RPYTHON"
         jitdriver_sd = self.jitdriver_sd
@@ -500,6 +548,7 @@ class WarmEnterState(object):
         #
         self._trigger_automatic_cleanup = 0
         self._jitcell_dict = jitcell_dict       # for tests
+        is_warm_key = self.make_is_warm_key()
         #
         def get_jitcell(build, *greenargs):
             try:
@@ -509,6 +558,8 @@ class WarmEnterState(object):
                     return None
                 _maybe_cleanup_dict()
                 cell = JitCell()
+                if is_warm_key(*greenargs):
+                    cell.counter = self.get_warm_counter()
                 jitcell_dict[greenargs] = cell
             return cell
         return get_jitcell
@@ -519,6 +570,7 @@ class WarmEnterState(object):
         get_jitcell_at_ptr = self.jitdriver_sd._get_jitcell_at_ptr
         set_jitcell_at_ptr = self.jitdriver_sd._set_jitcell_at_ptr
         lltohlhack = {}
+        is_warm_key = self.make_is_warm_key()
         # note that there is no equivalent of _maybe_cleanup_dict()
         # in the case of custom getters.  We assume that the interpreter
         # stores the JitCells on some objects that can go away by GC,
@@ -545,6 +597,8 @@ class WarmEnterState(object):
                 return cell
             if cell is None:
                 cell = JitCell()
+                if is_warm_key(*greenargs):
+                    cell.counter = self.get_warm_counter()
                 # <hacks>
                 if we_are_translated():
                     cellref = cast_object_to_ptr(BASEJITCELL, cell)
@@ -30,6 +30,10 @@ REGEXES = [
     (('total_compiled_bridges',), '^Total # of bridges:\s+(\d+)$'),
     (('total_freed_loops',),      '^Freed # of loops:\s+(\d+)$'),
     (('total_freed_bridges',),    '^Freed # of bridges:\s+(\d+)$'),
+    (('loops_freed_by_age',),     '^Freed by age:\s+(\d+)$'),
+    (('loops_freed_by_budget',),  '^Freed by budget:\s+(\d+)$'),
+    (('loops_recompiled',),       '^Recompiled loops:\s+(\d+)$'),
+    (('loop_code_size',),         '^Loop code size:\s+(\d+)$'),
     ]
 
 class Ops(object):
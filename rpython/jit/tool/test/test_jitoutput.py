@@ -65,6 +65,10 @@ Total # of loops:       100
 Total # of bridges:     300
 Freed # of loops:       99
 Freed # of bridges:     299
+Freed by age:           42
+Freed by budget:        7
+Recompiled loops:       3
+Loop code size:         65536
 '''
 
 def test_parse():
@@ -88,3 +92,7 @@ def test_parse():
     assert info.nvirtuals == 13
     assert info.nvholes == 14
     assert info.nvreused == 15
+    assert info.loops_freed_by_age == 42
+    assert info.loops_freed_by_budget == 7
+    assert info.loops_recompiled == 3
+    assert info.loop_code_size == 65536
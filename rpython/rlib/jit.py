@@ -429,7 +429,7 @@ class JitHintError(Exception):
     """Inconsistency in the JIT hints."""
 
 ENABLE_ALL_OPTS = (
-    'intbounds:rewrite:virtualize:string:earlyforce:pure:heap:unroll')
+    'intbounds:rewrite:virtualize:string:earlyforce:pure:taint:heap:unroll')
 
 PARAMETER_DOCS = {
     'threshold': 'number of times a loop has to run for it to become hot',
@@ -441,6 +441,12 @@ PARAMETER_DOCS = {
     'retrace_limit': 'how many times we can try retracing before giving up',
     'max_retrace_guards': 'number of extra guards a retrace can cause',
     'max_unroll_loops': 'number of extra unrollings a loop can cause',
+    'loop_memory_budget': 'approximate size in KB of the machine code '
+                          'of the loops above which the least used loops '
+                          'are freed (0 = no limit)',
+    'warm_threshold': 'number of times a loop that was hot in a previous '
+                      'run (see JitDriver.is_warm_key) has to run for it '
+                      'to become hot',
     'enable_opts': 'INTERNAL USE ONLY (MAY NOT WORK OR LEAD TO CRASHES): '
                    'optimizations to enable, or all = %s' % ENABLE_ALL_OPTS,
     }
@@ -454,6 +460,8 @@ PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'retrace_limit': 5,
               'max_retrace_guards': 15,
               'max_unroll_loops': 0,
+              'loop_memory_budget': 0,
+              'warm_threshold': 23,
               'enable_opts': 'all',
               }
 unroll_parameters = unrolling_iterable(PARAMETERS.items())
@@ -476,7 +484,7 @@ class JitDriver(object):
                  get_jitcell_at=None, set_jitcell_at=None,
                  get_printable_location=None, confirm_enter_jit=None,
                  can_never_inline=None, should_unroll_one_iteration=None,
-                 name='jitdriver'):
+                 is_warm_key=None, name='jitdriver'):
         if greens is not None:
             self.greens = greens
         self.name = name
@@ -511,6 +519,7 @@ class JitDriver(object):
         self.confirm_enter_jit = confirm_enter_jit
         self.can_never_inline = can_never_inline
         self.should_unroll_one_iteration = should_unroll_one_iteration
+        self.is_warm_key = is_warm_key
 
     def _freeze_(self):
         return True
@@ -1014,6 +1023,10 @@ class Counters(object):
     TOTAL_COMPILED_BRIDGES
     TOTAL_FREED_LOOPS
     TOTAL_FREED_BRIDGES
+    LOOPS_FREED_BY_AGE
+    LOOPS_FREED_BY_BUDGET
+    LOOPS_RECOMPILED
+    LOOP_CODE_SIZE
     """
 
     counter_names = []
@@ -355,6 +355,35 @@ def get_typeids_z():
     "NOT_RPYTHON"
     raise NotImplementedError
 
+# Statistics returned by get_stats().  Durations are measured with
+# rtimer.read_timestamp(), i.e. in CPU cycles on x86.  The two pause-time
+# histograms are made of STAT_HISTOGRAM_SIZE buckets: the bucket 'i'
+# counts the pauses that lasted between 2**i and 2**(i+1) ticks.
+STAT_MINOR_COLLECTIONS   = 0   # number of minor collections
+STAT_MAJOR_COLLECTIONS   = 1   # number of major collections finished
+STAT_MAJOR_STEPS         = 2   # number of pauses doing major collection work
+STAT_MINOR_PAUSE_TOTAL   = 3   # total duration of the minor collections
+STAT_MINOR_PAUSE_MAX     = 4   # longest minor collection
+STAT_MAJOR_PAUSE_TOTAL   = 5   # total duration of the major collection work
+STAT_MAJOR_PAUSE_MAX     = 6   # longest major collection pause
+STAT_BYTES_PROMOTED      = 7   # bytes copied out of the nursery
+STAT_CARDS_MARKED        = 8   # cards found set by minor collections
+STAT_RAWMALLOCED_TOTAL   = 9   # bytes ever raw-malloced for large objects
+STAT_RAWMALLOCED_CURRENT = 10  # bytes currently raw-malloced
+STAT_NURSERY_SIZE        = 11  # size of the nursery in bytes
+STAT_TOTAL_MEMORY_USED   = 12  # bytes used by old objects
+STAT_HISTOGRAM_SIZE      = 40
+STAT_MINOR_HISTOGRAM     = 16
+STAT_MAJOR_HISTOGRAM     = STAT_MINOR_HISTOGRAM + STAT_HISTOGRAM_SIZE
+STAT_COUNT               = STAT_MAJOR_HISTOGRAM + STAT_HISTOGRAM_SIZE
+
+def get_stats(index):
+    """Return the value of the GC statistic 'index', one of the STAT_*
+    constants above, or -1 if the GC doesn't record it.  Cheap enough to
+    be called often.
+    """
+    return -1
+
 def has_gcflag_extra():
     "NOT_RPYTHON"
     return True
@@ -549,6 +578,16 @@ class Entry(ExtRegistryEntry):
         hop.exception_is_here()
         return hop.genop('gc_typeids_z', [], resulttype = hop.r_result)
 
+class Entry(ExtRegistryEntry):
+    _about_ = get_stats
+    def compute_result_annotation(self, s_index):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeInteger()
+    def specialize_call(self, hop):
+        vlist = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_stats', vlist, resulttype=hop.r_result)
+
 class Entry(ExtRegistryEntry):
     _about_ = (has_gcflag_extra, get_gcflag_extra, toggle_gcflag_extra)
     def compute_result_annotation(self, s_arg=None):
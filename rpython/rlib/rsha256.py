@@ -0,0 +1,276 @@
+"""An implementation of SHA-256 and SHA-224 in RPython.
+
+   See also the pure Python implementation in lib_pypy/_sha256.py,
+   which is what hashlib falls back to when neither _hashlib nor the
+   _sha256 mixed module are available.  Based directly on the text of
+   the NIST standard FIPS PUB 180-2, with the same framework as rsha.py.
+"""
+
+from rpython.rlib.rarithmetic import r_uint, r_ulonglong
+from rpython.rlib.unroll import unrolling_iterable
+
+# We reuse helpers from rsha too
+from rpython.rlib.rsha import _string2uintlist
+
+
+MASK32 = r_uint(0xFFFFFFFFL)
+
+def _words2string(words, count):
+    return ''.join([chr((words[i // 4] >> (24 - 8 * (i % 4))) & 0xFF)
+                    for i in range(count * 4)])
+
+def _string2hex(s):
+    hx = '0123456789abcdef'
+    result = []
+    for c in s:
+        result.append(hx[(ord(c) >> 4) & 0xF])
+        result.append(hx[ord(c) & 0xF])
+    return ''.join(result)
+
+# r_uint is 64 bits wide on 64-bit hosts, so the words are kept masked to
+# 32 bits before anything is shifted to the right.
+
+def _rotateRight(x, n):
+    "Rotate x (32 bit) right n bits circularly."
+    return ((x >> n) | (x << (32 - n))) & MASK32
+
+
+# ======================================================================
+# The SHA-256 transformation functions
+#
+# ======================================================================
+
+UNROLL_ALL = True    # this algorithm should be fastest & biggest
+
+# Constants to be used: the first 32 bits of the fractional parts of the
+# cube roots of the first 64 primes
+K = [
+    0x428a2f98L, 0x71374491L, 0xb5c0fbcfL, 0xe9b5dba5L,
+    0x3956c25bL, 0x59f111f1L, 0x923f82a4L, 0xab1c5ed5L,
+    0xd807aa98L, 0x12835b01L, 0x243185beL, 0x550c7dc3L,
+    0x72be5d74L, 0x80deb1feL, 0x9bdc06a7L, 0xc19bf174L,
+    0xe49b69c1L, 0xefbe4786L, 0x0fc19dc6L, 0x240ca1ccL,
+    0x2de92c6fL, 0x4a7484aaL, 0x5cb0a9dcL, 0x76f988daL,
+    0x983e5152L, 0xa831c66dL, 0xb00327c8L, 0xbf597fc7L,
+    0xc6e00bf3L, 0xd5a79147L, 0x06ca6351L, 0x14292967L,
+    0x27b70a85L, 0x2e1b2138L, 0x4d2c6dfcL, 0x53380d13L,
+    0x650a7354L, 0x766a0abbL, 0x81c2c92eL, 0x92722c85L,
+    0xa2bfe8a1L, 0xa81a664bL, 0xc24b8b70L, 0xc76c51a3L,
+    0xd192e819L, 0xd6990624L, 0xf40e3585L, 0x106aa070L,
+    0x19a4c116L, 0x1e376c08L, 0x2748774cL, 0x34b0bcb5L,
+    0x391c0cb3L, 0x4ed8aa4aL, 0x5b9cca4fL, 0x682e6ff3L,
+    0x748f82eeL, 0x78a5636fL, 0x84c87814L, 0x8cc70208L,
+    0x90befffaL, 0xa4506cebL, 0xbef9a3f7L, 0xc67178f2L,
+    ]
+
+if UNROLL_ALL:
+    unroll_K = unrolling_iterable(enumerate(map(r_uint, K)))
+else:
+    K = map(r_uint, K)
+
+# Initial 256 bit message digests (8 times 32 bit)
+SHA256_INIT = [0x6A09E667L, 0xBB67AE85L, 0x3C6EF372L, 0xA54FF53AL,
+               0x510E527FL, 0x9B05688CL, 0x1F83D9ABL, 0x5BE0CD19L]
+SHA224_INIT = [0xc1059ed8L, 0x367cd507L, 0x3070dd17L, 0xf70e5939L,
+               0xffc00b31L, 0x68581511L, 0x64f98fa7L, 0xbefa4fa4L]
+
+
+class RSHA256(object):
+    """RPython-level SHA-256 object.
+    """
+    _mixin_ = True        # for interp_sha256.py
+
+    digest_size = 32
+    _initial_state = map(r_uint, SHA256_INIT)
+
+    def __init__(self, initialdata=''):
+        self._init()
+        self.update(initialdata)
+
+
+    def _init(self):
+        "Initialisation."
+        self.count = r_ulonglong(0)   # total number of bytes
+        self.input = ""   # pending unprocessed data, < 64 bytes
+        self.uintbuffer = [r_uint(0)] * 64
+        self.H = self._initial_state[:]
+
+    def _transform(self, W):
+
+        for t in range(16, 64):
+            w15 = W[t-15]
+            w2 = W[t-2]
+            s0 = _rotateRight(w15, 7) ^ _rotateRight(w15, 18) ^ (w15 >> 3)
+            s1 = _rotateRight(w2, 17) ^ _rotateRight(w2, 19) ^ (w2 >> 10)
+            W[t] = (W[t-16] + s0 + W[t-7] + s1) & MASK32
+
+        H = self.H
+        A = H[0]
+        B = H[1]
+        C = H[2]
+        D = H[3]
+        E = H[4]
+        F = H[5]
+        G = H[6]
+        I = H[7]
+
+        """
+        This loop is unrolled (via unroll_K) to gain some speed
+        for t in range(0, 64):
+            T1 = I + Sigma1(E) + Ch(E, F, G) + K[t] + W[t]
+            T2 = Sigma0(A) + Maj(A, B, C)
+            I = G
+            G = F
+            F = E
+            E = (D + T1) & 0xffffffffL
+            D = C
+            C = B
+            B = A
+            A = (T1 + T2) & 0xffffffffL
+        """
+        if UNROLL_ALL:
+            rng = unroll_K
+        else:
+            rng = enumerate(K)
+        for t, k in rng:
+            T1 = (I + (_rotateRight(E, 6) ^ _rotateRight(E, 11) ^
+                       _rotateRight(E, 25)) +
+                  ((E & F) ^ ((~E) & G)) + k + W[t])
+            T2 = ((_rotateRight(A, 2) ^ _rotateRight(A, 13) ^
+                   _rotateRight(A, 22)) +
+                  ((A & B) ^ (A & C) ^ (B & C)))
+            I = G
+            G = F
+            F = E
+            E = (D + T1) & MASK32
+            D = C
+            C = B
+            B = A
+            A = (T1 + T2) & MASK32
+
+        H[0] = (H[0] + A) & MASK32
+        H[1] = (H[1] + B) & MASK32
+        H[2] = (H[2] + C) & MASK32
+        H[3] = (H[3] + D) & MASK32
+        H[4] = (H[4] + E) & MASK32
+        H[5] = (H[5] + F) & MASK32
+        H[6] = (H[6] + G) & MASK32
+        H[7] = (H[7] + I) & MASK32
+
+
+    def _finalize(self):
+        """Logic to add the final padding and extract the digest.
+        """
+        # Save the state before adding the padding
+        count = self.count
+        input = self.input
+        H = self.H[:]
+
+        index = len(input)
+        if index < 56:
+            padLen = 56 - index
+        else:
+            padLen = 120 - index
+
+        if padLen:
+            self.update('\200' + '\000' * (padLen-1))
+
+        # Append length (before padding).
+        assert len(self.input) == 56
+        W = self.uintbuffer
+        _string2uintlist(self.input, 0, 14, W)
+        length_in_bits = count << 3
+        W[14] = r_uint(length_in_bits >> 32) & MASK32
+        W[15] = r_uint(length_in_bits) & MASK32
+        self._transform(W)
+
+        # Store state in digest.
+        digest = _words2string(self.H, self.digest_size // 4)
+
+        # Restore the saved state in case this instance is still used
+        self.count = count
+        self.input = input
+        self.H = H
+
+        return digest
+
+
+    # Down from here all methods follow the Python Standard Library
+    # API of the hashlib objects.
+
+    def update(self, inBuf):
+        """Add to the current message.
+
+        The hash is immediately calculated for all full blocks. The final
+        calculation is made in digest(), as in rsha.py.
+        """
+
+        leninBuf = len(inBuf)
+        self.count += leninBuf
+        index = len(self.input)
+        partLen = 64 - index
+        assert partLen > 0
+
+        if leninBuf >= partLen:
+            W = self.uintbuffer
+            self.input = self.input + inBuf[:partLen]
+            _string2uintlist(self.input, 0, 16, W)
+            self._transform(W)
+            i = partLen
+            while i + 64 <= leninBuf:
+                _string2uintlist(inBuf, i, 16, W)
+                self._transform(W)
+                i = i + 64
+            else:
+                self.input = inBuf[i:leninBuf]
+        else:
+            self.input = self.input + inBuf
+
+
+    def digest(self):
+        """Terminate the message-digest computation and return digest.
+
+        Return the digest of the strings passed to the update()
+        method so far, as a string of digest_size bytes.
+        """
+        return self._finalize()
+
+
+    def hexdigest(self):
+        """Terminate and return digest in HEX form.
+
+        Like digest() except the digest is returned as a string of
+        hexadecimal digits, twice as long.
+        """
+        return _string2hex(self._finalize())
+
+
+    def copy(self):
+        """Return a clone object.
+        """
+        clone = self.__class__()
+        clone._copyfrom(self)
+        return clone
+
+    def _copyfrom(self, other):
+        """Copy all state from 'other' into 'self'.
+        """
+        self.count = other.count
+        self.input = other.input
+        self.H = other.H[:]
+
+
+class RSHA224(RSHA256):
+    """RPython-level SHA-224 object: SHA-256 with a different initial
+    state, truncated to 28 bytes.
+    """
+    _mixin_ = True        # for interp_sha256.py
+
+    digest_size = 28
+    _initial_state = map(r_uint, SHA224_INIT)
+
+
+# synonyms to build new RSHA256 objects, for compatibility with the
+# CPython _sha256 module interface.
+sha256 = RSHA256
+sha224 = RSHA224
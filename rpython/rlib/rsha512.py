@@ -0,0 +1,293 @@
+"""An implementation of SHA-512 and SHA-384 in RPython.
+
+   See also the pure Python implementation in lib_pypy/_sha512.py,
+   which is what hashlib falls back to when neither _hashlib nor the
+   _sha512 mixed module are available.  Based directly on the text of
+   the NIST standard FIPS PUB 180-2, with the same framework as rsha.py.
+"""
+
+from rpython.rlib.rarithmetic import r_ulonglong
+from rpython.rlib.unroll import unrolling_iterable
+
+# We reuse helpers from rsha256 too
+from rpython.rlib.rsha256 import _string2hex
+
+
+def _words2string(words, count):
+    return ''.join([chr((words[i // 8] >> (56 - 8 * (i % 8))) & 0xFF)
+                    for i in range(count * 8)])
+
+def _string2ulonglonglist(s, start, count, result):
+    """Build a list of count r_ulonglong's by unpacking the string
+    s[start:start+8*count] in big-endian order.
+    """
+    for i in range(count):
+        p = start + i * 8
+        x = r_ulonglong(ord(s[p+7]))
+        x |= r_ulonglong(ord(s[p+6])) << 8
+        x |= r_ulonglong(ord(s[p+5])) << 16
+        x |= r_ulonglong(ord(s[p+4])) << 24
+        x |= r_ulonglong(ord(s[p+3])) << 32
+        x |= r_ulonglong(ord(s[p+2])) << 40
+        x |= r_ulonglong(ord(s[p+1])) << 48
+        x |= r_ulonglong(ord(s[p])) << 56
+        result[i] = x
+
+def _rotateRight(x, n):
+    "Rotate x (64 bit) right n bits circularly."
+    return (x >> n) | (x << (64 - n))
+
+
+# ======================================================================
+# The SHA-512 transformation functions
+#
+# ======================================================================
+
+UNROLL_ALL = True    # this algorithm should be fastest & biggest
+
+# Constants to be used: the first 64 bits of the fractional parts of the
+# cube roots of the first 80 primes
+K = [
+    0x428a2f98d728ae22L, 0x7137449123ef65cdL, 0xb5c0fbcfec4d3b2fL,
+    0xe9b5dba58189dbbcL, 0x3956c25bf348b538L, 0x59f111f1b605d019L,
+    0x923f82a4af194f9bL, 0xab1c5ed5da6d8118L, 0xd807aa98a3030242L,
+    0x12835b0145706fbeL, 0x243185be4ee4b28cL, 0x550c7dc3d5ffb4e2L,
+    0x72be5d74f27b896fL, 0x80deb1fe3b1696b1L, 0x9bdc06a725c71235L,
+    0xc19bf174cf692694L, 0xe49b69c19ef14ad2L, 0xefbe4786384f25e3L,
+    0x0fc19dc68b8cd5b5L, 0x240ca1cc77ac9c65L, 0x2de92c6f592b0275L,
+    0x4a7484aa6ea6e483L, 0x5cb0a9dcbd41fbd4L, 0x76f988da831153b5L,
+    0x983e5152ee66dfabL, 0xa831c66d2db43210L, 0xb00327c898fb213fL,
+    0xbf597fc7beef0ee4L, 0xc6e00bf33da88fc2L, 0xd5a79147930aa725L,
+    0x06ca6351e003826fL, 0x142929670a0e6e70L, 0x27b70a8546d22ffcL,
+    0x2e1b21385c26c926L, 0x4d2c6dfc5ac42aedL, 0x53380d139d95b3dfL,
+    0x650a73548baf63deL, 0x766a0abb3c77b2a8L, 0x81c2c92e47edaee6L,
+    0x92722c851482353bL, 0xa2bfe8a14cf10364L, 0xa81a664bbc423001L,
+    0xc24b8b70d0f89791L, 0xc76c51a30654be30L, 0xd192e819d6ef5218L,
+    0xd69906245565a910L, 0xf40e35855771202aL, 0x106aa07032bbd1b8L,
+    0x19a4c116b8d2d0c8L, 0x1e376c085141ab53L, 0x2748774cdf8eeb99L,
+    0x34b0bcb5e19b48a8L, 0x391c0cb3c5c95a63L, 0x4ed8aa4ae3418acbL,
+    0x5b9cca4f7763e373L, 0x682e6ff3d6b2b8a3L, 0x748f82ee5defb2fcL,
+    0x78a5636f43172f60L, 0x84c87814a1f0ab72L, 0x8cc702081a6439ecL,
+    0x90befffa23631e28L, 0xa4506cebde82bde9L, 0xbef9a3f7b2c67915L,
+    0xc67178f2e372532bL, 0xca273eceea26619cL, 0xd186b8c721c0c207L,
+    0xeada7dd6cde0eb1eL, 0xf57d4f7fee6ed178L, 0x06f067aa72176fbaL,
+    0x0a637dc5a2c898a6L, 0x113f9804bef90daeL, 0x1b710b35131c471bL,
+    0x28db77f523047d84L, 0x32caab7b40c72493L, 0x3c9ebe0a15c9bebcL,
+    0x431d67c49c100d4cL, 0x4cc5d4becb3e42b6L, 0x597f299cfc657e2aL,
+    0x5fcb6fab3ad6faecL, 0x6c44198c4a475817L,
+    ]
+
+if UNROLL_ALL:
+    unroll_K = unrolling_iterable(enumerate(map(r_ulonglong, K)))
+else:
+    K = map(r_ulonglong, K)
+
+# Initial 512 bit message digests (8 times 64 bit)
+SHA512_INIT = [0x6a09e667f3bcc908L, 0xbb67ae8584caa73bL,
+               0x3c6ef372fe94f82bL, 0xa54ff53a5f1d36f1L,
+               0x510e527fade682d1L, 0x9b05688c2b3e6c1fL,
+               0x1f83d9abfb41bd6bL, 0x5be0cd19137e2179L]
+SHA384_INIT = [0xcbbb9d5dc1059ed8L, 0x629a292a367cd507L,
+               0x9159015a3070dd17L, 0x152fecd8f70e5939L,
+               0x67332667ffc00b31L, 0x8eb44a8768581511L,
+               0xdb0c2e0d64f98fa7L, 0x47b5481dbefa4fa4L]
+
+
+class RSHA512(object):
+    """RPython-level SHA-512 object.
+    """
+    _mixin_ = True        # for interp_sha512.py
+
+    digest_size = 64
+    _initial_state = map(r_ulonglong, SHA512_INIT)
+
+    def __init__(self, initialdata=''):
+        self._init()
+        self.update(initialdata)
+
+
+    def _init(self):
+        "Initialisation."
+        self.count = r_ulonglong(0)   # total number of bytes
+        self.input = ""   # pending unprocessed data, < 128 bytes
+        self.ulonglongbuffer = [r_ulonglong(0)] * 80
+        self.H = self._initial_state[:]
+
+    def _transform(self, W):
+
+        for t in range(16, 80):
+            w15 = W[t-15]
+            w2 = W[t-2]
+            s0 = _rotateRight(w15, 1) ^ _rotateRight(w15, 8) ^ (w15 >> 7)
+            s1 = _rotateRight(w2, 19) ^ _rotateRight(w2, 61) ^ (w2 >> 6)
+            W[t] = W[t-16] + s0 + W[t-7] + s1
+
+        H = self.H
+        A = H[0]
+        B = H[1]
+        C = H[2]
+        D = H[3]
+        E = H[4]
+        F = H[5]
+        G = H[6]
+        I = H[7]
+
+        """
+        This loop is unrolled (via unroll_K) to gain some speed
+        for t in range(0, 80):
+            T1 = I + Sigma1(E) + Ch(E, F, G) + K[t] + W[t]
+            T2 = Sigma0(A) + Maj(A, B, C)
+            I = G
+            G = F
+            F = E
+            E = D + T1
+            D = C
+            C = B
+            B = A
+            A = T1 + T2
+        """
+        if UNROLL_ALL:
+            rng = unroll_K
+        else:
+            rng = enumerate(K)
+        for t, k in rng:
+            T1 = (I + (_rotateRight(E, 14) ^ _rotateRight(E, 18) ^
+                       _rotateRight(E, 41)) +
+                  ((E & F) ^ ((~E) & G)) + k + W[t])
+            T2 = ((_rotateRight(A, 28) ^ _rotateRight(A, 34) ^
+                   _rotateRight(A, 39)) +
+                  ((A & B) ^ (A & C) ^ (B & C)))
+            I = G
+            G = F
+            F = E
+            E = D + T1
+            D = C
+            C = B
+            B = A
+            A = T1 + T2
+
+        H[0] = H[0] + A
+        H[1] = H[1] + B
+        H[2] = H[2] + C
+        H[3] = H[3] + D
+        H[4] = H[4] + E
+        H[5] = H[5] + F
+        H[6] = H[6] + G
+        H[7] = H[7] + I
+
+
+    def _finalize(self):
+        """Logic to add the final padding and extract the digest.
+        """
+        # Save the state before adding the padding
+        count = self.count
+        input = self.input
+        H = self.H[:]
+
+        index = len(input)
+        if index < 112:
+            padLen = 112 - index
+        else:
+            padLen = 240 - index
+
+        if padLen:
+            self.update('\200' + '\000' * (padLen-1))
+
+        # Append length (before padding), as a 128-bit number.
+        assert len(self.input) == 112
+        W = self.ulonglongbuffer
+        _string2ulonglonglist(self.input, 0, 14, W)
+        W[14] = count >> 61
+        W[15] = count << 3
+        self._transform(W)
+
+        # Store state in digest.
+        digest = _words2string(self.H, self.digest_size // 8)
+
+        # Restore the saved state in case this instance is still used
+        self.count = count
+        self.input = input
+        self.H = H
+
+        return digest
+
+
+    # Down from here all methods follow the Python Standard Library
+    # API of the hashlib objects.
+
+    def update(self, inBuf):
+        """Add to the current message.
+
+        The hash is immediately calculated for all full blocks. The final
+        calculation is made in digest(), as in rsha.py.
+        """
+
+        leninBuf = len(inBuf)
+        self.count += leninBuf
+        index = len(self.input)
+        partLen = 128 - index
+        assert partLen > 0
+
+        if leninBuf >= partLen:
+            W = self.ulonglongbuffer
+            self.input = self.input + inBuf[:partLen]
+            _string2ulonglonglist(self.input, 0, 16, W)
+            self._transform(W)
+            i = partLen
+            while i + 128 <= leninBuf:
+                _string2ulonglonglist(inBuf, i, 16, W)
+                self._transform(W)
+                i = i + 128
+            else:
+                self.input = inBuf[i:leninBuf]
+        else:
+            self.input = self.input + inBuf
+
+
+    def digest(self):
+        """Terminate the message-digest computation and return digest.
+
+        Return the digest of the strings passed to the update()
+        method so far, as a string of digest_size bytes.
+        """
+        return self._finalize()
+
+
+    def hexdigest(self):
+        """Terminate and return digest in HEX form.
+
+        Like digest() except the digest is returned as a string of
+        hexadecimal digits, twice as long.
+        """
+        return _string2hex(self._finalize())
+
+
+    def copy(self):
+        """Return a clone object.
+        """
+        clone = self.__class__()
+        clone._copyfrom(self)
+        return clone
+
+    def _copyfrom(self, other):
+        """Copy all state from 'other' into 'self'.
+        """
+        self.count = other.count
+        self.input = other.input
+        self.H = other.H[:]
+
+
+class RSHA384(RSHA512):
+    """RPython-level SHA-384 object: SHA-512 with a different initial
+    state, truncated to 48 bytes.
+    """
+    _mixin_ = True        # for interp_sha512.py
+
+    digest_size = 48
+    _initial_state = map(r_ulonglong, SHA384_INIT)
+
+
+# synonyms to build new RSHA512 objects, for compatibility with the
+# CPython _sha512 module interface.
+sha512 = RSHA512
+sha384 = RSHA384
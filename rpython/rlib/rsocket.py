@@ -799,18 +799,25 @@ class RSocket(object):
         until at least one byte is available or until the remote end is closed.
         When the remote end is closed and all data is read, return the empty
         string."""
+        raw_buf, gc_buf = rffi.alloc_buffer(buffersize)
+        try:
+            read_bytes = self.recv_raw(raw_buf, buffersize, flags)
+            return rffi.str_from_buffer(raw_buf, gc_buf, buffersize, read_bytes)
+        finally:
+            rffi.keep_buffer_alive_until_here(raw_buf, gc_buf)
+
+    def recv_raw(self, dataptr, buffersize, flags=0):
+        """Like recv(), but receive into a CCHARP buffer of at least
+        buffersize bytes and return the number of bytes received."""
+        read_bytes = -1
         timeout = self._select(False)
         if timeout == 1:
             raise SocketTimeout
         elif timeout == 0:
-            raw_buf, gc_buf = rffi.alloc_buffer(buffersize)
-            try:
-                read_bytes = _c.socketrecv(self.fd, raw_buf, buffersize, flags)
-                if read_bytes >= 0:
-                    return rffi.str_from_buffer(raw_buf, gc_buf, buffersize, read_bytes)
-            finally:
-                rffi.keep_buffer_alive_until_here(raw_buf, gc_buf)
-        raise self.error_handler()
+            read_bytes = _c.socketrecv(self.fd, dataptr, buffersize, flags)
+        if read_bytes < 0:
+            raise self.error_handler()
+        return intmask(read_bytes)
 
     def recvinto(self, rwbuffer, nbytes, flags=0):
         buf = self.recv(nbytes, flags)
@@ -820,30 +827,38 @@ class RSocket(object):
     def recvfrom(self, buffersize, flags=0):
         """Like recv(buffersize, flags) but also return the sender's
         address."""
+        raw_buf, gc_buf = rffi.alloc_buffer(buffersize)
+        try:
+            read_bytes, address = self.recvfrom_raw(raw_buf, buffersize,
+                                                    flags)
+            data = rffi.str_from_buffer(raw_buf, gc_buf, buffersize,
+                                        read_bytes)
+            return (data, address)
+        finally:
+            rffi.keep_buffer_alive_until_here(raw_buf, gc_buf)
+
+    def recvfrom_raw(self, dataptr, buffersize, flags=0):
+        """Like recvfrom(), but receive into a CCHARP buffer and return
+        the number of bytes received and the sender's address."""
         read_bytes = -1
         timeout = self._select(False)
         if timeout == 1:
             raise SocketTimeout
         elif timeout == 0:
-            raw_buf, gc_buf = rffi.alloc_buffer(buffersize)
+            address, addr_p, addrlen_p = self._addrbuf()
             try:
-                address, addr_p, addrlen_p = self._addrbuf()
-                try:
-                    read_bytes = _c.recvfrom(self.fd, raw_buf, buffersize, flags,
-                                             addr_p, addrlen_p)
-                    addrlen = rffi.cast(lltype.Signed, addrlen_p[0])
-                finally:
-                    lltype.free(addrlen_p, flavor='raw')
-                    address.unlock()
-                if read_bytes >= 0:
-                    if addrlen:
-                        address.addrlen = addrlen
-                    else:
-                        address = None
-                    data = rffi.str_from_buffer(raw_buf, gc_buf, buffersize, read_bytes)
-                    return (data, address)
+                read_bytes = _c.recvfrom(self.fd, dataptr, buffersize, flags,
+                                         addr_p, addrlen_p)
+                addrlen = rffi.cast(lltype.Signed, addrlen_p[0])
             finally:
-                rffi.keep_buffer_alive_until_here(raw_buf, gc_buf)
+                lltype.free(addrlen_p, flavor='raw')
+                address.unlock()
+            if read_bytes >= 0:
+                if addrlen:
+                    address.addrlen = addrlen
+                else:
+                    address = None
+                return (intmask(read_bytes), address)
         raise self.error_handler()
 
     def recvfrom_into(self, rwbuffer, nbytes, flags=0):
@@ -895,6 +910,25 @@ class RSocket(object):
         finally:
             rffi.free_nonmovingbuffer(data, dataptr)
 
+    def sendall_raw(self, rawbuf, flags=0, signal_checker=None):
+        """Like sendall(), but send the memory of 'rawbuf' without copying
+        it.  'rawbuf' has get_raw_address() and getlength() methods.  They
+        are called again after every signal_checker.check(), as signal
+        handlers might have moved the memory."""
+        pos = 0
+        while True:
+            length = rawbuf.getlength()
+            if pos >= length:
+                break
+            try:
+                dataptr = rffi.ptradd(rawbuf.get_raw_address(), pos)
+                pos += self.send_raw(dataptr, length - pos, flags)
+            except CSocketError, e:
+                if e.errno != _c.EINTR:
+                    raise
+            if signal_checker:
+                signal_checker.check()
+
     def sendto(self, data, flags, address):
         """Like send(data, flags) but allows specifying the destination
         address.  (Note that 'flags' is mandatory here.)"""
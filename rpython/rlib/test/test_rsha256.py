@@ -0,0 +1,66 @@
+import hashlib    # for comparison
+from rpython.rlib import rsha256
+
+
+class TestSHA256:
+    def check(self, cls, data, digest):
+        computed = cls(data).hexdigest()
+        assert computed == digest
+        d = cls()
+        d.update(data)
+        computed = d.digest()
+        assert computed == digest.decode('hex')
+
+    def test_digest_size(self):
+        assert len(rsha256.sha256().digest()) == 32
+        assert len(rsha256.sha224().digest()) == 28
+
+    def test_cases(self):
+        # the examples from FIPS PUB 180-2, Appendix B and its SHA-224
+        # addendum
+        self.check(rsha256.sha256, "",
+            "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855")
+        self.check(rsha256.sha256, "abc",
+            "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad")
+        self.check(rsha256.sha256,
+            "abcdbcdecdefdefgefghfghighijhijkijkljklmklmnlmnomnopnopq",
+            "248d6a61d20638b8e5c026930c3e6039a33ce45964ff2167f6ecedd419db06c1")
+        self.check(rsha256.sha224, "abc",
+            "23097d223405d8228642a477bda255b32aadbce4bda0b3f7e36c9da7")
+        self.check(rsha256.sha224,
+            "abcdbcdecdefdefgefghfghighijhijkijkljklmklmnlmnomnopnopq",
+            "75388b16512776cc5dba5da1fd890150b0c6455cb4f58b1952522525")
+
+    def test_padding_boundaries(self):
+        for length in range(50, 140):
+            data = 'x' * length
+            for cls, name in [(rsha256.sha256, 'sha256'),
+                              (rsha256.sha224, 'sha224')]:
+                expected = hashlib.new(name, data).hexdigest()
+                self.check(cls, data, expected)
+
+    def test_copy(self):
+        for repeat in [1, 10, 100]:
+            d1 = rsha256.sha256("abc" * repeat)
+            d2 = d1.copy()
+            d1.update("def" * repeat)
+            d2.update("gh" * repeat)
+            assert d1.digest() == hashlib.sha256(
+                "abc" * repeat + "def" * repeat).digest()
+            assert d2.digest() == hashlib.sha256(
+                "abc" * repeat + "gh" * repeat).digest()
+
+    def test_random(self):
+        import random
+        for i in range(20):
+            input = ''.join([chr(random.randrange(256))
+                             for i in range(random.randrange(1000))])
+            m1 = rsha256.RSHA256()
+            m2 = hashlib.sha256()
+            pos = 0
+            while pos < len(input):
+                step = random.randrange(200)
+                m1.update(input[pos:pos+step])
+                m2.update(input[pos:pos+step])
+                pos += step
+                assert m2.hexdigest() == m1.hexdigest()
@@ -0,0 +1,71 @@
+import hashlib    # for comparison
+from rpython.rlib import rsha512
+
+
+LONG_INPUT = ("abcdefghbcdefghicdefghijdefghijkefghijklfghijklmghijklmn"
+              "hijklmnoijklmnopjklmnopqklmnopqrlmnopqrsmnopqrstnopqrstu")
+
+class TestSHA512:
+    def check(self, cls, data, digest):
+        computed = cls(data).hexdigest()
+        assert computed == digest
+        d = cls()
+        d.update(data)
+        computed = d.digest()
+        assert computed == digest.decode('hex')
+
+    def test_digest_size(self):
+        assert len(rsha512.sha512().digest()) == 64
+        assert len(rsha512.sha384().digest()) == 48
+
+    def test_cases(self):
+        # the examples from FIPS PUB 180-2, Appendix C and D
+        self.check(rsha512.sha512, "",
+            "cf83e1357eefb8bdf1542850d66d8007d620e4050b5715dc83f4a921d36ce9ce"
+            "47d0d13c5d85f2b0ff8318d2877eec2f63b931bd47417a81a538327af927da3e")
+        self.check(rsha512.sha512, "abc",
+            "ddaf35a193617abacc417349ae20413112e6fa4e89a97ea20a9eeee64b55d39a"
+            "2192992a274fc1a836ba3c23a3feebbd454d4423643ce80e2a9ac94fa54ca49f")
+        self.check(rsha512.sha512, LONG_INPUT,
+            "8e959b75dae313da8cf4f72814fc143f8f7779c6eb9f7fa17299aeadb6889018"
+            "501d289e4900f7e4331b99dec4b5433ac7d329eeb6dd26545e96e55b874be909")
+        self.check(rsha512.sha384, "abc",
+            "cb00753f45a35e8bb5a03d699ac65007272c32ab0eded163"
+            "1a8b605a43ff5bed8086072ba1e7cc2358baeca134c825a7")
+        self.check(rsha512.sha384, LONG_INPUT,
+            "09330c33f71147e83d192fc782cd1b4753111b173b3b05d2"
+            "2fa08086e3b0f712fcc7c71a557e2db966c3e9fa91746039")
+
+    def test_padding_boundaries(self):
+        for length in range(100, 260):
+            data = 'x' * length
+            for cls, name in [(rsha512.sha512, 'sha512'),
+                              (rsha512.sha384, 'sha384')]:
+                expected = hashlib.new(name, data).hexdigest()
+                self.check(cls, data, expected)
+
+    def test_copy(self):
+        for repeat in [1, 10, 100]:
+            d1 = rsha512.sha512("abc" * repeat)
+            d2 = d1.copy()
+            d1.update("def" * repeat)
+            d2.update("gh" * repeat)
+            assert d1.digest() == hashlib.sha512(
+                "abc" * repeat + "def" * repeat).digest()
+            assert d2.digest() == hashlib.sha512(
+                "abc" * repeat + "gh" * repeat).digest()
+
+    def test_random(self):
+        import random
+        for i in range(20):
+            input = ''.join([chr(random.randrange(256))
+                             for i in range(random.randrange(1000))])
+            m1 = rsha512.RSHA512()
+            m2 = hashlib.sha512()
+            pos = 0
+            while pos < len(input):
+                step = random.randrange(300)
+                m1.update(input[pos:pos+step])
+                m2.update(input[pos:pos+step])
+                pos += step
+                assert m2.hexdigest() == m1.hexdigest()
@@ -139,6 +139,59 @@ def test_socketpair_recvinto():
     s1.close()
     s2.close()
 
+def test_socketpair_sendall_raw():
+    import thread
+    from rpython.rtyper.lltypesystem import lltype, rffi
+    if sys.platform == "win32":
+        py.test.skip('No socketpair on Windows')
+    s1, s2 = socketpair()
+    # a small non-blocking buffer, so that the first send is partial
+    s1.setsockopt_int(SOL_SOCKET, SO_SNDBUF, 4096)
+    s1.settimeout(10.0)
+    size = 50000
+    class RawBuf:
+        raw = rffi.str2charp('x' * size)
+        def getlength(self):
+            return size
+        def get_raw_address(self):
+            return self.raw
+    rawbuf = RawBuf()
+    class SignalChecker:
+        calls = 0
+        def check(self):
+            # like a signal handler that moves the memory of 'rawbuf'
+            if not self.calls:
+                old = rawbuf.raw
+                rawbuf.raw = rffi.str2charp('y' * size)
+                for i in range(size):
+                    old[i] = '?'
+                lltype.free(old, flavor='raw')
+            self.calls += 1
+    received = []
+    lock = thread.allocate_lock()
+    lock.acquire()
+    def receiving():
+        count = 0
+        while count < size:
+            data = s2.recv(65536)
+            received.append(data)
+            count += len(data)
+        lock.release()
+    thread.start_new_thread(receiving, ())
+    try:
+        checker = SignalChecker()
+        s1.sendall_raw(rawbuf, 0, checker)
+        lock.acquire()
+        assert checker.calls > 1
+        data = ''.join(received)
+        first = data.count('x')
+        assert 0 < first < size
+        assert data == 'x' * first + 'y' * (size - first)
+    finally:
+        lltype.free(rawbuf.raw, flavor='raw')
+        s1.close()
+        s2.close()
+
 
 def test_simple_tcp():
     import thread
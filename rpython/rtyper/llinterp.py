@@ -915,6 +915,9 @@ class LLFrame(object):
     def op_gc_get_rpy_type_index(self):
         raise NotImplementedError("gc_get_rpy_type_index")
 
+    def op_gc_get_stats(self, index):
+        return self.heap.get_stats(index)
+
     def op_gc_dump_rpy_heap(self):
         raise NotImplementedError("gc_dump_rpy_heap")
 
@@ -494,6 +494,7 @@ LL_OPERATIONS = {
     'gc_get_rpy_referents': LLOp(),
     'gc_get_rpy_memory_usage': LLOp(),
     'gc_get_rpy_type_index': LLOp(),
+    'gc_get_stats': LLOp(),
     'gc_is_rpy_instance'  : LLOp(),
     'gc_dump_rpy_heap'    : LLOp(),
     'gc_typeids_z'        : LLOp(),
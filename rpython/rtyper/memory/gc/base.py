@@ -176,6 +176,11 @@ class GCBase(object):
     def set_max_heap_size(self, size):
         raise NotImplementedError
 
+    def get_stats(self, index):
+        """Return the statistic 'index' (see rgc.STAT_*), or -1 if this
+        GC doesn't record it."""
+        return -1
+
     def trace(self, obj, callback, arg):
         """Enumerate the locations inside the given obj that can contain
         GC pointers.  For each such location, callback(pointer, arg) is
@@ -37,6 +37,20 @@ Environment variables can be used to fine-tune the following parameters:
                         too slow for normal use.  Values are 0 (off),
                         1 (on major collections) or 2 (also on minor
                         collections).
+
+ PYPY_GC_INCREMENTAL    If set to 1, major collections are done
+                        incrementally: the marking and the sweeping are
+                        split in slices, each done just after a minor
+                        collection, instead of stopping the program for
+                        the whole duration of the major collection.
+
+ PYPY_GC_INCREMENT_STEP With PYPY_GC_INCREMENTAL=1, the size of the
+                        objects to mark in each slice.  Defaults to 4
+                        times the nursery.  Try values like '8MB'.
+
+ PYPY_GC_SWEEP_STEP     With PYPY_GC_INCREMENTAL=1, the amount of memory
+                        to sweep in each slice.  Defaults to 16 times the
+                        nursery.
 """
 # XXX Should find a way to bound the major collection threshold by the
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
@@ -53,6 +67,8 @@ from rpython.rlib.rarithmetic import ovfcheck, LONG_BIT, intmask, r_uint
 from rpython.rlib.rarithmetic import LONG_BIT_SHIFT
 from rpython.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.rtimer import read_timestamp
+from rpython.rlib import rgc
 from rpython.tool.sourcetools import func_with_new_name
 
 #
@@ -121,6 +137,17 @@ GCFLAG_CARDS_SET    = first_gcflag << 7     # <- at least one card bit is set
 
 TID_MASK            = (first_gcflag << 8) - 1
 
+# The states of a major collection.  Non-incremental major collections
+# go directly from STATE_SCANNING to STATE_SCANNING.  Incremental ones
+# stay in STATE_MARKING and then STATE_SWEEPING for several minor
+# collections.
+STATE_SCANNING = 0
+STATE_MARKING = 1
+STATE_SWEEPING = 2
+
+# The raw array of statistics, indexed by the rgc.STAT_* constants.
+STATS_ARRAY = lltype.Array(lltype.Signed, hints={'nolength': True})
+
 
 FORWARDSTUB = lltype.GcStruct('forwarding_stub',
                               ('forw', llmemory.Address))
@@ -203,6 +230,13 @@ class MiniMarkGC(MovingGCBase):
         # larger.  A value of 0 disables card marking.
         "card_page_indices": 128,
 
+        # Incremental major collections: disabled by default, but see
+        # PYPY_GC_INCREMENTAL.  The two step sizes are in bytes; if 0,
+        # they are computed from the nursery size.
+        "incremental": False,
+        "increment_step": 0,
+        "sweep_step": 0,
+
         # Objects whose total size is at least 'large_object' bytes are
         # allocated out of the nursery immediately, as old objects.  The
         # minimal allocated size of the nursery is 2x the following
@@ -220,6 +254,9 @@ class MiniMarkGC(MovingGCBase):
                  growth_rate_max=2.5,   # for tests
                  card_page_indices=0,
                  large_object=8*WORD,
+                 incremental=False,
+                 increment_step=0,
+                 sweep_step=0,
                  ArenaCollectionClass=None,
                  **kwds):
         MovingGCBase.__init__(self, config, **kwds)
@@ -235,6 +272,11 @@ class MiniMarkGC(MovingGCBase):
         self.max_heap_size_already_raised = False
         self.max_delta = float(r_uint(-1))
         #
+        self.incremental = incremental
+        self.increment_step = increment_step
+        self.sweep_step = sweep_step
+        self.gc_state = STATE_SCANNING
+        #
         self.card_page_indices = card_page_indices
         if self.card_page_indices > 0:
             self.card_page_shift = 0
@@ -279,6 +321,15 @@ class MiniMarkGC(MovingGCBase):
         # A list of all prebuilt GC objects that contain pointers to the heap
         self.prebuilt_root_objects = self.AddressStack()
         #
+        # Used by incremental major collections: the old objects modified
+        # by the program while we are marking, collected by the minor
+        # collection, which must be marked again.
+        self.objects_to_remark = self.AddressStack()
+        #
+        # Always-on statistics, returned by get_stats().
+        self.stats = lltype.malloc(STATS_ARRAY, rgc.STAT_COUNT, flavor='raw',
+                                   zero=True, immortal=True)
+        #
         self._init_writebarrier_logic()
 
 
@@ -368,6 +419,18 @@ class MiniMarkGC(MovingGCBase):
             else:
                 self.max_delta = 0.125 * env.get_total_memory()
             #
+            incremental = env.read_uint_from_env('PYPY_GC_INCREMENTAL')
+            if incremental > 0:
+                self.incremental = True
+            #
+            increment_step = env.read_from_env('PYPY_GC_INCREMENT_STEP')
+            if increment_step > 0:
+                self.increment_step = increment_step
+            #
+            sweep_step = env.read_from_env('PYPY_GC_SWEEP_STEP')
+            if sweep_step > 0:
+                self.sweep_step = sweep_step
+            #
             self.minor_collection()    # to empty the nursery
             llarena.arena_free(self.nursery)
             self.nursery_size = newsize
@@ -406,6 +469,10 @@ class MiniMarkGC(MovingGCBase):
         self.next_major_collection_initial = self.min_heap_size
         self.next_major_collection_threshold = self.min_heap_size
         self.set_major_threshold_from(0.0)
+        if self.increment_step <= 0:
+            self.increment_step = 4 * self.nursery_size
+        if self.sweep_step <= 0:
+            self.sweep_step = 16 * self.nursery_size
         ll_assert(self.extra_threshold == 0, "extra_threshold set too early")
         debug_stop("gc-set-nursery-size")
 
@@ -588,8 +655,10 @@ class MiniMarkGC(MovingGCBase):
         """
         self.minor_collection()
         #
-        if self.get_total_memory_used() > self.next_major_collection_threshold:
-            self.major_collection()
+        if (self.gc_state != STATE_SCANNING or
+                self.get_total_memory_used() >
+                    self.next_major_collection_threshold):
+            self.major_collection_progress()
             #
             # The nursery might not be empty now, because of
             # execute_finalizers().  If it is almost full again,
@@ -646,7 +715,7 @@ class MiniMarkGC(MovingGCBase):
         if (float(self.get_total_memory_used()) + raw_malloc_usage(totalsize) >
                 self.next_major_collection_threshold):
             self.minor_collection()
-            self.major_collection(raw_malloc_usage(totalsize))
+            self.major_collection_progress(raw_malloc_usage(totalsize))
         #
         # Check if the object would fit in the ArenaCollection.
         if raw_malloc_usage(totalsize) <= self.small_request_threshold:
@@ -667,6 +736,7 @@ class MiniMarkGC(MovingGCBase):
             # is for large objects, bigger than the 'large_objects' threshold,
             # which are raw-malloced but still young.
             extra_flags = GCFLAG_TRACK_YOUNG_PTRS
+            is_old = True
             #
         else:
             # No, so proceed to allocate it externally with raw_malloc().
@@ -725,19 +795,27 @@ class MiniMarkGC(MovingGCBase):
             # Record the newly allocated object and its full malloced size.
             # The object is young or old depending on the argument.
             self.rawmalloced_total_size += r_uint(allocsize)
+            self.stats[rgc.STAT_RAWMALLOCED_TOTAL] += allocsize
             if can_make_young:
                 if not self.young_rawmalloced_objects:
                     self.young_rawmalloced_objects = self.AddressDict()
                 self.young_rawmalloced_objects.add(result + size_gc_header)
+                is_old = False
             else:
                 self.old_rawmalloced_objects.append(result + size_gc_header)
                 extra_flags |= GCFLAG_TRACK_YOUNG_PTRS
+                is_old = True
         #
         # Common code to fill the header and length of the object.
         self.init_gc_object(result, typeid, extra_flags)
         if self.is_varsize(typeid):
             offset_to_length = self.varsize_offset_to_length(typeid)
             (result + size_gc_header + offset_to_length).signed[0] = length
+        #
+        # An old object allocated while an incremental major collection
+        # is marking must survive it.
+        if is_old and self.gc_state == STATE_MARKING:
+            self.objects_to_trace.append(result + size_gc_header)
         return result + size_gc_header
 
 
@@ -926,9 +1004,11 @@ class MiniMarkGC(MovingGCBase):
         # similarily, all objects should have this flag:
         ll_assert(self.header(obj).tid & GCFLAG_TRACK_YOUNG_PTRS != 0,
                   "missing GCFLAG_TRACK_YOUNG_PTRS")
-        # the GCFLAG_VISITED should not be set between collections
-        ll_assert(self.header(obj).tid & GCFLAG_VISITED == 0,
-                  "unexpected GCFLAG_VISITED")
+        # the GCFLAG_VISITED should not be set between collections,
+        # unless an incremental major collection is in progress
+        if self.gc_state == STATE_SCANNING:
+            ll_assert(self.header(obj).tid & GCFLAG_VISITED == 0,
+                      "unexpected GCFLAG_VISITED")
         # the GCFLAG_FINALIZATION_ORDERING should not be set between coll.
         ll_assert(self.header(obj).tid & GCFLAG_FINALIZATION_ORDERING == 0,
                   "unexpected GCFLAG_FINALIZATION_ORDERING")
@@ -1021,8 +1101,12 @@ class MiniMarkGC(MovingGCBase):
             # to the list 'old_objects_pointing_to_young'.  We know that
             # 'addr_struct' cannot be in the nursery, because nursery objects
             # never have the flag GCFLAG_TRACK_YOUNG_PTRS to start with.
+            # While an incremental major collection is marking, we must
+            # also remember the objects in which we write old pointers,
+            # because they may already have been marked.
             objhdr = self.header(addr_struct)
-            if self.appears_to_be_young(newvalue):
+            if (self.appears_to_be_young(newvalue) or
+                    self.gc_state == STATE_MARKING):
                 self.old_objects_pointing_to_young.append(addr_struct)
                 objhdr.tid &= ~GCFLAG_TRACK_YOUNG_PTRS
             #
@@ -1151,6 +1235,12 @@ class MiniMarkGC(MovingGCBase):
             return True
         # ^^^ a fast path of write-barrier
         #
+        if self.gc_state == STATE_MARKING:
+            # The copied pointers may be old pointers that an incremental
+            # major collection must see.  Trace 'dest' fully again.
+            self.assume_young_pointers(dest_addr)
+            return True
+        #
         if source_hdr.tid & GCFLAG_HAS_CARDS != 0:
             #
             if source_hdr.tid & GCFLAG_TRACK_YOUNG_PTRS == 0:
@@ -1212,6 +1302,7 @@ class MiniMarkGC(MovingGCBase):
         that remain alive and move them out."""
         #
         debug_start("gc-minor")
+        start = read_timestamp()
         #
         # Before everything else, remove from 'old_objects_pointing_to_young'
         # the young arrays.
@@ -1263,6 +1354,13 @@ class MiniMarkGC(MovingGCBase):
         if self.young_rawmalloced_objects:
             self.free_young_rawmalloced_objects()
         #
+        # If an incremental major collection is marking, the objects
+        # modified or made old since the last minor collection must be
+        # (re)marked.  This is done only now, because GCFLAG_VISITED has
+        # a different meaning for young raw-malloced objects until here.
+        if self.gc_state == STATE_MARKING:
+            self.remark_modified_objects()
+        #
         # All live nursery objects are out, and the rest dies.  Fill
         # the whole nursery with zero and reset the current nursery pointer.
         llarena.arena_reset(self.nursery, self.nursery_size, 2)
@@ -1273,6 +1371,9 @@ class MiniMarkGC(MovingGCBase):
                     self.get_total_memory_used())
         if self.DEBUG >= 2:
             self.debug_check_consistency()     # expensive!
+        self.stats[rgc.STAT_MINOR_COLLECTIONS] += 1
+        self._record_pause(start, rgc.STAT_MINOR_PAUSE_TOTAL,
+                           rgc.STAT_MINOR_PAUSE_MAX, rgc.STAT_MINOR_HISTOGRAM)
         debug_stop("gc-minor")
 
 
@@ -1298,6 +1399,8 @@ class MiniMarkGC(MovingGCBase):
             ll_assert(self.header(obj).tid & GCFLAG_CARDS_SET != 0,
                 "!GCFLAG_CARDS_SET but object in 'old_objects_with_cards_set'")
             self.header(obj).tid &= ~GCFLAG_CARDS_SET
+            if self.gc_state == STATE_MARKING:
+                self.objects_to_remark.append(obj)
             #
             # Get the number of card marker bytes in the header.
             typeid = self.get_type_id(obj)
@@ -1333,6 +1436,7 @@ class MiniMarkGC(MovingGCBase):
                         interval_stop = interval_start + self.card_page_indices
                         #
                         if cardbyte & 1:
+                            self.stats[rgc.STAT_CARDS_MARKED] += 1
                             if interval_stop > length:
                                 interval_stop = length
                                 ll_assert(cardbyte <= 1 and bytes == 0,
@@ -1361,12 +1465,25 @@ class MiniMarkGC(MovingGCBase):
             # Add the flag GCFLAG_TRACK_YOUNG_PTRS.  All live objects should
             # have this flag set after a nursery collection.
             self.header(obj).tid |= GCFLAG_TRACK_YOUNG_PTRS
+            if self.gc_state == STATE_MARKING:
+                self.objects_to_remark.append(obj)
             #
             # Trace the 'obj' to replace pointers to nursery with pointers
             # outside the nursery, possibly forcing nursery objects out
             # and adding them to 'old_objects_pointing_to_young' as well.
             self.trace_and_drag_out_of_nursery(obj)
 
+    def remark_modified_objects(self):
+        # Move the objects from 'objects_to_remark' to 'objects_to_trace',
+        # removing GCFLAG_VISITED so that they are traced again.  These
+        # objects are either old objects modified while we were marking,
+        # or objects that just became old.
+        pending = self.objects_to_remark
+        while pending.non_empty():
+            obj = pending.pop()
+            self.header(obj).tid &= ~GCFLAG_VISITED
+            self.objects_to_trace.append(obj)
+
     def trace_and_drag_out_of_nursery(self, obj):
         """obj must not be in the nursery.  This copies all the
         young objects it references out of the nursery.
@@ -1432,6 +1549,8 @@ class MiniMarkGC(MovingGCBase):
             #
             totalsize = size_gc_header + self.get_size(obj)
         #
+        self.stats[rgc.STAT_BYTES_PROMOTED] += raw_malloc_usage(totalsize)
+        #
         # Copy it.  Note that references to other objects in the
         # nursery are kept unchanged in this step.
         llmemory.raw_memcopy(obj - size_gc_header, newhdr, totalsize)
@@ -1510,6 +1629,7 @@ class MiniMarkGC(MovingGCBase):
         #
         size_gc_header = self.gcheaderbuilder.size_gc_header
         self.rawmalloced_total_size += r_uint(raw_malloc_usage(totalsize))
+        self.stats[rgc.STAT_RAWMALLOCED_TOTAL] += raw_malloc_usage(totalsize)
         self.old_rawmalloced_objects.append(arena + size_gc_header)
         return arena
 
@@ -1543,7 +1663,188 @@ class MiniMarkGC(MovingGCBase):
     def major_collection(self, reserving_size=0):
         """Do a major collection.  Only for when the nursery is empty."""
         #
+        # If an incremental major collection is in progress, finish it
+        # first: it cannot be mixed with a non-incremental one.  (Its
+        # finalizers may allocate and even start the next one.)
+        while self.gc_state != STATE_SCANNING:
+            self.finish_major_collection_step()
+            self.minor_collection()
+        #
         debug_start("gc-collect")
+        start = read_timestamp()
+        self._major_collection_start()
+        #
+        # Note that a major collection is non-moving.  The goal is only to
+        # find and free some of the objects allocated by the ArenaCollection.
+        # We first visit all objects and toggle the flag GCFLAG_VISITED on
+        # them, starting from the roots.
+        self.objects_to_trace = self.AddressStack()
+        self.collect_roots()
+        self.visit_all_objects()
+        self._major_collection_end_of_marking()
+        #
+        # Walk all rawmalloced objects and free the ones that don't
+        # have the GCFLAG_VISITED flag.
+        self.free_unvisited_rawmalloc_objects()
+        #
+        # Ask the ArenaCollection to visit all objects.  Free the ones
+        # that have not been visited above, and reset GCFLAG_VISITED on
+        # the others.
+        self.ac.mass_free(self._free_if_unvisited)
+        #
+        self._major_collection_report()
+        self.stats[rgc.STAT_MAJOR_COLLECTIONS] += 1
+        self._record_major_pause(start)
+        debug_stop("gc-collect")
+        self._major_collection_end(reserving_size)
+
+    def major_collection_step(self, reserving_size=0):
+        """Do one slice of an incremental major collection, starting a
+        new one if none is in progress.  Only for when the nursery is
+        empty.  Returns True if this slice finished the major collection.
+        """
+        start = read_timestamp()
+        if self.gc_state == STATE_SCANNING:
+            debug_start("gc-collect-start")
+            self._major_collection_start()
+            debug_stop("gc-collect-start")
+            self.objects_to_trace = self.AddressStack()
+            self.collect_roots()
+            self.gc_state = STATE_MARKING
+            # then continue with a first slice of marking
+        #
+        if self.gc_state == STATE_MARKING:
+            debug_start("gc-collect-step")
+            done = self.visit_objects_until(self.increment_step)
+            debug_print("marking step, done:", done)
+            debug_stop("gc-collect-step")
+            if not done:
+                self._record_major_pause(start)
+                return False
+            #
+            # The marking is almost done.  We still have to mark the
+            # objects reachable from the roots again, because the program
+            # can modify the roots without any write barrier.  This is
+            # usually a short pause.
+            self.collect_roots()
+            self.visit_all_objects()
+            self._major_collection_end_of_marking()
+            #
+            # Prepare the sweeping: from now on, the new objects are
+            # allocated in pages and lists that are not swept.
+            self.rawmalloced_objects_to_sweep = self.old_rawmalloced_objects
+            self.old_rawmalloced_objects = self.AddressStack()
+            self.ac.mass_free_prepare()
+            self.gc_state = STATE_SWEEPING
+            self._record_major_pause(start)
+            return False
+        #
+        ll_assert(self.gc_state == STATE_SWEEPING, "bad gc_state")
+        debug_start("gc-collect-step")
+        done = self.sweep_objects_until(self.sweep_step)
+        debug_print("sweeping step, done:", done)
+        debug_stop("gc-collect-step")
+        if not done:
+            self._record_major_pause(start)
+            return False
+        self.rawmalloced_objects_to_sweep.delete()
+        self.gc_state = STATE_SCANNING
+        debug_start("gc-collect-done")
+        self._major_collection_report()
+        self.stats[rgc.STAT_MAJOR_COLLECTIONS] += 1
+        self._record_major_pause(start)
+        debug_stop("gc-collect-done")
+        self._major_collection_end(reserving_size)
+        return True
+
+    def _record_major_pause(self, start):
+        self.stats[rgc.STAT_MAJOR_STEPS] += 1
+        self._record_pause(start, rgc.STAT_MAJOR_PAUSE_TOTAL,
+                           rgc.STAT_MAJOR_PAUSE_MAX, rgc.STAT_MAJOR_HISTOGRAM)
+
+    def _record_pause(self, start, index_total, index_max, index_histogram):
+        duration = intmask(read_timestamp() - start)
+        stats = self.stats
+        stats[index_total] += duration
+        if duration > stats[index_max]:
+            stats[index_max] = duration
+        bucket = 0
+        while duration > 1 and bucket < rgc.STAT_HISTOGRAM_SIZE - 1:
+            duration >>= 1
+            bucket += 1
+        stats[index_histogram + bucket] += 1
+
+    def get_stats(self, index):
+        if index == rgc.STAT_RAWMALLOCED_CURRENT:
+            return intmask(self.rawmalloced_total_size)
+        if index == rgc.STAT_NURSERY_SIZE:
+            return self.nursery_size
+        if index == rgc.STAT_TOTAL_MEMORY_USED:
+            return intmask(self.get_total_memory_used())
+        if 0 <= index < rgc.STAT_COUNT:
+            return self.stats[index]
+        return -1
+
+    def finish_major_collection_step(self, reserving_size=0):
+        """Finish the incremental major collection in progress, if any,
+        without interruption."""
+        while not self.major_collection_step(reserving_size):
+            pass
+
+    def major_collection_progress(self, reserving_size=0):
+        """To call after a minor collection, when the memory used is above
+        the threshold or an incremental major collection is in progress.
+        Does a step of the incremental major collection, or a whole major
+        collection if not 'incremental'.  If the program allocates faster
+        than we collect, the collection in progress is finished now.
+        """
+        if self.gc_state != STATE_SCANNING:
+            if (float(self.get_total_memory_used()) + reserving_size >
+                    self.next_major_collection_threshold *
+                    self.major_collection_threshold):
+                self.finish_major_collection_step(reserving_size)
+            else:
+                self.major_collection_step(reserving_size)
+        elif self.incremental:
+            self.major_collection_step(reserving_size)
+        else:
+            self.major_collection(reserving_size)
+
+    def visit_objects_until(self, limit):
+        # Visit objects from 'objects_to_trace' until the total size of the
+        # objects visited reaches 'limit'.  Returns True if the marking is
+        # complete.
+        pending = self.objects_to_trace
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        while pending.non_empty():
+            if limit <= 0:
+                return False
+            obj = pending.pop()
+            if self.header(obj).tid & (GCFLAG_VISITED | GCFLAG_NO_HEAP_PTRS):
+                continue
+            self.visit(obj)
+            limit -= raw_malloc_usage(size_gc_header + self.get_size(obj))
+        return True
+
+    def sweep_objects_until(self, limit):
+        # Free the unvisited objects, sweeping about 'limit' bytes of
+        # memory.  Returns True if the sweeping is complete.
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        pending = self.rawmalloced_objects_to_sweep
+        while pending.non_empty():
+            if limit <= 0:
+                return False
+            obj = pending.pop()
+            limit -= raw_malloc_usage(size_gc_header + self.get_size(obj))
+            self.free_rawmalloced_object_if_unvisited(obj)
+        #
+        max_pages = limit // self.ac.page_size
+        if max_pages <= 0:
+            max_pages = 1
+        return self.ac.mass_free_incremental(self._free_if_unvisited,
+                                             max_pages)
+
+    def _major_collection_start(self):
         debug_print()
         debug_print(".----------- Full collection ------------------")
         debug_print("| used before collection:")
@@ -1556,14 +1857,8 @@ class MiniMarkGC(MovingGCBase):
         ll_assert(self.nursery_free == self.nursery,
                   "nursery not empty in major_collection()")
         self.debug_check_consistency()
-        #
-        # Note that a major collection is non-moving.  The goal is only to
-        # find and free some of the objects allocated by the ArenaCollection.
-        # We first visit all objects and toggle the flag GCFLAG_VISITED on
-        # them, starting from the roots.
-        self.objects_to_trace = self.AddressStack()
-        self.collect_roots()
-        self.visit_all_objects()
+
+    def _major_collection_end_of_marking(self):
         #
         # Finalizer support: adds the flag GCFLAG_VISITED to all objects
         # with a finalizer and all objects reachable from there (and also
@@ -1580,16 +1875,7 @@ class MiniMarkGC(MovingGCBase):
         if self.old_objects_with_light_finalizers.non_empty():
             self.deal_with_old_objects_with_finalizers()
 
-        #
-        # Walk all rawmalloced objects and free the ones that don't
-        # have the GCFLAG_VISITED flag.
-        self.free_unvisited_rawmalloc_objects()
-        #
-        # Ask the ArenaCollection to visit all objects.  Free the ones
-        # that have not been visited above, and reset GCFLAG_VISITED on
-        # the others.
-        self.ac.mass_free(self._free_if_unvisited)
-        #
+    def _major_collection_report(self):
         # We also need to reset the GCFLAG_VISITED on prebuilt GC objects.
         self.prebuilt_root_objects.foreach(self._reset_gcflag_visited, None)
         #
@@ -1604,8 +1890,8 @@ class MiniMarkGC(MovingGCBase):
         debug_print("| number of major collects:        ",
                     self.num_major_collects)
         debug_print("`----------------------------------------------")
-        debug_stop("gc-collect")
-        #
+
+    def _major_collection_end(self, reserving_size):
         # Set the threshold for the next major collection to be when we
         # have allocated 'major_collection_threshold' times more than
         # we currently have -- but no more than 'max_delta' more than
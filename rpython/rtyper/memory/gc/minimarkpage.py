@@ -105,6 +105,15 @@ class ArenaCollection(object):
         self.full_page_for_size = lltype.malloc(rffi.CArray(PAGE_PTR), length,
                                                 flavor='raw', zero=True,
                                                 immortal=True)
+        # these two are used in mass_free_incremental() only: the pages
+        # that remain to be walked
+        self.old_page_for_size = lltype.malloc(rffi.CArray(PAGE_PTR), length,
+                                               flavor='raw', zero=True,
+                                               immortal=True)
+        self.old_full_page_for_size = lltype.malloc(rffi.CArray(PAGE_PTR),
+                                                    length, flavor='raw',
+                                                    zero=True, immortal=True)
+        self.size_class_with_old_pages = -1
         self.nblocks_for_size = lltype.malloc(rffi.CArray(lltype.Signed),
                                               length, flavor='raw',
                                               immortal=True)
@@ -301,8 +310,6 @@ class ArenaCollection(object):
         """For each object, if ok_to_free_func(obj) returns True, then free
         the object.
         """
-        self.total_memory_used = r_uint(0)
-        #
         # For each size class:
         size_class = self.small_request_threshold >> WORD_POWER_2
         while size_class >= 1:
@@ -317,6 +324,96 @@ class ArenaCollection(object):
             #
             size_class -= 1
         #
+        self.rehash_arena_lists()
+
+
+    def mass_free_prepare(self):
+        """Prepare calls to mass_free_incremental(): moves the chained lists
+        of pages into 'old_page_for_size' and 'old_full_page_for_size'.
+        The objects allocated from now on go to new pages, which will not
+        be walked by mass_free_incremental().  'total_memory_used' keeps
+        counting the blocks of these pages until they are freed.
+        """
+        size_class = self.small_request_threshold >> WORD_POWER_2
+        self.size_class_with_old_pages = size_class
+        while size_class >= 1:
+            self.old_page_for_size[size_class] = (
+                self.page_for_size[size_class])
+            self.old_full_page_for_size[size_class] = (
+                self.full_page_for_size[size_class])
+            self.page_for_size[size_class] = PAGE_NULL
+            self.full_page_for_size[size_class] = PAGE_NULL
+            size_class -= 1
+
+
+    def mass_free_incremental(self, ok_to_free_func, max_pages):
+        """Like mass_free(), but walk at most 'max_pages' pages from the
+        ones set aside by mass_free_prepare().  Returns True if all these
+        pages have been walked, or False if it must be called again.
+        """
+        size_class = self.size_class_with_old_pages
+        while size_class >= 1:
+            max_pages = self.mass_free_in_old_pages(size_class,
+                                                    ok_to_free_func,
+                                                    max_pages)
+            if max_pages <= 0:
+                self.size_class_with_old_pages = size_class
+                return False
+            size_class -= 1
+        #
+        if size_class == 0:
+            self.rehash_arena_lists()
+            self.size_class_with_old_pages = -1
+        return True
+
+
+    def mass_free_in_old_pages(self, size_class, ok_to_free_func, max_pages):
+        # Walk up to 'max_pages' pages of the old lists of 'size_class',
+        # and put them back into the regular lists.  Returns the number of
+        # pages that could still be walked.
+        nblocks = self.nblocks_for_size[size_class]
+        block_size = size_class * WORD
+        #
+        step = 0
+        while step < 2:
+            if step == 0:
+                page = self.old_full_page_for_size[size_class]
+            else:
+                page = self.old_page_for_size[size_class]
+            #
+            while page != PAGE_NULL:
+                if max_pages <= 0:
+                    break
+                max_pages -= 1
+                #
+                surviving = self.walk_page(page, block_size, ok_to_free_func)
+                nextpage = page.nextpage
+                #
+                if surviving == nblocks:
+                    ll_assert(step == 0,
+                              "A non-full page became full while freeing")
+                    page.nextpage = self.full_page_for_size[size_class]
+                    self.full_page_for_size[size_class] = page
+                elif surviving > 0:
+                    page.nextpage = self.page_for_size[size_class]
+                    self.page_for_size[size_class] = page
+                else:
+                    self.free_page(page)
+                #
+                page = nextpage
+            #
+            if step == 0:
+                self.old_full_page_for_size[size_class] = page
+            else:
+                self.old_page_for_size[size_class] = page
+            if page != PAGE_NULL:
+                return 0
+            step += 1
+        #
+        return max_pages
+
+
+    def rehash_arena_lists(self):
         # Rehash arenas into the correct arenas_lists[i].  If
         # 'self.current_arena' contains an arena too, it remains there.
         (self.old_arenas_lists, self.arenas_lists) = (
@@ -429,6 +526,7 @@ class ArenaCollection(object):
         obj = llarena.getfakearenaaddress(llmemory.cast_ptr_to_adr(page))
         obj += self.hdrsize
         surviving = 0    # initially
+        freed = 0
         skip_free_blocks = page.nfree
         #
         while True:
@@ -466,6 +564,7 @@ class ArenaCollection(object):
                     #
                     # Update the number of free objects in the page.
                     page.nfree += 1
+                    freed += 1
                     #
                 else:
                     # The object survives.
@@ -473,8 +572,10 @@ class ArenaCollection(object):
             #
             obj += block_size
         #
-        # Update the global total size of objects.
-        self.total_memory_used += r_uint(surviving * block_size)
+        # Update the global total size of objects.  Only subtract what was
+        # freed: during an incremental sweep, the pages not walked yet and
+        # the new pages must still be counted.
+        self.total_memory_used -= r_uint(freed * block_size)
         #
         # Return the number of surviving objects.
         return surviving
@@ -42,3 +42,21 @@ class SimpleArenaCollection(object):
             else:
                 self.all_objects.append((rawobj, nsize))
                 self.total_memory_used += nsize
+
+    def mass_free_prepare(self):
+        self.old_all_objects = self.all_objects
+        self.all_objects = []
+
+    def mass_free_incremental(self, ok_to_free_func, max_pages):
+        old = self.old_all_objects
+        while old:
+            if max_pages <= 0:
+                return False
+            max_pages -= 1
+            rawobj, nsize = old.pop()
+            if ok_to_free_func(rawobj):
+                llarena.arena_free(rawobj)
+                self.total_memory_used -= nsize
+            else:
+                self.all_objects.append((rawobj, nsize))
+        return True
@@ -580,6 +580,171 @@ class TestMiniMarkGCSimple(DirectGCTest):
     test_writebarrier_before_copy_preserving_cards.GC_PARAMS = {
         "card_page_indices": 4}
 
+    def test_get_stats(self):
+        from rpython.rlib import rgc
+        stats = self.gc.get_stats
+        assert stats(rgc.STAT_NURSERY_SIZE) == self.gc.nursery_size
+        assert stats(rgc.STAT_COUNT) == -1
+        minor = stats(rgc.STAT_MINOR_COLLECTIONS)
+        major = stats(rgc.STAT_MAJOR_COLLECTIONS)
+        promoted = stats(rgc.STAT_BYTES_PROMOTED)
+        #
+        self.stackroots.append(self.malloc(S))
+        self.gc.collect(0)
+        assert stats(rgc.STAT_MINOR_COLLECTIONS) == minor + 1
+        assert stats(rgc.STAT_MAJOR_COLLECTIONS) == major
+        assert stats(rgc.STAT_BYTES_PROMOTED) > promoted
+        self.gc.collect()
+        assert stats(rgc.STAT_MINOR_COLLECTIONS) == minor + 2
+        assert stats(rgc.STAT_MAJOR_COLLECTIONS) == major + 1
+        assert stats(rgc.STAT_MAJOR_STEPS) >= 1
+        #
+        histogram = [stats(rgc.STAT_MINOR_HISTOGRAM + i)
+                     for i in range(rgc.STAT_HISTOGRAM_SIZE)]
+        assert sum(histogram) == stats(rgc.STAT_MINOR_COLLECTIONS)
+        assert (stats(rgc.STAT_MINOR_PAUSE_TOTAL) >=
+                stats(rgc.STAT_MINOR_PAUSE_MAX) >= 0)
+        #
+        rawmalloced = stats(rgc.STAT_RAWMALLOCED_TOTAL)
+        self.stackroots.append(self.malloc(VAR, self.gc.nonlarge_max + 1))
+        assert stats(rgc.STAT_RAWMALLOCED_TOTAL) > rawmalloced
+        assert stats(rgc.STAT_RAWMALLOCED_CURRENT) > 0
+        assert stats(rgc.STAT_TOTAL_MEMORY_USED) > 0
+        #
+        self.gc.collect()
+        p = self.malloc(S)
+        self.writearray(self.stackroots[-1], 1, p)
+        cards = stats(rgc.STAT_CARDS_MARKED)
+        self.gc.collect(0)
+        assert stats(rgc.STAT_CARDS_MARKED) == cards + 1
+    test_get_stats.GC_PARAMS = {"card_page_indices": 4}
+
 
 class TestMiniMarkGCFull(DirectGCTest):
     from rpython.rtyper.memory.gc.minimark import MiniMarkGC as GCClass
+
+class TestMiniMarkGCIncremental(TestMiniMarkGCFull):
+    GC_PARAMS = {'incremental': True,
+                 'increment_step': 4*WORD,
+                 'sweep_step': 1,
+                 }
+
+    def finish_incremental(self):
+        from rpython.rtyper.memory.gc import minimark
+        while self.gc.gc_state != minimark.STATE_SCANNING:
+            self.gc.minor_collection()
+            self.gc.major_collection_step()
+
+    def test_incremental_write_barrier(self):
+        from rpython.rtyper.memory.gc import minimark
+        a = self.malloc(S)
+        b = self.malloc(S)
+        c = self.malloc(S)
+        b.x = 42
+        self.write(a, 'next', b)
+        self.stackroots.append(a)
+        self.stackroots.append(c)
+        self.gc.collect()
+        a, c = self.stackroots
+        b = a.next
+        #
+        # start marking, and visit only one root
+        self.gc.major_collection_step()
+        assert self.gc.gc_state == minimark.STATE_MARKING
+        hdr_a = self.gc.header(llmemory.cast_ptr_to_adr(a))
+        hdr_c = self.gc.header(llmemory.cast_ptr_to_adr(c))
+        if hdr_a.tid & minimark.GCFLAG_VISITED:
+            a, c = c, a     # depends on the order of the stack roots
+            hdr_a, hdr_c = hdr_c, hdr_a
+            self.write(a, 'next', b)
+            c.next = lltype.nullptr(S)
+        assert hdr_c.tid & minimark.GCFLAG_VISITED
+        assert not hdr_a.tid & minimark.GCFLAG_VISITED
+        #
+        # move 'b' from the non-marked 'a' to the already-marked 'c'
+        self.write(c, 'next', b)
+        self.write(a, 'next', lltype.nullptr(S))
+        del b
+        self.finish_incremental()
+        assert c.next.x == 42
+    test_incremental_write_barrier.GC_PARAMS = {'increment_step': 1}
+
+    def test_incremental_new_objects(self):
+        from rpython.rtyper.memory.gc import minimark
+        k = self.malloc(S)
+        self.stackroots.append(k)
+        for i in range(20):
+            p = self.malloc(S)
+            p.x = i
+            self.write(p, 'next', self.stackroots[0].next)
+            self.write(self.stackroots[0], 'next', p)
+        self.gc.collect()
+        #
+        self.gc.major_collection_step()
+        assert self.gc.gc_state == minimark.STATE_MARKING
+        # objects allocated and made old while marking survive
+        for i in range(20, 40):
+            p = self.malloc(S)
+            p.x = i
+            self.write(p, 'next', self.stackroots[0].next)
+            self.write(self.stackroots[0], 'next', p)
+            self.gc.minor_collection()
+            self.gc.major_collection_step()
+        large = self.malloc(VAR, self.gc.nonlarge_max + 1)
+        self.stackroots.append(large)
+        self.finish_incremental()
+        p = self.stackroots[0].next
+        for i in range(39, -1, -1):
+            assert p.x == i
+            p = p.next
+        assert not p
+        assert len(self.stackroots[1]) == self.gc.nonlarge_max + 1
+
+    def test_incremental_then_full_collection(self):
+        from rpython.rtyper.memory.gc import minimark
+        self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        garbage = self.malloc(S)
+        self.gc.minor_collection()
+        self.gc.major_collection_step()
+        assert self.gc.gc_state != minimark.STATE_SCANNING
+        num = self.gc.num_major_collects
+        self.gc.collect()
+        assert self.gc.gc_state == minimark.STATE_SCANNING
+        assert self.gc.num_major_collects == num + 2
+        py.test.raises(RuntimeError, 'garbage.x')
+
+    def test_incremental_large_mallocs(self):
+        from rpython.rtyper.memory.gc import minimark
+        # a live heap whose marking takes many steps
+        self.stackroots.append(self.malloc(S))
+        for i in range(300):
+            p = self.malloc(S)
+            self.write(p, 'next', self.stackroots[0].next)
+            self.write(self.stackroots[0], 'next', p)
+        self.gc.collect()
+        num = self.gc.num_major_collects
+        self.gc.major_collection_step()
+        assert self.gc.gc_state == minimark.STATE_MARKING
+        limit = (self.gc.next_major_collection_threshold *
+                 self.gc.major_collection_threshold)
+        # every large malloc is over the threshold and does a step; the
+        # collection must be finished once the memory grew too much,
+        # instead of continuing with one tiny step per malloc
+        count = 0
+        maxused = 0
+        while self.gc.num_major_collects == num and count < 1000:
+            self.stackroots.append(self.malloc(VAR, self.gc.nonlarge_max + 1))
+            count += 1
+            maxused = max(maxused, self.gc.get_total_memory_used())
+        assert self.gc.num_major_collects == num + 1
+        assert maxused < limit * 1.1
+
+
+class TestMiniMarkGCIncrementalSimple(TestMiniMarkGCSimple):
+    GC_PARAMS = {'ArenaCollectionClass':
+                     TestMiniMarkGCSimple.GC_PARAMS['ArenaCollectionClass'],
+                 'incremental': True,
+                 'increment_step': 4*WORD,
+                 'sweep_step': 1,
+                 }
@@ -291,6 +291,20 @@ def test_mass_free_partial_remains():
     chkob(ac, 0, 4*WORD, page.freeblock)
     assert freepages(ac) == NULL
 
+def test_mass_free_incremental_total_memory_used():
+    pagesize = hdrsize + 7*WORD
+    ac = arena_collection_for_test(pagesize, "## ", fill_with_objects=2)
+    ac.total_memory_used += 6*2*WORD     # the objects in the two pages
+    ac.mass_free_prepare()
+    assert ac.total_memory_used == 6*2*WORD
+    obj = ac.malloc(2*WORD)
+    assert ac.total_memory_used == 7*2*WORD
+    ok_to_free = OkToFree(ac, lambda obj: obj != ac._startpageaddr + hdrsize)
+    assert not ac.mass_free_incremental(ok_to_free, 1)
+    assert ac.total_memory_used == 5*2*WORD
+    assert ac.mass_free_incremental(ok_to_free, 10)
+    assert ac.total_memory_used == 2*2*WORD
+
 def test_mass_free_emptied_page():
     pagesize = hdrsize + 7*WORD
     ac = arena_collection_for_test(pagesize, "2", fill_with_objects=2)
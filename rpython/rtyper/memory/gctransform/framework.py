@@ -428,6 +428,10 @@ class BaseFrameworkGCTransformer(GCTransformer):
                                            lltype.Ptr(rgc.ARRAY_OF_CHAR)),
                                        minimal_transform=False)
 
+        self.get_stats_ptr = getfn(GCClass.get_stats.im_func,
+                                   [s_gc, annmodel.SomeInteger()],
+                                   annmodel.SomeInteger())
+
         self.set_max_heap_size_ptr = getfn(GCClass.set_max_heap_size.im_func,
                                            [s_gc,
                                             annmodel.SomeInteger(nonneg=True)],
@@ -1066,6 +1070,12 @@ class BaseFrameworkGCTransformer(GCTransformer):
                   resultvar=hop.spaceop.result)
         self.pop_roots(hop, livevars)
 
+    def gct_gc_get_stats(self, hop):
+        [v_index] = hop.spaceop.args
+        hop.genop("direct_call",
+                  [self.get_stats_ptr, self.c_const_gc, v_index],
+                  resultvar=hop.spaceop.result)
+
     def gct_gc_typeids_z(self, hop):
         livevars = self.push_roots(hop)
         hop.genop("direct_call",
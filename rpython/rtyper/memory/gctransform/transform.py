@@ -350,6 +350,10 @@ class BaseGCTransformer(object):
         # must be implemented in the various GCs
         raise NotImplementedError
 
+    def gct_gc_get_stats(self, hop):
+        # only the framework GCs record statistics
+        return hop.cast_result(rmodel.inputconst(lltype.Signed, -1))
+
     def gct_gc_id(self, hop):
         # this assumes a non-moving GC.  Moving GCs need to override this
         hop.rename('cast_ptr_to_int')
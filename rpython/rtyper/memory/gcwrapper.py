@@ -124,6 +124,9 @@ class GCManagedHeap(object):
     def can_move(self, addr):
         return self.gc.can_move(addr)
 
+    def get_stats(self, index):
+        return self.gc.get_stats(index)
+
     def weakref_create_getlazy(self, objgetter):
         # we have to be lazy in reading the llinterp variable containing
         # the 'obj' pointer, because the gc.malloc() call below could
@@ -943,3 +943,8 @@ class TestMiniMarkGC(TestSemiSpaceGC):
 
 class TestMiniMarkGCCardMarking(TestMiniMarkGC):
     GC_PARAMS = {'card_page_indices': 4}
+
+class TestMiniMarkGCIncremental(TestMiniMarkGC):
+    GC_PARAMS = {'incremental': True,
+                 'increment_step': 4*WORD,
+                 'sweep_step': 1}
@@ -1259,6 +1259,24 @@ class TestMiniMarkGC(TestHybridGC):
         res = run([])
         assert res == 123
 
+    def define_get_stats(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            minor = rgc.get_stats(rgc.STAT_MINOR_COLLECTIONS)
+            major = rgc.get_stats(rgc.STAT_MAJOR_COLLECTIONS)
+            s = lltype.malloc(S)
+            rgc.collect()
+            s.x = rgc.get_stats(rgc.STAT_BYTES_PROMOTED)
+            return ((rgc.get_stats(rgc.STAT_MINOR_COLLECTIONS) - minor) * 100 +
+                    (rgc.get_stats(rgc.STAT_MAJOR_COLLECTIONS) - major) * 10 +
+                    (s.x > 0))
+        return f
+
+    def test_get_stats(self):
+        run = self.runner("get_stats")
+        res = run([])
+        assert res == 111
+
 # ________________________________________________________________
 # tagged pointers
 
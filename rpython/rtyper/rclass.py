@@ -214,6 +214,18 @@ class AbstractInstanceRepr(Repr):
             hints['immutable_fields'] = accessor
         return hints
 
+    def _check_for_taint_hints(self, hints):
+        # '_jit_taint_fields_' lists the fields of this class that only
+        # hold taint metadata, which the JIT optimizer knows about (see
+        # jit/metainterp/optimizeopt/taint.py)
+        taint_fields = self.classdef.classdesc.classdict.get(
+            '_jit_taint_fields_')
+        if taint_fields is not None:
+            hints = hints.copy()
+            hints['taint_fields'] = tuple(['inst_' + name
+                                           for name in taint_fields.value])
+        return hints
+
     def __repr__(self):
         if self.classdef is None:
             clsname = 'object'
@@ -975,6 +975,24 @@ class BaseTestRclass(BaseRtypingTest):
 
 class TestLLtype(BaseTestRclass, LLRtypeMixin):
 
+    def test_taint_fields(self):
+        class A(object):
+            _jit_taint_fields_ = ["taints"]
+            def __init__(self, x):
+                self.x = x
+                self.taints = None
+        class B(A):
+            pass
+
+        def f():
+            a = A(3)
+            return B(4)
+        t, typer, graph = self.gengraph(f, [])
+        B_TYPE = graph.getreturnvar().concretetype.TO
+        A_TYPE = B_TYPE.super
+        assert A_TYPE._hints["taint_fields"] == ("inst_taints",)
+        assert "taint_fields" not in B_TYPE._hints
+
     def test__del__(self):
         class A(object):
             def __init__(self):
@@ -0,0 +1,79 @@
+"""Measure the latency of a request-like loop running on top of a large,
+long-lived heap.  Each "request" allocates a number of short-lived
+objects and replaces a few entries of the live data; the benchmark
+prints the median, 99th percentile and maximum duration of a request.
+With a non-incremental collector the maximum is dominated by the major
+collections, which have to mark the whole live heap in one go.
+
+Compare PYPY_GC_INCREMENTAL=0 and PYPY_GC_INCREMENTAL=1 when running the
+translated targetgcpausebench.
+"""
+import os, time
+from rpython.rlib.listsort import TimSort
+
+USAGE = """gcpausebench [num_requests] [--live=N] [--garbage=N]"""
+
+
+class Node(object):
+
+    def __init__(self, value, next=None):
+        self.value = value
+        self.next = next
+
+def make_chain(length, start):
+    node = None
+    for i in range(length):
+        node = Node(start + i, node)
+    return node
+
+def request(live, index, garbage):
+    # short-lived objects, most of which die in the nursery
+    chain = make_chain(garbage, index)
+    total = 0
+    while chain is not None:
+        total += chain.value
+        chain = chain.next
+    # a few modifications of the old live data
+    live[index % len(live)] = make_chain(8, total)
+    return total
+
+def run(num_requests, live_size, garbage):
+    live = [make_chain(16, i) for i in range(live_size)]
+    durations = [0.0] * num_requests
+    for i in range(num_requests):
+        t0 = time.time()
+        request(live, i, garbage)
+        durations[i] = time.time() - t0
+    TimSort(durations).sort()
+    p50 = durations[num_requests // 2]
+    p99 = durations[(num_requests * 99) // 100]
+    print "requests: %d, live chains: %d" % (num_requests, live_size)
+    print "p50: %.3f ms  p99: %.3f ms  max: %.3f ms" % (
+        p50 * 1000.0, p99 * 1000.0, durations[-1] * 1000.0)
+
+def argerror():
+    print "Usage:"
+    print "   ", USAGE
+    return 2
+
+def entry_point(argv):
+    num_requests = 20000
+    live_size = 200000
+    garbage = 1000
+    for arg in argv[1:]:
+        if arg.startswith('--live='):
+            live_size = int(arg[len('--live='):])
+        elif arg.startswith('--garbage='):
+            garbage = int(arg[len('--garbage='):])
+        elif arg.isdigit():
+            num_requests = int(arg)
+        else:
+            return argerror()
+    if num_requests <= 0 or live_size <= 0 or garbage <= 0:
+        return argerror()
+    run(num_requests, live_size, garbage)
+    return 0
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(entry_point(sys.argv))
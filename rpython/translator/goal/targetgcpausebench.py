@@ -0,0 +1,6 @@
+from rpython.translator.goal import gcpausebench
+
+# _____ Define and setup target ___
+
+def target(*args):
+    return gcpausebench.entry_point, None
@@ -431,7 +431,9 @@ class _Unmarshaller:
 def _read(self, n):
     pos = self.bufpos
     newpos = pos + n
-    if newpos > len(self.bufstr): raise EOFError
+    if newpos > len(self.bufstr):
+        self.needed = newpos     # for sandlib.MessageDecoder
+        raise EOFError
     ret = self.bufstr[pos : newpos]
     self.bufpos = newpos
     return ret
@@ -489,6 +491,7 @@ class _FastUnmarshaller:
     def __init__(self, buffer):
         self.bufstr = buffer
         self.bufpos = 0
+        self.needed = 0
         self._stringtable = []
 
     def load(self):
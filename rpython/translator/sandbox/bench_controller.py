@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+
+"""Measure the number of syscall round-trips per second that the
+controller can serve, with 1, 10 and 100 concurrent subprocesses.
+Each subprocess is a small fake sandboxed program speaking the same
+protocol as a --sandbox executable, so that only the controller side
+is measured.  It compares one SandboxedProc.handle_forever() thread per
+subprocess with a single SandboxController event loop.
+
+Usage:
+    bench_controller.py [roundtrips-per-process]
+"""
+
+import sys, time, thread
+from rpython.translator.sandbox.sandlib import SandboxedProc
+from rpython.translator.sandbox.sandlib import SandboxController
+
+CHILD = r'''
+import os, marshal
+request = marshal.dumps("ll_os.ll_os_getuid") + marshal.dumps(())
+for i in range(%d):
+    os.write(1, request)
+    answer = ""
+    while len(answer) < 10:    # two marshalled ints: error code and uid
+        data = os.read(0, 10 - len(answer))
+        if not data:
+            raise SystemExit(1)
+        answer += data
+'''
+
+
+class FakeProc(SandboxedProc):
+    def do_ll_os__ll_os_getuid(self):
+        return 1000
+
+
+def start(n, roundtrips):
+    args = [sys.executable, '-c', CHILD % roundtrips]
+    return [FakeProc(args) for i in range(n)]
+
+def run_threads(procs):
+    lock = thread.allocate_lock()
+    pending = [len(procs)]
+    def serve(proc):
+        proc.handle_forever()
+        lock.acquire()
+        pending[0] -= 1
+        lock.release()
+    for proc in procs:
+        thread.start_new_thread(serve, (proc,))
+    while pending[0]:
+        time.sleep(0.001)
+
+def run_controller(procs):
+    SandboxController(procs).run()
+
+def measure(runner, n, roundtrips):
+    procs = start(n, roundtrips)
+    t0 = time.time()
+    runner(procs)
+    return n * roundtrips / (time.time() - t0)
+
+def main(roundtrips):
+    print '%10s %20s %20s' % ('processes', 'threads (rt/s)', 'controller (rt/s)')
+    for n in [1, 10, 100]:
+        a = measure(run_threads, n, roundtrips)
+        b = measure(run_controller, n, roundtrips)
+        print '%10d %20.0f %20.0f' % (n, a, b)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(2000)
@@ -235,54 +235,71 @@ class SandboxedProc(object):
             raise OSError("the sandboxed subprocess exited with code %d" % (
                 returncode,))
 
+    def enable_os_level_sandboxing(self):
+        # rationale: we wait until the child process started completely,
+        # letting the C library do any system calls it wants for
+        # initialization.  When the RPython code starts up, it quickly
+        # does its first system call.  At this point we turn seccomp on.
+        f = open('/proc/%d/seccomp' % self.popen.pid, 'w')
+        print >> f, 1
+        f.close()
+
     def handle_until_return(self):
         child_stdin  = self.popen.stdin
         child_stdout = self.popen.stdout
         if self.os_level_sandboxing and sys.platform.startswith('linux'):
-            # rationale: we wait until the child process started completely,
-            # letting the C library do any system calls it wants for
-            # initialization.  When the RPython code starts up, it quickly
-            # does its first system call.  At this point we turn seccomp on.
             import select
             select.select([child_stdout], [], [])
-            f = open('/proc/%d/seccomp' % self.popen.pid, 'w')
-            print >> f, 1
-            f.close()
+            self.enable_os_level_sandboxing()
         while True:
             try:
                 fnname = read_message(child_stdout)
                 args   = read_message(child_stdout)
             except EOFError, e:
                 break
-            if self.log and not self.is_spam(fnname, *args):
-                self.log.call('%s(%s)' % (fnname,
-                                     ', '.join([shortrepr(x) for x in args])))
-            try:
-                answer, resulttype = self.handle_message(fnname, *args)
-            except Exception, e:
-                tb = sys.exc_info()[2]
-                write_exception(child_stdin, e, tb)
-                if self.log:
-                    if str(e):
-                        self.log.exception('%s: %s' % (e.__class__.__name__, e))
-                    else:
-                        self.log.exception('%s' % (e.__class__.__name__,))
-            else:
-                if self.log and not self.is_spam(fnname, *args):
-                    self.log.result(shortrepr(answer))
-                try:
-                    write_message(child_stdin, 0)  # error code - 0 for ok
-                    write_message(child_stdin, answer, resulttype)
-                    child_stdin.flush()
-                except (IOError, OSError):
-                    # likely cause: subprocess is dead, child_stdin closed
-                    if self.poll() is not None:
-                        break
-                    else:
-                        raise
+            if not self.handle_messages([(fnname, args)]):
+                break
         returncode = self.wait()
         return returncode
 
+    def handle_messages(self, messages):
+        """Answer a batch of already-decoded (fnname, args) requests.
+        All the answers are written to the subprocess' stdin before it
+        is flushed once.  Returns False if the subprocess went away.
+        """
+        child_stdin = self.popen.stdin
+        try:
+            for fnname, args in messages:
+                self.handle_one_message(child_stdin, fnname, args)
+            child_stdin.flush()
+        except (IOError, OSError):
+            # likely cause: subprocess is dead, child_stdin closed
+            if self.poll() is not None:
+                return False
+            else:
+                raise
+        return True
+
+    def handle_one_message(self, child_stdin, fnname, args):
+        if self.log and not self.is_spam(fnname, *args):
+            self.log.call('%s(%s)' % (fnname,
+                                 ', '.join([shortrepr(x) for x in args])))
+        try:
+            answer, resulttype = self.handle_message(fnname, *args)
+        except Exception, e:
+            tb = sys.exc_info()[2]
+            write_exception(child_stdin, e, tb)
+            if self.log:
+                if str(e):
+                    self.log.exception('%s: %s' % (e.__class__.__name__, e))
+                else:
+                    self.log.exception('%s' % (e.__class__.__name__,))
+        else:
+            if self.log and not self.is_spam(fnname, *args):
+                self.log.result(shortrepr(answer))
+            write_message(child_stdin, 0)  # error code - 0 for ok
+            write_message(child_stdin, answer, resulttype)
+
     def is_spam(self, fnname, *args):
         # To hide the spamming amounts of reads and writes to stdin and stdout
         # in interactive sessions
@@ -576,3 +593,128 @@ class VirtualizedSocketProc(VirtualizedSandboxedProc):
         return super(VirtualizedSocketProc, self).do_ll_os__ll_os_write(
             fd, data)
 
+
+
+class MessageDecoder(object):
+    """Incrementally decode the (fnname, args) requests sent by a
+    sandboxed subprocess, from data read in arbitrary chunks.  The data
+    of an incomplete request is only decoded again once enough of it is
+    there to complete the string that was cut, so a large request read
+    in many chunks is decoded once.
+    """
+    def __init__(self):
+        self.chunks = []
+        self.length = 0    # the total length of the chunks
+        self.needed = 1    # the length before trying to decode again
+
+    def feed(self, data):
+        self.chunks.append(data)
+        self.length += len(data)
+
+    def pop_messages(self):
+        """Return the list of all complete requests received so far."""
+        messages = []
+        if self.length < self.needed:
+            return messages
+        buf = ''.join(self.chunks)
+        pos = 0
+        needed = 0
+        while pos < len(buf):
+            um = marshal._FastUnmarshaller(buf)
+            um.bufpos = pos
+            try:
+                fnname = um.load()
+                args   = um.load()
+            except EOFError:
+                needed = um.needed     # incomplete, wait for more data
+                break
+            messages.append((fnname, args))
+            pos = um.bufpos
+        if pos:
+            buf = buf[pos:]
+        self.chunks = [buf]
+        self.length = len(buf)
+        self.needed = max(needed - pos, self.length + 1)
+        return messages
+
+
+class SandboxController(object):
+    """Serve the requests of many sandboxed subprocesses from a single
+    event loop.  The pipes of all the subprocesses are watched with
+    poll() (or select() where poll() is not available); every request
+    found in a pipe is answered, and all the answers for one subprocess
+    are sent with a single flush.
+    """
+    readsize = 65536
+
+    def __init__(self, procs=()):
+        self.procs = {}         # {fd: (proc, decoder)}
+        self.returncodes = {}   # {proc: returncode}
+        self.seccomp_pending = {}
+        self.poller = None
+        import select
+        if hasattr(select, 'poll'):
+            self.poller = select.poll()
+        for proc in procs:
+            self.add(proc)
+
+    def add(self, proc):
+        fd = proc.popen.stdout.fileno()
+        self.procs[fd] = (proc, MessageDecoder())
+        if proc.os_level_sandboxing and sys.platform.startswith('linux'):
+            self.seccomp_pending[fd] = True
+        if self.poller is not None:
+            import select
+            self.poller.register(fd, select.POLLIN | select.POLLHUP |
+                                     select.POLLERR)
+
+    def _wait_readable(self, timeout):
+        import select
+        if self.poller is not None:
+            if timeout is not None:
+                timeout = int(timeout * 1000)
+            return [fd for fd, event in self.poller.poll(timeout)]
+        else:
+            iwtd, owtd, ewtd = select.select(self.procs.keys(), [], [],
+                                             timeout)
+            return iwtd
+
+    def _finish(self, fd):
+        proc, decoder = self.procs.pop(fd)
+        self.seccomp_pending.pop(fd, None)
+        if self.poller is not None:
+            self.poller.unregister(fd)
+        self.returncodes[proc] = proc.wait()
+
+    def handle_ready(self, timeout=None):
+        """Wait until at least one subprocess sends data, and answer all
+        the complete requests received.  Returns the number of requests
+        handled.
+        """
+        count = 0
+        for fd in self._wait_readable(timeout):
+            proc, decoder = self.procs[fd]
+            if self.seccomp_pending.pop(fd, False):
+                proc.enable_os_level_sandboxing()
+            try:
+                data = os.read(fd, self.readsize)
+            except OSError:
+                data = ''
+            if not data:
+                self._finish(fd)
+                continue
+            decoder.feed(data)
+            messages = decoder.pop_messages()
+            if messages:
+                count += len(messages)
+                if not proc.handle_messages(messages):
+                    self._finish(fd)
+        return count
+
+    def run(self):
+        """Serve all the subprocesses until they have all exited.
+        Returns a dict {proc: returncode}.
+        """
+        while self.procs:
+            self.handle_ready()
+        return self.returncodes
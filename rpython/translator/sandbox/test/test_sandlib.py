@@ -6,6 +6,9 @@ from rpython.translator.sandbox.sandlib import SandboxedProc
 from rpython.translator.sandbox.sandlib import SimpleIOSandboxedProc
 from rpython.translator.sandbox.sandlib import VirtualizedSandboxedProc
 from rpython.translator.sandbox.sandlib import VirtualizedSocketProc
+from rpython.translator.sandbox.sandlib import MessageDecoder
+from rpython.translator.sandbox.sandlib import SandboxController
+from rpython.translator.sandbox import _marshal as marshal
 from rpython.translator.sandbox.test.test_sandbox import compile
 from rpython.translator.sandbox.vfs import Dir, File, RealDir, RealFile
 
@@ -63,6 +66,61 @@ def test_lib():
     proc.handle_forever()
     assert proc.seen == len(proc.expected)
 
+def test_message_decoder():
+    data = (marshal.dumps("ll_os.ll_os_open") +
+            marshal.dumps(("/tmp/foobar", os.O_RDONLY, 0777)) +
+            marshal.dumps("ll_os.ll_os_close") +
+            marshal.dumps((77,)))
+    for cut in range(len(data) + 1):
+        decoder = MessageDecoder()
+        decoder.feed(data[:cut])
+        messages = decoder.pop_messages()
+        decoder.feed(data[cut:])
+        messages += decoder.pop_messages()
+        assert messages == [
+            ("ll_os.ll_os_open", ("/tmp/foobar", os.O_RDONLY, 0777)),
+            ("ll_os.ll_os_close", (77,)),
+            ]
+        assert decoder.length == 0
+
+def test_message_decoder_large():
+    data = (marshal.dumps("ll_os.ll_os_write") +
+            marshal.dumps((1, "x" * 1000000)))
+    decoder = MessageDecoder()
+    decoder.feed(data[:100])
+    assert decoder.pop_messages() == []
+    # the length of the string is known: no decoding before its end
+    assert decoder.needed == len(data)
+    for i in range(100, len(data) - 1000, 1000):
+        decoder.feed(data[i:i + 1000])
+        assert decoder.pop_messages() == []
+        assert len(decoder.chunks) > 1
+    decoder.feed(data[i + 1000:])
+    assert decoder.pop_messages() == [("ll_os.ll_os_write",
+                                       (1, "x" * 1000000))]
+
+def test_controller():
+    def entry_point(argv):
+        fd = os.open(argv[1], os.O_RDONLY, 0777)
+        res = os.read(fd, 123)
+        assert res == argv[1]
+        os.close(fd)
+        return 0
+    exe = compile(entry_point)
+
+    procs = []
+    for i in range(5):
+        name = "/tmp/foobar%d" % i
+        procs.append(MockSandboxedProc([exe, name], expected = [
+            ("open", (name, os.O_RDONLY, 0777), 70 + i),
+            ("read", (70 + i, 123), name),
+            ("close", (70 + i,), None),
+            ]))
+    returncodes = SandboxController(procs).run()
+    for proc in procs:
+        assert returncodes[proc] == 0
+        assert proc.seen == len(proc.expected)
+
 def test_foobar():
     py.test.skip("to be updated")
     foobar = rffi.llexternal("foobar", [rffi.CCHARP], rffi.LONG)
@@ -106,3 +106,71 @@ def test_realdir_exclude():
     py.test.raises(OSError, v_xdir.join, 'test_realdir_exclude.No')
     py.test.raises(OSError, v_xdir.join, 'test_realdir_exclude.nO')
     py.test.raises(OSError, v_xdir.join, 'test_realdir_exclude.NO')
+
+def test_cachedrealdir():
+    cdir = udir.ensure('test_cachedrealdir', dir=1)
+    cdir.join('file1').write('some data')
+    cdir.join('empty').write('')
+    cdir.ensure('subdir', dir=1).join('subfile').write('spam')
+    cache = ContentCache()
+    v_cdir = CachedRealDir(str(cdir), content_cache=cache)
+    names = v_cdir.keys()
+    names.sort()
+    assert names == ['empty', 'file1', 'subdir']
+    py.test.raises(OSError, v_cdir.join, 'file2')
+    # the listing, the lookups and the failed lookups are memoized
+    cdir.join('file2').write('new')
+    assert 'file2' not in v_cdir.keys()
+    e = py.test.raises(OSError, v_cdir.join, 'file2')
+    assert e.value.errno == errno.ENOENT
+    assert v_cdir.join('file1') is v_cdir.join('file1')
+    assert v_cdir.stat() is v_cdir.stat()
+
+    f = v_cdir.join('file1')
+    assert isinstance(f, CachedRealFile)
+    assert f.getsize() == len('some data')
+    assert f.stat().st_size == len('some data')
+    h1 = f.open()
+    h2 = f.open()
+    assert h1.read(4) == 'some'
+    assert h2.read() == 'some data'
+    assert h1.read() == ' data'
+    assert h1.read() == ''
+    h1.seek(-4, 2)
+    assert h1.tell() == 5
+    assert h1.read(100) == 'data'
+    h1.seek(1)
+    h1.seek(2, 1)
+    assert h1.read(2) == 'e '
+    h1.close()
+    h2.close()
+    assert cache.contents.keys() == [str(cdir.join('file1'))]
+
+    assert v_cdir.join('empty').open().read() == ''
+    d = v_cdir.join('subdir')
+    assert isinstance(d, CachedRealDir)
+    assert d.content_cache is cache
+    assert d.join('subfile').open().read() == 'spam'
+    cache.clear()
+    assert cache.contents == {}
+
+def test_contentcache_bounded():
+    if not os.path.isdir('/proc/self/fd'):
+        py.test.skip("needs /proc/self/fd")
+    cdir = udir.ensure('test_contentcache_bounded', dir=1)
+    for i in range(20):
+        cdir.join('file%d' % i).write('data%d' % i)
+    cache = ContentCache(max_entries=5)
+    fds = len(os.listdir('/proc/self/fd'))
+    h0 = MappedFile(cache.get(str(cdir.join('file0'))))
+    for i in range(1, 20):
+        assert cache.get(str(cdir.join('file%d' % i)))[:] == 'data%d' % i
+        cache.get(str(cdir.join('file1')))
+    # no file descriptor is kept open by the mappings
+    assert len(os.listdir('/proc/self/fd')) == fds
+    # the least recently used files were dropped
+    assert sorted(cache.contents.keys()) == [str(cdir.join('file%d' % i))
+                                             for i in [1, 16, 17, 18, 19]]
+    # a dropped file can still be read by the files that opened it
+    assert h0.read() == 'data0'
+    h0.close()
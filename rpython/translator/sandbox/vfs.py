@@ -1,5 +1,5 @@
 import os
-import stat, errno
+import stat, errno, mmap
 
 UID = 1000
 GID = 1000
@@ -94,14 +94,18 @@ class RealDir(Dir):
         else:
             st = os.lstat(path)
         if stat.S_ISDIR(st.st_mode):
-            return RealDir(path, show_dotfiles = self.show_dotfiles,
-                                 follow_links  = self.follow_links,
-                                 exclude       = self.exclude)
+            return self.make_dir(path)
         elif stat.S_ISREG(st.st_mode):
-            return RealFile(path)
+            return self.make_file(path, st)
         else:
             # don't allow access to symlinks and other special files
             raise OSError(errno.EACCES, path)
+    def make_dir(self, path):
+        return RealDir(path, show_dotfiles = self.show_dotfiles,
+                             follow_links  = self.follow_links,
+                             exclude       = self.exclude)
+    def make_file(self, path, st):
+        return RealFile(path)
 
 class File(FSObject):
     kind = stat.S_IFREG
@@ -125,3 +129,180 @@ class RealFile(File):
             return open(self.path, "rb")
         except IOError, e:
             raise OSError(e.errno, "open failed")
+
+
+_libc = None
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int,
+                              ctypes.c_int, ctypes.c_int, ctypes.c_long]
+        libc.mmap.restype = ctypes.c_void_p
+        libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        libc.munmap.restype = ctypes.c_int
+        _libc = libc
+    return _libc
+
+class Mapping(object):
+    """The contents of a real file mapped read-only in memory, which can
+    be sliced like a string.  Unlike mmap.mmap, which keeps a dup of the
+    file descriptor open, it needs no file descriptor once mapped.  The
+    memory is unmapped when the Mapping goes away.
+    """
+    addr = None
+    def __init__(self, fd, size):
+        import ctypes
+        libc = _get_libc()
+        addr = libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, fd, 0)
+        if addr is None or addr == ctypes.c_void_p(-1).value:
+            raise OSError(ctypes.get_errno(), "mmap failed")
+        self.addr = addr
+        self.size = size
+        self.chars = (ctypes.c_char * size).from_address(addr)
+    def __len__(self):
+        return self.size
+    def __getitem__(self, index):
+        return self.chars[index]
+    def __getslice__(self, start, end):
+        return self.chars[start:end]
+    def __del__(self):
+        if self.addr is not None:
+            self.chars = None
+            _get_libc().munmap(self.addr, self.size)
+            self.addr = None
+
+class ContentCache(object):
+    """Read-only contents of real files, each mapped in memory the first
+    time it is opened and then shared by all open() calls, including the
+    ones of other sandboxed processes controlled from the same process.
+    At most 'max_entries' files are kept, the least recently opened ones
+    are dropped first; a dropped file stays mapped until its open files
+    are closed.
+    """
+    def __init__(self, max_entries=256):
+        from collections import OrderedDict
+        self.max_entries = max_entries
+        self.contents = OrderedDict()    # {path: Mapping or ''}
+    def get(self, path):
+        try:
+            data = self.contents.pop(path)
+        except KeyError:
+            data = self._load(path)
+            while len(self.contents) >= self.max_entries:
+                self.contents.popitem(last=False)
+        self.contents[path] = data
+        return data
+    def _load(self, path):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError, e:
+            raise OSError(e.errno, "open failed")
+        try:
+            size = os.fstat(fd).st_size
+            if size == 0:
+                return ''      # can't mmap an empty file
+            return Mapping(fd, size)
+        finally:
+            os.close(fd)
+    def clear(self):
+        self.contents.clear()
+
+shared_content_cache = ContentCache()
+
+class MappedFile(object):
+    """An open file reading from a ContentCache entry, with its own
+    position."""
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+    def read(self, size=-1):
+        start = self.pos
+        end = len(self.data)
+        if 0 <= size < end - start:
+            end = start + size
+        if start >= end:
+            return ''
+        self.pos = end
+        return self.data[start:end]
+    def seek(self, pos, how=0):
+        if how == 1:
+            pos += self.pos
+        elif how == 2:
+            pos += len(self.data)
+        if pos < 0:
+            raise IOError(errno.EINVAL, "negative seek position")
+        self.pos = pos
+    def tell(self):
+        return self.pos
+    def close(self):
+        self.data = ''
+
+class CachedRealDir(RealDir):
+    # A RealDir for a tree that doesn't change while the sandboxed
+    # processes run, like lib-python and lib_pypy.  Directory listings,
+    # lookups (including failed ones) and stat results are memoized,
+    # and file contents are served from a shared ContentCache.
+    def __init__(self, path, show_dotfiles=False, follow_links=False,
+                 exclude=[], content_cache=None):
+        RealDir.__init__(self, path, show_dotfiles = show_dotfiles,
+                                     follow_links  = follow_links,
+                                     exclude       = exclude)
+        if content_cache is None:
+            content_cache = shared_content_cache
+        self.content_cache = content_cache
+        self._keys = None
+        self._children = {}   # {name: node or OSError args}
+    def __repr__(self):
+        return '<CachedRealDir %s>' % (self.path,)
+    def stat(self):
+        try:
+            return self._stat
+        except AttributeError:
+            self._stat = RealDir.stat(self)
+            return self._stat
+    def keys(self):
+        if self._keys is None:
+            self._keys = RealDir.keys(self)
+        return self._keys[:]
+    def join(self, name):
+        try:
+            result = self._children[name]
+        except KeyError:
+            try:
+                result = RealDir.join(self, name)
+            except OSError, e:
+                result = e.args
+            self._children[name] = result
+        if isinstance(result, tuple):
+            raise OSError(*result)
+        return result
+    def make_dir(self, path):
+        return CachedRealDir(path, show_dotfiles = self.show_dotfiles,
+                                   follow_links  = self.follow_links,
+                                   exclude       = self.exclude,
+                                   content_cache = self.content_cache)
+    def make_file(self, path, st):
+        return CachedRealFile(path, st.st_size, self.content_cache)
+
+class CachedRealFile(RealFile):
+    def __init__(self, path, size, content_cache=None):
+        self.path = path
+        self.size = size
+        if content_cache is None:
+            content_cache = shared_content_cache
+        self.content_cache = content_cache
+    def __repr__(self):
+        return '<CachedRealFile %s>' % (self.path,)
+    def stat(self):
+        try:
+            return self._stat
+        except AttributeError:
+            self._stat = RealFile.stat(self)
+            return self._stat
+    def getsize(self):
+        return self.size
+    def open(self):
+        return MappedFile(self.content_cache.get(self.path))